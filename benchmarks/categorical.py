@@ -0,0 +1,204 @@
+"""
+Compares one-hot encoding of the categorical columns with native CatBoost cat_features.
+
+For every size and project (parsing with CatBoostRegressor, classification with CatBoostClassifier)
+the pipeline runs twice: with EncodeCategoricalFeaturesHandler and with native_categorical=True.
+For both modes the benchmark reports the width of the model input, pipeline time, training time
+with a fixed number of iterations, batch prediction time, the median latency of a single-row
+prediction and the quality on the hold-out part (R2 or accuracy).
+
+The parsing features are read back from the saved files (features.npz, categorical.npy) with
+regression/data_loader.py, as the regression model gets them. Every project runs in a separate
+process (this module with --project), both projects are the `src` package.
+
+Usage (from the repository root):
+    python -m benchmarks.categorical --sizes 10k 100k --iterations 200
+"""
+import argparse
+import json
+import logging
+import os
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+from tempfile import TemporaryDirectory
+
+import numpy as np
+
+from benchmarks.generate_hh import SIZES, parse_rows
+from benchmarks.run import DEFAULT_DATA_DIR, DEFAULT_RESULTS_DIR, PROJECTS, ROOT, dataset, environment
+
+MODES = ("onehot", "native")
+LATENCY_ROWS = 200
+
+
+def _load_parsing_output() -> tuple:
+    """
+    Loads the files saved by the parsing pipeline in the working directory, as regression/data_loader.py does.
+    """
+    from data_loader import load_features, load_schema
+
+    schema = load_schema(Path("features.json"))
+    features = load_features(Path(schema["features_path"]), schema)
+    files = [schema["features_path"], schema["target_path"], schema.get("categorical_path")]
+    artifact_bytes = sum(os.path.getsize(name) for name in files if name)
+    return features, np.load(schema["target_path"]), artifact_bytes
+
+
+def _rows(features, start: int, stop: int):
+    return features.iloc[start:stop] if hasattr(features, "iloc") else features[start:stop]
+
+
+def run_mode(project: str, csv_path: Path, mode: str, iterations: int) -> dict:
+    """
+    Runs the pipeline of the project in one mode, trains CatBoost on its output and measures it.
+
+    Args:
+        project: "parsing" or "classification".
+        csv_path: input CSV.
+        mode: "onehot" or "native".
+        iterations: CatBoost iterations.
+
+    Returns:
+        dict: width, timings and quality of the mode.
+    """
+    from catboost import CatBoostClassifier, CatBoostRegressor
+    from sklearn.metrics import accuracy_score, r2_score
+    from sklearn.model_selection import train_test_split
+    from src.core import PipelineContext
+    from src.pipeline import build_pipeline
+
+    native = mode == "native"
+    start = time.perf_counter()
+    ctx = build_pipeline(native_categorical=native).handle(PipelineContext(csv_path=csv_path))
+    pipeline_time = time.perf_counter() - start
+
+    if project == "parsing":
+        features, target, artifact_bytes = _load_parsing_output()
+        cat_features = features.select_dtypes(include="object").columns.tolist() if native else None
+        model = CatBoostRegressor(iterations=iterations, random_seed=28, verbose=0, allow_writing_files=False)
+        score_name, score = "r2", r2_score
+    else:
+        features, target, artifact_bytes = ctx.features, ctx.target, None
+        cat_features = ctx.cat_features or None
+        model = CatBoostClassifier(
+            iterations=iterations, loss_function="MultiClass", random_seed=42, verbose=0, allow_writing_files=False,
+        )
+        score_name, score = "accuracy", accuracy_score
+
+    X_train, X_test, y_train, y_test = train_test_split(features, target, test_size=0.2, random_state=28)
+
+    start = time.perf_counter()
+    model.fit(X_train, y_train, cat_features=cat_features)
+    fit_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    y_pred = model.predict(X_test)
+    predict_time = time.perf_counter() - start
+
+    latencies = []
+    for idx in range(min(LATENCY_ROWS, X_test.shape[0])):
+        row = _rows(X_test, idx, idx + 1)
+        start = time.perf_counter()
+        model.predict(row)
+        latencies.append(time.perf_counter() - start)
+
+    return {
+        "mode": mode,
+        "rows": int(features.shape[0]),
+        "width": int(features.shape[1]),
+        "cat_features": len(cat_features or []),
+        "artifact_bytes": artifact_bytes,
+        "pipeline_time": pipeline_time,
+        "fit_time": fit_time,
+        "predict_time": predict_time,
+        "predict_time_per_row": predict_time / X_test.shape[0],
+        "single_row_latency": statistics.median(latencies),
+        score_name: float(score(y_test, np.ravel(y_pred))),
+    }
+
+
+def run_project(project: str, csv_path: Path, iterations: int) -> list[dict]:
+    """
+    Runs both modes of the project in temporary working directories (this is the process of one project).
+    """
+    sys.path.insert(0, str(ROOT / project))
+    if project == "parsing":
+        sys.path.insert(1, str(ROOT / "regression"))
+    results = []
+    for mode in MODES:
+        with TemporaryDirectory(prefix=f"bench_{project}_{mode}_") as workdir:
+            os.chdir(workdir)
+            logging.info(f"Benchmark: {project}, {mode}")
+            results.append(run_mode(project, csv_path, mode, iterations))
+        os.chdir(ROOT)
+    return results
+
+
+def run(sizes: list[int], projects: list[str], data_dir: Path, iterations: int, seed: int = 0) -> dict:
+    """
+    Runs both modes of every project on every size, every project in a separate process.
+
+    Returns:
+        dict: environment of the run and the list of results.
+    """
+    report = {**environment(), "seed": seed, "iterations": iterations, "results": []}
+    for rows in sizes:
+        csv_path = dataset(data_dir, rows, seed).resolve()
+        for project in projects:
+            with TemporaryDirectory(prefix="bench_") as tmp:
+                out_path = Path(tmp) / "result.json"
+                subprocess.run(
+                    [
+                        sys.executable, "-m", "benchmarks.categorical", "--project", project, "--csv", str(csv_path),
+                        "--iterations", str(iterations), "--out", str(out_path),
+                    ],
+                    cwd=ROOT, check=True,
+                )
+                for result in json.loads(out_path.read_text(encoding="utf-8")):
+                    report["results"].append({"project": project, "csv_rows": rows, **result})
+    return report
+
+
+def print_report(report: dict) -> None:
+    print(f"\n{'project':<16}{'csv rows':>10}{'mode':>8}{'width':>8}{'fit, s':>10}{'predict, s':>12}{'1 row, ms':>11}{'quality':>10}")
+    for result in report["results"]:
+        quality = result.get("r2", result.get("accuracy"))
+        print(
+            f"{result['project']:<16}{result['csv_rows']:>10}{result['mode']:>8}{result['width']:>8}"
+            f"{result['fit_time']:>10.2f}{result['predict_time']:>12.3f}{result['single_row_latency'] * 1e3:>11.3f}{quality:>10.4f}"
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare one-hot encoding with native CatBoost categorical features")
+    parser.add_argument("--sizes", type=parse_rows, nargs="+", default=[SIZES["10k"], SIZES["100k"]], help=f"Numbers of rows, e.g. {' '.join(SIZES)}")
+    parser.add_argument("--projects", choices=PROJECTS, nargs="+", default=list(PROJECTS))
+    parser.add_argument("--iterations", type=int, default=200, help="CatBoost iterations (the same for both modes)")
+    parser.add_argument("--seed", type=int, default=0, help="Seed of the generator")
+    parser.add_argument("--data-dir", type=Path, default=DEFAULT_DATA_DIR, help="Directory of the generated CSV files")
+    parser.add_argument("--out", type=Path, default=None, help=f"Output JSON (default {DEFAULT_RESULTS_DIR}/categorical-<commit>.json)")
+    parser.add_argument("--project", choices=PROJECTS, default=None, help=argparse.SUPPRESS)
+    parser.add_argument("--csv", type=Path, default=None, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.project:
+        # process of one project started by run()
+        logging.disable(logging.INFO)
+        results = run_project(args.project, args.csv, args.iterations)
+        args.out.write_text(json.dumps(results, indent=2), encoding="utf-8")
+        return
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s: %(message)s")
+    report = run(args.sizes, args.projects, args.data_dir, args.iterations, args.seed)
+    print_report(report)
+    out_path = args.out or DEFAULT_RESULTS_DIR / f"categorical-{(report['commit'] or 'unknown')[:12]}{'-dirty' if report['dirty'] else ''}.json"
+    out_path.parent.mkdir(parents=True, exist_ok=True)
+    out_path.write_text(json.dumps(report, indent=2), encoding="utf-8")
+    logging.info(f"Benchmark: Results saved to {out_path}")
+
+
+if __name__ == "__main__":
+    main()
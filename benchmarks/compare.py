@@ -0,0 +1,77 @@
+"""
+Compares two result files of benchmarks.run, e.g. of two commits.
+
+Pipelines are matched by project and number of rows, handlers by name. The ratio is new / base,
+so values above 1 are slowdowns.
+
+Usage (from the repository root):
+    python -m benchmarks.compare benchmarks/results/base.json benchmarks/results/new.json
+    python -m benchmarks.compare base.json new.json --fail-above 1.2   # exit code 1 on a 20% slowdown
+"""
+import argparse
+import json
+import sys
+from pathlib import Path
+from typing import Optional
+
+
+def _ratio(base: float, new: float) -> Optional[float]:
+    return new / base if base else None
+
+
+def compare(base: dict, new: dict) -> list[dict]:
+    """
+    Matches the results of two runs.
+
+    Args:
+        base: report of the base run.
+        new: report of the new run.
+
+    Returns:
+        list[dict]: project, rows, handler (None for the whole pipeline), both wall times and their ratio.
+    """
+    base_results = {(result["project"], result["rows"]): result for result in base["results"]}
+    rows = []
+    for result in new["results"]:
+        base_result = base_results.get((result["project"], result["rows"]))
+        if base_result is None:
+            continue
+        base_handlers = {handler["name"]: handler for handler in base_result["handlers"]}
+        for handler in result["handlers"]:
+            if handler["name"] in base_handlers:
+                base_time = base_handlers[handler["name"]]["wall_time"]
+                rows.append({
+                    "project": result["project"], "rows": result["rows"], "handler": handler["name"],
+                    "base": base_time, "new": handler["wall_time"], "ratio": _ratio(base_time, handler["wall_time"]),
+                })
+        rows.append({
+            "project": result["project"], "rows": result["rows"], "handler": None,
+            "base": base_result["wall_time"], "new": result["wall_time"],
+            "ratio": _ratio(base_result["wall_time"], result["wall_time"]),
+        })
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare two benchmark result files")
+    parser.add_argument("base", type=Path)
+    parser.add_argument("new", type=Path)
+    parser.add_argument("--fail-above", type=float, default=None, help="Exit with code 1 if a pipeline is slower by this ratio")
+    args = parser.parse_args()
+
+    base, new = (json.loads(path.read_text(encoding="utf-8")) for path in (args.base, args.new))
+    print(f"base: {base.get('commit')}  new: {new.get('commit')}")
+    rows = compare(base, new)
+    print(f"{'project':<16}{'rows':>10}  {'handler':<40}{'base s':>10}{'new s':>10}{'ratio':>8}")
+    for row in rows:
+        ratio = "-" if row["ratio"] is None else f"{row['ratio']:.2f}"
+        print(f"{row['project']:<16}{row['rows']:>10}  {row['handler'] or 'TOTAL':<40}{row['base']:>10.3f}{row['new']:>10.3f}{ratio:>8}")
+
+    if args.fail_above is not None:
+        slower = [row for row in rows if row["handler"] is None and row["ratio"] is not None and row["ratio"] > args.fail_above]
+        if slower:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,294 @@
+"""
+Deterministic generator of synthetic hh.csv files.
+
+The values follow the formats of the real dataset, so every handler of the parsing and
+classification pipelines takes its usual paths: Cyrillic and English "Пол, возраст",
+multi-currency "ЗП" with non-breaking spaces, multi-line "Опыт" texts, the cities of
+ParseCityHandler, keyword-based employment/schedule/education strings and so on.
+The same seed and size always produce the same file.
+
+Usage (from the repository root):
+    python -m benchmarks.generate_hh --rows 100k --out benchmarks/data/hh_100k.csv
+"""
+import argparse
+import logging
+from pathlib import Path
+from typing import Iterator
+
+import numpy as np
+import pandas as pd
+
+SIZES = {"10k": 10_000, "100k": 100_000, "1M": 1_000_000, "10M": 10_000_000}
+
+# rows generated at once; part of the format, so that a seed always gives the same file
+CHUNK_ROWS = 100_000
+
+NBSP = "\xa0"
+
+COLUMNS = [
+    "Пол, возраст", "ЗП", "Ищет работу на должность:", "Город", "Занятость", "График",
+    "Опыт (двойное нажатие для полной версии)", "Последенее/нынешнее место работы",
+    "Последеняя/нынешняя должность", "Образование и ВУЗ", "Обновление резюме", "Авто",
+]
+
+MONTHS_RU = ["января", "февраля", "марта", "апреля", "мая", "июня",
+             "июля", "августа", "сентября", "октября", "ноября", "декабря"]
+MONTHS_EN = ["January", "February", "March", "April", "May", "June",
+             "July", "August", "September", "October", "November", "December"]
+MONTHS_RU_NOMINATIVE = ["Январь", "Февраль", "Март", "Апрель", "Май", "Июнь",
+                        "Июль", "Август", "Сентябрь", "Октябрь", "Ноябрь", "Декабрь"]
+
+# (currency, share, range of amounts in thousands)
+CURRENCIES = [
+    ("руб.", 0.86, (15, 400)), ("USD", 0.04, (1, 10)), ("KZT", 0.03, (100, 900)),
+    ("бел. руб.", 0.02, (1, 5)), ("EUR", 0.01, (1, 8)), ("грн.", 0.015, (10, 80)),
+    ("сум", 0.005, (2000, 9000)), ("KGS", 0.005, (20, 90)), ("UAH", 0.005, (10, 80)),
+    ("BYN", 0.005, (1, 5)), ("AZN", 0.005, (1, 5)),
+]
+
+# cities of ParseCityHandler plus a few which fall into "Other"
+CITIES = [
+    "Москва", "Moscow", "Зеленоград", "Подольск", "Балашиха", "Химки", "Мытищи", "Королев",
+    "Санкт-Петербург", "Saint Petersburg", "Гатчина", "Выборг",
+    "Воронеж", "Ярославль", "Рязань", "Тверь", "Тула", "Липецк",
+    "Казань", "Kazan", "Нижний Новгород", "Самара", "Уфа", "Пермь", "Саратов",
+    "Краснодар", "Ростов-на-Дону", "Волгоград", "Сочи", "Ставрополь",
+    "Екатеринбург", "Yekaterinburg", "Челябинск", "Тюмень", "Сургут",
+    "Новосибирск", "Novosibirsk", "Красноярск", "Омск", "Томск", "Иркутск",
+    "Владивосток", "Хабаровск", "Якутск",
+    "Алматы", "Almaty", "Астана", "Караганда",
+    "Минск", "Minsk", "Гомель",
+    "Киев", "Ташкент", "Бишкек", "Тбилиси",
+    "Урюпинск", "Мурманск", "Архангельск", "Калининград",
+]
+CITY_WEIGHTS = np.array([30, 3] + [1] * 6 + [15, 2] + [1] * (len(CITIES) - 10), dtype=float)
+
+RELOCATION = ["не готов к переезду", "готов к переезду", "хочу переехать", "not willing to relocate", "willing to relocate"]
+TRIPS = ["не готов к командировкам", "готов к командировкам", "готов к редким командировкам", "not prepared for business trips"]
+
+EMPLOYMENT = [["полная занятость", "частичная занятость", "проектная работа", "стажировка", "волонтерство"],
+              ["full time", "part time", "project work", "work placement", "volunteering"]]
+SCHEDULE = [["полный день", "гибкий график", "сменный график", "удаленная работа", "вахтовый метод"],
+            ["full day", "flexible schedule", "shift schedule", "remote working", "rotation based work"]]
+EDUCATION = [["Высшее образование", "Неоконченное высшее образование", "Среднее специальное образование", "Среднее образование"],
+             ["Higher education", "Incomplete higher education", "Secondary special education", "Secondary education"]]
+UNIVERSITIES = ["МГУ им. М.В. Ломоносова", "МГТУ им. Н.Э. Баумана", "СПбГУ", "НИУ ВШЭ", "МФТИ", "КФУ",
+                "УрФУ", "НГУ", "ТПУ", "Колледж связи №54", "Moscow Aviation Institute", "ИТМО"]
+COMPANIES = ["ООО \"Ромашка\"", "ПАО Сбербанк", "Яндекс", "АО \"Тинькофф Банк\"", "ООО \"Лента\"", "X5 Retail Group",
+             "ИП Иванов", "ООО \"СтройМонтаж\"", "Ozon", "Wildberries", "ООО \"ТехноСервис\"", "ПАО МТС",
+             "Газпром нефть", "ООО \"Альфа\"", "EPAM Systems", "Лаборатория Касперского"]
+
+IT_ROLES = ["Python developer", "Java developer", "Frontend developer", "Backend developer", "Разработчик",
+            "Программист", "Программист 1С", "QA engineer", "Тестировщик", "DevOps engineer",
+            "Data scientist", "Data analyst", "Системный администратор", "Аналитик данных",
+            "Бизнес-аналитик", "Project manager", "iOS developer", "Android developer",
+            "Веб-разработчик", "Инженер-программист", "Инженер по автоматизации", "Специалист технической поддержки"]
+OTHER_ROLES = ["Менеджер по продажам", "Бухгалтер", "Водитель", "Продавец-консультант", "Администратор",
+               "Менеджер", "Инженер", "Юрист", "Экономист", "Оператор call-центра", "Кладовщик",
+               "Главный бухгалтер", "Руководитель отдела продаж", "Специалист", "Курьер", "Логист",
+               "Менеджер проектов", "HR-менеджер", "Маркетолог", "Дизайнер", "Электрик", "Охранник"]
+GRADES = ["", "", "", "Junior ", "Middle ", "Senior ", "Ведущий ", "Младший ", "Lead ", "Старший "]
+
+DESCRIPTION = ["Разработка и поддержка сервисов на Python и Django.", "Работа с клиентами, ведение переговоров.",
+               "Администрирование Linux серверов, настройка Docker и Kubernetes.", "Ведение бухгалтерского учета.",
+               "Проектирование баз данных PostgreSQL, оптимизация SQL запросов.", "Продажи, выполнение плана.",
+               "Тестирование веб-приложений, написание автотестов.", "Управление командой из 5 человек.",
+               "Development of REST API and microservices.", "Подготовка отчетности, работа в 1С.",
+               "Анализ данных, построение моделей машинного обучения.", "Доставка грузов по городу.",
+               "Frontend on React and TypeScript.", "Обслуживание клиентов, работа с кассой."]
+
+
+def _years_word(value: np.ndarray, forms: tuple[str, str, str]) -> np.ndarray:
+    """Russian plural form (год/года/лет) for every number."""
+    last, last_two = value % 10, value % 100
+    few = (last >= 2) & (last <= 4) & ~((last_two >= 12) & (last_two <= 14))
+    one = (last == 1) & (last_two != 11)
+    return np.where(one, forms[0], np.where(few, forms[1], forms[2])).astype(object)
+
+
+def _choice(rng: np.random.Generator, values: list, n: int, weights=None) -> np.ndarray:
+    values = np.array(values, dtype=object)
+    if weights is not None:
+        weights = np.asarray(weights, dtype=float) / np.sum(weights)
+    return values[rng.choice(len(values), size=n, p=weights)]
+
+
+def _str(values: np.ndarray) -> np.ndarray:
+    return values.astype(str).astype(object)
+
+
+def _flags(rng: np.random.Generator, options: list[list[str]], english: np.ndarray) -> np.ndarray:
+    """Comma-separated subsets of 1-3 options, in Russian or English."""
+    n = len(english)
+    first = rng.integers(0, len(options[0]), n)
+    second = (first + rng.integers(1, len(options[0]), n)) % len(options[0])
+    third = (second + 1) % len(options[0])
+    count = rng.choice(3, size=n, p=[0.5, 0.35, 0.15])
+    out = np.empty(n, dtype=object)
+    for lang in (0, 1):
+        words = np.array(options[lang], dtype=object)
+        mask = english == lang
+        value = words[first[mask]]
+        value = np.where(count[mask] >= 1, value + ", " + words[second[mask]], value)
+        out[mask] = np.where(count[mask] >= 2, value + ", " + words[third[mask]], value)
+    return out
+
+
+def _titles(rng: np.random.Generator, n: int) -> np.ndarray:
+    """Job titles with a long tail, like the 18k distinct titles of the real data."""
+    roles = np.array(IT_ROLES + OTHER_ROLES, dtype=object)
+    weights = np.r_[np.full(len(IT_ROLES), 1.0), np.full(len(OTHER_ROLES), 2.0)]
+    titles = _choice(rng, GRADES, n) + roles[rng.choice(len(roles), size=n, p=weights / weights.sum())]
+    # a tenth of the titles are unique-ish free text
+    tail = rng.random(n) < 0.1
+    titles[tail] = titles[tail] + " " + _str(rng.integers(1, 5000, tail.sum()))
+    return titles
+
+
+def _gender_age(rng: np.random.Generator, n: int, english: np.ndarray) -> np.ndarray:
+    male = rng.random(n) < 0.6
+    age = rng.integers(16, 66, n)
+    day = _str(rng.integers(1, 29, n))
+    month = rng.integers(0, 12, n)
+    year = _str(2020 - age)
+    age_text = _str(age)
+
+    ru = np.where(male, "Мужчина", "Женщина").astype(object) + " ,  " + age_text + NBSP \
+        + _years_word(age, ("год", "года", "лет")) + " , " + np.where(male, "родился", "родилась").astype(object) + " " \
+        + day + NBSP + np.array(MONTHS_RU, dtype=object)[month] + NBSP + year
+    en = np.where(male, "Male", "Female").astype(object) + " ,  " + age_text + NBSP + "years , born on " \
+        + day + NBSP + np.array(MONTHS_EN, dtype=object)[month] + NBSP + year
+    values = np.where(english, en, ru)
+    # some people hide the birthday
+    no_birthday = rng.random(n) < 0.05
+    values[no_birthday] = np.array([value.rsplit(" , ", 1)[0] for value in values[no_birthday]], dtype=object)
+    return values
+
+
+def _salary(rng: np.random.Generator, n: int) -> np.ndarray:
+    currency = rng.choice(len(CURRENCIES), size=n, p=[share / sum(c[1] for c in CURRENCIES) for _, share, _ in CURRENCIES])
+    low = np.array([c[2][0] for c in CURRENCIES])[currency]
+    high = np.array([c[2][1] for c in CURRENCIES])[currency]
+    thousands = low + (rng.random(n) * (high - low)).astype(int)
+    names = np.array([c[0].replace(" ", NBSP) for c in CURRENCIES], dtype=object)[currency]
+    return _str(thousands) + NBSP + "000" + NBSP + names
+
+
+def _experience(rng: np.random.Generator, n: int, english: np.ndarray) -> np.ndarray:
+    years = rng.integers(0, 31, n)
+    months = rng.integers(0, 12, n)
+    start_month = np.array(MONTHS_RU_NOMINATIVE, dtype=object)[rng.integers(0, 12, n)]
+    start_year = _str(rng.integers(2000, 2020, n))
+    company = _choice(rng, COMPANIES, n)
+    position = _titles(rng, n)
+    description = _choice(rng, DESCRIPTION, n) + " " + _choice(rng, DESCRIPTION, n)
+
+    ru_header = np.where(
+        years > 0,
+        "Опыт работы " + _str(years) + " " + _years_word(years, ("год", "года", "лет")) + " ",
+        "Опыт работы ",
+    ).astype(object) + _str(months) + " " + _years_word(months, ("месяц", "месяца", "месяцев"))
+    en_header = "Work experience " + _str(years) + " years " + _str(months) + " months"
+    header = np.where(english, en_header, ru_header)
+    return header + "\n\n" + start_month + " " + start_year + " — по настоящее время\n" \
+        + company + "\n" + position + "\n" + description
+
+
+def generate_chunk(rows: int, seed: int, chunk: int) -> pd.DataFrame:
+    """
+    Generates one chunk of rows; chunks are independent, so the generation is deterministic.
+
+    Args:
+        rows: number of rows in the chunk.
+        seed: seed of the file.
+        chunk: number of the chunk in the file.
+
+    Returns:
+        pd.DataFrame: rows indexed from chunk * CHUNK_ROWS.
+    """
+    rng = np.random.default_rng([seed, chunk])
+    n = rows
+    english = rng.random(n) < 0.1
+
+    city = _choice(rng, CITIES, n, CITY_WEIGHTS) + " , " + _choice(rng, RELOCATION, n) + " , " + _choice(rng, TRIPS, n)
+    education_level = rng.integers(0, len(EDUCATION[0]), n)
+    education = np.where(
+        english,
+        np.array(EDUCATION[1], dtype=object)[education_level],
+        np.array(EDUCATION[0], dtype=object)[education_level],
+    ) + " " + _str(rng.integers(1985, 2021, n)) + " " + _choice(rng, UNIVERSITIES, n)
+    updated = (
+        _str(rng.integers(10, 29, n)) + "." + _str(rng.integers(10, 13, n)) + "."
+        + _str(rng.choice(np.arange(2010, 2020), size=n, p=np.r_[np.full(8, 0.05), 0.2, 0.4]))
+        + " " + _str(rng.integers(10, 24, n)) + ":" + _str(rng.integers(10, 60, n))
+    )
+    jobs = _titles(rng, n)
+    last_jobs = np.where(rng.random(n) < 0.5, jobs, _titles(rng, n))
+
+    columns = [
+        _gender_age(rng, n, english),
+        _salary(rng, n),
+        jobs,
+        city,
+        _flags(rng, EMPLOYMENT, english),
+        _flags(rng, SCHEDULE, english),
+        _experience(rng, n, english),
+        _choice(rng, COMPANIES, n),
+        last_jobs,
+        education,
+        updated,
+        np.where(rng.random(n) < 0.25, "Имеется собственный автомобиль", "Не указано").astype(object),
+    ]
+    start = chunk * CHUNK_ROWS
+    return pd.DataFrame(dict(zip(COLUMNS, columns)), index=pd.RangeIndex(start, start + n))
+
+
+def generate(rows: int, seed: int = 0) -> Iterator[pd.DataFrame]:
+    """
+    Yields the rows of a synthetic hh.csv in chunks of CHUNK_ROWS.
+    """
+    for chunk, start in enumerate(range(0, rows, CHUNK_ROWS)):
+        yield generate_chunk(min(CHUNK_ROWS, rows - start), seed, chunk)
+
+
+def write_hh_csv(path: Path, rows: int, seed: int = 0) -> Path:
+    """
+    Writes a synthetic hh.csv with the given number of rows.
+
+    Args:
+        path: output path.
+        rows: number of rows.
+        seed: seed of the generator.
+
+    Returns:
+        Path: the written file.
+    """
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, "w", encoding="utf-8", newline="") as fout:
+        for idx, dataframe in enumerate(generate(rows, seed)):
+            dataframe.to_csv(fout, header=idx == 0, lineterminator="\n")
+    logging.info(f"generate_hh: {rows} rows written to {path}")
+    return path
+
+
+def parse_rows(value: str) -> int:
+    """'100k', '1M' or a plain number of rows."""
+    if value in SIZES:
+        return SIZES[value]
+    scale = {"k": 1_000, "m": 1_000_000}.get(value[-1].lower(), 1)
+    return int(float(value[:-1] if scale > 1 else value) * scale)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate a synthetic hh.csv")
+    parser.add_argument("--rows", type=parse_rows, default=SIZES["100k"], help=f"Number of rows, e.g. {', '.join(SIZES)}")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--out", type=Path, default=Path("hh.csv"))
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s: %(message)s")
+    write_hh_csv(args.out, args.rows, args.seed)
+
+
+if __name__ == "__main__":
+    main()
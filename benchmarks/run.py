@@ -0,0 +1,166 @@
+"""
+End-to-end benchmark of the parsing and classification pipelines on synthetic hh.csv files.
+
+For every size the CSV is generated once by benchmarks.generate_hh and kept in the data directory
+(the generator is deterministic, so the same size is the same file on every commit).
+Every pipeline runs in a separate process (benchmarks/run_pipeline.py); the results of all runs
+are saved into one JSON file with the commit, so two commits can be compared by benchmarks.compare.
+
+Usage (from the repository root):
+    python -m benchmarks.run --sizes 10k 100k --repeat 3
+    python -m benchmarks.run --sizes 1M --projects parsing --out benchmarks/results/1M.json
+"""
+import argparse
+import json
+import logging
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+from importlib import metadata
+from pathlib import Path
+from tempfile import TemporaryDirectory
+
+from benchmarks.generate_hh import SIZES, parse_rows, write_hh_csv
+
+ROOT = Path(__file__).resolve().parent.parent
+RUNNER = Path(__file__).resolve().parent / "run_pipeline.py"
+PROJECTS = ("parsing", "classification")
+PACKAGES = ("numpy", "pandas", "pyarrow", "scikit-learn", "catboost")
+DEFAULT_DATA_DIR = Path("benchmarks/data")
+DEFAULT_RESULTS_DIR = Path("benchmarks/results")
+
+
+def _git(*args: str) -> str:
+    try:
+        return subprocess.run(["git", *args], cwd=ROOT, capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return ""
+
+
+def environment() -> dict:
+    """
+    Returns:
+        dict: commit, machine and package versions of the run.
+    """
+    versions = {}
+    for package in PACKAGES:
+        try:
+            versions[package] = metadata.version(package)
+        except metadata.PackageNotFoundError:
+            versions[package] = None
+    return {
+        "commit": _git("rev-parse", "HEAD") or None,
+        "dirty": bool(_git("status", "--porcelain", "--untracked-files=no")),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "packages": versions,
+    }
+
+
+def dataset(data_dir: Path, rows: int, seed: int) -> Path:
+    """
+    Returns the synthetic CSV with the given number of rows, generating it if it is missing.
+    """
+    path = data_dir / f"hh_{rows}_seed{seed}.csv"
+    if not path.exists():
+        logging.info(f"Benchmark: Generating {path}")
+        tmp = path.with_suffix(".tmp")
+        write_hh_csv(tmp, rows, seed)
+        os.replace(tmp, path)
+    return path
+
+
+def run_pipeline(project: str, csv_path: Path) -> dict:
+    """
+    Runs the pipeline of the project in a separate process.
+
+    Returns:
+        dict: result of benchmarks/run_pipeline.py.
+    """
+    with TemporaryDirectory(prefix="bench_") as tmp:
+        out_path = Path(tmp) / "result.json"
+        subprocess.run(
+            [sys.executable, str(RUNNER), "--project", project, "--csv", str(csv_path), "--out", str(out_path)],
+            cwd=ROOT, check=True,
+        )
+        return json.loads(out_path.read_text(encoding="utf-8"))
+
+
+def _median_run(runs: list[dict]) -> dict:
+    """
+    Median of the timings over repeated runs of the same pipeline; handlers are matched by position.
+    """
+    result = dict(runs[0])
+    for key in ("wall_time", "cpu_time", "peak_rss"):
+        result[key] = statistics.median(run[key] for run in runs)
+    result["handlers"] = [
+        {
+            **handler,
+            **{key: statistics.median(run["handlers"][idx][key] for run in runs) for key in ("wall_time", "cpu_time", "apply_time")},
+        }
+        for idx, handler in enumerate(runs[0]["handlers"])
+    ]
+    result["wall_times"] = [run["wall_time"] for run in runs]
+    return result
+
+
+def run(sizes: list[int], projects: list[str], data_dir: Path, repeat: int = 1, seed: int = 0) -> dict:
+    """
+    Runs every project on every size.
+
+    Args:
+        sizes: numbers of rows.
+        projects: pipelines to run.
+        data_dir: directory of the generated CSV files.
+        repeat: number of runs of every pipeline, the median is reported.
+        seed: seed of the generator.
+
+    Returns:
+        dict: environment of the run and the list of results.
+    """
+    report = {**environment(), "seed": seed, "repeat": repeat, "results": []}
+    for rows in sizes:
+        csv_path = dataset(data_dir, rows, seed)
+        for project in projects:
+            runs = []
+            for idx in range(repeat):
+                logging.info(f"Benchmark: {project} on {rows} rows, run {idx + 1}/{repeat}")
+                runs.append(run_pipeline(project, csv_path))
+            report["results"].append({"project": project, "rows": rows, **_median_run(runs)})
+    return report
+
+
+def print_report(report: dict) -> None:
+    for result in report["results"]:
+        print(f"\n{result['project']}, {result['rows']} rows: {result['wall_time']:.3f} s, peak RSS {result['peak_rss'] / 2**20:.0f} MB")
+        for handler in result["handlers"]:
+            share = handler["wall_time"] / result["wall_time"] * 100 if result["wall_time"] else 0.0
+            print(f"  {handler['name']:<40}{handler['wall_time']:>10.3f} s{share:>7.1f}%")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the pipelines on synthetic hh.csv files")
+    parser.add_argument("--sizes", type=parse_rows, nargs="+", default=[SIZES["10k"], SIZES["100k"]], help=f"Numbers of rows, e.g. {' '.join(SIZES)}")
+    parser.add_argument("--projects", choices=PROJECTS, nargs="+", default=list(PROJECTS))
+    parser.add_argument("--repeat", type=int, default=1, help="Runs of every pipeline, the median is reported")
+    parser.add_argument("--seed", type=int, default=0, help="Seed of the generator")
+    parser.add_argument("--data-dir", type=Path, default=DEFAULT_DATA_DIR, help="Directory of the generated CSV files")
+    parser.add_argument("--out", type=Path, default=None, help=f"Output JSON (default {DEFAULT_RESULTS_DIR}/<commit>.json)")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s: %(message)s")
+
+    report = run(args.sizes, args.projects, args.data_dir, args.repeat, args.seed)
+    print_report(report)
+    out_path = args.out or DEFAULT_RESULTS_DIR / f"{(report['commit'] or 'unknown')[:12]}{'-dirty' if report['dirty'] else ''}.json"
+    out_path.parent.mkdir(parents=True, exist_ok=True)
+    out_path.write_text(json.dumps(report, indent=2), encoding="utf-8")
+    logging.info(f"Benchmark: Results saved to {out_path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+"""
+Runs one pipeline (parsing or classification) on one CSV and saves per-handler timings to JSON.
+
+Both projects are the `src` package, so every pipeline runs in its own process started by
+benchmarks.run; this script is that process. The pipeline runs in a temporary working directory,
+so files written by the handlers (features.npy, target.npy) do not touch the repository.
+
+Usage (from the repository root):
+    python benchmarks/run_pipeline.py --project parsing --csv benchmarks/data/hh_10k.csv --out result.json
+"""
+import argparse
+import json
+import logging
+import os
+import resource
+import sys
+import time
+from pathlib import Path
+from tempfile import TemporaryDirectory
+
+ROOT = Path(__file__).resolve().parent.parent
+PROJECTS = ("parsing", "classification")
+
+
+def run(project: str, csv_path: Path) -> dict:
+    """
+    Runs the whole chain of the project with the profiler.
+
+    Args:
+        project: "parsing" or "classification".
+        csv_path: input CSV.
+
+    Returns:
+        dict: total wall and CPU time, peak RSS, rows and the profile of every handler.
+    """
+    sys.path.insert(0, str(ROOT / project))
+    from src.core import PipelineContext
+    from src.pipeline import build_pipeline
+    from src.profiling import Profiler
+
+    # memory tracing slows pandas down several times, peak RSS of the process is reported instead
+    profiler = Profiler(trace_memory=False)
+    ctx = PipelineContext(csv_path=csv_path, profiler=profiler)
+    pipeline = build_pipeline()
+
+    start_wall, start_cpu = time.perf_counter(), time.process_time()
+    ctx = pipeline.handle(ctx)
+    wall_time, cpu_time = time.perf_counter() - start_wall, time.process_time() - start_cpu
+
+    features = getattr(ctx, "features", None)
+    return {
+        "wall_time": wall_time,
+        "cpu_time": cpu_time,
+        # ru_maxrss is in kilobytes on Linux
+        "peak_rss": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024,
+        "rows_in": profiler.stages[0].rows_out if profiler.stages else None,
+        "features_shape": list(features.shape) if features is not None else None,
+        "handlers": [
+            {
+                "name": stage.name,
+                "wall_time": stage.wall_time,
+                "cpu_time": stage.cpu_time,
+                "apply_time": stage.apply_time,
+                "rows_in": stage.rows_in,
+                "rows_out": stage.rows_out,
+            }
+            for stage in profiler.stages
+        ],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run one pipeline for the benchmark")
+    parser.add_argument("--project", choices=PROJECTS, required=True)
+    parser.add_argument("--csv", type=Path, required=True, help="Input CSV")
+    parser.add_argument("--out", type=Path, required=True, help="Output JSON")
+    args = parser.parse_args()
+    logging.disable(logging.INFO)
+
+    csv_path, out_path = args.csv.resolve(), args.out.resolve()
+    with TemporaryDirectory(prefix=f"bench_{args.project}_") as workdir:
+        os.chdir(workdir)
+        result = run(args.project, csv_path)
+    out_path.write_text(json.dumps(result, indent=2), encoding="utf-8")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,185 @@
+"""
+Start-up of the regression training: the old path, a cold and a warm quantized pool, a pool saved to a file.
+
+For every size the parsing pipeline runs once in a temporary directory, then the training data is prepared
+in every mode and CatBoostRegressor is trained for a fixed number of iterations on the same 80/20 split:
+- copy: data_loader.load_data, train_test_split of the features (a copy), the model quantizes the training part;
+- cold: quantization.quantize_pool chooses the borders, quantizes all rows and saves the borders, the split is Pool.slice;
+- warm: quantization.quantize_pool quantizes by the saved borders;
+- pool_file: the quantized pool saved with Pool.save is loaded from quantized://.
+The start-up is the time until the training data is ready; the fit time of the copy mode includes
+the quantization done by CatBoost. The predictions on the test part are compared with the cold mode.
+
+Usage (from the repository root):
+    python -m benchmarks.training_startup --sizes 10k 100k --iterations 100
+    python -m benchmarks.training_startup --sizes 100k --dense          # features.npy instead of features.npz
+    python -m benchmarks.training_startup --sizes 100k --native-categorical
+"""
+import argparse
+import json
+import logging
+import os
+import subprocess
+import sys
+import time
+from pathlib import Path
+from tempfile import TemporaryDirectory
+
+import numpy as np
+
+from benchmarks.generate_hh import SIZES, parse_rows
+from benchmarks.run import DEFAULT_DATA_DIR, DEFAULT_RESULTS_DIR, ROOT, dataset, environment
+
+MODES = ("copy", "cold", "warm", "pool_file")
+
+
+def _prepare(mode: str, workdir: Path) -> tuple:
+    """
+    Prepares the training data in one mode.
+
+    Returns:
+        tuple: arguments of CatBoostRegressor.fit, the test data (a Pool for the pool modes) and the test target.
+    """
+    from catboost import Pool
+    from data_loader import load_data
+    from quantization import cat_feature_names, quantize_pool
+    from sklearn.model_selection import train_test_split
+
+    if mode == "copy":
+        features, target = load_data(workdir)
+        X_train, X_test, y_train, y_test = train_test_split(features, target, test_size=0.2, random_state=28)
+        return {"X": X_train, "y": y_train, "cat_features": cat_feature_names(features)}, X_test, y_test
+
+    if mode == "pool_file":
+        pool = Pool(f"quantized://{workdir / 'train.pool'}")
+    else:
+        pool = quantize_pool(parsing_dir=workdir, borders_dir=workdir / "borders", rebuild=mode == "cold")
+    train_idx, test_idx = train_test_split(np.arange(pool.num_row()), test_size=0.2, random_state=28)
+    test_pool = pool.slice(test_idx)
+    fit_args = {"X": pool.slice(train_idx), "eval_set": test_pool, "use_best_model": False}
+    return fit_args, test_pool, test_pool.get_label().astype(np.float64)
+
+
+def _fit(fit_args: dict, test, iterations: int) -> np.ndarray:
+    """
+    Trains the model and predicts the test part (a test Pool is predicted as the eval set of the fit).
+    """
+    from catboost import CatBoostRegressor, Pool
+
+    model = CatBoostRegressor(iterations=iterations, random_seed=28, verbose=0, allow_writing_files=False)
+    model.fit(**fit_args)
+    return np.asarray(model.get_test_eval() if isinstance(test, Pool) else model.predict(test))
+
+
+def run_modes(csv_path: Path, iterations: int, dense: bool = False, native_categorical: bool = False) -> list[dict]:
+    """
+    Runs the parsing pipeline and every mode in a temporary working directory (this is the process of one size).
+    """
+    sys.path.insert(0, str(ROOT / "parsing"))
+    sys.path.insert(1, str(ROOT / "regression"))
+    from quantization import quantize_pool
+    from sklearn.metrics import r2_score
+    from src.core import PipelineContext
+    from src.pipeline import build_pipeline
+
+    results = []
+    with TemporaryDirectory(prefix="bench_startup_") as tmp:
+        workdir = Path(tmp)
+        os.chdir(workdir)
+        build_pipeline(sparse_features=not dense, native_categorical=native_categorical).handle(PipelineContext(csv_path=csv_path))
+        rows = json.loads((workdir / "features.json").read_text(encoding="utf-8"))["shape"][0]
+        quantize_pool(parsing_dir=workdir, borders_dir=workdir / "borders").save(str(workdir / "train.pool"))
+
+        predictions = {}
+        for mode in MODES:
+            logging.info(f"Benchmark: {mode}")
+            start = time.perf_counter()
+            fit_args, test, y_test = _prepare(mode, workdir)
+            startup_time = time.perf_counter() - start
+
+            start = time.perf_counter()
+            y_pred = _fit(fit_args, test, iterations)
+            fit_time = time.perf_counter() - start
+
+            predictions[mode] = y_pred
+            results.append({
+                "mode": mode,
+                "rows": rows,
+                "startup_time": startup_time,
+                "fit_time": fit_time,
+                "total_time": startup_time + fit_time,
+                "r2": float(r2_score(y_test, y_pred)),
+            })
+        for result in results:
+            result["max_diff_vs_cold"] = float(np.abs(predictions[result["mode"]] - predictions["cold"]).max())
+        os.chdir(ROOT)
+    return results
+
+
+def run(sizes: list[int], data_dir: Path, iterations: int, seed: int = 0, dense: bool = False, native_categorical: bool = False) -> dict:
+    """
+    Runs every mode on every size, every size in a separate process.
+
+    Returns:
+        dict: environment of the run and the list of results.
+    """
+    report = {
+        **environment(), "seed": seed, "iterations": iterations, "dense": dense, "native_categorical": native_categorical,
+        "results": [],
+    }
+    for rows in sizes:
+        csv_path = dataset(data_dir, rows, seed).resolve()
+        with TemporaryDirectory(prefix="bench_") as tmp:
+            out_path = Path(tmp) / "result.json"
+            subprocess.run(
+                [
+                    sys.executable, "-m", "benchmarks.training_startup", "--csv", str(csv_path),
+                    "--iterations", str(iterations), "--out", str(out_path),
+                    *(["--dense"] if dense else []), *(["--native-categorical"] if native_categorical else []),
+                ],
+                cwd=ROOT, check=True,
+            )
+            for result in json.loads(out_path.read_text(encoding="utf-8")):
+                report["results"].append({"csv_rows": rows, **result})
+    return report
+
+
+def print_report(report: dict) -> None:
+    print(f"\n{'csv rows':>10}{'mode':>11}{'start-up, s':>13}{'fit, s':>10}{'total, s':>10}{'r2':>9}{'diff vs cold':>14}")
+    for result in report["results"]:
+        print(
+            f"{result['csv_rows']:>10}{result['mode']:>11}{result['startup_time']:>13.2f}{result['fit_time']:>10.2f}"
+            f"{result['total_time']:>10.2f}{result['r2']:>9.4f}{result['max_diff_vs_cold']:>14.2g}"
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare the cold and warm start-up of the regression training")
+    parser.add_argument("--sizes", type=parse_rows, nargs="+", default=[SIZES["10k"], SIZES["100k"]], help=f"Numbers of rows, e.g. {' '.join(SIZES)}")
+    parser.add_argument("--iterations", type=int, default=100, help="CatBoost iterations (the same for every mode)")
+    parser.add_argument("--dense", action="store_true", help="Save the features as a dense features.npy")
+    parser.add_argument("--native-categorical", action="store_true", help="Keep the categorical columns for CatBoost cat_features")
+    parser.add_argument("--seed", type=int, default=0, help="Seed of the generator")
+    parser.add_argument("--data-dir", type=Path, default=DEFAULT_DATA_DIR, help="Directory of the generated CSV files")
+    parser.add_argument("--out", type=Path, default=None, help=f"Output JSON (default {DEFAULT_RESULTS_DIR}/training_startup-<commit>.json)")
+    parser.add_argument("--csv", type=Path, default=None, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.csv:
+        # process of one size started by run()
+        logging.disable(logging.INFO)
+        results = run_modes(args.csv, args.iterations, args.dense, args.native_categorical)
+        args.out.write_text(json.dumps(results, indent=2), encoding="utf-8")
+        return
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s: %(message)s")
+    report = run(args.sizes, args.data_dir, args.iterations, args.seed, args.dense, args.native_categorical)
+    print_report(report)
+    out_path = args.out or DEFAULT_RESULTS_DIR / f"training_startup-{(report['commit'] or 'unknown')[:12]}{'-dirty' if report['dirty'] else ''}.json"
+    out_path.parent.mkdir(parents=True, exist_ok=True)
+    out_path.write_text(json.dumps(report, indent=2), encoding="utf-8")
+    logging.info(f"Benchmark: Results saved to {out_path}")
+
+
+if __name__ == "__main__":
+    main()
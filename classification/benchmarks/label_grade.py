@@ -0,0 +1,114 @@
+"""
+Benchmark of grade labeling: row-wise DataFrame.apply(axis=1) versus LabelGradeHandler.label_grades.
+
+The row-wise reference is the original implementation of the labeling rules (substring checks of
+the lowercased title for every row). Both are run on the same titles and experience values,
+and the labels are checked to be equal.
+
+Usage (from the classification directory):
+    python -m benchmarks.label_grade --rows 1000000
+    python -m benchmarks.label_grade --csv ../parsing/hh.csv --rows 1000000 --json label_grade.json
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import logging
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from src.handlers.labeling import LabelGradeHandler
+from src.utils import read_hh_csv, resolve_csv
+
+TITLE_COL = 'Ищет работу на должность:'
+
+# Prefixes which make titles hit every rule, including the Junior/Senior ambiguity
+_PREFIXES = ['', '', '', 'Junior ', 'Senior ', 'Middle ', 'Lead ', 'Стажер ', 'Senior junior ', 'Ведущий младший ', 'Mid ']
+
+
+def label_grade_row(row: pd.Series) -> str:
+    """Original row-wise labeling rules."""
+    title: str = row['_title']
+    exp: int = row.get('experience_months', 0)
+
+    if any(kw in title for kw in LabelGradeHandler._SENIOR_KW):
+        if any(kw in title for kw in LabelGradeHandler._JUNIOR_KW):
+            return 'Senior' if exp > 36 else 'Junior'
+        return 'Senior'
+    if any(kw in title for kw in LabelGradeHandler._JUNIOR_KW):
+        return 'Middle' if exp > 60 else 'Junior'
+    if any(kw in title for kw in LabelGradeHandler._MIDDLE_KW):
+        return 'Senior' if exp > 96 else 'Middle'
+    if exp <= 18:
+        return 'Junior'
+    if exp <= 60:
+        return 'Middle'
+    return 'Senior'
+
+
+def synthetic(titles: pd.Series, rows: int, seed: int = 0) -> pd.DataFrame:
+    """
+    Samples titles from the real column, adds grade prefixes to some of them and draws experience.
+    """
+    rng = np.random.default_rng(seed)
+    titles = titles.to_numpy()[rng.integers(0, len(titles), rows)]
+    prefixes = np.array(_PREFIXES, dtype=object)[rng.integers(0, len(_PREFIXES), rows)]
+    return pd.DataFrame({
+        TITLE_COL: prefixes + titles.astype(str),
+        'experience_months': rng.integers(0, 480, rows),
+        # Other columns make every row of the row-wise reference a mixed-dtype Series, like in the pipeline
+        'city': 'Other',
+    })
+
+
+def run(dataframe: pd.DataFrame) -> dict:
+    """
+    Times the row-wise reference and the vectorized labeling.
+
+    Returns:
+        dict: number of rows and both timings.
+    """
+    start = time.perf_counter()
+    reference = dataframe.assign(_title=dataframe[TITLE_COL].fillna('').str.lower()).apply(label_grade_row, axis=1)
+    apply_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    keywords = LabelGradeHandler._MATCHER.match_column(dataframe[TITLE_COL])
+    labels = LabelGradeHandler.label_grades(keywords, dataframe['experience_months'].to_numpy())
+    vectorized_seconds = time.perf_counter() - start
+
+    mismatches = int((reference.to_numpy() != labels).sum())
+    if mismatches:
+        raise AssertionError(f"{mismatches} labels differ from the row-wise reference")
+    return {
+        'rows': len(dataframe),
+        'apply_seconds': apply_seconds,
+        'vectorized_seconds': vectorized_seconds,
+        'speedup': apply_seconds / vectorized_seconds,
+        'distribution': pd.Series(labels).value_counts().to_dict(),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark vectorized grade labeling")
+    parser.add_argument("--csv", type=Path, default=None, help="Path to hh.csv (default: found by resolve_csv)")
+    parser.add_argument("--rows", type=int, default=1_000_000, help="Number of synthetic rows")
+    parser.add_argument("--json", type=Path, default=None, help="Save results to this JSON file")
+    args = parser.parse_args()
+    logging.disable(logging.INFO)
+
+    titles = read_hh_csv(args.csv or resolve_csv())[TITLE_COL]
+    result = run(synthetic(titles, args.rows))
+    print(f"rows: {result['rows']}")
+    print(f"apply(axis=1): {result['apply_seconds']:.3f} s")
+    print(f"vectorized:    {result['vectorized_seconds']:.3f} s  ({result['speedup']:.1f}x)")
+    print(f"labels: {result['distribution']}")
+    if args.json:
+        args.json.write_text(json.dumps(result, indent=2))
+
+
+if __name__ == "__main__":
+    main()
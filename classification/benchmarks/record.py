@@ -0,0 +1,121 @@
+"""
+Benchmark of single-record featurization: src.record.RecordFeaturizer versus the batch pipeline.
+
+The file is featurized twice with the same pipeline.pkl: by a transform-only batch run (in memory)
+and record by record. The records kept by the IT filter and their vectors are checked to be equal
+to the batch rows, then the latency of one record is reported.
+
+Usage (from the classification directory, after `python3 poc_script.py` saved pipeline.pkl):
+    python -m benchmarks.record --csv ../parsing/hh.csv --pipeline pipeline.pkl
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import logging
+import time
+from pathlib import Path
+
+import numpy as np
+import scipy.sparse as sp
+
+from src.core import PipelineContext
+from src.fitted import FittedPipeline
+from src.pipeline import build_pipeline
+from src.record import RecordFeaturizer
+from src.utils import read_hh_csv, resolve_csv
+
+
+def batch_rows(csv_path: Path, fitted: FittedPipeline) -> tuple[np.ndarray, np.ndarray, float]:
+    """
+    Featurize a file with a transform-only batch run.
+
+    Args:
+        csv_path: Path to hh.csv.
+        fitted: The fitted pipeline.
+
+    Returns:
+        tuple[np.ndarray, np.ndarray, float]: Rows in the layout of RecordFeaturizer, the index of the kept
+            resumes and the time of the run in seconds.
+    """
+    ctx = fitted.apply(PipelineContext(csv_path=csv_path))
+    index = None
+    start = time.perf_counter()
+    for stage in build_pipeline(native_categorical=fitted.native_categorical).iter_chain():
+        if ctx.dataframe is not None:
+            index = ctx.dataframe.index.to_numpy()
+        ctx = stage.run(ctx)
+    seconds = time.perf_counter() - start
+    if sp.issparse(ctx.features):
+        return ctx.features.toarray(), index, seconds
+    return ctx.features.to_numpy(dtype=object), index, seconds
+
+
+def run(csv_path: Path, fitted: FittedPipeline, repeat: int = 3) -> dict:
+    """
+    Check the record vectors against the batch rows and time RecordFeaturizer.transform.
+
+    Args:
+        csv_path: Path to hh.csv.
+        fitted: The fitted pipeline.
+        repeat: Time every record this many times.
+
+    Returns:
+        dict: Number of records, batch time per row and latency percentiles of one featurized record.
+    """
+    expected, expected_index, batch_seconds = batch_rows(csv_path, fitted)
+    raw = read_hh_csv(csv_path)
+    records = raw.to_dict("records")
+
+    featurizer = RecordFeaturizer(fitted)
+    actual, kept = featurizer.transform_many(records)
+    if not np.array_equal(raw.index.to_numpy()[kept], expected_index):
+        raise AssertionError("The filter keeps other records than the batch run")
+    mismatched = np.flatnonzero(~(actual == expected).all(axis=1))
+    if len(mismatched):
+        raise AssertionError(f"{len(mismatched)} records differ from the batch rows, first at row {mismatched[0]}")
+
+    latencies = []
+    for _ in range(repeat):
+        for record in records:
+            start = time.perf_counter_ns()
+            featurizer.transform(record)
+            latencies.append(time.perf_counter_ns() - start)
+    # Records filtered out return early, so only the featurized ones are timed
+    latencies = (np.array(latencies) / 1000)[np.tile(kept, repeat)]
+    return {
+        "records": len(records),
+        "kept": int(kept.sum()),
+        "columns": len(featurizer.columns),
+        "native_categorical": fitted.native_categorical,
+        "batch_us_per_row": batch_seconds / len(records) * 1e6,
+        "record_mean_us": float(latencies.mean()),
+        "record_p50_us": float(np.percentile(latencies, 50)),
+        "record_p99_us": float(np.percentile(latencies, 99)),
+        "records_per_second": float(1e6 / latencies.mean()),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark single-record featurization against the batch pipeline")
+    parser.add_argument("--csv", type=Path, default=None, help="Path to hh.csv (default: found like poc_script.py)")
+    parser.add_argument("--pipeline", type=Path, default=Path("pipeline.pkl"), help="Fitted pipeline.pkl")
+    parser.add_argument("--repeat", type=int, default=3, help="Time every record this many times")
+    parser.add_argument("--json", type=Path, default=None, help="Save results to this JSON file")
+    args = parser.parse_args()
+    logging.disable(logging.INFO)
+
+    csv_path = args.csv or resolve_csv()
+    result = run(csv_path, FittedPipeline.load(args.pipeline), args.repeat)
+    print(f"{result['records']} records, {result['kept']} IT roles, {result['columns']} columns: all equal to the batch rows")
+    print(f"batch run: {result['batch_us_per_row']:.1f} us per row")
+    print(
+        f"one IT record: mean {result['record_mean_us']:.1f} us, p50 {result['record_p50_us']:.1f} us, "
+        f"p99 {result['record_p99_us']:.1f} us ({result['records_per_second']:.0f} records/s)"
+    )
+    if args.json:
+        args.json.write_text(json.dumps(result, indent=2))
+
+
+if __name__ == "__main__":
+    main()
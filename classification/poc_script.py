@@ -1,17 +1,29 @@
 from __future__ import annotations
 
+import argparse
+import json
 import logging
+import os
 import sys
 from pathlib import Path
+from typing import Optional
 
 import matplotlib
 import numpy as np
+import pandas as pd
 from catboost import CatBoostClassifier
 from sklearn.model_selection import train_test_split
 from sklearn.preprocessing import LabelEncoder
 
+from src.cache import DEFAULT_CACHE_DIR, StageCache, run_cached
 from src.core import PipelineContext
+from src.fitted import FittedPipeline
 from src.pipeline import build_pipeline
+from src.profiling import Profiler
+from src.registry import MODELS
+from src.scheduler import run_scheduled
+from src.sharding import run_sharded
+from src.store import DEFAULT_STORE_DIR, parse_rows, read_manifest, read_store, write_store
 from src.utils import resolve_csv, plot_class_balance, print_and_save_report
 
 # Use Agg backend for headless environments
@@ -20,27 +32,193 @@ matplotlib.use('Agg')
 logging.basicConfig(level=logging.INFO, format='%(levelname)s: %(message)s')
 
 OUTPUT_DIR = Path(".")
+PIPELINE_PATH = OUTPUT_DIR / "pipeline.pkl"
+MODEL_PATH = OUTPUT_DIR / "grade_model.cbm"
 
 
-def main() -> None:
-    """Main function to run the classification PoC."""
-    # 1. Run the data pipeline.
+def parse_arguments() -> argparse.Namespace:
+    """
+    Parse CLI arguments of the PoC.
+
+    Returns:
+        argparse.Namespace: Parsed arguments.
+    """
+    parser = argparse.ArgumentParser(description="IT grade classification PoC")
+    # the ways to run the chain cannot be combined: only one of them is given
+    mode = parser.add_mutually_exclusive_group()
+    mode.add_argument(
+        "--parallel",
+        choices=["thread", "process"],
+        default=None,
+        help="Run independent handlers concurrently in a thread or process pool",
+    )
+    mode.add_argument(
+        "--workers",
+        type=int,
+        default=None,
+        help="Split the rows across this many processes for the row-local handlers",
+    )
+    parser.add_argument(
+        "--profile",
+        type=Path,
+        default=None,
+        help="Directory for per-handler profiling traces (trace.json and chrome_trace.json)",
+    )
+    mode.add_argument(
+        "--cache",
+        type=Path,
+        nargs="?",
+        const=DEFAULT_CACHE_DIR,
+        default=None,
+        help=f"Take unchanged stages from the stage cache in this directory (default {DEFAULT_CACHE_DIR})",
+    )
+    parser.add_argument(
+        "--native-categorical",
+        action="store_true",
+        help="Pass the categorical columns to CatBoost as cat_features instead of one-hot encoding them",
+    )
+    parser.add_argument(
+        "--transform",
+        type=Path,
+        default=None,
+        help=f"Transform-only run: featurize hh.csv with this fitted {PIPELINE_PATH.name} "
+             f"and score it with the {MODEL_PATH.name} saved next to it",
+    )
+    parser.add_argument(
+        "--feature-store",
+        type=Path,
+        nargs="?",
+        const=DEFAULT_STORE_DIR,
+        default=None,
+        help=f"Write the features of the run into the partitioned Parquet feature store in this directory (default {DEFAULT_STORE_DIR})",
+    )
+    parser.add_argument(
+        "--from-store",
+        type=Path,
+        default=None,
+        help="Train on the features of this feature store instead of running the pipeline",
+    )
+    parser.add_argument(
+        "--columns",
+        nargs="+",
+        default=None,
+        help="Train on these feature columns only, names or glob patterns like 'city_*' (--from-store)",
+    )
+    parser.add_argument(
+        "--rows",
+        type=parse_rows,
+        default=None,
+        help="Train on the row range START:STOP only (--from-store)",
+    )
+    return parser.parse_args()
+
+
+def score_resumes(ctx: PipelineContext, fitted: FittedPipeline, model_path: Path) -> None:
+    """
+    Score the resumes of a transform-only run with the model trained together with the fitted pipeline.
+
+    The predicted grades are saved into grade_pred.npy; the heuristic labels of hh.csv are known,
+    so the agreement with them is reported.
+
+    Args:
+        ctx: Context after the transform-only run.
+        fitted: The fitted pipeline of the run.
+        model_path: Path to the model.
+
+    Raises:
+        ValueError: If the model was trained with another fitted pipeline.
+    """
+    clf = MODELS.get(model_path)
+    metadata = clf.get_metadata()
+    if metadata["pipeline_version"] != fitted.version:
+        raise ValueError(
+            f"{model_path} was trained with the fitted pipeline {metadata['pipeline_version']}, not {fitted.version}"
+        )
+    le = LabelEncoder().fit(json.loads(metadata["classes"]))
+    features, feature_names = ctx.features, ctx.feature_names
+    if "feature_columns" in metadata.keys():
+        # the model was trained on a subset of the columns of the feature store (--from-store --columns)
+        feature_names = json.loads(metadata["feature_columns"])
+        if isinstance(features, pd.DataFrame):
+            features = features[feature_names]
+        else:
+            positions = {name: idx for idx, name in enumerate(ctx.feature_names)}
+            features = features[:, [positions[name] for name in feature_names]]
+
+    logging.info(f"Scoring {features.shape[0]} resumes with {model_path} ...")
+    y_pred = clf.predict(features).flatten().astype(int)
+    np.save(OUTPUT_DIR / "grade_pred.npy", le.inverse_transform(y_pred).astype(str))
+    print_and_save_report(
+        le.transform(ctx.target), y_pred, le.classes_,
+        feature_names, clf.get_feature_importance(),
+        OUTPUT_DIR / "transform_report.txt",
+    )
+
+
+def run_pipeline(args: argparse.Namespace) -> tuple[PipelineContext, Optional[FittedPipeline], bool]:
+    """
+    Run the data pipeline over hh.csv.
+
+    Args:
+        args: Parsed CLI arguments.
+
+    Returns:
+        tuple: Context after the pipeline, the fitted pipeline of a transform-only run (None for a fit run)
+        and whether the categorical columns were left without one-hot encoding.
+    """
     csv_path = resolve_csv()
-    pipeline = build_pipeline()
+    fitted = FittedPipeline.load(args.transform) if args.transform else None
+    native_categorical = fitted.native_categorical if fitted is not None else args.native_categorical
+    pipeline = build_pipeline(native_categorical=native_categorical)
 
     logging.info(f"Starting pipeline (source: {csv_path}) ...")
-    ctx = PipelineContext(csv_path=csv_path)
+    profiler = Profiler() if args.profile else None
+    ctx = PipelineContext(csv_path=csv_path, profiler=profiler)
+    if fitted is not None:
+        logging.info(f"Transforming with the fitted pipeline {fitted.version} from {args.transform}")
+        ctx = fitted.apply(ctx)
     try:
-        ctx = pipeline.handle(ctx)
+        if args.parallel:
+            ctx = run_scheduled(pipeline, ctx, executor=args.parallel)
+        elif args.workers:
+            ctx = run_sharded(pipeline, ctx, max_workers=args.workers)
+        elif args.cache:
+            ctx = run_cached(pipeline, ctx, StageCache(args.cache))
+        else:
+            ctx = pipeline.handle(ctx)
     except Exception:
         logging.exception("Pipeline failed")
         sys.exit(1)
 
-    features = ctx.features
-    target = ctx.target
-    feature_names: list[str] = getattr(
-        ctx, 'feature_names', [f"feat_{i}" for i in range(features.shape[1])]
-    )
+    if profiler is not None:
+        args.profile.mkdir(parents=True, exist_ok=True)
+        logging.info(f"Profile:\n{profiler.summary()}")
+        profiler.save_json(args.profile / "trace.json")
+        profiler.save_chrome_trace(args.profile / "chrome_trace.json")
+    return ctx, fitted, native_categorical
+
+
+def main() -> None:
+    """Main function to run the classification PoC."""
+    args = parse_arguments()
+
+    # 1. Run the data pipeline, or read a subset of its features from the feature store.
+    if args.from_store:
+        features, target, feature_names, cat_features = read_store(args.from_store, args.columns, args.rows or slice(None))
+        native_categorical = bool(cat_features)
+    else:
+        ctx, fitted, native_categorical = run_pipeline(args)
+        feature_names: list[str] = getattr(
+            ctx, 'feature_names', [f"feat_{i}" for i in range(ctx.features.shape[1])]
+        )
+        if args.feature_store:
+            version = (fitted or FittedPipeline.from_context(ctx, feature_names, native_categorical=native_categorical)).version
+            write_store(args.feature_store, ctx.features, ctx.target, feature_names, pipeline_version=version)
+        if fitted is not None:
+            score_resumes(ctx, fitted, args.transform.parent / MODEL_PATH.name)
+            return
+        features, target, cat_features = ctx.features, ctx.target, ctx.cat_features
+
     logging.info(f"Data ready.  features shape: {features.shape},  target classes: {np.unique(target)}")
 
     # 2. Class balance.
@@ -74,7 +252,7 @@ def main() -> None:
         allow_writing_files=False,
         thread_count=-1,
     )
-    clf.fit(X_train, y_train)
+    clf.fit(X_train, y_train, cat_features=cat_features or None)
 
     # 6. Evaluate.
     y_pred = clf.predict(X_test).flatten()
@@ -84,6 +262,24 @@ def main() -> None:
         OUTPUT_DIR / "classification_report.txt",
     )
 
+    # 7. Save the fitted pipeline and the model for transform-only runs (--transform).
+    if args.from_store:
+        # the model belongs to the pipeline.pkl of the run that wrote the store
+        pipeline_version = read_manifest(args.from_store)["pipeline_version"]
+        if args.columns is not None:
+            clf.get_metadata()["feature_columns"] = json.dumps(feature_names, ensure_ascii=False)
+    else:
+        fitted = FittedPipeline.from_context(ctx, feature_names, native_categorical=native_categorical)
+        fitted.save(PIPELINE_PATH)
+        pipeline_version = fitted.version
+    clf.get_metadata()["pipeline_version"] = pipeline_version
+    clf.get_metadata()["classes"] = json.dumps(le.classes_.tolist(), ensure_ascii=False)
+    # replaced atomically: a process serving the previous model (src.registry) never reads a half-written file
+    tmp_path = MODEL_PATH.with_name(MODEL_PATH.name + ".tmp")
+    clf.save_model(str(tmp_path))
+    os.replace(tmp_path, MODEL_PATH)
+    logging.info(f"Saved model of the fitted pipeline {pipeline_version} -> {MODEL_PATH}")
+
 
 if __name__ == "__main__":
     main()
@@ -3,12 +3,21 @@ from __future__ import annotations
 import logging
 import sys
 from abc import ABC, abstractmethod
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from pathlib import Path
-from typing import Optional
+from typing import Iterator, Optional
 
 import numpy as np
 import pandas as pd
+from sklearn.feature_extraction.text import TfidfVectorizer
+
+from src.fitted import FittedPipeline
+from src.profiling import Profiler
+
+# Copy-on-write lets handlers share one dataframe: derived frames and snapshots
+# are copied lazily, only when their data is modified (always on since pandas 3).
+if int(pd.__version__.split(".")[0]) < 3:
+    pd.set_option("mode.copy_on_write", True)
 
 # Configure logging
 logging.basicConfig(
@@ -19,14 +28,85 @@ logging.basicConfig(
 
 @dataclass
 class PipelineContext:
-    """Context for processing data pipeline."""
+    """
+    Context for processing data pipeline.
+
+    Handlers modify the shared dataframe in place through set_column, add_columns
+    and drop_columns instead of copying it. With debug=True a snapshot of the
+    dataframe is kept after every handler in `snapshots`. When `profiler` is set,
+    every handler run is measured by it. `job_vocabulary` and `tfidf` hold the
+    statistics of the whole dataframe computed by Handler.fit, `categories` fixes the
+    one-hot columns. `cat_features` lists the categorical columns of `features` left
+    without one-hot encoding. In a transform-only run `fitted` holds the fitted pipeline
+    these fields are taken from, and the features get its columns.
+    """
     csv_path: Path
     dataframe: Optional[pd.DataFrame] = None
     features: Optional[np.ndarray] = None
     target: Optional[np.ndarray] = None
+    debug: bool = False
+    snapshots: dict[str, pd.DataFrame] = field(default_factory=dict)
+    profiler: Optional[Profiler] = None
+    job_vocabulary: Optional[pd.Index] = None
+    tfidf: Optional[TfidfVectorizer] = None
+    categories: Optional[dict[str, list[str]]] = None
+    cat_features: list[str] = field(default_factory=list)
+    fitted: Optional[FittedPipeline] = None
+
+    def set_column(self, name: str, values) -> None:
+        """
+        Add or replace a column of the dataframe in place.
+
+        Args:
+            name: Column name.
+            values: Column values aligned with the dataframe index.
+        """
+        self.dataframe[name] = values
+
+    def add_columns(self, columns: pd.DataFrame) -> None:
+        """
+        Append the columns of another dataframe with the same index.
+
+        Args:
+            columns: Dataframe with the new columns.
+        """
+        self.dataframe = pd.concat([self.dataframe, columns], axis=1)
+
+    def drop_columns(self, columns: list[str]) -> None:
+        """
+        Drop columns from the dataframe in place.
+
+        Unlike DataFrame.drop, `del` does not copy the remaining columns.
+
+        Args:
+            columns: Names of the columns to drop.
+        """
+        for column in columns:
+            del self.dataframe[column]
 
 class Handler(ABC):
-    """Abstract handler for chain of responsibility pattern."""
+    """
+    Abstract handler for chain of responsibility pattern.
+
+    Attributes:
+        reads: Columns the handler reads (None - the whole dataframe, the handler runs alone).
+        writes: Columns the handler adds, replaces or drops; may contain glob patterns.
+        cacheable: False if the handler has side effects, so its result is never taken from the stage cache.
+        row_local: True if the handler processes every row independently of the others,
+            so it can be applied to any range of rows.
+        requires_global_stats: True if a row-local handler needs statistics of the whole dataframe
+            (e.g. a fitted TF-IDF vocabulary); they are computed by fit(ctx) before the rows are split.
+        parses_records: True if a row-local handler implements parse_record(record, ctx), which processes
+            a single record (a dict of raw fields, updated in place) the way _process processes a row and returns
+            it, or None if the handler filters it out; required by src.record.RecordFeaturizer.
+    """
+    reads: Optional[tuple[str, ...]] = None
+    writes: tuple[str, ...] = ()
+    cacheable: bool = True
+    row_local: bool = True
+    requires_global_stats: bool = False
+    parses_records: bool = False
+
     def __init__(self):
         self._next: Optional["Handler"] = None
 
@@ -43,6 +123,18 @@ class Handler(ABC):
         self._next = handler
         return handler
 
+    def iter_chain(self) -> Iterator["Handler"]:
+        """
+        Iterate over this handler and all handlers after it in the chain.
+
+        Yields:
+            Handler: The next handler of the chain.
+        """
+        handler = self
+        while handler is not None:
+            yield handler
+            handler = handler._next
+
     def handle(self, ctx: PipelineContext) -> PipelineContext:
         """
         Handle the request and pass it to the next handler.
@@ -53,11 +145,37 @@ class Handler(ABC):
         Returns:
             PipelineContext: The processed context.
         """
-        ctx = self._process(ctx)
+        ctx = self.run(ctx)
         if self._next:
             return self._next.handle(ctx)
         return ctx
 
+    def fit(self, ctx: PipelineContext) -> None:
+        """
+        Compute the statistics of the whole dataframe the handler needs and store them in the context.
+
+        Args:
+            ctx: The data pipeline context with the whole dataframe.
+        """
+
+    def run(self, ctx: PipelineContext) -> PipelineContext:
+        """
+        Process the context with this handler only.
+
+        Args:
+            ctx: The data pipeline context.
+
+        Returns:
+            PipelineContext: The processed context.
+        """
+        if ctx.profiler is not None:
+            ctx = ctx.profiler.measure(type(self).__name__, ctx, lambda: self._process(ctx))
+        else:
+            ctx = self._process(ctx)
+        if ctx.debug and ctx.dataframe is not None:
+            ctx.snapshots[type(self).__name__] = ctx.dataframe.copy(deep=False)
+        return ctx
+
     @abstractmethod
     def _process(self, ctx: PipelineContext) -> PipelineContext:
         """
@@ -0,0 +1,166 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+import pickle
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import TYPE_CHECKING, Optional
+
+import pandas as pd
+import sklearn
+from sklearn.feature_extraction.text import TfidfVectorizer
+
+if TYPE_CHECKING:
+    from src.core import PipelineContext
+
+# Version of the pipeline.pkl layout; an artifact of another version is not loaded.
+FORMAT_VERSION = 1
+
+
+@dataclass(frozen=True)
+class FittedPipeline:
+    """
+    Dataset-dependent state of the pipeline, fitted once and reused to transform new data.
+
+    A run over the whole dataset (fit) computes the TF-IDF vocabulary, the categories of the categorical
+    columns (the layout of the one-hot columns) and the feature columns. A transform-only run takes them
+    from the artifact: no handler looks at the whole dataframe, and the features have exactly the columns
+    the model was trained on.
+
+    Attributes:
+        tfidf: Fitted TF-IDF vectorizer of the experience descriptions.
+        categories: Categories of every categorical column.
+        columns: Feature columns in the order the model was trained on.
+        job_vocabulary: Jobs kept by ParseJobHandler (None if the handler is not in the chain).
+        native_categorical: The categorical columns were left without one-hot encoding.
+        format_version: Version of the artifact layout.
+    """
+    tfidf: Optional[TfidfVectorizer]
+    categories: dict[str, list[str]]
+    columns: list[str]
+    job_vocabulary: Optional[list[str]] = None
+    native_categorical: bool = False
+    format_version: int = field(default=FORMAT_VERSION)
+
+    @property
+    def version(self) -> str:
+        """Content hash of the artifact; the model is stamped with it."""
+        digest = hashlib.sha256(json.dumps({
+            "format_version": self.format_version,
+            "native_categorical": self.native_categorical,
+            "job_vocabulary": self.job_vocabulary,
+            "categories": self.categories,
+            "columns": self.columns,
+        }, sort_keys=True, ensure_ascii=False).encode("utf-8"))
+        if self.tfidf is not None:
+            digest.update("\n".join(self.tfidf.get_feature_names_out()).encode("utf-8"))
+            digest.update(self.tfidf.idf_.tobytes())
+        return digest.hexdigest()[:16]
+
+    @classmethod
+    def from_context(cls, ctx: PipelineContext, columns: list[str], native_categorical: bool = False) -> FittedPipeline:
+        """
+        Take the fitted state of a run over the whole dataset.
+
+        Args:
+            ctx: Context after the pipeline.
+            columns: Columns of the features.
+            native_categorical: The categorical columns were left without one-hot encoding.
+
+        Returns:
+            FittedPipeline: The fitted state.
+        """
+        return cls(
+            tfidf=ctx.tfidf,
+            categories={str(col): [str(value) for value in values] for col, values in (ctx.categories or {}).items()},
+            columns=[str(col) for col in columns],
+            job_vocabulary=[str(job) for job in ctx.job_vocabulary] if ctx.job_vocabulary is not None else None,
+            native_categorical=native_categorical,
+        )
+
+    def apply(self, ctx: PipelineContext) -> PipelineContext:
+        """
+        Put the fitted state into the context of a transform-only run.
+
+        Args:
+            ctx: Initial context.
+
+        Returns:
+            PipelineContext: The context with the fitted TF-IDF, categories and job vocabulary.
+        """
+        ctx.tfidf = self.tfidf
+        ctx.categories = {col: list(values) for col, values in self.categories.items()}
+        if self.job_vocabulary is not None:
+            ctx.job_vocabulary = pd.Index(self.job_vocabulary, dtype=object)
+        ctx.fitted = self
+        return ctx
+
+    def align(self, features: pd.DataFrame) -> pd.DataFrame:
+        """
+        Check the columns of the features and put them into the fitted order.
+
+        Args:
+            features: Features of a transform-only run.
+
+        Returns:
+            pd.DataFrame: The features with the fitted columns.
+
+        Raises:
+            ValueError: If the features have other columns than the fitted ones.
+        """
+        if features.columns.tolist() == self.columns:
+            return features
+        missing = [col for col in self.columns if col not in features.columns]
+        unexpected = [col for col in features.columns if col not in set(self.columns)]
+        if missing or unexpected:
+            raise ValueError(
+                f"Features do not match the fitted pipeline {self.version}: "
+                f"missing columns {missing[:5]}, unexpected columns {unexpected[:5]}"
+            )
+        return features[self.columns]
+
+    def save(self, path: Path) -> None:
+        """
+        Save the artifact with its version and the scikit-learn version of the TF-IDF model.
+
+        Args:
+            path: Output path (pipeline.pkl).
+        """
+        state = {
+            "format_version": self.format_version,
+            "version": self.version,
+            "sklearn_version": sklearn.__version__,
+            "pipeline": self,
+        }
+        with open(path, "wb") as fout:
+            pickle.dump(state, fout, protocol=pickle.HIGHEST_PROTOCOL)
+
+    @classmethod
+    def load(cls, path: Path) -> FittedPipeline:
+        """
+        Load an artifact saved by save.
+
+        Args:
+            path: Path to pipeline.pkl.
+
+        Returns:
+            FittedPipeline: The fitted state.
+
+        Raises:
+            ValueError: If the artifact has another layout version or does not match its version.
+        """
+        with open(path, "rb") as fin:
+            state = pickle.load(fin)
+        if state.get("format_version") != FORMAT_VERSION:
+            raise ValueError(f"{path} has format version {state.get('format_version')}, expected {FORMAT_VERSION}")
+        if state["sklearn_version"] != sklearn.__version__:
+            logging.warning(
+                f"FittedPipeline: {path} was saved with scikit-learn {state['sklearn_version']}, "
+                f"running {sklearn.__version__}"
+            )
+        fitted = state["pipeline"]
+        if fitted.version != state["version"]:
+            raise ValueError(f"{path} does not match its version {state['version']} (got {fitted.version})")
+        return fitted
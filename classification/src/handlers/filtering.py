@@ -1,13 +1,15 @@
 import logging
-import re
+from typing import Optional
 
 from src.core import Handler, PipelineContext
+from src.utils.keywords import KeywordMatcher
 
 
 class FilterITRolesHandler(Handler):
     """
     Filters dataset to include only IT-related roles using two-tier keyword matching.
     """
+    parses_records = True
 
     # Unambiguous IT roles
     _STRONG_KEYWORDS: list[str] = [
@@ -57,6 +59,30 @@ class FilterITRolesHandler(Handler):
         'техн', 'tech', 'цифр', 'digital',
     ]
 
+    _MATCHER = KeywordMatcher({
+        'strong': _STRONG_KEYWORDS,
+        'tech': _TECH_KEYWORDS,
+        'weak': _WEAK_KEYWORDS,
+        'context': _IT_CONTEXT,
+    })
+    _IT, _WEAK, _CONTEXT = _MATCHER.mask('strong', 'tech'), _MATCHER.mask('weak'), _MATCHER.mask('context')
+
+    def parse_record(self, record: dict, ctx: PipelineContext) -> Optional[dict]:
+        """
+        Keep one record if its job title is an IT role.
+
+        Args:
+            record: Fields of the record.
+            ctx: The data pipeline context.
+
+        Returns:
+            Optional[dict]: The record, or None if it is not an IT role.
+        """
+        mask = self._MATCHER.match(record['Ищет работу на должность:'])
+        if mask & self._IT or (mask & self._WEAK and mask & self._CONTEXT):
+            return record
+        return None
+
     def _process(self, ctx: PipelineContext) -> PipelineContext:
         """
         Filter rows where the job title matches IT-related keywords.
@@ -68,28 +94,17 @@ class FilterITRolesHandler(Handler):
             PipelineContext: Context with filtered dataframe.
         """
         logging.info("FilterITRolesHandler: Filtering for IT roles")
-        dataframe = ctx.dataframe.copy()
+        dataframe = ctx.dataframe
         initial_count = len(dataframe)
         col = 'Ищет работу на должность:'
 
-        def is_it_role(value: str) -> bool:
-            """Check if a job title string corresponds to an IT role."""
-            if not isinstance(value, str):
-                return False
-            val = value.lower()
-
-            if any(kw in val for kw in self._STRONG_KEYWORDS):
-                return True
-            if any(kw in val for kw in self._TECH_KEYWORDS):
-                return True
-
-            if any(kw in val for kw in self._WEAK_KEYWORDS):
-                return any(ctx_kw in val for ctx_kw in self._IT_CONTEXT)
+        # A strong or tech keyword is enough, a weak one needs an IT context keyword as well
+        masks = self._MATCHER.match_column(dataframe[col])
+        it_role = self._MATCHER.matches(masks, 'strong', 'tech')
+        it_role |= self._MATCHER.matches(masks, 'weak') & self._MATCHER.matches(masks, 'context')
 
-            return False
+        # Row filtering is the only place where the data itself has to be copied
+        ctx.dataframe = dataframe[it_role]
 
-        dataframe = dataframe[dataframe[col].apply(is_it_role)]
-        
-        logging.info(f"FilterITRolesHandler: {initial_count} -> {len(dataframe)} rows ({len(dataframe)/initial_count*100:.1f}%)")
-        ctx.dataframe = dataframe
+        logging.info(f"FilterITRolesHandler: {initial_count} -> {len(ctx.dataframe)} rows ({len(ctx.dataframe)/initial_count*100:.1f}%)")
         return ctx
@@ -1,12 +1,14 @@
 import logging
 
 import numpy as np
-import pandas as pd
 
 from src.core import Handler, PipelineContext
+from src.utils.ingest import read_hh_csv
 
 class LoadCSVHandler(Handler):
     """Handler for loading data from a CSV file."""
+    row_local = False
+
     def _process(self, ctx: PipelineContext) -> PipelineContext:
         """
         Load the CSV file specified in the context path into a DataFrame.
@@ -18,19 +20,15 @@ class LoadCSVHandler(Handler):
             PipelineContext: Context updated with the loaded DataFrame.
         """
         logging.info(f"LoadCSVHandler: Starting to load {ctx.csv_path}")
-        ctx.dataframe = pd.read_csv(
-            ctx.csv_path,
-            sep=",",
-            quotechar='"',
-            engine="python",
-            encoding="utf-8",
-            index_col=0
-        )
+        ctx.dataframe = read_hh_csv(ctx.csv_path)
         logging.info(f"LoadCSVHandler: Loaded {ctx.csv_path} with {ctx.dataframe.shape[0]} rows and {ctx.dataframe.shape[1]} columns")
         return ctx
 
 class SaveDataHandler(Handler):
     """Handler for saving the dataset into features.npy and target.npy files."""
+    cacheable = False
+    row_local = False
+
     def _process(self, ctx: PipelineContext) -> PipelineContext:
         """
         Save the processed features (features) and target (target) to NumPy files.
@@ -1,6 +1,9 @@
 import logging
 
+import numpy as np
+
 from src.core import Handler, PipelineContext
+from src.utils.keywords import KeywordMatcher
 
 class LabelGradeHandler(Handler):
     """
@@ -12,30 +15,64 @@ class LabelGradeHandler(Handler):
     _SENIOR_KW = ['senior', 'sr ', 'lead', 'principal', 'staff', 'ведущий', 'главный', 'руководитель', 'team lead', 'architect', 'head of', 'expert']
     _MIDDLE_KW = ['middle', 'mid ', 'мидл', 'мидлл']
 
-    def label_grade(self, row) -> str:
-        """Determine grade based on title keywords and experience."""
-        title: str = row['_title']
-        exp: int = row.get('experience_months', 0)
+    _MATCHER = KeywordMatcher({'junior': _JUNIOR_KW, 'senior': _SENIOR_KW, 'middle': _MIDDLE_KW})
+    _JUNIOR, _SENIOR, _MIDDLE = _MATCHER.mask('junior'), _MATCHER.mask('senior'), _MATCHER.mask('middle')
+
+    reads = ('Ищет работу на должность:', 'job', 'experience_months', 'Последеняя/нынешняя должность')
+    writes = ('grade', 'Ищет работу на должность:', 'experience_months', 'Последеняя/нынешняя должность')
+    parses_records = True
+
+    @classmethod
+    def label_grades(cls, keywords: np.ndarray, experience: np.ndarray) -> np.ndarray:
+        """
+        Determine grades based on title keyword groups and experience.
+
+        The rules are checked in order, the first matching rule gives the grade:
+        senior and junior keywords, senior keywords, junior keywords, middle keywords, experience only.
+
+        Args:
+            keywords: Bitmasks of the keyword groups found in the titles (see _MATCHER).
+            experience: Experience in months.
+
+        Returns:
+            np.ndarray: 'Junior', 'Middle' or 'Senior' for every row.
+        """
+        senior = (keywords & cls._SENIOR) != 0
+        junior = (keywords & cls._JUNIOR) != 0
+        middle = (keywords & cls._MIDDLE) != 0
 
-        # Keyword-based classification
-        if any(kw in title for kw in self._SENIOR_KW):
+        conditions = [
             # Resolve Junior/Senior ambiguity if both keywords present
-            if any(kw in title for kw in self._JUNIOR_KW):
-                return 'Senior' if exp > 36 else 'Junior'
-            return 'Senior'
-            
-        if any(kw in title for kw in self._JUNIOR_KW):
-            return 'Middle' if exp > 60 else 'Junior'
-            
-        if any(kw in title for kw in self._MIDDLE_KW):
-            return 'Senior' if exp > 96 else 'Middle'
-
-        # Experience-based classification for no keywords
-        if exp <= 18:
-            return 'Junior'
-        if exp <= 60:
-            return 'Middle'
-        return 'Senior'
+            senior & junior & (experience > 36),
+            senior & junior,
+            senior,
+            junior & (experience > 60),
+            junior,
+            middle & (experience > 96),
+            middle,
+            # Experience-based classification for no keywords
+            experience <= 18,
+            experience <= 60,
+        ]
+        choices = ['Senior', 'Junior', 'Senior', 'Middle', 'Junior', 'Senior', 'Middle', 'Junior', 'Middle']
+        return np.select(conditions, choices, default='Senior').astype(object)
+
+    def parse_record(self, record: dict, ctx: PipelineContext) -> dict:
+        """
+        Drop the fields used for labeling from one record.
+
+        The grade is the target, so it is not computed for a record that is being scored.
+
+        Args:
+            record: Fields of the record.
+            ctx: The data pipeline context.
+
+        Returns:
+            dict: The record without the title, experience and last job.
+        """
+        for col in ('Ищет работу на должность:', 'experience_months', 'Последеняя/нынешняя должность'):
+            record.pop(col, None)
+        return record
 
     def _process(self, ctx: PipelineContext) -> PipelineContext:
         """
@@ -48,27 +85,32 @@ class LabelGradeHandler(Handler):
             PipelineContext: Context updated with 'grade' target and clean feature set.
         """
         logging.info("LabelGradeHandler: Starting to label grades")
-        dataframe = ctx.dataframe.copy()
+        dataframe = ctx.dataframe
 
         raw_title_col = 'Ищет работу на должность:'
+        # Bitmask of the keyword groups found in the lowercased title, missing titles match nothing
         if raw_title_col in dataframe.columns:
-            dataframe['_title'] = dataframe[raw_title_col].fillna('').str.lower()
+            keywords = self._MATCHER.match_column(dataframe[raw_title_col])
         elif 'job' in dataframe.columns:
-            dataframe['_title'] = dataframe['job'].fillna('').str.lower()
+            keywords = self._MATCHER.match_column(dataframe['job'])
+        else:
+            keywords = np.zeros(len(dataframe), dtype=np.int64)
+
+        if 'experience_months' in dataframe.columns:
+            experience = dataframe['experience_months'].to_numpy()
         else:
-            dataframe['_title'] = ''
+            experience = np.zeros(len(dataframe), dtype=np.int64)
 
-        dataframe['grade'] = dataframe.apply(self.label_grade, axis=1)
+        ctx.set_column('grade', self.label_grades(keywords, experience))
 
         # Drop features used for labeling to prevent leakage
-        cols_to_drop = ['_title']
+        cols_to_drop = []
         if raw_title_col in dataframe.columns: cols_to_drop.append(raw_title_col)
         if 'experience_months' in dataframe.columns: cols_to_drop.append('experience_months')
         if 'Последеняя/нынешняя должность' in dataframe.columns: cols_to_drop.append('Последеняя/нынешняя должность')
 
-        dataframe = dataframe.drop(columns=cols_to_drop)
+        ctx.drop_columns(cols_to_drop)
 
-        ctx.dataframe = dataframe
         ctx.target = dataframe['grade'].values
 
         logging.info(f"LabelGradeHandler: Distribution:\n{dataframe['grade'].value_counts().to_string()}")
@@ -1,13 +1,181 @@
+import functools
 import logging
+import math
 import re
+from typing import Callable
 
 import pandas as pd
 from sklearn.feature_extraction.text import TfidfVectorizer
 
 from src.core import Handler, PipelineContext
+from src.utils.keywords import KeywordMatcher
+from src.utils.memo import UniqueValues, map_unique
+
+MALE_VALUES = frozenset(['Мужчина', 'Male'])
+
+MONTHS = {
+    'January': 0, 'января': 0,
+    'February': 1, 'февраля': 1,
+    'March': 2, 'марта': 2,
+    'April': 3, 'апреля': 3,
+    'May': 4, 'мая': 4,
+    'June': 5, 'июня': 5,
+    'July': 6, 'июля': 6,
+    'August': 7, 'августа': 7,
+    'September': 8, 'сентября': 8,
+    'October': 9, 'октября': 9,
+    'November': 10, 'ноября': 10,
+    'December': 11, 'декабря': 11,
+}
+
+CURRENCY_RATES = {
+    'руб.': 1.0, 'USD': 73.35, 'RUB': 1.0, 'KZT': 0.18,
+    'бел. руб.': 2.28, 'EUR': 85.86, 'грн.': 2.72, 'сум': 0.005,
+    'KGS': 0.98, 'UAH': 2.5, 'BYN': 2.5, 'AZN': 41.1, 'som': 0.005,
+}
+
+REGIONS = {
+    "Moscow & Oblast": [
+        "Москва", "Moscow", "Зеленоград", "Подольск", "Балашиха", "Химки", "Мытищи", 
+        "Королев", "Люберцы", "Красногорск", "Одинцово", "Домодедово", "Щелково", 
+        "Серпухов", "Раменское", "Долгопрудный", "Реутов", "Пушкино", "Лобня"
+    ],
+    "Saint Petersburg & Oblast": [
+        "Санкт-Петербург", "Saint Petersburg", "Гатчина", "Выборг", "Всеволожск", 
+        "Сосновый Бор", "Кириши", "Тихвин", "Сертолово"
+    ],
+    "Central Federal District": [
+        "Воронеж", "Ярославль", "Рязань", "Тверь", "Тула", "Липецк", "Курск", 
+        "Брянск", "Иваново", "Белгород", "Владимир", "Калуга", "Орел", "Смоленск", 
+        "Тамбов", "Кострома", "Старый Оскол"
+    ],
+    "Volga Federal District": [
+        "Казань", "Kazan", "Нижний Новгород", "Самара", "Уфа", "Пермь", "Саратов", 
+        "Тольятти", "Ижевск", "Ульяновск", "Оренбург", "Пенза", "Набережные Челны", 
+        "Чебоксары", "Киров", "Саранск", "Стерлитамак", "Йошкар-Ола"
+    ],
+    "South and North Caucasus Federal District": [
+        "Краснодар", "Ростов-на-Дону", "Волгоград", "Сочи", "Ставрополь", "Астрахань", 
+        "Севастополь", "Симферополь", "Новороссийск", "Таганрог", "Махачкала", 
+        "Владикавказ", "Грозный", "Майкоп", "Пятигорск"
+    ],
+    "Ural Federal District": [
+        "Екатеринбург", "Yekaterinburg", "Челябинск", "Тюмень", "Магнитогорск", 
+        "Сургут", "Нижневартовск", "Курган", "Новый Уренгой", "Ноябрьск", "Ханты-Мансийск"
+    ],
+    "Siberian Federal District": [
+        "Новосибирск", "Novosibirsk", "Красноярск", "Омск", "Томск", "Барнаул", 
+        "Иркутск", "Кемерово", "Новокузнецк", "Абакан", "Братск", "Ангарск"
+    ],
+    "Far Eastern Federal District": [
+        "Владивосток", "Хабаровск", "Улан-Удэ", "Чита", "Благовещенск", "Якутск", 
+        "Петропавловск-Камчатский", "Южно-Сахалинск", "Находка"
+    ],
+    "Kazakhstan": [
+        "Алматы", "Almaty", "Нур-Султан", "Астана", "Astana", "Шымкент", "Актобе", 
+        "Караганда", "Атырау", "Актау", "Павлодар", "Уральск"
+    ],
+    "Belarus": [
+        "Минск", "Minsk", "Гомель", "Витебск", "Могилев", "Гродно", "Брест"
+    ],
+    "Other countries / CIS": [
+        "Киев", "Kyiv", "Ташкент", "Бишкек", "Тбилиси", "Баку", "Ереван", "Рига", "Вильнюс"
+    ]
+}
+# Region of every city; a city listed in several regions belongs to the first one
+CITY_REGIONS: dict[str, str] = {}
+for _region, _cities in REGIONS.items():
+    for _city in _cities:
+        CITY_REGIONS.setdefault(_city, _region)
+
+EMPLOYMENT_MAP = {
+    "full_time": ["полная занятость", "full time"],
+    "part_time": ["частичная занятость", "part time"],
+    "project": ["проектная работа", "project work"],
+    "internship": ["стажировка", "work placement"],
+    "volunteering": ["волонтерство", "volunteering"]
+}
+
+SCHEDULE_MAP = {
+    "full_day": ["полный день", "full day"],
+    "flexible": ["гибкий график", "flexible schedule"],
+    "shift": ["сменный график", "shift schedule"],
+    "remote": ["удаленная работа", "remote working"],
+    "rotation": ["вахтовый метод", "rotation based work"]
+}
+
+EDUCATION_MAP = {
+    "incomplete_higher": ["неоконченное высшее", "incomplete higher"],
+    "higher": ["высшее образование", "higher education"],
+    "secondary_special": ["среднее специальное", "secondary special"],
+    "secondary": ["среднее образование", "secondary education"]
+}
+
+# One scan of every value finds all groups of a map at once
+EMPLOYMENT_MATCHER = KeywordMatcher(EMPLOYMENT_MAP)
+SCHEDULE_MATCHER = KeywordMatcher(SCHEDULE_MAP)
+EDUCATION_MATCHER = KeywordMatcher(EDUCATION_MAP)
+
+YEARS_PATTERN = re.compile(r'(\d+)\s*(?:год|года|лет)')
+MONTHS_PATTERN = re.compile(r'(\d+)\s*(?:месяц|месяца|месяцев)')
+
+
+def _record_flags(record: dict, value, matcher: KeywordMatcher, prefix: str) -> None:
+    """Set the 0/1 flag of every keyword group of a matcher for one record."""
+    mask = matcher.match(value)
+    for group, bit in matcher.bits.items():
+        record[f"{prefix}{group}"] = 1 if mask & bit else 0
+
+
+@functools.lru_cache(maxsize=8)
+def _tfidf_tables(tfidf: TfidfVectorizer) -> tuple[Callable, dict, list, list, dict]:
+    """Analyzer, vocabulary, idf weights, feature columns and zero features of a fitted vectorizer, for single texts."""
+    names = [f"tfidf_{name}" for name in tfidf.get_feature_names_out()]
+    return tfidf.build_analyzer(), tfidf.vocabulary_, tfidf.idf_.tolist(), names, dict.fromkeys(names, 0.0)
+
 
 class ParseGenderAgeBirthdayHandler(Handler):
     """Handler for parsing gender, age, and birthday information."""
+    reads = ("Пол, возраст",)
+    writes = ("gender", "age", "birthday_month", "Пол, возраст")
+    parses_records = True
+
+    @staticmethod
+    def extract_gender(value: str) -> int:
+        """0 for male, 1 for female."""
+        raw_gender = value.split(',')[0].strip()
+        if raw_gender in MALE_VALUES:
+            return 0 # Male
+        return 1 # Female
+
+    @staticmethod
+    def extract_age(value: str) -> int:
+        """Age in years, -1 if it is not given."""
+        data = value.split(',')
+        if len(data) < 2:
+            return -1
+        raw_age = data[1].strip().replace('\xa0', ' ')
+        raw_age = raw_age.split(' ')[0]
+        return int(raw_age)
+
+    @staticmethod
+    def extract_birthday_month(value: str) -> int:
+        """Birthday month (0-11), -1 if it is not given."""
+        data = value.split(',')
+        if len(data) < 3:
+            return -1
+        raw_birthday_month = data[2].strip().replace('\xa0', ' ')
+        raw_birthday_month = raw_birthday_month.split(' ')[-2]
+        return MONTHS.get(raw_birthday_month, -1)
+
+    def parse_record(self, record: dict, ctx: PipelineContext) -> dict:
+        """Parse the gender, age and birthday month of one record."""
+        value = record.pop("Пол, возраст")
+        record["gender"] = self.extract_gender(value)
+        record["age"] = self.extract_age(value)
+        record["birthday_month"] = self.extract_birthday_month(value)
+        return record
+
     def _process(self, ctx: PipelineContext) -> PipelineContext:
         """
         Parse 'Пол, возраст' column into separate gender, age, and birthday_month columns.
@@ -19,62 +187,49 @@ class ParseGenderAgeBirthdayHandler(Handler):
             PipelineContext: Context updated with parsed features.
         """
         logging.info("ParseGenderAgeBirthdayHandler: Starting to parse gender, age and birthday month")
-        dataframe = ctx.dataframe.copy()
-        
-        male_values = ['Мужчина', 'Male']
+        dataframe = ctx.dataframe
         
-        def extract_gender(value: str) -> int:
-            raw_gender = value.split(',')[0].strip()
-            if raw_gender in male_values:
-                return 0 # Male
-            return 1 # Female
-
-        def extract_age(value: str) -> int:
-            data = value.split(',')
-            if len(data) < 2:
-                return -1
-            raw_age = data[1].strip().replace('\xa0', ' ')
-            raw_age = raw_age.split(' ')[0]
-            return int(raw_age)
-
-        def extract_birthday_month(value: str) -> int:
-            data = value.split(',')
-            if len(data) < 3:
-                return -1
-            raw_birthday_month = data[2].strip().replace('\xa0', ' ')
-            raw_birthday_month = raw_birthday_month.split(' ')[-2]
-            match raw_birthday_month:
-                case 'January' | 'января': return 0
-                case 'February' | 'февраля': return 1
-                case 'March' | 'марта': return 2
-                case 'April' | 'апреля': return 3
-                case 'May' | 'мая': return 4
-                case 'June' | 'июня': return 5
-                case 'July' | 'июля': return 6
-                case 'August' | 'августа': return 7
-                case 'September' | 'сентября': return 8    
-                case 'October' | 'октября': return 9
-                case 'November' | 'ноября': return 10
-                case 'December' | 'декабря': return 11
-                case _: return -1
-
         GENDER_AGE_COL = "Пол, возраст"
-        gender_data = dataframe[GENDER_AGE_COL].apply(extract_gender)
-        age_data = dataframe[GENDER_AGE_COL].apply(extract_age)
-        month_data = dataframe[GENDER_AGE_COL].apply(extract_birthday_month)
+        values = UniqueValues(dataframe[GENDER_AGE_COL])
+        gender_data = values.map(self.extract_gender)
+        age_data = values.map(self.extract_age)
+        month_data = values.map(self.extract_birthday_month)
 
-        dataframe["gender"] = gender_data
-        dataframe["age"] = age_data
-        dataframe["birthday_month"] = month_data
+        ctx.set_column("gender", gender_data)
+        ctx.set_column("age", age_data)
+        ctx.set_column("birthday_month", month_data)
 
-        dataframe = dataframe.drop(columns=[GENDER_AGE_COL])
+        ctx.drop_columns([GENDER_AGE_COL])
 
-        ctx.dataframe = dataframe
         logging.info("ParseGenderAgeHandler: Parsed gender, age and birthday month")
         return ctx
 
 class ParseSalaryHandler(Handler):
     """Handler for parsing salary information."""
+    reads = ("ЗП",)
+    writes = ("salary_rub", "ЗП")
+    parses_records = True
+
+    @staticmethod
+    def extract_salary(value: str) -> float:
+        """Salary converted to rubles."""
+        value = value.replace('\xa0', ' ').strip().split(' ')
+        number = ''
+        currency = ''
+
+        for idx, cur in enumerate(value):
+            if cur.isdigit():
+                number += cur
+            else:
+                currency = ' '.join(value[idx:])
+                break
+        return CURRENCY_RATES[currency.strip()] * float(number)
+
+    def parse_record(self, record: dict, ctx: PipelineContext) -> dict:
+        """Parse the salary of one record."""
+        record["salary_rub"] = self.extract_salary(record.pop("ЗП"))
+        return record
+
     def _process(self, ctx: PipelineContext) -> PipelineContext:
         """
         Parse 'ЗП' column and convert all salaries to rubles.
@@ -86,36 +241,43 @@ class ParseSalaryHandler(Handler):
             PipelineContext: Context updated with 'salary_rub' column.
         """
         logging.info("ParseSalaryHandler: Starting to parse salary")
-        dataframe = ctx.dataframe.copy()
+        dataframe = ctx.dataframe
+
+        ctx.set_column("salary_rub", map_unique(dataframe["ЗП"], self.extract_salary))
+        ctx.drop_columns(["ЗП"])
 
-        currency_rates = {
-            'руб.': 1.0, 'USD': 73.35, 'RUB': 1.0, 'KZT': 0.18,
-            'бел. руб.': 2.28, 'EUR': 85.86, 'грн.': 2.72, 'сум': 0.005,
-            'KGS': 0.98, 'UAH': 2.5, 'BYN': 2.5, 'AZN': 41.1, 'som': 0.005,
-        }
-        
-        def extract_salary(value: str) -> int:
-            value = value.replace('\xa0', ' ').strip().split(' ')
-            number = ''
-            currency = ''
-
-            for idx, cur in enumerate(value):
-                if cur.isdigit():
-                    number += cur
-                else:
-                    currency = ' '.join(value[idx:])
-                    break
-            return currency_rates[currency.strip()] * float(number)
-
-        dataframe["salary_rub"] = dataframe["ЗП"].apply(extract_salary)
-        dataframe = dataframe.drop(columns=["ЗП"])
-
-        ctx.dataframe = dataframe
         logging.info("ParseSalaryHandler: Parsed salary")
         return ctx
 
 class ParseJobHandler(Handler):
     """Handler for parsing job information."""
+    reads = ("Ищет работу на должность:",)
+    writes = ("job", "Ищет работу на должность:")
+    requires_global_stats = True
+    parses_records = True
+
+    def fit(self, ctx: PipelineContext) -> None:
+        """
+        Find the 133 most common job titles of the whole dataframe.
+
+        Args:
+            ctx: Pipeline context containing the dataframe.
+        """
+        if ctx.job_vocabulary is None:
+            ctx.job_vocabulary = ctx.dataframe['Ищет работу на должность:'].value_counts()[:133].index
+
+    @staticmethod
+    def extract_job(value: str, vocabulary) -> str:
+        """The job title if it is in the vocabulary, 'other' otherwise."""
+        if value in vocabulary:
+            return value
+        return "other"
+
+    def parse_record(self, record: dict, ctx: PipelineContext) -> dict:
+        """Normalize the job title of one record with the fitted vocabulary."""
+        record["job"] = self.extract_job(record.pop("Ищет работу на должность:"), ctx.job_vocabulary)
+        return record
+
     def _process(self, ctx: PipelineContext) -> PipelineContext:
         """
         Normalize job titles to the top 133 most common ones, grouping others as 'other'.
@@ -127,24 +289,34 @@ class ParseJobHandler(Handler):
             PipelineContext: Context updated with normalized 'job' column.
         """
         logging.info("ParseJobHandler: Starting to parse job")
-        dataframe = ctx.dataframe.copy()
+        dataframe = ctx.dataframe
 
-        job_count = dataframe['Ищет работу на должность:'].value_counts()[:133]
+        self.fit(ctx)
+        job_count = ctx.job_vocabulary
 
-        def extract_job(value: str) -> str:
-            if value in job_count:
-                return value
-            return "other"
+        ctx.set_column("job", map_unique(dataframe["Ищет работу на должность:"], lambda value: self.extract_job(value, job_count)))
+        ctx.drop_columns(["Ищет работу на должность:"])
 
-        dataframe["job"] = dataframe["Ищет работу на должность:"].apply(extract_job)
-        dataframe = dataframe.drop(columns=["Ищет работу на должность:"])
-
-        ctx.dataframe = dataframe
         logging.info("ParseJobHandler: Parsed job")
         return ctx
 
 class ParseCityHandler(Handler):
     """Handler for parsing city information."""
+    reads = ("Город",)
+    writes = ("city", "Город")
+    parses_records = True
+
+    @staticmethod
+    def extract_city(value: str) -> str:
+        """Region of the city, 'Other' if the city is not known."""
+        city_name = value.split(',')[0].strip()
+        return CITY_REGIONS.get(city_name, "Other")
+
+    def parse_record(self, record: dict, ctx: PipelineContext) -> dict:
+        """Parse the region of one record."""
+        record["city"] = self.extract_city(record.pop("Город"))
+        return record
+
     def _process(self, ctx: PipelineContext) -> PipelineContext:
         """
         Group cities into regions/federal districts.
@@ -156,73 +328,25 @@ class ParseCityHandler(Handler):
             PipelineContext: Context updated with 'city' region column.
         """
         logging.info("ParseCityHandler: Starting to parse city")
-        dataframe = ctx.dataframe.copy()
-
-        regions_map = {
-            "Moscow & Oblast": [
-                "Москва", "Moscow", "Зеленоград", "Подольск", "Балашиха", "Химки", "Мытищи", 
-                "Королев", "Люберцы", "Красногорск", "Одинцово", "Домодедово", "Щелково", 
-                "Серпухов", "Раменское", "Долгопрудный", "Реутов", "Пушкино", "Лобня"
-            ],
-            "Saint Petersburg & Oblast": [
-                "Санкт-Петербург", "Saint Petersburg", "Гатчина", "Выборг", "Всеволожск", 
-                "Сосновый Бор", "Кириши", "Тихвин", "Сертолово"
-            ],
-            "Central Federal District": [
-                "Воронеж", "Ярославль", "Рязань", "Тверь", "Тула", "Липецк", "Курск", 
-                "Брянск", "Иваново", "Белгород", "Владимир", "Калуга", "Орел", "Смоленск", 
-                "Тамбов", "Кострома", "Старый Оскол"
-            ],
-            "Volga Federal District": [
-                "Казань", "Kazan", "Нижний Новгород", "Самара", "Уфа", "Пермь", "Саратов", 
-                "Тольятти", "Ижевск", "Ульяновск", "Оренбург", "Пенза", "Набережные Челны", 
-                "Чебоксары", "Киров", "Саранск", "Стерлитамак", "Йошкар-Ола"
-            ],
-            "South and North Caucasus Federal District": [
-                "Краснодар", "Ростов-на-Дону", "Волгоград", "Сочи", "Ставрополь", "Астрахань", 
-                "Севастополь", "Симферополь", "Новороссийск", "Таганрог", "Махачкала", 
-                "Владикавказ", "Грозный", "Майкоп", "Пятигорск"
-            ],
-            "Ural Federal District": [
-                "Екатеринбург", "Yekaterinburg", "Челябинск", "Тюмень", "Магнитогорск", 
-                "Сургут", "Нижневартовск", "Курган", "Новый Уренгой", "Ноябрьск", "Ханты-Мансийск"
-            ],
-            "Siberian Federal District": [
-                "Новосибирск", "Novosibirsk", "Красноярск", "Омск", "Томск", "Барнаул", 
-                "Иркутск", "Кемерово", "Новокузнецк", "Абакан", "Братск", "Ангарск"
-            ],
-            "Far Eastern Federal District": [
-                "Владивосток", "Хабаровск", "Улан-Удэ", "Чита", "Благовещенск", "Якутск", 
-                "Петропавловск-Камчатский", "Южно-Сахалинск", "Находка"
-            ],
-            "Kazakhstan": [
-                "Алматы", "Almaty", "Нур-Султан", "Астана", "Astana", "Шымкент", "Актобе", 
-                "Караганда", "Атырау", "Актау", "Павлодар", "Уральск"
-            ],
-            "Belarus": [
-                "Минск", "Minsk", "Гомель", "Витебск", "Могилев", "Гродно", "Брест"
-            ],
-            "Other countries / CIS": [
-                "Киев", "Kyiv", "Ташкент", "Бишкек", "Тбилиси", "Баку", "Ереван", "Рига", "Вильнюс"
-            ]
-        }
-
-        def extract_city(value: str) -> str:
-            city_name = value.split(',')[0].strip()
-            for region, cities in regions_map.items():
-                if city_name in cities:
-                    return region
-            return "Other"
-
-        dataframe["city"] = dataframe["Город"].apply(extract_city)
-        dataframe = dataframe.drop(columns=["Город"])
-
-        ctx.dataframe = dataframe
+        dataframe = ctx.dataframe
+
+        ctx.set_column("city", map_unique(dataframe["Город"], self.extract_city))
+        ctx.drop_columns(["Город"])
+
         logging.info("ParseCityHandler: Parsed city")
         return ctx
 
 class ParseEmploymentHandler(Handler):
     """Handler for parsing employment information."""
+    reads = ("Занятость",)
+    writes = ("emp_*", "Занятость")
+    parses_records = True
+
+    def parse_record(self, record: dict, ctx: PipelineContext) -> dict:
+        """Parse the employment flags of one record."""
+        _record_flags(record, record.pop("Занятость"), EMPLOYMENT_MATCHER, "emp_")
+        return record
+
     def _process(self, ctx: PipelineContext) -> PipelineContext:
         """
         Parse 'Занятость' column into binary flags.
@@ -234,33 +358,28 @@ class ParseEmploymentHandler(Handler):
             PipelineContext: Context updated with employment flags.
         """
         logging.info("ParseEmploymentHandler: Starting to parse employment")
-        dataframe = ctx.dataframe.copy()
-
-        employment_map = {
-            "full_time": ["полная занятость", "full time"],
-            "part_time": ["частичная занятость", "part time"],
-            "project": ["проектная работа", "project work"],
-            "internship": ["стажировка", "work placement"],
-            "volunteering": ["волонтерство", "volunteering"]
-        }
-
-        for column_name, keywords in employment_map.items():
-            def check_employment(value: str, kw=keywords) -> int:
-                value_lower = value.lower()
-                if any(keyword in value_lower for keyword in kw):
-                    return 1
-                return 0
-            
-            dataframe[f"emp_{column_name}"] = dataframe["Занятость"].apply(check_employment)
+        dataframe = ctx.dataframe
+
+        masks = EMPLOYMENT_MATCHER.match_column(dataframe["Занятость"])
+        for column_name in EMPLOYMENT_MAP:
+            ctx.set_column(f"emp_{column_name}", EMPLOYMENT_MATCHER.flags(masks, column_name))
 
-        dataframe = dataframe.drop(columns=["Занятость"])
+        ctx.drop_columns(["Занятость"])
 
-        ctx.dataframe = dataframe
         logging.info("ParseEmploymentHandler: Parsed employment")
         return ctx
 
 class ParseWorkScheduleHandler(Handler):
     """Handler for parsing work schedule information."""
+    reads = ("График",)
+    writes = ("sch_*", "График")
+    parses_records = True
+
+    def parse_record(self, record: dict, ctx: PipelineContext) -> dict:
+        """Parse the work schedule flags of one record."""
+        _record_flags(record, record.pop("График"), SCHEDULE_MATCHER, "sch_")
+        return record
+
     def _process(self, ctx: PipelineContext) -> PipelineContext:
         """
         Parse 'График' column into binary flags.
@@ -272,33 +391,42 @@ class ParseWorkScheduleHandler(Handler):
             PipelineContext: Context updated with schedule flags.
         """
         logging.info("ParseWorkScheduleHandler: Starting to parse work schedule")
-        dataframe = ctx.dataframe.copy()
-
-        schedule_map = {
-            "full_day": ["полный день", "full day"],
-            "flexible": ["гибкий график", "flexible schedule"],
-            "shift": ["сменный график", "shift schedule"],
-            "remote": ["удаленная работа", "remote working"],
-            "rotation": ["вахтовый метод", "rotation based work"]
-        }
-
-        for column_name, keywords in schedule_map.items():
-            def check_schedule(value: str, kw=keywords) -> int:
-                value_lower = value.lower()
-                if any(keyword in value_lower for keyword in kw):
-                    return 1
-                return 0
-            
-            dataframe[f"sch_{column_name}"] = dataframe["График"].apply(check_schedule)
+        dataframe = ctx.dataframe
 
-        dataframe = dataframe.drop(columns=["График"])
+        masks = SCHEDULE_MATCHER.match_column(dataframe["График"])
+        for column_name in SCHEDULE_MAP:
+            ctx.set_column(f"sch_{column_name}", SCHEDULE_MATCHER.flags(masks, column_name))
+
+        ctx.drop_columns(["График"])
 
-        ctx.dataframe = dataframe
         logging.info("ParseWorkScheduleHandler: Parsed work schedule")
         return ctx
 
 class ParseExperienceHandler(Handler):
     """Handler for parsing experience information."""
+    reads = ("Опыт (двойное нажатие для полной версии)",)
+    writes = ("experience_months",)
+    parses_records = True
+
+    @staticmethod
+    def extract_experience(value: str) -> int:
+        """Total experience in months."""
+        if not isinstance(value, str):
+            return 0
+        years_match = YEARS_PATTERN.search(value)
+        months_match = MONTHS_PATTERN.search(value)
+        total = 0
+        if years_match:
+            total += int(years_match.group(1)) * 12
+        if months_match:
+            total += int(months_match.group(1))
+        return total
+
+    def parse_record(self, record: dict, ctx: PipelineContext) -> dict:
+        """Parse the experience of one record, the description is kept for the NLP handler."""
+        record["experience_months"] = self.extract_experience(record["Опыт (двойное нажатие для полной версии)"])
+        return record
+
     def _process(self, ctx: PipelineContext) -> PipelineContext:
         """
         Parse 'Опыт' string into total months.
@@ -310,27 +438,85 @@ class ParseExperienceHandler(Handler):
             PipelineContext: Context updated with 'experience_months' column.
         """
         logging.info("ParseExperienceHandler: Parsing experience")
-        dataframe = ctx.dataframe.copy()
-
-        def extract(value: str) -> int:
-            if not isinstance(value, str): 
-                return 0
-            years_match = re.search(r'(\d+)\s*(?:год|года|лет)', value)
-            months_match = re.search(r'(\d+)\s*(?:месяц|месяца|месяцев)', value)
-            total = 0
-            if years_match:
-                total += int(years_match.group(1)) * 12
-            if months_match:
-                total += int(months_match.group(1))
-            return total
-        
-        dataframe["experience_months"] = dataframe["Опыт (двойное нажатие для полной версии)"].apply(extract)
-        ctx.dataframe = dataframe
+        dataframe = ctx.dataframe
+
+        ctx.set_column("experience_months", map_unique(dataframe["Опыт (двойное нажатие для полной версии)"], self.extract_experience))
         logging.info("ParseExperienceHandler: Done")
         return ctx
 
 class ParseEperienceNLPHandler(Handler):
     """Handler for NLP processing of experience description."""
+    reads = ("Опыт (двойное нажатие для полной версии)",)
+    writes = ("tfidf_*", "Опыт (двойное нажатие для полной версии)")
+    requires_global_stats = True
+    parses_records = True
+
+    _TEXT_COL = 'Опыт (двойное нажатие для полной версии)'
+
+    @staticmethod
+    def _extract_text(value: str) -> str:
+        """Cut the experience duration header off the description."""
+        text = ''
+        try:
+            possible_strings = ['месяц', 'год', 'лет']
+            drop_index = -1
+            for current in possible_strings:
+                drop_index = max(value.find(current) + len(current), drop_index)
+            if drop_index != -1:
+                text = value[drop_index + 2:] # +2 accounts for skip double '\n\n'
+        except Exception as error:
+            logging.info(error)
+        return text
+
+    def parse_record(self, record: dict, ctx: PipelineContext) -> dict:
+        """
+        TF-IDF features of the description of one record with the fitted vectorizer.
+
+        The weights are computed the way TfidfVectorizer.transform computes them (binary counts times idf,
+        l2 normalization summed in the column order), without building a sparse matrix for one text.
+        """
+        value = record.pop(self._TEXT_COL)
+        if ctx.tfidf is None:
+            return record
+        analyzer, vocabulary, idf, names, zeros = _tfidf_tables(ctx.tfidf)
+        record.update(zeros)
+        terms = sorted({vocabulary[term] for term in analyzer(str(self._extract_text(value))) if term in vocabulary})
+        weights = [idf[term] for term in terms]
+        norm = 0.0
+        for weight in weights:
+            norm += weight * weight
+        if norm == 0:
+            return record
+        norm = math.sqrt(norm)
+        for term, weight in zip(terms, weights):
+            record[names[term]] = weight / norm
+        return record
+
+    def _texts(self, dataframe: pd.DataFrame) -> pd.Series:
+        return map_unique(dataframe[self._TEXT_COL], self._extract_text).astype(str)
+
+    @staticmethod
+    def _vectorizer() -> TfidfVectorizer:
+        return TfidfVectorizer(
+            max_features=50,
+            ngram_range=(1, 2),
+            binary=True
+        )
+
+    def fit(self, ctx: PipelineContext) -> None:
+        """
+        Fit the TF-IDF vocabulary on the descriptions of the whole dataframe.
+
+        Args:
+            ctx: Pipeline context containing the dataframe.
+        """
+        if ctx.tfidf is not None or self._TEXT_COL not in ctx.dataframe.columns:
+            return
+        try:
+            ctx.tfidf = self._vectorizer().fit(self._texts(ctx.dataframe))
+        except Exception as e:
+            logging.error(f"ParseDescriptionNLPHandler: NLP failed: {e}")
+
     def _process(self, ctx: PipelineContext) -> PipelineContext:
         """
         Extract TF-IDF features from experience description.
@@ -342,57 +528,53 @@ class ParseEperienceNLPHandler(Handler):
             PipelineContext: Context updated with TF-IDF features.
         """
         logging.info("ParseDescriptionNLPHandler: Starting NLP processing")
-        dataframe = ctx.dataframe.copy()
+        dataframe = ctx.dataframe
         
-        text_col = 'Опыт (двойное нажатие для полной версии)'
+        text_col = self._TEXT_COL
             
         if text_col not in dataframe.columns:
             logging.warning(f"ParseDescriptionNLPHandler: Column '{text_col}' not found. Skipping NLP.")
             return ctx
-        
-        tfidf = TfidfVectorizer(
-            max_features=50,
-            ngram_range=(1, 2),
-            binary=True
-        )
 
-        def extract_text(value: str) -> int:
-            text = ''
-            try:
-                possible_strings = ['месяц', 'год', 'лет']
-                drop_index = -1
-                for current in possible_strings:
-                    drop_index = max(value.find(current) + len(current), drop_index)
-                if drop_index != -1:
-                    text = value[drop_index + 2:] # +2 accounts for skip double '\n\n'
-            except Exception as error:
-                logging.info(error)
-            return text
-        
-        texts = dataframe[text_col].apply(extract_text).astype(str)
+        texts = self._texts(dataframe)
         
         try:
-            tfidf_matrix = tfidf.fit_transform(texts)
-            feature_names = [f"tfidf_{name}" for name in tfidf.get_feature_names_out()]
+            # The vocabulary may be already fitted on the whole dataframe (e.g. in sharded mode).
+            if ctx.tfidf is None:
+                tfidf = self._vectorizer()
+                tfidf_matrix = tfidf.fit_transform(texts)
+                ctx.tfidf = tfidf
+            else:
+                tfidf_matrix = ctx.tfidf.transform(texts)
+            feature_names = [f"tfidf_{name}" for name in ctx.tfidf.get_feature_names_out()]
             
-            tfidf_df = pd.DataFrame(
-                tfidf_matrix.toarray(), 
-                columns=feature_names, 
+            # Sparse columns keep only the nonzero weights, so max_features can grow without densifying
+            tfidf_df = pd.DataFrame.sparse.from_spmatrix(
+                tfidf_matrix,
+                columns=feature_names,
                 index=dataframe.index
             )
             
-            dataframe = pd.concat([dataframe, tfidf_df], axis=1)
+            ctx.add_columns(tfidf_df)
             logging.info(f"ParseDescriptionNLPHandler: Added {len(feature_names)} TF-IDF features")
             
         except Exception as e:
             logging.error(f"ParseDescriptionNLPHandler: NLP failed: {e}")
             
-        dataframe = dataframe.drop(columns=[text_col])
-        ctx.dataframe = dataframe
+        ctx.drop_columns([text_col])
         return ctx
 
 class ParseLastPlaceHandler(Handler):
     """Handler for parsing last place information."""
+    reads = ("Последенее/нынешнее место работы",)
+    writes = ("Последенее/нынешнее место работы",)
+    parses_records = True
+
+    def parse_record(self, record: dict, ctx: PipelineContext) -> dict:
+        """Drop the last place of one record."""
+        record.pop("Последенее/нынешнее место работы", None)
+        return record
+
     def _process(self, ctx: PipelineContext) -> PipelineContext:
         """
         Drop 'Последенее/нынешнее место работы' column.
@@ -404,11 +586,32 @@ class ParseLastPlaceHandler(Handler):
             PipelineContext: Context with the column removed.
         """
         logging.info("ParseLastPlaceHandler: Dropping column")
-        ctx.dataframe = ctx.dataframe.drop(columns=["Последенее/нынешнее место работы"])
+        ctx.drop_columns(["Последенее/нынешнее место работы"])
         return ctx
 
 class ParseLastJobHandler(Handler):
     """Handler for parsing last job information."""
+    reads = ("Последеняя/нынешняя должность", "job")
+    writes = ("last_job", "Последеняя/нынешняя должность")
+    requires_global_stats = True
+    parses_records = True
+
+    def fit(self, ctx: PipelineContext) -> None:
+        """
+        Take the normalized job titles of the whole dataframe if the job vocabulary is not known yet.
+
+        Args:
+            ctx: Pipeline context containing the dataframe.
+        """
+        if ctx.job_vocabulary is None and 'job' in ctx.dataframe:
+            ctx.job_vocabulary = ctx.dataframe['job'].value_counts().index
+
+    def parse_record(self, record: dict, ctx: PipelineContext) -> dict:
+        """Normalize the last job title of one record with the fitted vocabulary."""
+        jobs = ctx.job_vocabulary if ctx.job_vocabulary is not None else []
+        record["last_job"] = ParseJobHandler.extract_job(record.pop("Последеняя/нынешняя должность"), jobs)
+        return record
+
     def _process(self, ctx: PipelineContext) -> PipelineContext:
         """
         Normalize 'Последеняя/нынешняя должность' to top 133 or 'other'.
@@ -420,20 +623,30 @@ class ParseLastJobHandler(Handler):
             PipelineContext: Context updated with 'last_job' column.
         """
         logging.info("ParseLastJobHandler: Parsing last job")
-        dataframe = ctx.dataframe.copy()
+        dataframe = ctx.dataframe
         
-        # Note: ideally reuse top_jobs from ParseJobHandler
-        jobs = dataframe['job'].value_counts().index if 'job' in dataframe else []
+        self.fit(ctx)
+        jobs = ctx.job_vocabulary if ctx.job_vocabulary is not None else []
         
-        dataframe["last_job"] = dataframe["Последеняя/нынешняя должность"].apply(
-            lambda job_title: job_title if job_title in jobs else "other"
-        )
-        ctx.dataframe = dataframe.drop(columns=["Последеняя/нынешняя должность"])
+        ctx.set_column("last_job", map_unique(
+            dataframe["Последеняя/нынешняя должность"],
+            lambda job_title: ParseJobHandler.extract_job(job_title, jobs)
+        ))
+        ctx.drop_columns(["Последеняя/нынешняя должность"])
         logging.info("ParseLastJobHandler: Done")
         return ctx
 
 class ParseEducationHandler(Handler):
     """Handler for parsing education information."""
+    reads = ("Образование и ВУЗ",)
+    writes = ("edu_*", "Образование и ВУЗ")
+    parses_records = True
+
+    def parse_record(self, record: dict, ctx: PipelineContext) -> dict:
+        """Parse the education flags of one record."""
+        _record_flags(record, record.pop("Образование и ВУЗ"), EDUCATION_MATCHER, "edu_")
+        return record
+
     def _process(self, ctx: PipelineContext) -> PipelineContext:
         """
         Parse 'Образование и ВУЗ' into binary education level flags.
@@ -445,26 +658,36 @@ class ParseEducationHandler(Handler):
             PipelineContext: Context updated with education flags.
         """
         logging.info("ParseEducationHandler: Parsing education")
-        dataframe = ctx.dataframe.copy()
+        dataframe = ctx.dataframe
         
-        mapping = {
-            "incomplete_higher": ["неоконченное высшее", "incomplete higher"],
-            "higher": ["высшее образование", "higher education"],
-            "secondary_special": ["среднее специальное", "secondary special"],
-            "secondary": ["среднее образование", "secondary education"]
-        }
-
-        for column_suffix, keywords in mapping.items():
-            dataframe[f"edu_{column_suffix}"] = dataframe["Образование и ВУЗ"].apply(
-                lambda s, kw=keywords: 1 if any(k in s.lower() for k in kw) else 0
-            )
+        masks = EDUCATION_MATCHER.match_column(dataframe["Образование и ВУЗ"])
+        for column_suffix in EDUCATION_MAP:
+            ctx.set_column(f"edu_{column_suffix}", EDUCATION_MATCHER.flags(masks, column_suffix))
 
-        ctx.dataframe = dataframe.drop(columns=["Образование и ВУЗ"])
+        ctx.drop_columns(["Образование и ВУЗ"])
         logging.info("ParseEducationHandler: Done")
         return ctx
 
 class ParseResumeHandler(Handler):
     """Handler for parsing resume information."""
+    reads = ("Обновление резюме",)
+    writes = ("old_resume", "Обновление резюме")
+    parses_records = True
+
+    @staticmethod
+    def is_old(date_string: str) -> int:
+        """1 if the resume was updated in 2018 or earlier, 0 otherwise."""
+        try:
+            year = int(date_string.split('.')[2].split(' ')[0])
+            return 0 if year > 2018 else 1
+        except (ValueError, IndexError, AttributeError):
+            return 0
+
+    def parse_record(self, record: dict, ctx: PipelineContext) -> dict:
+        """Parse the resume update flag of one record."""
+        record["old_resume"] = self.is_old(record.pop("Обновление резюме"))
+        return record
+
     def _process(self, ctx: PipelineContext) -> PipelineContext:
         """
         Parse 'Обновление резюме' to create 'old_resume' flag.
@@ -476,22 +699,29 @@ class ParseResumeHandler(Handler):
             PipelineContext: Context updated with 'old_resume' flag.
         """
         logging.info("ParseResumeHandler: Parsing resume date")
-        dataframe = ctx.dataframe.copy()
+        dataframe = ctx.dataframe
 
-        def is_old(date_string: str) -> int:
-            try:
-                year = int(date_string.split('.')[2].split(' ')[0])
-                return 0 if year > 2018 else 1
-            except (ValueError, IndexError, AttributeError):
-                return 0
-
-        dataframe["old_resume"] = dataframe["Обновление резюме"].apply(is_old)
-        ctx.dataframe = dataframe.drop(columns=["Обновление резюме"])
+        ctx.set_column("old_resume", map_unique(dataframe["Обновление резюме"], self.is_old))
+        ctx.drop_columns(["Обновление резюме"])
         logging.info("ParseResumeHandler: Done")
         return ctx
 
 class ParseAutoHandler(Handler):
     """Handler for parsing auto information."""
+    reads = ("Авто",)
+    writes = ("auto", "Авто")
+    parses_records = True
+
+    @staticmethod
+    def has_auto(auto_status: str) -> int:
+        """1 if the resume mentions an own car, 0 otherwise."""
+        return 1 if auto_status == 'Имеется собственный автомобиль' else 0
+
+    def parse_record(self, record: dict, ctx: PipelineContext) -> dict:
+        """Parse the auto flag of one record."""
+        record["auto"] = self.has_auto(record.pop("Авто"))
+        return record
+
     def _process(self, ctx: PipelineContext) -> PipelineContext:
         """
         Parse 'Авто' to create 'auto' ownership flag.
@@ -503,10 +733,7 @@ class ParseAutoHandler(Handler):
             PipelineContext: Context updated with 'auto' flag.
         """
         logging.info("ParseAutoHandler: Parsing auto")
-        dataframe = ctx.dataframe.copy()
-        dataframe["auto"] = dataframe["Авто"].apply(
-            lambda auto_status: 1 if auto_status == 'Имеется собственный автомобиль' else 0
-        )
-        ctx.dataframe = dataframe.drop(columns=["Авто"])
+        ctx.set_column("auto", map_unique(ctx.dataframe["Авто"], self.has_auto))
+        ctx.drop_columns(["Авто"])
         logging.info("ParseAutoHandler: Done")
         return ctx
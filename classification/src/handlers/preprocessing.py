@@ -3,13 +3,19 @@ import logging
 import pandas as pd
 
 from src.core import Handler, PipelineContext
+from src.utils.sparse import to_csr
 
 class EncodeCategoricalFeaturesHandler(Handler):
     """Handler for encoding categorical features."""
+    row_local = False
+
     def _process(self, ctx: PipelineContext) -> PipelineContext:
         """
         One-hot encode categorical columns, excluding the target 'grade'.
 
+        The dummy columns are sparse, so a large job vocabulary does not grow the dataframe.
+        Fixed categories (ctx.categories) give the same dummy columns for any subset of rows.
+
         Args:
             ctx: Pipeline context containing the dataframe.
 
@@ -17,20 +23,25 @@ class EncodeCategoricalFeaturesHandler(Handler):
             PipelineContext: Context with encoded dataframe.
         """
         logging.info("EncodeCategoricalFeaturesHandler: Encoding categorical features")
-        dataframe = ctx.dataframe.copy()
+        dataframe = ctx.dataframe
 
         # Exclude target 'grade' from encoding
         cat_cols = dataframe.select_dtypes(include="object").columns.tolist()
         if 'grade' in cat_cols:
             cat_cols.remove('grade')
-            
-        dataframe = pd.get_dummies(dataframe, columns=cat_cols, drop_first=True)
-        ctx.dataframe = dataframe
-        logging.info(f"EncodeCategoricalFeaturesHandler: Done (features: {dataframe.shape[1]})")
+
+        if ctx.categories is None:
+            ctx.categories = {col: sorted(dataframe[col].dropna().unique()) for col in cat_cols}
+        for col in cat_cols:
+            ctx.set_column(col, pd.Categorical(dataframe[col], categories=ctx.categories[col]))
+        ctx.dataframe = pd.get_dummies(dataframe, columns=cat_cols, drop_first=True, sparse=True)
+        logging.info(f"EncodeCategoricalFeaturesHandler: Done (features: {ctx.dataframe.shape[1]})")
         return ctx
 
 class SplitDataHandler(Handler):
     """Handler for splitting data for regression (salary target)."""
+    row_local = False
+
     def _process(self, ctx: PipelineContext) -> PipelineContext:
         """
         Split dataframe into features and target (salary_rub).
@@ -49,26 +60,43 @@ class SplitDataHandler(Handler):
 
 class SplitClassificationDataHandler(Handler):
     """Handler for splitting data for classification (grade target)."""
+    row_local = False
+
     def _process(self, ctx: PipelineContext) -> PipelineContext:
         """
         Split dataframe into features and target (grade).
 
+        The features are a float32 CSR matrix (see to_csr), its columns are listed in feature_names.
+        If categorical columns were left without one-hot encoding, the features stay a dataframe
+        with dense numeric columns and string categorical ones (listed in cat_features) for CatBoost.
+
         Args:
             ctx: Pipeline context containing the dataframe.
 
         Returns:
-            PipelineContext: Context with features, target, and feature_names populated.
+            PipelineContext: Context with features, target, feature_names and cat_features populated.
         """
         logging.info("SplitClassificationDataHandler: Splitting features/target")
-        dataframe = ctx.dataframe.copy()
-        
+        dataframe = ctx.dataframe
+
         if 'grade' not in dataframe.columns:
             logging.error("Grade column not found!")
             return ctx
-            
+
+        features = dataframe.drop(columns=['grade'])
         ctx.target = dataframe['grade'].values
-        ctx.features = dataframe.drop(columns=['grade']).values
-        ctx.feature_names = dataframe.drop(columns=['grade']).columns.tolist()
+        if ctx.fitted is not None:
+            features = ctx.fitted.align(features)
+        ctx.cat_features = features.select_dtypes(include="object").columns.tolist()
+        if ctx.cat_features:
+            if ctx.categories is None:
+                ctx.categories = {col: sorted(features[col].dropna().unique()) for col in ctx.cat_features}
+            sparse_cols = [col for col, dtype in features.dtypes.items() if isinstance(dtype, pd.SparseDtype)]
+            features = features.astype({col: features[col].dtype.subtype for col in sparse_cols})
+            ctx.features = features.fillna({col: "" for col in ctx.cat_features})
+        else:
+            ctx.features = to_csr(features)
+        ctx.feature_names = features.columns.tolist()
         ctx.dataframe = None
         logging.info("SplitClassificationDataHandler: Done")
         return ctx
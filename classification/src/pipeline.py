@@ -12,10 +12,13 @@ from src.handlers.preprocessing import (
     EncodeCategoricalFeaturesHandler, SplitClassificationDataHandler
 )
 
-def build_pipeline() -> Handler:
+def build_pipeline(native_categorical: bool = False) -> Handler:
     """
     Builds the full data processing pipeline by chaining together all handlers in the required order.
 
+    Args:
+        native_categorical: Skip one-hot encoding and keep the categorical columns for CatBoost cat_features.
+
     Returns:
         Handler: The first handler in the pipeline (LoadCSVHandler).
     """
@@ -49,8 +52,12 @@ def build_pipeline() -> Handler:
         .set_next(last_place)\
         .set_next(education)\
         .set_next(resume)\
-        .set_next(auto)\
-        .set_next(encode_categorical_features)\
-        .set_next(split_data)
+        .set_next(auto)
+
+    if native_categorical:
+        auto.set_next(split_data)
+    else:
+        auto.set_next(encode_categorical_features)\
+            .set_next(split_data)
     
     return load
@@ -0,0 +1,130 @@
+from __future__ import annotations
+
+from pathlib import Path
+from typing import Iterable, Mapping, Optional
+
+import numpy as np
+
+from src.core import Handler, PipelineContext
+from src.fitted import FittedPipeline
+from src.pipeline import build_pipeline
+
+
+class RecordFeaturizer:
+    """
+    Featurizes single resumes (dicts of raw hh.csv fields) for online scoring, without pandas.
+
+    The row-local handlers of the pipeline process the record one after another (parse_record) with the
+    same parsers and lookup tables as the batch run; the fitted pipeline gives the TF-IDF vectorizer and
+    the layout of the one-hot columns. The vector is exactly the row a transform-only run with the same
+    pipeline.pkl gives for the resume. A resume which is not an IT role is filtered out, as in the batch run.
+
+    Attributes:
+        fitted: The fitted pipeline.
+        columns: Names of the vector values (the fitted columns).
+        categorical: Columns left without one-hot encoding (native categorical mode only).
+        dtype: Dtype of the one-hot encoded vectors.
+    """
+    dtype = np.float32
+
+    def __init__(self, fitted: FittedPipeline, pipeline: Optional[Handler] = None):
+        self.fitted = fitted
+        pipeline = pipeline or build_pipeline(native_categorical=fitted.native_categorical)
+        self.handlers = [handler for handler in pipeline.iter_chain() if handler.row_local]
+        # Every row-local handler must parse single records, otherwise the vector misses its columns
+        unsupported = [type(handler).__name__ for handler in self.handlers if not handler.parses_records]
+        if unsupported:
+            raise ValueError(f"RecordFeaturizer: handlers {', '.join(unsupported)} do not parse single records (parses_records)")
+        self.ctx = fitted.apply(PipelineContext(csv_path=Path()))
+        if fitted.job_vocabulary is not None:
+            # A set lookup is several times faster than pd.Index.__contains__ for a single value
+            self.ctx.job_vocabulary = frozenset(fitted.job_vocabulary)
+
+        self.columns = list(fitted.columns)
+        self.categorical = [col for col in self.columns if fitted.native_categorical and col in fitted.categories]
+        position = {col: idx for idx, col in enumerate(self.columns)}
+
+        # Position of the dummy column of every category; the first category has none (drop_first),
+        # as well as the values unseen in fit
+        self._onehot = []
+        dummies = set()
+        if not fitted.native_categorical:
+            for col, values in fitted.categories.items():
+                positions = {value: position[f"{col}_{value}"] for value in values[1:] if f"{col}_{value}" in position}
+                self._onehot.append((col, positions))
+                dummies.update(positions.values())
+        numeric = [(idx, col) for idx, col in enumerate(self.columns) if idx not in dummies]
+        self._positions = np.array([idx for idx, _ in numeric], dtype=np.intp)
+        self._value_columns = [col for _, col in numeric]
+
+    def parse(self, record: Mapping[str, str]) -> Optional[dict]:
+        """
+        Run the row-local handlers on one record.
+
+        Args:
+            record: Raw fields of one resume by hh.csv column names.
+
+        Returns:
+            Optional[dict]: The parsed fields, or None if the record is filtered out.
+
+        Raises:
+            ValueError: If the record misses a field the pipeline needs.
+        """
+        parsed = dict(record)
+        try:
+            for handler in self.handlers:
+                parsed = handler.parse_record(parsed, self.ctx)
+                if parsed is None:
+                    return None
+        except KeyError as e:
+            raise ValueError(f"RecordFeaturizer: record has no field {e}") from None
+        return parsed
+
+    def transform(self, record: Mapping[str, str]) -> Optional[np.ndarray]:
+        """
+        Feature vector of one record.
+
+        Args:
+            record: Raw fields of one resume by hh.csv column names.
+
+        Returns:
+            Optional[np.ndarray]: Values of self.columns (float32, or object with the categorical strings
+                in native categorical mode), None if the record is filtered out.
+
+        Raises:
+            ValueError: If the record misses a field the pipeline needs.
+        """
+        parsed = self.parse(record)
+        if parsed is None:
+            return None
+        try:
+            values = [parsed[col] for col in self._value_columns]
+        except KeyError as e:
+            raise ValueError(f"RecordFeaturizer: the pipeline gives no value for column {e}") from None
+        if self.categorical:
+            # Native categorical features keep the values and column order of the dataframe
+            return np.array(values, dtype=object)
+        vector = np.zeros(len(self.columns), dtype=self.dtype)
+        vector[self._positions] = values
+        for col, positions in self._onehot:
+            idx = positions.get(parsed[col])
+            if idx is not None:
+                vector[idx] = 1
+        return vector
+
+    def transform_many(self, records: Iterable[Mapping[str, str]]) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Feature matrix of several records.
+
+        Args:
+            records: Raw fields of the resumes.
+
+        Returns:
+            tuple[np.ndarray, np.ndarray]: Rows of the records kept by the filter and the boolean mask of kept records.
+        """
+        vectors = [self.transform(record) for record in records]
+        kept = np.array([vector is not None for vector in vectors], dtype=bool)
+        rows = [vector for vector in vectors if vector is not None]
+        if not rows:
+            return np.zeros((0, len(self.columns)), dtype=object if self.categorical else self.dtype), kept
+        return np.vstack(rows), kept
@@ -0,0 +1,129 @@
+import logging
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from dataclasses import fields, replace
+from fnmatch import fnmatchcase
+from typing import Optional
+
+import pandas as pd
+
+from src.core import Handler, PipelineContext
+
+# Context fields that are never merged back from a stage.
+_LOCAL_FIELDS = ("dataframe", "snapshots", "profiler")
+
+
+def _overlap(columns: tuple[str, ...], other: tuple[str, ...]) -> bool:
+    """
+    Checks if two column declarations share a column (declarations may contain glob patterns).
+    """
+    return any(fnmatchcase(col, pattern) or fnmatchcase(pattern, col) for col in columns for pattern in other)
+
+
+def _depends(stage: Handler, earlier: Handler) -> bool:
+    """
+    Checks if `stage` has to wait for `earlier` (read-after-write, write-after-read or write-after-write).
+    """
+    if stage.reads is None or earlier.reads is None:
+        return True
+    return (
+        _overlap(stage.reads, earlier.writes)
+        or _overlap(stage.writes, earlier.reads)
+        or _overlap(stage.writes, earlier.writes)
+    )
+
+
+def build_dag(stages: list[Handler]) -> list[set[int]]:
+    """
+    Builds the dependency DAG of the stages from their declared columns.
+
+    The order of the chain is the spec: a stage may only depend on the stages before it.
+
+    Args:
+        stages: handlers in the order of the chain.
+
+    Returns:
+        list[set[int]]: indices of the stages every stage depends on.
+    """
+    return [
+        {idx for idx in range(pos) if _depends(stage, stages[idx])}
+        for pos, stage in enumerate(stages)
+    ]
+
+
+def _run_stage(stage: Handler, ctx: PipelineContext) -> tuple[pd.DataFrame, dict, dict, list]:
+    """
+    Runs one stage on a projected context (also in a worker process).
+
+    Returns:
+        the resulting dataframe, the context fields changed by the stage, the debug snapshots
+        and the profiles recorded in a worker process.
+    """
+    before = {item.name: getattr(ctx, item.name) for item in fields(ctx) if item.name not in _LOCAL_FIELDS}
+    ctx = stage.run(ctx)
+    changed = {name: getattr(ctx, name) for name, value in before.items() if getattr(ctx, name) is not value}
+    profiles = ctx.profiler.stages if ctx.profiler is not None and ctx.profiler.is_remote else []
+    return ctx.dataframe, changed, ctx.snapshots, profiles
+
+
+def _project(stage: Handler, ctx: PipelineContext) -> PipelineContext:
+    columns = [col for col in ctx.dataframe.columns if _overlap((col,), stage.reads)]
+    return replace(ctx, dataframe=ctx.dataframe[columns], snapshots={})
+
+
+def _merge(stage: Handler, ctx: PipelineContext, projected: list[str], result: tuple[pd.DataFrame, dict, dict, list]) -> None:
+    """
+    Applies the column delta of a stage to the shared dataframe, as if the stage ran on it directly.
+    """
+    dataframe, changed, snapshots, profiles = result
+    for col in dataframe.columns:
+        if col not in projected or _overlap((col,), stage.writes):
+            ctx.set_column(col, dataframe[col])
+    ctx.drop_columns([col for col in projected if col not in dataframe.columns])
+    for name, value in changed.items():
+        setattr(ctx, name, value)
+    ctx.snapshots.update(snapshots)
+    if profiles:
+        ctx.profiler.stages.extend(profiles)
+
+
+def run_scheduled(pipeline: Handler, ctx: PipelineContext, executor: str = "thread", max_workers: Optional[int] = None) -> PipelineContext:
+    """
+    Runs the chain as a DAG: independent stages run concurrently on the columns they declared.
+
+    Every stage gets a context with only its `reads` columns. The column deltas are merged back
+    in the order of the chain, so the result (including the column order) is the same as pipeline.handle(ctx).
+    Stages without declarations (reads = None) run alone in the main thread.
+
+    Args:
+        pipeline: first handler of the chain (e.g. build_pipeline()).
+        ctx: initial context.
+        executor: "thread" or "process" pool for the independent stages.
+        max_workers: size of the pool (default - chosen by concurrent.futures).
+
+    Returns:
+        PipelineContext: the processed context.
+    """
+    stages = list(pipeline.iter_chain())
+    dependencies = build_dag(stages)
+    pools: dict[str, type[Executor]] = {"thread": ThreadPoolExecutor, "process": ProcessPoolExecutor}
+    if executor not in pools:
+        raise ValueError(f"Unknown executor {executor!r}, expected one of {list(pools)}")
+
+    submitted: dict[int, tuple[list[str], object]] = {}
+    with pools[executor](max_workers=max_workers) as pool:
+        for pos, stage in enumerate(stages):
+            # start every declared stage whose dependencies are already merged
+            for idx in range(pos, len(stages)):
+                candidate = stages[idx]
+                if idx in submitted or candidate.reads is None or any(dep >= pos for dep in dependencies[idx]):
+                    continue
+                projected = _project(candidate, ctx)
+                submitted[idx] = (list(projected.dataframe.columns), pool.submit(_run_stage, candidate, projected))
+
+            if pos in submitted:
+                projected_columns, future = submitted.pop(pos)
+                _merge(stage, ctx, projected_columns, future.result())
+            else:
+                ctx = stage.run(ctx)
+            logging.debug(f"Scheduler: Merged {type(stage).__name__}")
+    return ctx
@@ -0,0 +1,137 @@
+from __future__ import annotations
+
+import logging
+import os
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import replace
+from pathlib import Path
+from tempfile import TemporaryDirectory
+from typing import Optional, Union
+
+import numpy as np
+import pandas as pd
+
+from src.core import Handler, PipelineContext
+
+try:
+    import pyarrow as pa
+    import pyarrow.ipc
+except ImportError:
+    pa = None
+
+# tmpfs: Arrow files written there never touch the disk and are memory-mapped by the readers
+SHARED_MEMORY_DIR = Path("/dev/shm")
+
+Shard = Union[Path, pd.DataFrame]
+
+
+def _dump(dataframe: pd.DataFrame, path: Path) -> Shard:
+    """
+    Writes the dataframe into an Arrow IPC file in shared memory.
+
+    Returns:
+        the path of the file, or the dataframe itself (sent by pickle) if it cannot be stored in Arrow.
+    """
+    if pa is None:
+        return dataframe
+    try:
+        table = pa.Table.from_pandas(dataframe, preserve_index=True)
+        with pa.OSFile(str(path), "wb") as sink, pa.ipc.new_file(sink, table.schema) as writer:
+            writer.write_table(table)
+        return path
+    except (pa.ArrowException, TypeError, ValueError, OSError) as error:
+        logging.debug(f"Sharding: Falling back to pickle for {path.name} ({error})")
+        path.unlink(missing_ok=True)
+        return dataframe
+
+
+def _load(shard: Shard) -> pd.DataFrame:
+    """
+    Reads a shard written by _dump and removes its file.
+    """
+    if isinstance(shard, pd.DataFrame):
+        return shard
+    with pa.memory_map(str(shard)) as source:
+        dataframe = pa.ipc.open_file(source).read_all().to_pandas()
+    shard.unlink()
+    return dataframe
+
+
+def _run_shard(stages: list[Handler], ctx: PipelineContext, shard: Shard, out_path: Path) -> tuple[Shard, list]:
+    """
+    Runs the row-local stages on one shard in a worker process.
+
+    Returns:
+        the resulting shard and the profiles recorded in the worker.
+    """
+    ctx = replace(ctx, dataframe=_load(shard), snapshots={})
+    for stage in stages:
+        ctx = stage.run(ctx)
+    profiles = ctx.profiler.stages if ctx.profiler is not None and ctx.profiler.is_remote else []
+    return _dump(ctx.dataframe, out_path), profiles
+
+
+def _run_segment(pool: ProcessPoolExecutor, stages: list[Handler], ctx: PipelineContext, n_shards: int, shm_dir: Path, segment: int) -> PipelineContext:
+    dataframe = ctx.dataframe
+    bounds = np.linspace(0, len(dataframe), n_shards + 1).astype(int)
+    # only the dataframe is sent through shared memory, the rest of the context is small
+    worker_ctx = replace(ctx, dataframe=None, snapshots={})
+    futures = []
+    for idx, (start, stop) in enumerate(zip(bounds[:-1], bounds[1:])):
+        shard = _dump(dataframe.iloc[start:stop], shm_dir / f"{segment}_{idx}_in.arrow")
+        futures.append(pool.submit(_run_shard, stages, worker_ctx, shard, shm_dir / f"{segment}_{idx}_out.arrow"))
+
+    parts = []
+    for future in futures:
+        shard, profiles = future.result()
+        parts.append(_load(shard))
+        if profiles:
+            ctx.profiler.stages.extend(profiles)
+    # shards are row ranges, so concatenating them in order keeps the order of the index
+    ctx.dataframe = pd.concat(parts)
+    return ctx
+
+
+def run_sharded(pipeline: Handler, ctx: PipelineContext, max_workers: Optional[int] = None) -> PipelineContext:
+    """
+    Runs the chain with the row-local handlers sharded by row ranges across a process pool.
+
+    Consecutive row-local handlers form a segment: the dataframe is split into one row range per worker,
+    every worker runs the whole segment on its range, and the results are concatenated in index order.
+    Shards are passed through Arrow IPC files in shared memory (pickle without pyarrow).
+
+    Other handlers run in the main process on the whole dataframe. A handler with requires_global_stats
+    starts a new segment: its fit(ctx) runs on the whole dataframe first, and the statistics are sent to
+    the workers with the context. Workers may change only the dataframe, other context fields
+    are taken from the main process; debug snapshots of sharded stages are not collected.
+
+    Args:
+        pipeline: first handler of the chain (e.g. build_pipeline()).
+        ctx: initial context.
+        max_workers: number of worker processes (default os.cpu_count()).
+
+    Returns:
+        PipelineContext: the processed context.
+    """
+    stages = list(pipeline.iter_chain())
+    n_shards = max_workers or os.cpu_count() or 1
+    shm_root = SHARED_MEMORY_DIR if SHARED_MEMORY_DIR.is_dir() else None
+
+    with ProcessPoolExecutor(max_workers=n_shards) as pool, TemporaryDirectory(prefix="classification_shards_", dir=shm_root) as shm_dir:
+        pos = segment = 0
+        while pos < len(stages):
+            stage = stages[pos]
+            if not stage.row_local or ctx.dataframe is None:
+                ctx = stage.run(ctx)
+                pos += 1
+                continue
+
+            stage.fit(ctx)
+            end = pos + 1
+            while end < len(stages) and stages[end].row_local and not stages[end].requires_global_stats:
+                end += 1
+            names = [type(item).__name__ for item in stages[pos:end]]
+            logging.info(f"Sharding: Running {names} on {len(ctx.dataframe)} rows in {n_shards} shards")
+            ctx = _run_segment(pool, stages[pos:end], ctx, n_shards, Path(shm_dir), segment)
+            pos, segment = end, segment + 1
+    return ctx
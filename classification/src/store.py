@@ -0,0 +1,249 @@
+from __future__ import annotations
+
+import fnmatch
+import json
+import logging
+import os
+import shutil
+from pathlib import Path
+from typing import Optional, Sequence, Union
+
+import numpy as np
+import pandas as pd
+import scipy.sparse as sp
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = None
+
+DEFAULT_STORE_DIR = Path("feature_store")
+MANIFEST_NAME = "manifest.json"
+# Version of the manifest layout; a store of another version is not read.
+STORE_FORMAT_VERSION = 1
+# Rows of one Parquet file and of one row group in it: a read of a row range opens only the files
+# and row groups it overlaps.
+ROWS_PER_PARTITION = 131072
+ROW_GROUP_SIZE = 16384
+# Versions of the store kept on disk: a reader of the previous manifest can finish while a new version is written.
+KEEP_VERSIONS = 2
+
+
+def read_manifest(store_dir: Path) -> Optional[dict]:
+    """
+    Load the manifest of the feature store.
+
+    Args:
+        store_dir: Directory of the store.
+
+    Returns:
+        dict: Manifest, None if there is no store in the directory.
+
+    Raises:
+        ValueError: If the store has another layout version.
+    """
+    manifest_path = Path(store_dir) / MANIFEST_NAME
+    if not manifest_path.exists():
+        return None
+    manifest = json.loads(manifest_path.read_text(encoding="utf-8"))
+    if manifest.get("format_version") != STORE_FORMAT_VERSION:
+        raise ValueError(f"{manifest_path} has format version {manifest.get('format_version')}, expected {STORE_FORMAT_VERSION}")
+    return manifest
+
+
+def _partition_table(features, target: np.ndarray, manifest: dict, start: int, stop: int) -> "pa.Table":
+    if sp.issparse(features):
+        # one contiguous array per column
+        block = np.ascontiguousarray(features[start:stop].toarray().T)
+        arrays = [pa.array(values) for values in block]
+    else:
+        block = features.iloc[start:stop]
+        arrays = [
+            pa.array(block[name].to_numpy()).dictionary_encode() if name in manifest["categorical"] else pa.array(block[name].to_numpy())
+            for name in block.columns
+        ]
+    arrays.append(pa.array(np.asarray(target[start:stop])))
+    return pa.Table.from_arrays(arrays, names=[column["name"] for column in manifest["columns"]] + [manifest["target"]])
+
+
+def write_store(
+    store_dir: Path,
+    features: Union[sp.csr_matrix, pd.DataFrame],
+    target: np.ndarray,
+    feature_names: list[str],
+    target_name: str = "grade",
+    pipeline_version: Optional[str] = None,
+    rows_per_partition: int = ROWS_PER_PARTITION,
+    row_group_size: int = ROW_GROUP_SIZE,
+) -> dict:
+    """
+    Write the features of a pipeline run into a new version of a partitioned columnar feature store.
+
+    The rows are split into Parquet files of rows_per_partition rows with row groups of row_group_size rows;
+    every feature and the target is a column of its own, so a reader takes only the column chunks and row
+    groups it needs. The manifest lists the columns with their dtypes, the categorical columns, the partitions
+    with their row ranges, the layout of the features (csr or frame) and the version of the fitted pipeline.
+
+    Every write makes a new version: the partitions go into a new directory, then the manifest is replaced
+    atomically, so a reader sees either the old or the new version. Only the last KEEP_VERSIONS versions are kept.
+
+    Args:
+        store_dir: Directory of the store.
+        features: CSR matrix or dataframe with categorical (string) columns.
+        target: Target of every row.
+        feature_names: Names of the feature columns.
+        target_name: Name of the target column.
+        pipeline_version: Version of the fitted pipeline the features were made with.
+        rows_per_partition: Rows of one Parquet file.
+        row_group_size: Rows of one row group.
+
+    Returns:
+        dict: Manifest of the written version.
+    """
+    if pa is None:
+        raise ImportError("The feature store requires pyarrow")
+    store_dir = Path(store_dir)
+    previous = read_manifest(store_dir)
+    version = (previous["version"] if previous is not None else 0) + 1
+    data_dir = store_dir / f"v{version:05d}"
+    # a directory left by an interrupted write is not a part of any manifest
+    shutil.rmtree(data_dir, ignore_errors=True)
+    data_dir.mkdir(parents=True)
+
+    n_rows = features.shape[0]
+    dtypes = [features.dtype] * len(feature_names) if sp.issparse(features) else features.dtypes.tolist()
+    manifest = {
+        "format_version": STORE_FORMAT_VERSION,
+        "version": version,
+        "pipeline_version": pipeline_version,
+        "layout": "csr" if sp.issparse(features) else "frame",
+        "rows": n_rows,
+        "target": target_name,
+        "columns": [{"name": str(name), "dtype": str(dtype)} for name, dtype in zip(feature_names, dtypes)],
+        "categorical": [] if sp.issparse(features) else features.select_dtypes(include="object").columns.tolist(),
+        "partitions": [],
+    }
+    for part, start in enumerate(range(0, max(n_rows, 1), rows_per_partition)):
+        stop = min(start + rows_per_partition, n_rows)
+        path = data_dir / f"part-{part:05d}.parquet"
+        pq.write_table(_partition_table(features, target, manifest, start, stop), path, row_group_size=row_group_size, compression="zstd")
+        manifest["partitions"].append({"path": str(path.relative_to(store_dir)), "row_start": start, "rows": stop - start})
+
+    tmp_path = store_dir / (MANIFEST_NAME + ".tmp")
+    tmp_path.write_text(json.dumps(manifest, indent=2, ensure_ascii=False), encoding="utf-8")
+    os.replace(tmp_path, store_dir / MANIFEST_NAME)
+    for old_dir in store_dir.glob("v*"):
+        if old_dir.is_dir() and old_dir.name[1:].isdigit() and int(old_dir.name[1:]) <= version - KEEP_VERSIONS:
+            shutil.rmtree(old_dir, ignore_errors=True)
+    logging.info(f"Store: Saved {n_rows} rows in {len(manifest['partitions'])} partitions to {store_dir} (version {version})")
+    return manifest
+
+
+def select_columns(manifest: dict, patterns: Optional[Sequence[str]] = None) -> list[str]:
+    """
+    Names of the feature columns matching any of the patterns (exact names or globs like "city_*"), in the store order.
+
+    Raises:
+        ValueError: If a pattern matches no column.
+    """
+    names = [column["name"] for column in manifest["columns"]]
+    if patterns is None:
+        return names
+    unmatched = [pattern for pattern in patterns if not fnmatch.filter(names, pattern)]
+    if unmatched:
+        raise ValueError(f"No feature columns match {unmatched}")
+    return [name for name in names if any(fnmatch.fnmatchcase(name, pattern) for pattern in patterns)]
+
+
+def read_table(store_dir: Path, manifest: dict, columns: list[str], rows: slice = slice(None)) -> "pa.Table":
+    """
+    Read the columns of a row range: only the partitions and row groups overlapping the range are opened,
+    and only the column chunks of the requested columns are read.
+    """
+    start, stop, step = rows.indices(manifest["rows"])
+    if step != 1:
+        raise ValueError("Row ranges of the feature store cannot have a step")
+    tables = []
+    for partition in manifest["partitions"]:
+        part_start = partition["row_start"]
+        if part_start + partition["rows"] <= start or part_start >= stop:
+            continue
+        parquet = pq.ParquetFile(Path(store_dir) / partition["path"])
+        groups, group_start, first_row = [], part_start, None
+        for group in range(parquet.metadata.num_row_groups):
+            group_rows = parquet.metadata.row_group(group).num_rows
+            if group_start < stop and group_start + group_rows > start:
+                groups.append(group)
+                first_row = group_start if first_row is None else first_row
+            group_start += group_rows
+        table = parquet.read_row_groups(groups, columns=columns)
+        offset = max(start - first_row, 0)
+        tables.append(table.slice(offset, min(stop, part_start + partition["rows"]) - first_row - offset))
+    if not tables:
+        return pa.table({name: pa.array([], type=pa.float32()) for name in columns})
+    return pa.concat_tables(tables)
+
+
+def read_store(
+    store_dir: Path, columns: Optional[Sequence[str]] = None, rows: slice = slice(None),
+) -> tuple[Union[sp.csr_matrix, pd.DataFrame], np.ndarray, list[str], list[str]]:
+    """
+    Read a subset of the features and the target from the feature store, only the selected columns and rows.
+
+    The features have the form of the pipeline run that wrote the store: a CSR matrix (one-hot run) or
+    a dataframe with categorical string columns (--native-categorical).
+
+    Args:
+        store_dir: Directory of the store.
+        columns: Names or glob patterns of the feature columns (None - all of them).
+        rows: Row range (default all rows).
+
+    Returns:
+        tuple: Features, target, feature names and the categorical columns among them.
+
+    Raises:
+        FileNotFoundError: If there is no store in the directory.
+    """
+    if pa is None:
+        raise ImportError("The feature store requires pyarrow")
+    manifest = read_manifest(store_dir)
+    if manifest is None:
+        raise FileNotFoundError(f"No feature store in {store_dir}: run poc_script.py with --feature-store first")
+    names = select_columns(manifest, columns)
+    table = read_table(store_dir, manifest, names + [manifest["target"]], rows)
+    target = table.column(manifest["target"]).to_numpy()
+    cat_features = [name for name in names if name in manifest["categorical"]]
+    if manifest["layout"] == "csr":
+        # the matrix is assembled column by column from the non-zero values, never densely
+        row_parts, col_parts, value_parts = [], [], []
+        for idx, name in enumerate(names):
+            values = table.column(name).to_numpy()
+            nonzero = np.flatnonzero(values)
+            row_parts.append(nonzero)
+            col_parts.append(np.full(len(nonzero), idx))
+            value_parts.append(values[nonzero])
+        features = sp.csr_matrix(
+            (np.concatenate(value_parts or [np.empty(0, np.float32)]),
+             (np.concatenate(row_parts or [np.empty(0, int)]), np.concatenate(col_parts or [np.empty(0, int)]))),
+            shape=(table.num_rows, len(names)),
+        )
+    else:
+        features = pd.DataFrame({
+            name: table.column(name).to_pandas().astype(object) if name in cat_features else table.column(name).to_numpy()
+            for name in names
+        })
+    logging.info(
+        f"Store: Read {len(names)} of {len(manifest['columns'])} columns and {table.num_rows} of {manifest['rows']} rows from {store_dir}"
+    )
+    return features, target, names, cat_features
+
+
+def parse_rows(text: str) -> slice:
+    """
+    Parse a row range START:STOP (either bound may be omitted) for argparse.
+    """
+    start, sep, stop = text.partition(":")
+    if not sep:
+        raise ValueError(f"Row range must look like START:STOP, got {text!r}")
+    return slice(int(start) if start else None, int(stop) if stop else None)
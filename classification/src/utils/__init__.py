@@ -1,3 +1,7 @@
+from .ingest import read_hh_csv
 from .io import resolve_csv
+from .keywords import KeywordMatcher
+from .memo import UniqueValues, map_unique
 from .plots import plot_class_balance
 from .reporting import print_and_save_report
+from .sparse import to_csr
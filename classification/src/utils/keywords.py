@@ -0,0 +1,122 @@
+from __future__ import annotations
+
+import re
+from functools import reduce
+from operator import or_
+from typing import Iterable, Mapping
+
+import numpy as np
+import pandas as pd
+
+from src.utils.memo import map_unique
+
+
+def _trie_pattern(node: dict) -> str:
+    """
+    Regular expression of a trie node: the alternatives are its children, and the continuation
+    is optional where a keyword ends, so the greedy match is the longest keyword.
+    """
+    branches = [re.escape(char) + _trie_pattern(child) for char, child in node.items() if char]
+    if not branches:
+        return ""
+    pattern = branches[0] if len(branches) == 1 else f"(?:{'|'.join(branches)})"
+    return f"(?:{pattern})?" if "" in node else pattern
+
+
+class KeywordMatcher:
+    """
+    Finds which groups of keywords occur in a string, scanning the string once.
+
+    All keywords are compiled into one regular expression: a trie of the keywords inside a lookahead,
+    tried at every position of the string. At a position it matches the longest keyword, and the
+    shorter keywords found at the same position are its prefixes, so their groups are precomputed
+    into the mask of the longest one. The result for a string is a bitmask with the bit of a group set
+    if `any(keyword in value for keyword in group)`.
+    """
+    def __init__(self, groups: Mapping[str, Iterable[str]], lowercase: bool = True):
+        """
+        Args:
+            groups: Keywords of every group; a keyword may belong to several groups.
+            lowercase: Lowercase the strings before matching (the keywords are used as is).
+
+        Raises:
+            ValueError: If there are more than 63 groups or a keyword is empty.
+        """
+        if len(groups) > 63:
+            raise ValueError(f"KeywordMatcher supports up to 63 groups, got {len(groups)}")
+        self.bits = {group: 1 << idx for idx, group in enumerate(groups)}
+        self.lowercase = lowercase
+
+        masks: dict[str, int] = {}
+        for group, keywords in groups.items():
+            for keyword in keywords:
+                if not keyword:
+                    raise ValueError(f"Empty keyword in group '{group}'")
+                masks[keyword] = masks.get(keyword, 0) | self.bits[group]
+        self._masks = {
+            keyword: reduce(or_, (mask for prefix, mask in masks.items() if keyword.startswith(prefix)))
+            for keyword in masks
+        }
+
+        trie: dict = {}
+        for keyword in masks:
+            node = trie
+            for char in keyword:
+                node = node.setdefault(char, {})
+            node[""] = {}
+        self._pattern = re.compile(f"(?=({_trie_pattern(trie)}))", re.DOTALL) if trie else None
+
+    def mask(self, *groups: str) -> int:
+        """
+        Returns:
+            int: Bits of the given groups.
+        """
+        return reduce(or_, (self.bits[group] for group in groups), 0)
+
+    def match(self, value) -> int:
+        """
+        Match one string.
+
+        Args:
+            value: String to scan; anything else matches nothing.
+
+        Returns:
+            int: Bitmask of the groups with a keyword in the string.
+        """
+        if not isinstance(value, str) or self._pattern is None:
+            return 0
+        if self.lowercase:
+            value = value.lower()
+        mask = 0
+        for keyword in self._pattern.findall(value):
+            mask |= self._masks[keyword]
+        return mask
+
+    def match_column(self, values: pd.Series) -> np.ndarray:
+        """
+        Match every value of a column; every unique value is scanned once.
+
+        Args:
+            values: Column of the dataframe.
+
+        Returns:
+            np.ndarray: int64 bitmask of every row.
+        """
+        return map_unique(values, self.match).to_numpy(dtype=np.int64)
+
+    def matches(self, masks: np.ndarray, *groups: str) -> np.ndarray:
+        """
+        Args:
+            masks: Bitmasks returned by match_column.
+            groups: Groups to check.
+
+        Returns:
+            np.ndarray: True for the rows where a keyword of any of the groups was found.
+        """
+        return (masks & self.mask(*groups)) != 0
+
+    def flags(self, masks: np.ndarray, *groups: str) -> np.ndarray:
+        """
+        Same as matches, as 0/1 int64 feature values.
+        """
+        return self.matches(masks, *groups).astype(np.int64)
@@ -0,0 +1,48 @@
+from __future__ import annotations
+
+import numpy as np
+import pandas as pd
+import scipy.sparse as sp
+
+
+def to_csr(dataframe: pd.DataFrame, dtype: type = np.float32) -> sp.csr_matrix:
+    """
+    Convert a numeric dataframe with dense and sparse columns into a CSR matrix without densifying it.
+
+    Sparse columns with a zero fill value (one-hot dummies, TF-IDF) contribute only their stored values,
+    dense columns only their nonzero values; NaN is kept as a stored value. The column order is preserved,
+    so `dataframe.columns` are the feature names of the matrix.
+
+    Args:
+        dataframe: Numeric (or boolean) columns.
+        dtype: Dtype of the matrix values.
+
+    Returns:
+        sp.csr_matrix: Matrix of shape dataframe.shape.
+    """
+    n_rows, n_cols = dataframe.shape
+    indices, values = [], []
+    indptr = np.zeros(n_cols + 1, dtype=np.int64)
+    for position in range(n_cols):
+        column = dataframe.iloc[:, position]
+        if isinstance(column.dtype, pd.SparseDtype) and column.sparse.fill_value == 0:
+            rows = column.array.sp_index.to_int_index().indices
+            data = column.array.sp_values.astype(dtype)
+        else:
+            dense = column.to_numpy(dtype=dtype)
+            rows = np.flatnonzero(dense)
+            data = dense[rows]
+        stored = data != 0
+        indices.append(rows[stored])
+        values.append(data[stored])
+        indptr[position + 1] = indptr[position] + stored.sum()
+
+    matrix = sp.csc_matrix(
+        (
+            np.concatenate(values) if values else np.empty(0, dtype=dtype),
+            np.concatenate(indices) if indices else np.empty(0, dtype=np.int32),
+            indptr,
+        ),
+        shape=(n_rows, n_cols),
+    )
+    return matrix.tocsr()
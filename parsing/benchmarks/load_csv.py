@@ -0,0 +1,96 @@
+"""
+Benchmark of hh.csv readers: the old python engine versus the typed fast ingest path.
+
+Every reader runs in a fresh process, so the reported peak RSS belongs to that reader only.
+
+Usage (from the parsing directory):
+    python -m benchmarks.load_csv --csv hh.csv --repeat 3
+"""
+import argparse
+import json
+import multiprocessing
+import resource
+import sys
+import time
+from pathlib import Path
+
+import pandas as pd
+
+from src import ingest
+
+
+def read_python_engine(csv_path: Path) -> pd.DataFrame:
+    """Reader used by LoadCSVHandler before the typed ingest path."""
+    return pd.read_csv(csv_path, sep=",", quotechar='"', engine="python", encoding="utf-8", index_col=0)
+
+
+def read_c_engine(csv_path: Path) -> pd.DataFrame:
+    """Typed ingest path without pyarrow."""
+    ingest.pa = None
+    return ingest.read_hh_csv(csv_path)
+
+
+READERS = {
+    "python": read_python_engine,
+    "c": read_c_engine,
+    "pyarrow": ingest.read_hh_csv,
+}
+
+
+def _measure(name: str, csv_path: Path, queue) -> None:
+    start = time.perf_counter()
+    dataframe = READERS[name](csv_path)
+    elapsed = time.perf_counter() - start
+    # ru_maxrss is in kilobytes on Linux and in bytes on macOS
+    scale = 1 if sys.platform == "darwin" else 1024
+    queue.put({
+        "reader": name,
+        "seconds": elapsed,
+        "rows": len(dataframe),
+        "frame_mb": dataframe.memory_usage(deep=True).sum() / 2**20,
+        "peak_rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * scale / 2**20,
+    })
+
+
+def run(csv_path: Path, readers: list[str], repeat: int) -> list[dict]:
+    """
+    Runs every reader `repeat` times in separate processes and keeps the fastest run.
+
+    Returns:
+        list of dicts with load time, rows, dataframe size and peak RSS.
+    """
+    context = multiprocessing.get_context("spawn")
+    results = []
+    for name in readers:
+        if name == "pyarrow" and ingest.pa is None:
+            print("pyarrow is not installed, skipping")
+            continue
+        runs = []
+        for _ in range(repeat):
+            queue = context.Queue()
+            process = context.Process(target=_measure, args=(name, csv_path, queue))
+            process.start()
+            runs.append(queue.get())
+            process.join()
+        results.append(min(runs, key=lambda item: item["seconds"]))
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark hh.csv readers")
+    parser.add_argument("--csv", type=Path, default=Path("hh.csv"), help="Path to hh.csv")
+    parser.add_argument("--readers", nargs="+", default=list(READERS), choices=list(READERS))
+    parser.add_argument("--repeat", type=int, default=3, help="Runs per reader, the fastest one is reported")
+    parser.add_argument("--json", type=Path, default=None, help="Save results to this JSON file")
+    args = parser.parse_args()
+
+    results = run(args.csv, args.readers, args.repeat)
+    print(f"{'reader':<10}{'seconds':>10}{'rows':>12}{'frame MB':>12}{'peak RSS MB':>14}")
+    for item in results:
+        print(f"{item['reader']:<10}{item['seconds']:>10.3f}{item['rows']:>12}{item['frame_mb']:>12.1f}{item['peak_rss_mb']:>14.1f}")
+    if args.json:
+        args.json.write_text(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,130 @@
+"""
+Benchmark of unique-value memoization: every parsing handler with Series.apply versus src.memo.
+
+The handlers run twice on the same data: once as they are (one parser call per unique value)
+and once with src.memo replaced by plain Series.apply (one parser call per row).
+The results of both runs are checked to be equal.
+
+Usage (from the parsing directory):
+    python -m benchmarks.memo --csv hh.csv               # real data
+    python -m benchmarks.memo --csv hh.csv --rows 1000000  # synthetic rows sampled from the real columns
+"""
+import argparse
+import json
+import logging
+import sys
+import time
+from pathlib import Path
+from typing import Callable
+
+import numpy as np
+import pandas as pd
+
+from src.core import PipelineContext
+from src.ingest import read_hh_csv
+from src.pipeline import build_pipeline
+
+
+class _ApplyValues:
+    """UniqueValues replacement which calls the parser for every row."""
+    def __init__(self, values: pd.Series):
+        self.values = values
+
+    def map(self, func: Callable) -> pd.Series:
+        return self.values.apply(func)
+
+
+def _apply(values: pd.Series, func: Callable) -> pd.Series:
+    return values.apply(func)
+
+
+def synthetic(dataframe: pd.DataFrame, rows: int, seed: int = 0) -> pd.DataFrame:
+    """
+    Samples every column independently from the real values, so the cardinality of the columns stays realistic.
+    """
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame(
+        {col: dataframe[col].to_numpy()[rng.integers(0, len(dataframe), rows)] for col in dataframe.columns},
+        index=pd.RangeIndex(rows),
+    )
+
+
+def _run_stages(stages: list, dataframe: pd.DataFrame, patched: bool) -> tuple[PipelineContext, dict[str, float]]:
+    replacements = {"map_unique": _apply, "UniqueValues": _ApplyValues}
+    originals = {}
+    if patched:
+        for module in {sys.modules[type(stage).__module__] for stage in stages}:
+            originals[module] = {name: getattr(module, name) for name in replacements if hasattr(module, name)}
+            for name in originals[module]:
+                setattr(module, name, replacements[name])
+    try:
+        ctx = PipelineContext(csv_path=Path(), dataframe=dataframe.copy(deep=False))
+        timings = {}
+        for stage in stages:
+            start = time.perf_counter()
+            ctx = stage.run(ctx)
+            timings[type(stage).__name__] = time.perf_counter() - start
+        return ctx, timings
+    finally:
+        for module, attributes in originals.items():
+            for name, value in attributes.items():
+                setattr(module, name, value)
+
+
+def run(dataframe: pd.DataFrame) -> list[dict]:
+    """
+    Times every row-local parsing handler with and without memoization.
+
+    Returns:
+        list of dicts with the handler, its input column cardinality and both timings.
+    """
+    stages = [stage for stage in list(build_pipeline().iter_chain())[1:] if stage.row_local]
+    cardinality = {}
+    for stage in stages:
+        columns = [col for col in stage.reads or () if col in dataframe.columns]
+        cardinality[type(stage).__name__] = dataframe[columns[0]].nunique(dropna=False) if columns else None
+
+    apply_ctx, apply_times = _run_stages(stages, dataframe, patched=True)
+    memo_ctx, memo_times = _run_stages(stages, dataframe, patched=False)
+    pd.testing.assert_frame_equal(apply_ctx.dataframe, memo_ctx.dataframe)
+
+    return [
+        {
+            "handler": name,
+            "rows": len(dataframe),
+            "unique": cardinality[name],
+            "apply_seconds": apply_times[name],
+            "memo_seconds": memo_times[name],
+            "speedup": apply_times[name] / memo_times[name] if memo_times[name] else None,
+        }
+        for name in apply_times
+    ]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark unique-value memoization of the parsers")
+    parser.add_argument("--csv", type=Path, default=Path("hh.csv"), help="Path to hh.csv")
+    parser.add_argument("--rows", type=int, default=None, help="Sample this many synthetic rows from the real columns")
+    parser.add_argument("--json", type=Path, default=None, help="Save results to this JSON file")
+    args = parser.parse_args()
+    logging.disable(logging.INFO)
+
+    dataframe = read_hh_csv(args.csv)
+    if args.rows:
+        dataframe = synthetic(dataframe, args.rows)
+
+    results = run(dataframe)
+    print(f"{'handler':<30}{'rows':>10}{'unique':>10}{'apply s':>10}{'memo s':>10}{'speedup':>9}")
+    for item in results:
+        unique = "-" if item["unique"] is None else item["unique"]
+        speedup = "-" if item["speedup"] is None else f"{item['speedup']:.1f}x"
+        print(f"{item['handler']:<30}{item['rows']:>10}{unique:>10}{item['apply_seconds']:>10.3f}{item['memo_seconds']:>10.3f}{speedup:>9}")
+    total_apply = sum(item["apply_seconds"] for item in results)
+    total_memo = sum(item["memo_seconds"] for item in results)
+    print(f"{'total':<50}{total_apply:>10.3f}{total_memo:>10.3f}{total_apply / total_memo:>8.1f}x")
+    if args.json:
+        args.json.write_text(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,109 @@
+"""
+Benchmark of single-record featurization: src.record.RecordFeaturizer versus the batch pipeline.
+
+The file is featurized twice with the same pipeline.json: by a transform-only batch run (in memory,
+nothing is saved) and record by record. Every record vector is checked to be equal to its batch row,
+then the latency of one record is reported.
+
+Usage (from the parsing directory, after `python3 main.py` saved pipeline.json):
+    python -m benchmarks.record --csv hh.csv --pipeline pipeline.json
+"""
+import argparse
+import json
+import logging
+import time
+from pathlib import Path
+
+import numpy as np
+
+from src.core import PipelineContext
+from src.fitted import FittedPipeline
+from src.handlers import SaveDataHandler
+from src.ingest import read_hh_csv
+from src.pipeline import build_pipeline
+from src.record import RecordFeaturizer
+from src.sparse import to_csr
+
+
+def batch_rows(csv_path: Path, fitted: FittedPipeline) -> tuple[np.ndarray, float]:
+    """
+    Returns:
+        rows of a transform-only batch run in the layout of RecordFeaturizer, and its time in seconds.
+    """
+    stages = [stage for stage in build_pipeline(native_categorical=fitted.native_categorical).iter_chain()
+              if not isinstance(stage, SaveDataHandler)]
+    ctx = fitted.apply(PipelineContext(csv_path=csv_path))
+    start = time.perf_counter()
+    for stage in stages:
+        ctx = stage.run(ctx)
+    seconds = time.perf_counter() - start
+
+    features = ctx.features
+    categorical = SaveDataHandler.categorical_columns(features)
+    numeric = to_csr(features.drop(columns=categorical)).toarray()
+    if not categorical:
+        return numeric, seconds
+    codes = SaveDataHandler.encode_categorical(features[categorical], {col: fitted.categories[col] for col in categorical})
+    strings = np.column_stack([
+        np.asarray(fitted.categories[col] + [""], dtype=object)[codes[:, position]] for position, col in enumerate(categorical)
+    ])
+    return np.hstack([numeric.astype(object), strings]), seconds
+
+
+def run(csv_path: Path, fitted: FittedPipeline, repeat: int = 3) -> dict:
+    """
+    Checks the record vectors against the batch rows and times RecordFeaturizer.transform.
+
+    Returns:
+        dict with the number of records, the batch time per row and the latency percentiles of one record.
+    """
+    expected, batch_seconds = batch_rows(csv_path, fitted)
+    records = read_hh_csv(csv_path).to_dict("records")
+
+    featurizer = RecordFeaturizer(fitted)
+    actual = featurizer.transform_many(records)
+    mismatched = np.flatnonzero(~(actual == expected).all(axis=1))
+    if len(mismatched):
+        raise AssertionError(f"{len(mismatched)} records differ from the batch rows, first at row {mismatched[0]}")
+
+    latencies = []
+    for _ in range(repeat):
+        for record in records:
+            start = time.perf_counter_ns()
+            featurizer.transform(record)
+            latencies.append(time.perf_counter_ns() - start)
+    latencies = np.array(latencies) / 1000
+    return {
+        "records": len(records),
+        "columns": len(featurizer.columns),
+        "native_categorical": fitted.native_categorical,
+        "batch_us_per_row": batch_seconds / len(records) * 1e6,
+        "record_mean_us": float(latencies.mean()),
+        "record_p50_us": float(np.percentile(latencies, 50)),
+        "record_p99_us": float(np.percentile(latencies, 99)),
+        "records_per_second": float(1e6 / latencies.mean()),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark single-record featurization against the batch pipeline")
+    parser.add_argument("--csv", type=Path, default=Path("hh.csv"), help="Path to hh.csv")
+    parser.add_argument("--pipeline", type=Path, default=SaveDataHandler.pipeline_path, help="Fitted pipeline.json")
+    parser.add_argument("--repeat", type=int, default=3, help="Time every record this many times")
+    parser.add_argument("--json", type=Path, default=None, help="Save results to this JSON file")
+    args = parser.parse_args()
+    logging.disable(logging.INFO)
+
+    result = run(args.csv, FittedPipeline.load(args.pipeline), args.repeat)
+    print(f"{result['records']} records, {result['columns']} columns: all equal to the batch rows")
+    print(f"batch run: {result['batch_us_per_row']:.1f} us per row")
+    print(
+        f"one record: mean {result['record_mean_us']:.1f} us, p50 {result['record_p50_us']:.1f} us, "
+        f"p99 {result['record_p99_us']:.1f} us ({result['records_per_second']:.0f} records/s)"
+    )
+    if args.json:
+        args.json.write_text(json.dumps(result, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,18 +1,131 @@
 from src.pipeline import build_pipeline
+from src.cache import DEFAULT_CACHE_DIR, StageCache, run_cached
 from src.core import PipelineContext
+from src.fitted import FittedPipeline
+from src.handlers import SaveDataHandler
+from src.incremental import run_incremental
+from src.profiling import Profiler
+from src.scheduler import run_scheduled
+from src.sharding import run_sharded
+from src.store import DEFAULT_STORE_DIR
+from src.streaming import run_streaming
 
+import argparse
 import logging
 from pathlib import Path
 
+def parse_arguments():
+    """
+    Parse CLI arguments of the pipeline.
+
+    Returns:
+        argparse.Namespace: Parsed arguments.
+    """
+    parser = argparse.ArgumentParser(description="Data parsing pipeline")
+    # the ways to run the chain cannot be combined: only one of them is given
+    mode = parser.add_mutually_exclusive_group()
+    mode.add_argument(
+        "--chunk-size",
+        type=int,
+        default=None,
+        help="Stream hh.csv in chunks of this many rows instead of loading the whole file"
+    )
+    mode.add_argument(
+        "--parallel",
+        choices=["thread", "process"],
+        default=None,
+        help="Run independent handlers concurrently in a thread or process pool"
+    )
+    mode.add_argument(
+        "--workers",
+        type=int,
+        default=None,
+        help="Split the rows across this many processes for the row-local handlers"
+    )
+    parser.add_argument(
+        "--dense-features",
+        action="store_true",
+        help="Save the features as a dense features.npy matrix instead of a sparse features.npz"
+    )
+    parser.add_argument(
+        "--native-categorical",
+        action="store_true",
+        help="Skip one-hot encoding and save job, last_job and city as categorical columns for CatBoost cat_features"
+    )
+    parser.add_argument(
+        "--transform",
+        type=Path,
+        default=None,
+        help="Transform-only run: take the job vocabulary, categories and feature columns from this pipeline.json"
+    )
+    mode.add_argument(
+        "--incremental",
+        action="store_true",
+        help="Parse only the rows of hh.csv that are new or changed since the last incremental run"
+    )
+    parser.add_argument(
+        "--feature-store",
+        type=Path,
+        nargs="?",
+        const=DEFAULT_STORE_DIR,
+        default=None,
+        help=f"Also write the dataset into the partitioned Parquet feature store in this directory (default {DEFAULT_STORE_DIR})"
+    )
+    parser.add_argument(
+        "--profile",
+        type=Path,
+        default=None,
+        help="Directory for per-handler profiling traces (trace.json and chrome_trace.json)"
+    )
+    mode.add_argument(
+        "--cache",
+        type=Path,
+        nargs="?",
+        const=DEFAULT_CACHE_DIR,
+        default=None,
+        help=f"Take unchanged stages from the stage cache in this directory (default {DEFAULT_CACHE_DIR})"
+    )
+    return parser.parse_args()
+
 def main():
     """
     Main function to run the pipeline.
     """
-    logging.info("Starting the pipeline")   
-    pipeline = build_pipeline()
-    ctx = PipelineContext(csv_path=Path("hh.csv"))
-    ctx = pipeline.handle(ctx)
+    args = parse_arguments()
+    logging.info("Starting the pipeline")
+    profiler = Profiler() if args.profile else None
+    fitted = FittedPipeline.load(args.transform) if args.transform else None
+    if fitted is None and args.incremental and SaveDataHandler.pipeline_path.exists():
+        # the vocabulary of the previous run stays frozen
+        fitted = FittedPipeline.load(SaveDataHandler.pipeline_path)
+    native_categorical = fitted.native_categorical if fitted is not None else args.native_categorical
+    if fitted is not None:
+        logging.info(f"Transforming with the fitted pipeline {fitted.version} from {args.transform or SaveDataHandler.pipeline_path}")
+    pipeline = build_pipeline(
+        sparse_features=not args.dense_features, native_categorical=native_categorical, store_dir=args.feature_store
+    )
+    if args.incremental:
+        run_incremental(Path("hh.csv"), pipeline=pipeline, profiler=profiler, fitted=fitted)
+    elif args.chunk_size:
+        run_streaming(Path("hh.csv"), chunk_size=args.chunk_size, pipeline=pipeline, profiler=profiler, fitted=fitted)
+    else:
+        ctx = PipelineContext(csv_path=Path("hh.csv"), profiler=profiler)
+        if fitted is not None:
+            ctx = fitted.apply(ctx)
+        if args.parallel:
+            ctx = run_scheduled(pipeline, ctx, executor=args.parallel)
+        elif args.workers:
+            ctx = run_sharded(pipeline, ctx, max_workers=args.workers)
+        elif args.cache:
+            ctx = run_cached(pipeline, ctx, StageCache(args.cache))
+        else:
+            ctx = pipeline.handle(ctx)
     logging.info("Pipeline completed")
+    if profiler is not None:
+        args.profile.mkdir(parents=True, exist_ok=True)
+        logging.info(f"Profile:\n{profiler.summary()}")
+        profiler.save_json(args.profile / "trace.json")
+        profiler.save_chrome_trace(args.profile / "chrome_trace.json")
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,305 @@
+from src.core import Handler, PipelineContext
+
+import argparse
+import copy
+import hashlib
+import inspect
+import json
+import logging
+import os
+import pickle
+import shutil
+import sys
+import time
+from pathlib import Path
+from types import ModuleType
+from typing import Optional
+
+import pandas as pd
+
+try:
+    import pyarrow as pa
+except ImportError:
+    pa = None
+
+DEFAULT_CACHE_DIR = Path(".stage_cache")
+DEFAULT_MAX_BYTES = 4 * 2**30
+
+# Context fields which belong to the current run and are never cached.
+_RUN_FIELDS = ("dataframe", "snapshots", "profiler")
+
+
+def hash_file(path: Path, block_size: int = 2**24) -> str:
+    """
+    Returns:
+        str: sha256 of the file content.
+    """
+    digest = hashlib.sha256()
+    with open(path, "rb") as fin:
+        while block := fin.read(block_size):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _code_modules(module: ModuleType, package: str, found: dict[str, ModuleType]) -> None:
+    """
+    Collects the module and all modules of the package it uses (directly or through other modules).
+    """
+    found[module.__name__] = module
+    for value in vars(module).values():
+        name = value.__name__ if inspect.ismodule(value) else getattr(value, "__module__", None)
+        if isinstance(name, str) and name.split(".")[0] == package and name not in found and name in sys.modules:
+            _code_modules(sys.modules[name], package, found)
+
+
+def handler_fingerprint(handler: Handler) -> str:
+    """
+    Hash of the handler code and config.
+
+    The code is the source of the module of the handler and of every module of the package it uses
+    (helpers, ingest, core), the config is the instance attributes of the handler.
+
+    Args:
+        handler: handler of the chain.
+
+    Returns:
+        str: sha256 hex digest.
+    """
+    module = sys.modules[type(handler).__module__]
+    modules: dict[str, ModuleType] = {}
+    _code_modules(module, module.__name__.split(".")[0], modules)
+
+    digest = hashlib.sha256(type(handler).__qualname__.encode())
+    for name in sorted(modules):
+        digest.update(name.encode())
+        digest.update(inspect.getsource(modules[name]).encode())
+    config = {name: value for name, value in vars(handler).items() if name != "_next"}
+    digest.update(repr(sorted(config.items())).encode())
+    return digest.hexdigest()
+
+
+class StageCache:
+    """
+    On-disk content-addressed cache of the context after every handler.
+
+    The key of a stage is sha256(upstream key + handler code and config); the chain of keys
+    starts from the hash of the input file. A change of the file or of a handler changes the keys
+    of this handler and of all handlers after it, the earlier stages are still taken from the cache.
+
+    Every entry is a directory with the dataframe in Parquet (pickle if pyarrow is missing
+    or the dataframe cannot be stored in Parquet), the other context fields in a pickle and meta.json.
+    The modification time of meta.json is the time of the last use; least recently used entries
+    are evicted when the cache grows over max_bytes.
+
+    Methods:
+        input_key(csv_path): Key of the input file.
+        stage_key(upstream_key, handler): Key of the context after the handler.
+        contains(key): Checks if the context is cached.
+        load(key, ctx): Loads a cached context.
+        store(key, name, ctx): Stores a context.
+        entries(): Lists the cached contexts.
+        evict(max_bytes): Removes least recently used entries over the size limit.
+        clear(): Removes the whole cache.
+    """
+    def __init__(self, root: Path = DEFAULT_CACHE_DIR, max_bytes: int = DEFAULT_MAX_BYTES):
+        self.root = Path(root)
+        self.max_bytes = max_bytes
+
+    @property
+    def _stages_dir(self) -> Path:
+        return self.root / "stages"
+
+    def input_key(self, csv_path: Path) -> str:
+        # hashes are remembered by (size, mtime), so an unchanged file is not read again
+        index_path = self.root / "inputs.json"
+        index = json.loads(index_path.read_text(encoding="utf-8")) if index_path.exists() else {}
+        stat = Path(csv_path).stat()
+        path = str(Path(csv_path).resolve())
+        entry = index.get(path)
+        if entry is None or entry["size"] != stat.st_size or entry["mtime_ns"] != stat.st_mtime_ns:
+            logging.info(f"StageCache: Hashing {csv_path}")
+            entry = {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns, "sha256": hash_file(csv_path)}
+            index[path] = entry
+            self.root.mkdir(parents=True, exist_ok=True)
+            index_path.write_text(json.dumps(index, indent=2, ensure_ascii=False), encoding="utf-8")
+        return entry["sha256"]
+
+    @staticmethod
+    def stage_key(upstream_key: str, handler: Handler) -> str:
+        return hashlib.sha256((upstream_key + handler_fingerprint(handler)).encode()).hexdigest()
+
+    def contains(self, key: str) -> bool:
+        return (self._stages_dir / key / "meta.json").exists()
+
+    def load(self, key: str, ctx: PipelineContext) -> PipelineContext:
+        """
+        Loads a cached context; run settings (debug, snapshots, profiler) are taken from ctx.
+
+        Args:
+            key: stage key.
+            ctx: context of the current run.
+
+        Returns:
+            PipelineContext: the cached context.
+        """
+        entry = self._stages_dir / key
+        with open(entry / "context.pkl", "rb") as fin:
+            state = pickle.load(fin)
+        if (entry / "dataframe.parquet").exists():
+            dataframe = pd.read_parquet(entry / "dataframe.parquet")
+        elif (entry / "dataframe.pkl").exists():
+            dataframe = pd.read_pickle(entry / "dataframe.pkl")
+        else:
+            dataframe = None
+        os.utime(entry / "meta.json")
+
+        restored = copy.copy(ctx)
+        vars(restored).update(state)
+        restored.dataframe = dataframe
+        return restored
+
+    def store(self, key: str, name: str, ctx: PipelineContext) -> None:
+        """
+        Stores the context after a handler.
+
+        Args:
+            key: stage key.
+            name: handler name, for the listing.
+            ctx: context after the handler.
+        """
+        entry = self._stages_dir / key
+        if entry.exists():
+            return
+        tmp = self.root / "tmp" / f"{key}.{os.getpid()}"
+        tmp.mkdir(parents=True, exist_ok=True)
+        try:
+            if ctx.dataframe is not None:
+                self._store_dataframe(ctx.dataframe, tmp)
+            state = {field: value for field, value in vars(ctx).items() if field not in _RUN_FIELDS}
+            with open(tmp / "context.pkl", "wb") as fout:
+                pickle.dump(state, fout, protocol=pickle.HIGHEST_PROTOCOL)
+            size = sum(path.stat().st_size for path in tmp.iterdir())
+            meta = {"stage": name, "created": time.time(), "size": size}
+            (tmp / "meta.json").write_text(json.dumps(meta), encoding="utf-8")
+            entry.parent.mkdir(parents=True, exist_ok=True)
+            os.replace(tmp, entry)
+        except OSError as error:
+            # another run stored the same key first, or the disk is full: the cache is optional
+            logging.warning(f"StageCache: Could not store {name} ({error})")
+        finally:
+            shutil.rmtree(tmp, ignore_errors=True)
+
+    @staticmethod
+    def _store_dataframe(dataframe: pd.DataFrame, directory: Path) -> None:
+        if pa is not None:
+            try:
+                dataframe.to_parquet(directory / "dataframe.parquet")
+                return
+            except (ValueError, TypeError, pa.ArrowException):
+                (directory / "dataframe.parquet").unlink(missing_ok=True)
+        dataframe.to_pickle(directory / "dataframe.pkl")
+
+    def entries(self) -> list[dict]:
+        """
+        Returns:
+            list[dict]: key, stage, size and last_used of every entry, least recently used first.
+        """
+        entries = []
+        for meta_path in self._stages_dir.glob("*/meta.json"):
+            meta = json.loads(meta_path.read_text(encoding="utf-8"))
+            entries.append({"key": meta_path.parent.name, **meta, "last_used": meta_path.stat().st_mtime})
+        return sorted(entries, key=lambda entry: entry["last_used"])
+
+    def evict(self, max_bytes: Optional[int] = None) -> int:
+        """
+        Removes least recently used entries until the cache fits into max_bytes.
+
+        Args:
+            max_bytes: size limit (default self.max_bytes).
+
+        Returns:
+            int: number of removed entries.
+        """
+        max_bytes = self.max_bytes if max_bytes is None else max_bytes
+        entries = self.entries()
+        total = sum(entry["size"] for entry in entries)
+        removed = 0
+        for entry in entries:
+            if total <= max_bytes:
+                break
+            shutil.rmtree(self._stages_dir / entry["key"], ignore_errors=True)
+            total -= entry["size"]
+            removed += 1
+        if removed:
+            logging.info(f"StageCache: Evicted {removed} entries")
+        return removed
+
+    def clear(self) -> None:
+        shutil.rmtree(self.root, ignore_errors=True)
+
+
+def run_cached(pipeline: Handler, ctx: PipelineContext, cache: StageCache) -> PipelineContext:
+    """
+    Runs the chain, taking the longest unchanged prefix of it from the cache.
+
+    Handlers with side effects (cacheable = False) are always run, so only the stages
+    before the first of them are taken from the cache.
+
+    Args:
+        pipeline: first handler of the chain (e.g. build_pipeline()).
+        ctx: initial context.
+        cache: stage cache.
+
+    Returns:
+        PipelineContext: the processed context.
+    """
+    stages = list(pipeline.iter_chain())
+    keys = []
+    key = cache.input_key(ctx.csv_path)
+    if ctx.fitted is not None:
+        # handlers of a transform-only run use the fitted state instead of the statistics of the file
+        key = hashlib.sha256((key + ctx.fitted.version).encode()).hexdigest()
+    for stage in stages:
+        key = cache.stage_key(key, stage)
+        keys.append(key)
+
+    n_pure = next((idx for idx, stage in enumerate(stages) if not stage.cacheable), len(stages))
+    start = next((idx + 1 for idx in reversed(range(n_pure)) if cache.contains(keys[idx])), 0)
+    if start:
+        logging.info(f"StageCache: Loading the context after {type(stages[start - 1]).__name__} from {cache.root}")
+        ctx = cache.load(keys[start - 1], ctx)
+
+    for idx in range(start, len(stages)):
+        ctx = stages[idx].run(ctx)
+        if idx < n_pure:
+            cache.store(keys[idx], type(stages[idx]).__name__, ctx)
+            cache.evict()
+    return ctx
+
+
+def main():
+    """
+    Inspects or clears the stage cache: python -m src.cache {info,evict,clear}.
+    """
+    parser = argparse.ArgumentParser(description="Stage cache of the parsing pipeline")
+    parser.add_argument("command", choices=["info", "evict", "clear"])
+    parser.add_argument("--dir", type=Path, default=DEFAULT_CACHE_DIR, help="Cache directory")
+    parser.add_argument("--max-size", type=float, default=DEFAULT_MAX_BYTES / 2**30, help="Size limit for evict, GiB")
+    args = parser.parse_args()
+
+    cache = StageCache(args.dir, max_bytes=int(args.max_size * 2**30))
+    if args.command == "info":
+        entries = cache.entries()
+        for entry in entries:
+            last_used = time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(entry["last_used"]))
+            print(f"{entry['key'][:16]}  {entry['stage']:<36}{entry['size'] / 2**20:>10.1f} MB  {last_used}")
+        print(f"{len(entries)} entries, {sum(entry['size'] for entry in entries) / 2**20:.1f} MB in {cache.root}")
+    elif args.command == "evict":
+        print(f"Removed {cache.evict()} entries")
+    else:
+        cache.clear()
+        print(f"Removed {cache.root}")
+
+
+if __name__ == "__main__":
+    main()
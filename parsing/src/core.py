@@ -1,13 +1,21 @@
 from abc import ABC, abstractmethod
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 import logging
 import sys
 from pathlib import Path
-from typing import Optional
+from typing import Iterator, Optional
 
 import pandas as pd
 import numpy as np
 
+from src.fitted import FittedPipeline
+from src.profiling import Profiler
+
+# Copy-on-write lets handlers share one dataframe: derived frames and snapshots
+# are copied lazily, only when their data is modified (always on since pandas 3).
+if int(pd.__version__.split(".")[0]) < 3:
+    pd.set_option("mode.copy_on_write", True)
+
 logging.basicConfig(
     level=logging.INFO,
     format='%(asctime)s %(levelname)s: %(message)s',
@@ -24,22 +32,67 @@ class PipelineContext:
         dataframe: dataframe with data (default None).
         features: features (default None).
         target: target (default None).
+        job_vocabulary: most frequent job titles kept by ParseJobHandler (default None - computed from the dataframe).
+        categories: categories of every one-hot encoded column (default None - computed from the dataframe).
+        fitted: fitted pipeline of a transform-only run; the features get its columns (default None - fit mode).
+        debug: keep a snapshot of the dataframe after every handler (default False).
+        snapshots: dataframe snapshots by handler name, filled in debug mode.
+        profiler: measures every handler run when set (default None).
+
+    Methods:
+        set_column(name, values): Adds or replaces a column of the shared dataframe in place.
+        drop_columns(columns): Drops columns from the shared dataframe in place.
     """
     csv_path: Path
     dataframe: Optional[pd.DataFrame] = None
     features: Optional[np.ndarray] = None
     target: Optional[np.ndarray] = None
+    job_vocabulary: Optional[pd.Index] = None
+    categories: Optional[dict[str, list[str]]] = None
+    fitted: Optional[FittedPipeline] = None
+    debug: bool = False
+    snapshots: dict[str, pd.DataFrame] = field(default_factory=dict)
+    profiler: Optional[Profiler] = None
+
+    def set_column(self, name: str, values) -> None:
+        self.dataframe[name] = values
+
+    def drop_columns(self, columns: list[str]) -> None:
+        # unlike DataFrame.drop, `del` does not copy the remaining columns
+        for column in columns:
+            del self.dataframe[column]
 
 
 class Handler(ABC):
     """
     Abstract handler for implementing a chain of responsibility.
 
+    Attributes:
+        row_local: True if the handler processes every row independently of the others,
+            so it can be applied to any chunk of rows (default True).
+        reads: columns the handler reads (default None - the whole dataframe, the handler runs alone).
+        writes: columns the handler adds, replaces or drops; may contain glob patterns (default ()).
+        cacheable: False if the handler has side effects, so its result is never taken from the stage cache (default True).
+        requires_global_stats: True if a row-local handler needs statistics of the whole dataframe
+            (e.g. the job vocabulary); they are computed by fit(ctx) before the rows are split (default False).
+        parses_records: True if a row-local handler implements parse_record(record, ctx): same as _process for
+            a single record (a dict of raw fields), updated in place; required by src.record.RecordFeaturizer (default False).
+
     Methods:
         set_next(handler): Sets the next handler in the chain.
+        iter_chain(): Iterates over this handler and all handlers after it.
+        fit(ctx): Computes the global statistics of the handler on the whole dataframe and stores them in the context.
+        run(ctx): Processes the data context with this handler only.
         handle(ctx): Processes the data context and passes it to the next handler in the chain.
         _process(ctx): Abstract method for specific processing, must be implemented in subclasses.
     """
+    row_local: bool = True
+    reads: Optional[tuple[str, ...]] = None
+    writes: tuple[str, ...] = ()
+    cacheable: bool = True
+    requires_global_stats: bool = False
+    parses_records: bool = False
+
     def __init__(self):
         self._next: Optional["Handler"] = None
 
@@ -47,8 +100,26 @@ class Handler(ABC):
         self._next = handler
         return handler
 
+    def iter_chain(self) -> Iterator["Handler"]:
+        handler = self
+        while handler is not None:
+            yield handler
+            handler = handler._next
+
+    def fit(self, ctx: PipelineContext) -> None:
+        pass
+
+    def run(self, ctx: PipelineContext) -> PipelineContext:
+        if ctx.profiler is not None:
+            ctx = ctx.profiler.measure(type(self).__name__, ctx, lambda: self._process(ctx))
+        else:
+            ctx = self._process(ctx)
+        if ctx.debug and ctx.dataframe is not None:
+            ctx.snapshots[type(self).__name__] = ctx.dataframe.copy(deep=False)
+        return ctx
+
     def handle(self, ctx: PipelineContext) -> PipelineContext:
-        ctx = self._process(ctx)
+        ctx = self.run(ctx)
         if self._next:
             return self._next.handle(ctx)
         return ctx
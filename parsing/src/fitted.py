@@ -0,0 +1,119 @@
+import hashlib
+import json
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import TYPE_CHECKING
+
+import pandas as pd
+
+if TYPE_CHECKING:
+    from src.core import PipelineContext
+
+# Version of the pipeline.json layout; an artifact of another version is not loaded.
+FORMAT_VERSION = 1
+
+
+@dataclass(frozen=True)
+class FittedPipeline:
+    """
+    Dataset-dependent state of the pipeline, fitted once and reused to transform new data.
+
+    A pipeline run over the whole dataset (fit) computes the job vocabulary, the categories of the
+    categorical columns (the layout of the one-hot columns) and the feature columns, and SaveDataHandler
+    saves them into pipeline.json. A transform-only run takes them from the artifact: no handler looks at
+    the whole dataframe, and the features have exactly the columns of the fitted ones.
+
+    Attributes:
+        job_vocabulary: jobs kept by ParseJobHandler and ParseLastJobHandler, other jobs are "other".
+        categories: categories of every categorical column.
+        columns: feature columns in the order the model was trained on.
+        native_categorical: the categorical columns were left without one-hot encoding.
+        format_version: version of the artifact layout.
+
+    Methods:
+        version: Content hash of the artifact, saved with the features it produced.
+        from_context(ctx, columns, native_categorical): Takes the fitted state of a finished run.
+        apply(ctx): Puts the fitted state into the context of a transform-only run.
+        align(features): Checks the columns of the features and puts them into the fitted order.
+        save(path): Saves the artifact into a JSON file.
+        load(path): Loads the artifact from a JSON file.
+    """
+    job_vocabulary: list[str]
+    categories: dict[str, list[str]]
+    columns: list[str]
+    native_categorical: bool = False
+    format_version: int = field(default=FORMAT_VERSION)
+
+    def _state(self) -> dict:
+        return {
+            "format_version": self.format_version,
+            "native_categorical": self.native_categorical,
+            "job_vocabulary": self.job_vocabulary,
+            "categories": self.categories,
+            "columns": self.columns,
+        }
+
+    @property
+    def version(self) -> str:
+        payload = json.dumps(self._state(), sort_keys=True, ensure_ascii=False).encode("utf-8")
+        return hashlib.sha256(payload).hexdigest()[:16]
+
+    @classmethod
+    def from_context(cls, ctx: "PipelineContext", columns: list[str], native_categorical: bool = False) -> "FittedPipeline":
+        """
+        Args:
+            ctx: context of a run over the whole dataset.
+            columns: columns of the features.
+            native_categorical: the categorical columns were left without one-hot encoding.
+        """
+        return cls(
+            job_vocabulary=[str(job) for job in (ctx.job_vocabulary if ctx.job_vocabulary is not None else [])],
+            categories={str(col): [str(value) for value in values] for col, values in (ctx.categories or {}).items()},
+            columns=[str(col) for col in columns],
+            native_categorical=native_categorical,
+        )
+
+    def apply(self, ctx: "PipelineContext") -> "PipelineContext":
+        ctx.job_vocabulary = pd.Index(self.job_vocabulary, dtype=object)
+        ctx.categories = {col: list(values) for col, values in self.categories.items()}
+        ctx.fitted = self
+        return ctx
+
+    def align(self, features: pd.DataFrame) -> pd.DataFrame:
+        """
+        Raises:
+            ValueError: if the features have other columns than the fitted ones.
+        """
+        if features.columns.tolist() == self.columns:
+            return features
+        missing = [col for col in self.columns if col not in features.columns]
+        unexpected = [col for col in features.columns if col not in set(self.columns)]
+        if missing or unexpected:
+            raise ValueError(
+                f"Features do not match the fitted pipeline {self.version}: "
+                f"missing columns {missing[:5]}, unexpected columns {unexpected[:5]}"
+            )
+        return features[self.columns]
+
+    def save(self, path: Path) -> None:
+        state = {**self._state(), "version": self.version}
+        Path(path).write_text(json.dumps(state, indent=2, ensure_ascii=False), encoding="utf-8")
+
+    @classmethod
+    def load(cls, path: Path) -> "FittedPipeline":
+        """
+        Raises:
+            ValueError: if the artifact has another layout version or was modified.
+        """
+        state = json.loads(Path(path).read_text(encoding="utf-8"))
+        if state.get("format_version") != FORMAT_VERSION:
+            raise ValueError(f"{path} has format version {state.get('format_version')}, expected {FORMAT_VERSION}")
+        fitted = cls(
+            job_vocabulary=state["job_vocabulary"],
+            categories=state["categories"],
+            columns=state["columns"],
+            native_categorical=state["native_categorical"],
+        )
+        if state.get("version") != fitted.version:
+            raise ValueError(f"{path} was modified: its content hash is {fitted.version}, not {state.get('version')}")
+        return fitted
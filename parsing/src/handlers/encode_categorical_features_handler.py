@@ -8,16 +8,24 @@ class EncodeCategoricalFeaturesHandler(Handler):
     """
     Handler for encoding categorical features. 
 
+    The dummy columns are sparse, so a large job vocabulary does not grow the dataframe.
+
     Methods:
         _process(ctx): Encodes categorical features.
     """
+    row_local = False
+
     def _process(self, ctx: PipelineContext) -> PipelineContext:
         logging.info(f"EncodeCategoricalFeaturesHandler: Start with {ctx.dataframe.shape[1]} features")
-        dataframe = ctx.dataframe.copy()
+        dataframe = ctx.dataframe
 
         cat_cols = dataframe.select_dtypes(include="object").columns
-        dataframe = pd.get_dummies(dataframe, columns=cat_cols, drop_first=True)
 
-        ctx.dataframe = dataframe
+        # Fixed categories give the same dummy columns for any subset of rows.
+        if ctx.categories is None:
+            ctx.categories = {col: sorted(dataframe[col].dropna().unique()) for col in cat_cols}
+        for col in cat_cols:
+            ctx.set_column(col, pd.Categorical(dataframe[col], categories=ctx.categories[col]))
+        ctx.dataframe = pd.get_dummies(dataframe, columns=cat_cols, drop_first=True, sparse=True)
         logging.info(f"EncodeCategoricalFeaturesHandler: Updated dataframe with {ctx.dataframe.shape[1]} features")
         return ctx
@@ -1,6 +1,10 @@
 from src.core import Handler, PipelineContext
+from src.ingest import iter_hh_csv, read_hh_csv
 
 import logging
+from pathlib import Path
+from typing import Iterator, Optional
+
 import pandas as pd
 
 class LoadCSVHandler(Handler):
@@ -9,16 +13,26 @@ class LoadCSVHandler(Handler):
 
     Methods:
         _process(ctx): Loads data from a CSV file into the context.
+        iter_chunks(csv_path, chunk_size, usecols): Lazily reads the CSV file in chunks of rows.
     """
+    row_local = False
+
     def _process(self, ctx: PipelineContext) -> PipelineContext:
         logging.info(f"LoadCSVHandler: Starting to load {ctx.csv_path}")
-        ctx.dataframe = pd.read_csv(
-            ctx.csv_path,
-            sep=",",
-            quotechar='"',
-            engine="python",
-            encoding="utf-8",
-            index_col=0
-        )
+        ctx.dataframe = read_hh_csv(ctx.csv_path)
         logging.info(f"LoadCSVHandler: Loaded {ctx.csv_path} with {ctx.dataframe.shape[0]} rows and {ctx.dataframe.shape[1]} columns")
         return ctx
+
+    def iter_chunks(self, csv_path: Path, chunk_size: int, usecols: Optional[list[str]] = None) -> Iterator[pd.DataFrame]:
+        """
+        Reads the CSV file lazily, so only one chunk of rows is kept in memory at a time.
+
+        Args:
+            csv_path: Path to the CSV file.
+            chunk_size: maximum number of rows in a chunk.
+            usecols: columns to read (default None - all columns).
+
+        Yields:
+            pd.DataFrame: next chunk of rows.
+        """
+        yield from iter_hh_csv(csv_path, chunk_size, usecols=usecols)
@@ -1,4 +1,5 @@
 from src.core import Handler, PipelineContext
+from src.memo import map_unique
 
 import logging
 
@@ -7,24 +8,34 @@ class ParseAgeHandler(Handler):
     Handler for parsing age information from the "Пол, возраст" column.
 
     Methods:
+        extract_age(value): Age of one raw value, -1 if it is not given.
+        parse_record(record, ctx): Extracts age information from one record.
         _process(ctx): Extracts age information from the raw text column.
     """
+    reads = ("Пол, возраст",)
+    writes = ("age",)
+    parses_records = True
+
+    @staticmethod
+    def extract_age(value: str) -> int:
+        data = value.split(',')
+        if len(data) < 2:
+            return -1
+        raw_age = data[1].strip().replace('\xa0', ' ')
+        raw_age = raw_age.split(' ')[0]
+        try:
+            return int(raw_age)
+        except (ValueError, IndexError):
+            return -1
+
+    def parse_record(self, record: dict, ctx: PipelineContext) -> dict:
+        record["age"] = self.extract_age(record["Пол, возраст"])
+        return record
+
     def _process(self, ctx: PipelineContext) -> PipelineContext:
         logging.info("ParseAgeHandler: Starting to parse age")
-        dataframe = ctx.dataframe.copy()
-        
-        def extract_age(value: str) -> int:
-            data = value.split(',')
-            if len(data) < 2:
-                return -1
-            raw_age = data[1].strip().replace('\xa0', ' ')
-            raw_age = raw_age.split(' ')[0]
-            try:
-                return int(raw_age)
-            except (ValueError, IndexError):
-                return -1
+        dataframe = ctx.dataframe
 
-        dataframe["age"] = dataframe["Пол, возраст"].apply(extract_age)
-        ctx.dataframe = dataframe
+        ctx.set_column("age", map_unique(dataframe["Пол, возраст"], self.extract_age))
         logging.info("ParseAgeHandler: Parsed age")
         return ctx
@@ -1,4 +1,5 @@
 from src.core import Handler, PipelineContext
+from src.memo import map_unique
 
 import logging
 
@@ -7,25 +8,35 @@ class ParseAutoHandler(Handler):
     Handler for parsing auto information from the "Авто" column. 
 
     Methods:
+        extract_auto(value): 1 if one raw value says there is a car, 0 otherwise.
+        parse_record(record, ctx): Extracts auto from one record.
         _process(ctx): Extracts new columns for auto from the raw text column.
     """
+    reads = ("Авто",)
+    writes = ("auto", "Авто")
+    parses_records = True
+
+    @staticmethod
+    def extract_auto(value: str) -> int:
+        match value:
+            case 'Имеется собственный автомобиль':
+                return 1
+            case 'Не указано':
+                return 0
+            case _:
+                return 0
+
+    def parse_record(self, record: dict, ctx: PipelineContext) -> dict:
+        record["auto"] = self.extract_auto(record.pop("Авто"))
+        return record
+
     def _process(self, ctx: PipelineContext) -> PipelineContext:
         logging.info(f"ParseAutoHandler: Starting to parse auto")
-        dataframe = ctx.dataframe.copy()
-
-        def extract_auto(value: str) -> str:
-            match value:
-                case 'Имеется собственный автомобиль':
-                    return 1
-                case 'Не указано':
-                    return 0
-                case _:
-                    return 0
+        dataframe = ctx.dataframe
 
-        dataframe["auto"] = dataframe["Авто"].apply(extract_auto)
+        ctx.set_column("auto", map_unique(dataframe["Авто"], self.extract_auto))
 
-        dataframe = dataframe.drop(columns=["Авто"])
+        ctx.drop_columns(["Авто"])
 
-        ctx.dataframe = dataframe
         logging.info(f"ParseAutoHandler: Parsed auto")
         return ctx
@@ -1,44 +1,58 @@
 from src.core import Handler, PipelineContext
+from src.memo import map_unique
 
 import logging
 
+# month names of the english and russian dumps
+MONTHS = {
+    'January': 0, 'января': 0,
+    'February': 1, 'февраля': 1,
+    'March': 2, 'марта': 2,
+    'April': 3, 'апреля': 3,
+    'May': 4, 'мая': 4,
+    'June': 5, 'июня': 5,
+    'July': 6, 'июля': 6,
+    'August': 7, 'августа': 7,
+    'September': 8, 'сентября': 8,
+    'October': 9, 'октября': 9,
+    'November': 10, 'ноября': 10,
+    'December': 11, 'декабря': 11,
+}
+
 class ParseBirthdayMonthHandler(Handler):
     """
     Handler for parsing birthday month information from the "Пол, возраст" column.
 
     Methods:
+        extract_birthday_month(value): Birthday month (0-11) of one raw value, -1 if it is not given.
+        parse_record(record, ctx): Extracts birthday month information from one record and drops the source field.
         _process(ctx): Extracts birthday month information from the raw text column.
     """
+    reads = ("Пол, возраст",)
+    writes = ("birthday_month", "Пол, возраст")
+    parses_records = True
+
+    @staticmethod
+    def extract_birthday_month(value: str) -> int:
+        data = value.split(',')
+        if len(data) < 3:
+            return -1
+        raw_birthday_month = data[2].strip().replace('\xa0', ' ')
+        raw_birthday_month = raw_birthday_month.split(' ')[-2]
+        return MONTHS.get(raw_birthday_month, -1)
+
+    def parse_record(self, record: dict, ctx: PipelineContext) -> dict:
+        record["birthday_month"] = self.extract_birthday_month(record.pop("Пол, возраст"))
+        return record
+
     def _process(self, ctx: PipelineContext) -> PipelineContext:
         logging.info("ParseBirthdayMonthHandler: Starting to parse birthday month")
-        dataframe = ctx.dataframe.copy()
-        
-        def extract_birthday_month(value: str) -> int:
-            data = value.split(',')
-            if len(data) < 3:
-                return -1
-            raw_birthday_month = data[2].strip().replace('\xa0', ' ')
-            raw_birthday_month = raw_birthday_month.split(' ')[-2]
-            match raw_birthday_month:
-                case 'January' | 'января': return 0
-                case 'February' | 'февраля': return 1
-                case 'March' | 'марта': return 2
-                case 'April' | 'апреля': return 3
-                case 'May' | 'мая': return 4
-                case 'June' | 'июня': return 5
-                case 'July' | 'июля': return 6
-                case 'August' | 'августа': return 7
-                case 'September' | 'сентября': return 8
-                case 'October' | 'октября': return 9
-                case 'November' | 'ноября': return 10
-                case 'December' | 'декабря': return 11
-                case _: return -1
-
-        dataframe["birthday_month"] = dataframe["Пол, возраст"].apply(extract_birthday_month)
-
-        if "Пол, возраст" in dataframe.columns:
-            dataframe = dataframe.drop(columns=["Пол, возраст"])
-
-        ctx.dataframe = dataframe
+        dataframe = ctx.dataframe
+
+        ctx.set_column("birthday_month", map_unique(dataframe["Пол, возраст"], self.extract_birthday_month))
+
+        if "Пол, возраст" in ctx.dataframe.columns:
+            ctx.drop_columns(["Пол, возраст"])
+
         logging.info("ParseBirthdayMonthHandler: Parsed birthday month and dropped source column")
         return ctx
@@ -1,36 +1,46 @@
 from src.core import Handler, PipelineContext
+from src.keywords import KeywordMatcher
 
 import logging
 
+EDUCATION_MAP = {
+    "incomplete_higher": ["неоконченное высшее", "incomplete higher"],
+    "higher": ["высшее образование", "higher education"],
+    "secondary_special": ["среднее специальное", "secondary special"],
+    "secondary": ["среднее образование", "secondary education"]
+}
+# one scan of every value finds all groups at once
+EDUCATION_MATCHER = KeywordMatcher(EDUCATION_MAP)
+# bit of every feature column, for single records
+EDUCATION_COLUMNS = {f"edu_{name}": EDUCATION_MATCHER.bits[name] for name in EDUCATION_MAP}
+
 class ParseEducationHandler(Handler):
     """
     Handler for parsing education information from the "Образование и ВУЗ" column.
 
     Methods:
+        parse_record(record, ctx): Extracts the education flags from one record.
         _process(ctx): Extracts new columns for education from the raw text column.
     """
+    reads = ("Образование и ВУЗ",)
+    writes = ("edu_*", "Образование и ВУЗ")
+    parses_records = True
+
+    def parse_record(self, record: dict, ctx: PipelineContext) -> dict:
+        mask = EDUCATION_MATCHER.match(record.pop("Образование и ВУЗ"))
+        for column_name, bit in EDUCATION_COLUMNS.items():
+            record[column_name] = 1 if mask & bit else 0
+        return record
+
     def _process(self, ctx: PipelineContext) -> PipelineContext:
         logging.info(f"ParseEducationHandler: Starting to parse education")
-        dataframe = ctx.dataframe.copy()
-
-        education_map = {
-            "incomplete_higher": ["неоконченное высшее", "incomplete higher"],
-            "higher": ["высшее образование", "higher education"],
-            "secondary_special": ["среднее специальное", "secondary special"],
-            "secondary": ["среднее образование", "secondary education"]
-        }
-
-        for column_name, keywords in education_map.items():
-            def extract_level(value: str) -> int:
-                value_lower = value.lower()
-                if any(keyword in value_lower for keyword in keywords):
-                    return 1
-                return 0
-            
-            dataframe[f"edu_{column_name}"] = dataframe["Образование и ВУЗ"].apply(extract_level)
-
-        dataframe = dataframe.drop(columns=["Образование и ВУЗ"])
-
-        ctx.dataframe = dataframe
+        dataframe = ctx.dataframe
+
+        masks = EDUCATION_MATCHER.match_column(dataframe["Образование и ВУЗ"])
+        for column_name in EDUCATION_MAP:
+            ctx.set_column(f"edu_{column_name}", EDUCATION_MATCHER.flags(masks, column_name))
+
+        ctx.drop_columns(["Образование и ВУЗ"])
+
         logging.info(f"ParseEducationHandler: Parsed education")
         return ctx
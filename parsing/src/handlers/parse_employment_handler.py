@@ -1,38 +1,48 @@
 from src.core import Handler, PipelineContext
+from src.keywords import KeywordMatcher
 
 import logging
 
+# group employment
+EMPLOYMENT_MAP = {
+    "full_time": ["полная занятость", "full time"],
+    "part_time": ["частичная занятость", "part time"],
+    "project": ["проектная работа", "project work"],
+    "internship": ["стажировка", "work placement"],
+    "volunteering": ["волонтерство", "volunteering"]
+}
+# one scan of every value finds all groups at once
+EMPLOYMENT_MATCHER = KeywordMatcher(EMPLOYMENT_MAP)
+# bit of every feature column, for single records
+EMPLOYMENT_COLUMNS = {f"emp_{name}": EMPLOYMENT_MATCHER.bits[name] for name in EMPLOYMENT_MAP}
+
 class ParseEmploymentHandler(Handler):
     """
     Handler for parsing employment information from the "Занятость" column.
 
     Methods:
+        parse_record(record, ctx): Extracts the employment flags from one record.
         _process(ctx): Extracts new columns for employment from the raw text column.
     """
+    reads = ("Занятость",)
+    writes = ("emp_*", "Занятость")
+    parses_records = True
+
+    def parse_record(self, record: dict, ctx: PipelineContext) -> dict:
+        mask = EMPLOYMENT_MATCHER.match(record.pop("Занятость"))
+        for column_name, bit in EMPLOYMENT_COLUMNS.items():
+            record[column_name] = 1 if mask & bit else 0
+        return record
+
     def _process(self, ctx: PipelineContext) -> PipelineContext:
         logging.info(f"ParseEmploymentHandler: Starting to parse employment")
-        dataframe = ctx.dataframe.copy()
-
-        # group employment
-        employment_map = {
-            "full_time": ["полная занятость", "full time"],
-            "part_time": ["частичная занятость", "part time"],
-            "project": ["проектная работа", "project work"],
-            "internship": ["стажировка", "work placement"],
-            "volunteering": ["волонтерство", "volunteering"]
-        }
-
-        for column_name, keywords in employment_map.items():
-            def check_employment(value: str) -> int:
-                value_lower = value.lower()
-                if any(keyword in value_lower for keyword in keywords):
-                    return 1
-                return 0
-            
-            dataframe[f"emp_{column_name}"] = dataframe["Занятость"].apply(check_employment)
-
-        dataframe = dataframe.drop(columns=["Занятость"])
-
-        ctx.dataframe = dataframe
+        dataframe = ctx.dataframe
+
+        masks = EMPLOYMENT_MATCHER.match_column(dataframe["Занятость"])
+        for column_name in EMPLOYMENT_MAP:
+            ctx.set_column(f"emp_{column_name}", EMPLOYMENT_MATCHER.flags(masks, column_name))
+
+        ctx.drop_columns(["Занятость"])
+
         logging.info(f"ParseEmploymentHandler: Parsed employment")
         return ctx
@@ -1,39 +1,50 @@
 from src.core import Handler, PipelineContext
+from src.memo import map_unique
 
 import logging
 import re
 
+YEARS_PATTERN = re.compile(r'(\d+)\s*(?:год|года|лет)')
+MONTHS_PATTERN = re.compile(r'(\d+)\s*(?:месяц|месяца|месяцев)')
+
 class ParseExperienceHandler(Handler):
     """
     Handler for parsing experience information from the "Опыт (двойное нажатие для полной версии)" column.
 
     Methods:
+        check_experience(value): Experience of one raw value in months.
+        parse_record(record, ctx): Extracts experience from one record.
         _process(ctx): Extracts new columns for experience from the raw text column.
     """
+    reads = ("Опыт (двойное нажатие для полной версии)",)
+    writes = ("experience_months", "Опыт (двойное нажатие для полной версии)")
+    parses_records = True
+
+    @staticmethod
+    def check_experience(value: str) -> int:
+        experience_part = value.split('\n')[0]
+
+        years = YEARS_PATTERN.search(experience_part)
+        months = MONTHS_PATTERN.search(experience_part)
+        total_months = 0
+        if years:
+            total_months += int(years.group(1)) * 12
+        if months:
+            total_months += int(months.group(1))
+
+        return total_months
+
+    def parse_record(self, record: dict, ctx: PipelineContext) -> dict:
+        record["experience_months"] = self.check_experience(record.pop("Опыт (двойное нажатие для полной версии)"))
+        return record
+
     def _process(self, ctx: PipelineContext) -> PipelineContext:
         logging.info(f"ParseExperienceHandler: Starting to parse experience")
-        dataframe = ctx.dataframe.copy()
-
-        def check_experience(value: str) -> int:
-            years_pattern = r'(\d+)\s*(?:год|года|лет)'
-            months_pattern = r'(\d+)\s*(?:месяц|месяца|месяцев)'
-            
-            experience_part = value.split('\n')[0]
-            
-            years = re.search(years_pattern, experience_part)
-            months = re.search(months_pattern, experience_part)
-            total_months = 0
-            if years:
-                total_months += int(years.group(1)) * 12
-            if months:
-                total_months += int(months.group(1))
-                
-            return total_months
-        
-        dataframe["experience_months"] = dataframe["Опыт (двойное нажатие для полной версии)"].apply(check_experience)
-
-        dataframe = dataframe.drop(columns=["Опыт (двойное нажатие для полной версии)"])
-
-        ctx.dataframe = dataframe
+        dataframe = ctx.dataframe
+
+        ctx.set_column("experience_months", map_unique(dataframe["Опыт (двойное нажатие для полной версии)"], self.check_experience))
+
+        ctx.drop_columns(["Опыт (двойное нажатие для полной версии)"])
+
         logging.info(f"ParseExperienceHandler: Parsed experience")
         return ctx
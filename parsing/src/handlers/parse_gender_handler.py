@@ -1,29 +1,41 @@
 from src.core import Handler, PipelineContext
+from src.memo import map_unique
 
 import logging
 
+# document possible gender values
+MALE_VALUES = frozenset(['Мужчина', 'Male'])
+# female_values = ['Женщина', 'Female']
+
 class ParseGenderHandler(Handler):
     """
     Handler for parsing gender information from the "Пол, возраст" column.
 
     Methods:
+        extract_gender(value): Gender of one raw value.
+        parse_record(record, ctx): Extracts gender information from one record.
         _process(ctx): Extracts gender information from the raw text column.
     """
+    reads = ("Пол, возраст",)
+    writes = ("gender",)
+    parses_records = True
+
+    # also encode them with 0 - male, 1 - female
+    @staticmethod
+    def extract_gender(value: str) -> int:
+        raw_gender = value.split(',')[0].strip()
+        if raw_gender in MALE_VALUES:
+            return 0 # Male
+        return 1 # Female
+
+    def parse_record(self, record: dict, ctx: PipelineContext) -> dict:
+        record["gender"] = self.extract_gender(record["Пол, возраст"])
+        return record
+
     def _process(self, ctx: PipelineContext) -> PipelineContext:
         logging.info("ParseGenderHandler: Starting to parse gender")
-        dataframe = ctx.dataframe.copy()
-        
-        # document possible gender values
-        male_values = ['Мужчина', 'Male']
-        # female_values = ['Женщина', 'Female']
-        # also encode them with 0 - male, 1 - female
-        def extract_gender(value: str) -> int:
-            raw_gender = value.split(',')[0].strip()
-            if raw_gender in male_values:
-                return 0 # Male
-            return 1 # Female
-
-        dataframe["gender"] = dataframe["Пол, возраст"].apply(extract_gender)
-        ctx.dataframe = dataframe
+        dataframe = ctx.dataframe
+
+        ctx.set_column("gender", map_unique(dataframe["Пол, возраст"], self.extract_gender))
         logging.info("ParseGenderHandler: Parsed gender")
         return ctx
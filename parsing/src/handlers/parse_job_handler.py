@@ -1,4 +1,5 @@
 from src.core import Handler, PipelineContext
+from src.memo import map_unique
 
 import logging
 
@@ -7,28 +8,46 @@ class ParseJobHandler(Handler):
     Handler for parsing job information from the "Ищет работу на должность:" column.
 
     Methods:
+        fit(ctx): Finds the job vocabulary (the 133 most frequent jobs) of the whole dataframe.
+        extract_job(value, vocabulary): The job if it is in the vocabulary, "other" otherwise.
+        parse_record(record, ctx): Extracts job from one record with the fitted vocabulary.
         _process(ctx): Extracts new columns for job from the raw text column.
     """
-    def _process(self, ctx: PipelineContext) -> PipelineContext:
-        logging.info(f"ParseJobHandler: Starting to parse job")
-        dataframe = ctx.dataframe.copy()
+    reads = ("Ищет работу на должность:",)
+    writes = ("job", "Ищет работу на должность:")
+    requires_global_stats = True
+    parses_records = True
 
+    def fit(self, ctx: PipelineContext) -> None:
         # due to pie chart of the distrubution of jobs, we can see 18007 different jobs.
         # However, there are only 133 jobs that are included more than 50 times.
         # So let's take only them - other jobs will be called "other" (as they make to much noise).
 
         # Also 133 jobs are much better for one-hot encoding (than 18007).
-        job_count = dataframe['Ищет работу на должность:'].value_counts()[:133]
+        # The vocabulary may be already computed for the whole file (e.g. in chunked mode).
+        if ctx.job_vocabulary is None:
+            ctx.job_vocabulary = ctx.dataframe['Ищет работу на должность:'].value_counts()[:133].index
+
+    @staticmethod
+    def extract_job(value: str, vocabulary) -> str:
+        if value in vocabulary:
+            return value
+        return "other"
+
+    def parse_record(self, record: dict, ctx: PipelineContext) -> dict:
+        record["job"] = self.extract_job(record.pop("Ищет работу на должность:"), ctx.job_vocabulary)
+        return record
+
+    def _process(self, ctx: PipelineContext) -> PipelineContext:
+        logging.info(f"ParseJobHandler: Starting to parse job")
+        dataframe = ctx.dataframe
 
-        def extract_job(value: str) -> str:
-            if value in job_count:
-                return value
-            return "other"
+        self.fit(ctx)
+        job_count = ctx.job_vocabulary
 
-        dataframe["job"] = dataframe["Ищет работу на должность:"].apply(extract_job)
+        ctx.set_column("job", map_unique(dataframe["Ищет работу на должность:"], lambda value: self.extract_job(value, job_count)))
 
-        dataframe = dataframe.drop(columns=["Ищет работу на должность:"])
+        ctx.drop_columns(["Ищет работу на должность:"])
 
-        ctx.dataframe = dataframe
         logging.info(f"ParseJobHandler: Parsed job")
         return ctx
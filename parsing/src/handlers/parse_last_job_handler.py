@@ -1,4 +1,6 @@
 from src.core import Handler, PipelineContext
+from src.handlers.parse_job_handler import ParseJobHandler
+from src.memo import map_unique
 
 import logging
 
@@ -7,24 +9,34 @@ class ParseLastJobHandler(Handler):
     Handler for parsing last job information from the "Последеняя/нынешняя должность" column.
 
     Methods:
+        fit(ctx): Takes the jobs of the whole dataframe if the job vocabulary is not known yet.
+        parse_record(record, ctx): Extracts last job from one record with the fitted vocabulary.
         _process(ctx): Extracts new columns for last job from the raw text column.
     """
-    def _process(self, ctx: PipelineContext) -> PipelineContext:
-        logging.info(f"ParseLastJobHandler: Starting to parse last job")
-        dataframe = ctx.dataframe.copy()
+    reads = ("Последеняя/нынешняя должность", "job")
+    writes = ("last_job", "Последеняя/нынешняя должность")
+    requires_global_stats = True
+    parses_records = True
 
+    def fit(self, ctx: PipelineContext) -> None:
         # lets take jobs from jobs column and parse only them
-        jobs = dataframe['job'].value_counts()
+        if ctx.job_vocabulary is None:
+            ctx.job_vocabulary = ctx.dataframe['job'].value_counts().index
+
+    def parse_record(self, record: dict, ctx: PipelineContext) -> dict:
+        record["last_job"] = ParseJobHandler.extract_job(record.pop("Последеняя/нынешняя должность"), ctx.job_vocabulary)
+        return record
+
+    def _process(self, ctx: PipelineContext) -> PipelineContext:
+        logging.info(f"ParseLastJobHandler: Starting to parse last job")
+        dataframe = ctx.dataframe
 
-        def extract_job(value: str) -> str:
-            if value in jobs:
-                return value
-            return "other"
+        self.fit(ctx)
+        jobs = ctx.job_vocabulary
 
-        dataframe["last_job"] = dataframe["Последеняя/нынешняя должность"].apply(extract_job)
+        ctx.set_column("last_job", map_unique(dataframe["Последеняя/нынешняя должность"], lambda value: ParseJobHandler.extract_job(value, jobs)))
 
-        dataframe = dataframe.drop(columns=["Последеняя/нынешняя должность"])
+        ctx.drop_columns(["Последеняя/нынешняя должность"])
 
-        ctx.dataframe = dataframe
         logging.info(f"ParseLastJobHandler: Parsed last job")
         return ctx
@@ -7,15 +7,22 @@ class ParseLastPlaceHandler(Handler):
     Handler for parsing last place information from the "Последенее/нынешнее место работы" column.
 
     Methods:
+        parse_record(record, ctx): Removes the last place from one record.
         _process(ctx): Removes column for last place from the dataframe.
     """
+    reads = ("Последенее/нынешнее место работы",)
+    writes = ("Последенее/нынешнее место работы",)
+    parses_records = True
+
+    def parse_record(self, record: dict, ctx: PipelineContext) -> dict:
+        record.pop("Последенее/нынешнее место работы", None)
+        return record
+
     def _process(self, ctx: PipelineContext) -> PipelineContext:
         logging.info(f"ParseLastPlaceHandler: Starting to parse last place")
-        dataframe = ctx.dataframe.copy()
 
         # This column does not seem to be useful for the analysis, because we already use
         # last job column and city column. Therefore, we can drop this column.
-        dataframe = dataframe.drop(columns=["Последенее/нынешнее место работы"])
-        ctx.dataframe = dataframe
+        ctx.drop_columns(["Последенее/нынешнее место работы"])
         logging.info(f"ParseLastPlaceHandler: Dropped last place column")
         return ctx
@@ -1,4 +1,5 @@
 from src.core import Handler, PipelineContext
+from src.memo import map_unique
 
 import logging
 
@@ -8,24 +9,34 @@ class ParseResumeHandler(Handler):
     Splits resume in "old" (more than 1 year) and "not old" (less than 1 year).
 
     Methods:
+        extract_oldness(value): 1 if the resume of one raw value is old, 0 otherwise.
+        parse_record(record, ctx): Extracts resume oldness from one record.
         _process(ctx): Extracts new columns for resume from the raw text column.
     """
+    reads = ("Обновление резюме",)
+    writes = ("old_resume", "Обновление резюме")
+    parses_records = True
+
+    @staticmethod
+    def extract_oldness(value: str) -> int:
+        try:
+            year = int(value.split('.')[2].split(' ')[0])
+        except Exception as e:
+            logging.error(f"ParseResumeHandler: Error extracting oldness: {e}")
+            year = 0
+        return 0 if year > 2018 else 1
+
+    def parse_record(self, record: dict, ctx: PipelineContext) -> dict:
+        record["old_resume"] = self.extract_oldness(record.pop("Обновление резюме"))
+        return record
+
     def _process(self, ctx: PipelineContext) -> PipelineContext:
         logging.info(f"ParseResumeHandler: Starting to parse resume")
-        dataframe = ctx.dataframe.copy()
-
-        def extract_oldness(value: str) -> str:
-            try:
-                year = int(value.split('.')[2].split(' ')[0])
-            except Exception as e:
-                logging.error(f"ParseResumeHandler: Error extracting oldness: {e}")
-                year = 0
-            return 0 if year > 2018 else 1
+        dataframe = ctx.dataframe
 
-        dataframe["old_resume"] = dataframe["Обновление резюме"].apply(extract_oldness)
+        ctx.set_column("old_resume", map_unique(dataframe["Обновление резюме"], self.extract_oldness))
 
-        dataframe = dataframe.drop(columns=["Обновление резюме"])
+        ctx.drop_columns(["Обновление резюме"])
 
-        ctx.dataframe = dataframe
         logging.info(f"ParseResumeHandler: Parsed resume")
         return ctx
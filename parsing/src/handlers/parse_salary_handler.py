@@ -1,52 +1,65 @@
 from src.core import Handler, PipelineContext
+from src.memo import map_unique
 
 import logging
 
+# approximate 2020 currency rates
+CURRENCY_RATES = {
+    'руб.': 1.0,
+    'USD': 73.35,
+    'RUB': 1.0,
+    'KZT': 0.18,
+    'бел. руб.': 2.28,
+    'EUR': 85.86,
+    'грн.': 2.72,
+    'сум': 0.005,
+    'KGS': 0.98,
+    'UAH': 2.5,
+    'BYN': 2.5,
+    'AZN': 41.1,
+    'som': 0.005,
+}
+
 class ParseSalaryHandler(Handler):
     """
     Handler for parsing salary information from the "ЗП" column and converting it to rubles.
 
     Methods:
+        extract_salary(value): Salary of one raw value in rubles.
+        parse_record(record, ctx): Extracts salary from one record if it is given (it is the target, not a feature).
         _process(ctx): Extracts new columns for salary from the raw text column and converts it to rubles.
     """
+    reads = ("ЗП",)
+    writes = ("salary_rub", "ЗП")
+    parses_records = True
+
+    @staticmethod
+    def extract_salary(value: str) -> float:
+        value = value.replace('\xa0', ' ').strip().split(' ')
+        number = ''
+        currency = ''
+
+        for idx, cur in enumerate(value):
+            if cur.isdigit():
+                number += cur
+            else:
+                currency = ' '.join(value[idx:])
+                break
+        return CURRENCY_RATES[currency.strip()] * float(number)
+
+    def parse_record(self, record: dict, ctx: PipelineContext) -> dict:
+        value = record.pop("ЗП", None)
+        if value is not None:
+            record["salary_rub"] = self.extract_salary(value)
+        return record
+
     def _process(self, ctx: PipelineContext) -> PipelineContext:
         logging.info(f"ParseSalaryHandler: Starting to parse salary")
-        dataframe = ctx.dataframe.copy()
-
-        # approximate 2020 currency rates
-        currency_rates = {
-            'руб.': 1.0,
-            'USD': 73.35,
-            'RUB': 1.0,
-            'KZT': 0.18,
-            'бел. руб.': 2.28,
-            'EUR': 85.86,
-            'грн.': 2.72,
-            'сум': 0.005,
-            'KGS': 0.98,
-            'UAH': 2.5,
-            'BYN': 2.5,
-            'AZN': 41.1,
-            'som': 0.005,
-        }
-        
-        def extract_salary(value: str) -> str:
-            value = value.replace('\xa0', ' ').strip().split(' ')
-            number = ''
-            currency = ''
-
-            for idx, cur in enumerate(value):
-                if cur.isdigit():
-                    number += cur
-                else:
-                    currency = ' '.join(value[idx:])
-                    break
-            return currency_rates[currency.strip()] * float(number)
-
-        dataframe["salary_rub"] = dataframe["ЗП"].apply(extract_salary)
-
-        dataframe = dataframe.drop(columns=["ЗП"])
-
-        ctx.dataframe = dataframe
+        dataframe = ctx.dataframe
+
+        ctx.set_column("salary_rub", map_unique(dataframe["ЗП"], self.extract_salary))
+
+        ctx.drop_columns(["ЗП"])
+
         logging.info(f"ParseSalaryHandler: Parsed salary")
         return ctx
@@ -1,37 +1,47 @@
 from src.core import Handler, PipelineContext
+from src.keywords import KeywordMatcher
 
 import logging
 
+SCHEDULE_MAP = {
+    "full_day": ["полный день", "full day"],
+    "flexible": ["гибкий график", "flexible schedule"],
+    "shift": ["сменный график", "shift schedule"],
+    "remote": ["удаленная работа", "remote working"],
+    "rotation": ["вахтовый метод", "rotation based work"]
+}
+# one scan of every value finds all groups at once
+SCHEDULE_MATCHER = KeywordMatcher(SCHEDULE_MAP)
+# bit of every feature column, for single records
+SCHEDULE_COLUMNS = {f"sch_{name}": SCHEDULE_MATCHER.bits[name] for name in SCHEDULE_MAP}
+
 class ParseWorkScheduleHandler(Handler):
     """
     Handler for parsing work schedule information from the "График" column.
 
     Methods:
+        parse_record(record, ctx): Extracts the work schedule flags from one record.
         _process(ctx): Extracts new columns for work schedule from the raw text column.
     """
+    reads = ("График",)
+    writes = ("sch_*", "График")
+    parses_records = True
+
+    def parse_record(self, record: dict, ctx: PipelineContext) -> dict:
+        mask = SCHEDULE_MATCHER.match(record.pop("График"))
+        for column_name, bit in SCHEDULE_COLUMNS.items():
+            record[column_name] = 1 if mask & bit else 0
+        return record
+
     def _process(self, ctx: PipelineContext) -> PipelineContext:
         logging.info(f"ParseWorkScheduleHandler: Starting to parse work schedule")
-        dataframe = ctx.dataframe.copy()
-
-        schedule_map = {
-            "full_day": ["полный день", "full day"],
-            "flexible": ["гибкий график", "flexible schedule"],
-            "shift": ["сменный график", "shift schedule"],
-            "remote": ["удаленная работа", "remote working"],
-            "rotation": ["вахтовый метод", "rotation based work"]
-        }
-
-        for column_name, keywords in schedule_map.items():
-            def check_schedule(value: str) -> int:
-                value_lower = value.lower()
-                if any(keyword in value_lower for keyword in keywords):
-                    return 1
-                return 0
-            
-            dataframe[f"sch_{column_name}"] = dataframe["График"].apply(check_schedule)
-
-        dataframe = dataframe.drop(columns=["График"])
-
-        ctx.dataframe = dataframe
+        dataframe = ctx.dataframe
+
+        masks = SCHEDULE_MATCHER.match_column(dataframe["График"])
+        for column_name in SCHEDULE_MAP:
+            ctx.set_column(f"sch_{column_name}", SCHEDULE_MATCHER.flags(masks, column_name))
+
+        ctx.drop_columns(["График"])
+
         logging.info(f"ParseWorkScheduleHandler: Parsed work schedule")
         return ctx
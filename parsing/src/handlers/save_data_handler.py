@@ -1,19 +1,204 @@
 from src.core import Handler, PipelineContext
+from src.fitted import FittedPipeline
+from src.sparse import CSRParts, to_csr
+from src.store import write_store
 
+import json
 import logging
+from pathlib import Path
+from typing import Optional
 
 import numpy as np
+import pandas as pd
+import scipy.sparse as sp
 
 class SaveDataHandler(Handler):
     """
-    Handler for saving the dataset into features.npy and target.npy files.
+    Handler for saving the dataset into features.npz (or features.npy) and target.npy files.
+
+    By default the features are saved as a float32 CSR matrix into features.npz (scipy.sparse.save_npz):
+    most of the columns are one-hot dummies, so the matrix stays sparse up to CatBoost.
+    With sparse=False they are saved as a dense float32 matrix into features.npy, which can be
+    opened with np.load(..., mmap_mode="r") without pickle. Feature names, original dtypes
+    and the format are saved into the features.json sidecar.
+
+    Categorical (object) columns are left by the pipeline without one-hot encoding (native_categorical),
+    so CatBoost can take them as cat_features. They are saved separately into categorical.npy as int32
+    codes (-1 for a missing value), and their categories are saved into the sidecar.
+
+    A fit run also saves the fitted pipeline (job vocabulary, categories, feature columns) into
+    pipeline.json; its version is written into the sidecar, so the features can be matched with it.
+    A transform-only run keeps the artifact it was started with.
+
+    With store_dir the dataset is also written into a new version of the partitioned columnar feature
+    store (src/store.py), which can be read by columns and row ranges.
+
+    Attributes:
+        sparse: save the features as a CSR matrix (default True).
+        store_dir: directory of the feature store (default None - the store is not written).
+        features_path: path of the saved features (depends on sparse).
+        target_path: path of the saved target.
+        categorical_path: path of the saved codes of the categorical columns.
+        schema_path: path of the sidecar with feature names and dtypes.
+        pipeline_path: path of the fitted pipeline.
+        features_dtype: dtype of the saved features.
+        target_dtype: dtype of the saved target.
 
     Methods:
-        _process(ctx): Saves the dataset into features.npy and target.npy files.
+        categorical_columns(features): Names of the categorical columns.
+        encode_categorical(features, categories): int32 codes of the categorical columns.
+        split_categorical(ctx): Separates the categorical columns of the features as codes.
+        save_features(features): Saves a features matrix in the format of the handler.
+        save_fitted(ctx, features): Saves the fitted pipeline of a fit run, returns its version.
+        save_schema(features, n_rows, nnz, categories, pipeline_version): Saves the sidecar for a features matrix of n_rows rows.
+        column_schema(features): Names and original dtypes of the columns.
+        save_store(matrix, target, codes, columns, categories, pipeline_version): Writes the dataset into the feature store.
+        _process(ctx): Saves the dataset into the features and target files.
     """
+    row_local = False
+    cacheable = False
+
+    dense_features_path = Path("features.npy")
+    sparse_features_path = Path("features.npz")
+    target_path = Path("target.npy")
+    categorical_path = Path("categorical.npy")
+    schema_path = Path("features.json")
+    pipeline_path = Path("pipeline.json")
+    features_dtype = np.float32
+    target_dtype = np.float64
+    target_name = "salary_rub"
+
+    def __init__(self, sparse: bool = True, store_dir: Optional[Path] = None):
+        super().__init__()
+        self.sparse = sparse
+        self.store_dir = store_dir
+
+    @property
+    def features_path(self) -> Path:
+        return self.sparse_features_path if self.sparse else self.dense_features_path
+
+    @staticmethod
+    def categorical_columns(features: pd.DataFrame) -> list[str]:
+        return features.select_dtypes(include=["object", "category"]).columns.tolist()
+
+    @staticmethod
+    def encode_categorical(features: pd.DataFrame, categories: dict[str, list]) -> np.ndarray:
+        return np.column_stack([
+            pd.Categorical(features[col], categories=categories[col]).codes.astype(np.int32) for col in features.columns
+        ])
+
+    @staticmethod
+    def column_schema(features: pd.DataFrame) -> list[dict]:
+        return [{"name": str(name), "dtype": str(dtype)} for name, dtype in features.dtypes.items()]
+
+    def save_features(self, features) -> Optional[int]:
+        """
+        Returns:
+            number of stored values of the sparse matrix, None for the dense one.
+        """
+        if isinstance(features, CSRParts):
+            features.save_npz(self.features_path)
+            return features.nnz
+        if self.sparse:
+            matrix = features if sp.issparse(features) else to_csr(features, dtype=self.features_dtype)
+            sp.save_npz(self.features_path, matrix.tocsr(), compressed=False)
+            return matrix.nnz
+        matrix = features.to_numpy(dtype=self.features_dtype) if isinstance(features, pd.DataFrame) else features
+        np.save(self.features_path, np.asarray(matrix, dtype=self.features_dtype))
+        return None
+
+    def save_fitted(self, ctx: PipelineContext, features: pd.DataFrame) -> str:
+        """
+        Returns:
+            version of the fitted pipeline the features were made with.
+        """
+        if ctx.fitted is not None:
+            return ctx.fitted.version
+        native_categorical = bool(self.categorical_columns(features))
+        fitted = FittedPipeline.from_context(ctx, features.columns.tolist(), native_categorical=native_categorical)
+        fitted.save(self.pipeline_path)
+        return fitted.version
+
+    def save_schema(
+        self,
+        features: pd.DataFrame,
+        n_rows: int,
+        nnz: Optional[int] = None,
+        categories: Optional[dict[str, list]] = None,
+        pipeline_version: Optional[str] = None,
+    ) -> None:
+        schema = {
+            "features_path": self.features_path.name,
+            "target_path": self.target_path.name,
+            "format": "csr" if self.sparse else "dense",
+            "shape": [n_rows, features.shape[1]],
+            "dtype": np.dtype(self.features_dtype).name,
+            "target_dtype": np.dtype(self.target_dtype).name,
+            "columns": self.column_schema(features),
+        }
+        if nnz is not None:
+            schema["nnz"] = int(nnz)
+        if pipeline_version is not None:
+            schema["pipeline_path"] = self.pipeline_path.name
+            schema["pipeline_version"] = pipeline_version
+        if categories:
+            schema["categorical_path"] = self.categorical_path.name
+            schema["categorical"] = [
+                {"name": str(name), "categories": [str(value) for value in values]} for name, values in categories.items()
+            ]
+        self.schema_path.write_text(json.dumps(schema, indent=2, ensure_ascii=False), encoding="utf-8")
+
+    def split_categorical(self, ctx: PipelineContext) -> tuple[pd.DataFrame, Optional[np.ndarray], Optional[dict[str, list]]]:
+        """
+        Returns:
+            the features without the categorical columns, the codes of the categorical columns
+            and their categories (None without categorical columns).
+        """
+        features = ctx.features
+        cat_cols = self.categorical_columns(features)
+        if not cat_cols:
+            return features, None, None
+        # categories of the columns left without one-hot encoding are a part of the fitted pipeline
+        ctx.categories = dict(ctx.categories or {})
+        for col in cat_cols:
+            if col not in ctx.categories:
+                ctx.categories[col] = sorted(features[col].dropna().unique())
+        categories = {col: ctx.categories[col] for col in cat_cols}
+        return features.drop(columns=cat_cols), self.encode_categorical(features[cat_cols], categories), categories
+
+    def save_store(
+        self,
+        matrix,
+        target: np.ndarray,
+        codes: Optional[np.ndarray],
+        columns: list[dict],
+        categories: Optional[dict[str, list]],
+        pipeline_version: Optional[str],
+    ) -> None:
+        """
+        Args:
+            matrix: numeric features as they are saved (CSR matrix or dense array).
+            target: target of every row.
+            codes: codes of the categorical columns (None without them).
+            columns: names and original dtypes of the numeric features (see column_schema).
+            categories: categories of the categorical columns (None without them).
+            pipeline_version: version of the fitted pipeline.
+        """
+        if self.store_dir is None:
+            return
+        write_store(self.store_dir, matrix, target, columns, self.target_name, codes, categories, pipeline_version)
+
     def _process(self, ctx: PipelineContext) -> PipelineContext:
         logging.info(f"SaveDataHandler: Saving data")
-        np.save("features.npy", ctx.features)
-        np.save("target.npy", ctx.target)
-        logging.info(f"SaveDataHandler: Data was saved to features.npy and target.npy files")
+        features, codes, categories = self.split_categorical(ctx)
+        if codes is not None:
+            np.save(self.categorical_path, codes)
+        pipeline_version = self.save_fitted(ctx, ctx.features)
+        matrix = to_csr(features, dtype=self.features_dtype) if self.sparse else features.to_numpy(dtype=self.features_dtype)
+        nnz = self.save_features(matrix)
+        target = ctx.target.to_numpy(dtype=self.target_dtype)
+        np.save(self.target_path, target)
+        self.save_schema(features, len(features), nnz, categories, pipeline_version)
+        self.save_store(matrix, target, codes, self.column_schema(features), categories, pipeline_version)
+        logging.info(f"SaveDataHandler: Data was saved to {self.features_path} and {self.target_path} files")
         return ctx
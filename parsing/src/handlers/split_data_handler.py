@@ -6,14 +6,20 @@ class SplitDataHandler(Handler):
     """
     Handler for splitting the dataset into features and target.
 
+    In a transform-only run the features are checked against the columns of the fitted pipeline.
+
     Methods:
         _process(ctx): Splits the dataset into features and target.
     """
+    row_local = False
+
     def _process(self, ctx: PipelineContext) -> PipelineContext:
         logging.info(f"SplitDataHandler: Splitting data into features and target")
-        dataframe = ctx.dataframe.copy()
+        dataframe = ctx.dataframe
 
         ctx.features = dataframe.drop(columns=["salary_rub"])
+        if ctx.fitted is not None:
+            ctx.features = ctx.fitted.align(ctx.features)
         ctx.target = dataframe["salary_rub"]
 
         ctx.dataframe = None
@@ -0,0 +1,201 @@
+from src.cache import handler_fingerprint
+from src.core import Handler, PipelineContext
+from src.fitted import FittedPipeline
+from src.handlers import LoadCSVHandler, SaveDataHandler
+from src.ingest import read_hh_csv
+from src.profiling import Profiler
+from src.sparse import to_csr
+
+import hashlib
+import json
+import logging
+from pathlib import Path
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+import scipy.sparse as sp
+
+ROW_INDEX_PATH = Path("row_index.npz")
+ROW_INDEX_META_PATH = Path("row_index.json")
+
+
+def hash_rows(dataframe: pd.DataFrame) -> np.ndarray:
+    """
+    Returns:
+        np.ndarray: uint64 hash of the raw fields of every row (the index is not hashed).
+    """
+    return pd.util.hash_pandas_object(dataframe, index=False).to_numpy(dtype=np.uint64)
+
+
+def pipeline_fingerprint(handlers: list[Handler]) -> str:
+    """
+    Hash of the code and config of every handler of the chain and of the pandas version (the row hash depends on it).
+    """
+    digest = hashlib.sha256(pd.__version__.encode())
+    for handler in handlers:
+        digest.update(handler_fingerprint(handler).encode())
+    return digest.hexdigest()
+
+
+def outputs_stamp(paths: list[Path]) -> str:
+    """
+    Hash of the names, sizes and modification times of the output files: it changes when
+    another run of the pipeline rewrites them.
+    """
+    stamps = [[str(path), path.stat().st_size, path.stat().st_mtime_ns] for path in paths if path.exists()]
+    return hashlib.sha256(json.dumps(stamps).encode()).hexdigest()[:16]
+
+
+def output_paths(save: SaveDataHandler) -> list[Path]:
+    return [save.features_path, save.target_path, save.categorical_path, save.schema_path, save.pipeline_path]
+
+
+def load_store(save: SaveDataHandler, fingerprint: str, fitted: Optional[FittedPipeline]) -> Optional[dict]:
+    """
+    Loads the row index and the output of the previous incremental run if they can be reused.
+
+    Returns:
+        dict: index, hash, features, target and codes of the stored rows; None if the rows have to be parsed again.
+    """
+    if not (ROW_INDEX_META_PATH.exists() and ROW_INDEX_PATH.exists()):
+        return None
+    meta = json.loads(ROW_INDEX_META_PATH.read_text(encoding="utf-8"))
+    reasons = {
+        "the pipeline code has changed": meta.get("fingerprint") != fingerprint,
+        "the fitted pipeline is another": fitted is None or meta.get("pipeline_version") != fitted.version,
+        "the features are saved in another format": meta.get("format") != ("csr" if save.sparse else "dense"),
+        "the output was rewritten by another run": meta.get("outputs") != outputs_stamp(output_paths(save)),
+    }
+    reason = next((reason for reason, failed in reasons.items() if failed), None)
+    if reason is not None:
+        logging.info(f"Incremental: Parsing all rows again: {reason}")
+        return None
+
+    rows = np.load(ROW_INDEX_PATH)
+    # the arrays are read into memory: the files are rewritten by this run
+    features = sp.load_npz(save.features_path).tocsr() if save.sparse else np.load(save.features_path)
+    codes = np.load(save.categorical_path) if save.categorical_path.exists() and fitted.native_categorical else None
+    return {
+        "index": rows["index"],
+        "hash": rows["hash"],
+        "features": features,
+        "target": np.load(save.target_path),
+        "codes": codes,
+    }
+
+
+def run_incremental(
+    csv_path: Path,
+    pipeline: Handler,
+    profiler: Optional[Profiler] = None,
+    fitted: Optional[FittedPipeline] = None,
+) -> PipelineContext:
+    """
+    Parses only the rows of the CSV file that are new or have changed since the last incremental run.
+
+    The row index of hh.csv (its first column) identifies a resume. Every run saves next to the output the
+    index and a hash of the raw fields of every row (row_index.npz). The next run reads the file, hashes its
+    rows and compares them with the saved ones: only the rows with a new index or another hash go through
+    the handlers, the features of the other rows are taken from the saved output. Removed rows are dropped,
+    and the output keeps the order of the file, so a file with appended rows gives an output with appended rows.
+
+    The job vocabulary and the categories stay frozen: the delta is transformed with the fitted pipeline
+    (pipeline.json of the previous run or the one given with --transform), so the features of old and new rows have the same
+    columns. The first run (without pipeline.json) fits the pipeline on all rows. All rows are parsed again
+    when the saved output cannot be reused: another version of the fitted pipeline (to refit the vocabulary,
+    run the pipeline without --incremental), changed code of a handler, another format of the features or
+    an output rewritten by another run.
+
+    Args:
+        csv_path: Path to the CSV file.
+        pipeline: first handler of the chain, the last one must be SaveDataHandler.
+        profiler: measures every handler run (default None).
+        fitted: fitted pipeline, pipeline.json of the previous run (default None - fit on all rows).
+
+    Returns:
+        PipelineContext: context of the parsed delta.
+    """
+    handlers = list(pipeline.iter_chain())
+    load, stages, save = handlers[0], handlers[1:-1], handlers[-1]
+    if not isinstance(load, LoadCSVHandler) or not isinstance(save, SaveDataHandler):
+        raise ValueError("Incremental mode requires the pipeline to start with LoadCSVHandler and end with SaveDataHandler")
+    fingerprint = pipeline_fingerprint(handlers)
+    store = load_store(save, fingerprint, fitted)
+
+    logging.info(f"Incremental: Reading {csv_path}")
+    dataframe = read_hh_csv(csv_path)
+    if not dataframe.index.is_unique or not pd.api.types.is_integer_dtype(dataframe.index):
+        raise ValueError(f"Incremental mode requires a unique integer row index in {csv_path}")
+    index = dataframe.index.to_numpy(dtype=np.int64)
+    hashes = hash_rows(dataframe)
+
+    n_stored = 0 if store is None else len(store["index"])
+    if store is None:
+        positions = np.full(len(index), -1)
+        unchanged = np.zeros(len(index), dtype=bool)
+    else:
+        positions = pd.Index(store["index"]).get_indexer(index)
+        unchanged = (positions >= 0) & (store["hash"][positions] == hashes)
+    delta = ~unchanged
+    n_removed = n_stored - int(np.count_nonzero(positions >= 0))
+    logging.info(
+        f"Incremental: {int(np.count_nonzero(positions < 0))} new, {int(np.count_nonzero(delta & (positions >= 0)))} changed, "
+        f"{n_removed} removed and {int(np.count_nonzero(unchanged))} unchanged rows"
+    )
+    if store is not None and not delta.any() and n_removed == 0 and np.array_equal(positions, np.arange(n_stored)):
+        logging.info("Incremental: The output is up to date")
+        return PipelineContext(csv_path=csv_path, profiler=profiler, fitted=fitted)
+
+    ctx = PipelineContext(csv_path=csv_path, dataframe=dataframe[delta], profiler=profiler)
+    del dataframe
+    if fitted is not None:
+        ctx = fitted.apply(ctx)
+    # features, target and codes of the stored rows followed by the delta
+    parts = [] if store is None else [(store["features"], store["target"], store["codes"])]
+    schema = None
+    if delta.any():
+        for stage in stages:
+            ctx = stage.run(ctx)
+        features, codes, categories = save.split_categorical(ctx)
+        matrix = to_csr(features, dtype=save.features_dtype) if save.sparse else features.to_numpy(dtype=save.features_dtype)
+        parts.append((matrix, ctx.target.to_numpy(dtype=save.target_dtype), codes))
+    else:
+        # rows were only removed or reordered: nothing to parse, the columns are those of the stored output
+        schema = json.loads(save.schema_path.read_text(encoding="utf-8"))
+    take = np.where(unchanged, positions, n_stored + np.cumsum(delta) - 1)
+
+    # the row index is invalidated first: an interrupted run is not taken for a finished one
+    ROW_INDEX_META_PATH.unlink(missing_ok=True)
+    stack = sp.vstack if save.sparse else np.concatenate
+    matrix = stack([part[0] for part in parts])[take]
+    target = np.concatenate([part[1] for part in parts])[take]
+    codes = np.concatenate([part[2] for part in parts])[take] if parts[0][2] is not None else None
+    nnz = save.save_features(matrix)
+    np.save(save.target_path, target)
+    if codes is not None:
+        np.save(save.categorical_path, codes)
+    if schema is None:
+        pipeline_version = save.save_fitted(ctx, ctx.features)
+        save.save_schema(features, len(take), nnz, categories, pipeline_version)
+        columns = save.column_schema(features)
+    else:
+        pipeline_version = fitted.version
+        schema["shape"][0] = len(take)
+        if nnz is not None:
+            schema["nnz"] = int(nnz)
+        save.schema_path.write_text(json.dumps(schema, indent=2, ensure_ascii=False), encoding="utf-8")
+        columns = schema["columns"]
+        categories = {column["name"]: column["categories"] for column in schema.get("categorical", [])} or None
+    save.save_store(matrix, target, codes, columns, categories, pipeline_version)
+    np.savez(ROW_INDEX_PATH, index=index, hash=hashes)
+    meta = {
+        "rows": len(take),
+        "pipeline_version": pipeline_version,
+        "fingerprint": fingerprint,
+        "format": "csr" if save.sparse else "dense",
+        "outputs": outputs_stamp(output_paths(save)),
+    }
+    ROW_INDEX_META_PATH.write_text(json.dumps(meta, indent=2), encoding="utf-8")
+    logging.info(f"Incremental: Parsed {int(np.count_nonzero(delta))} rows, saved {len(take)} rows to {save.features_path} and {save.target_path}")
+    return ctx
@@ -0,0 +1,319 @@
+import csv
+import io
+import logging
+from pathlib import Path
+from typing import Iterator, Optional
+
+import numpy as np
+import pandas as pd
+
+try:
+    import pyarrow as pa
+    import pyarrow.csv as pa_csv
+except ImportError:
+    pa = None
+
+# hh.csv columns; every column is raw text parsed later by the handlers.
+HH_SCHEMA: dict[str, type] = {
+    "Пол, возраст": str,
+    "ЗП": str,
+    "Ищет работу на должность:": str,
+    "Город": str,
+    "Занятость": str,
+    "График": str,
+    "Опыт (двойное нажатие для полной версии)": str,
+    "Последенее/нынешнее место работы": str,
+    "Последеняя/нынешняя должность": str,
+    "Образование и ВУЗ": str,
+    "Обновление резюме": str,
+    "Авто": str,
+}
+
+# The index column of hh.csv has an empty header.
+INDEX_COLUMNS = ("", "Unnamed: 0")
+
+# Values pd.read_csv reads as NaN by default; pyarrow is given the same ones.
+NA_VALUES = [
+    "", "#N/A", "#N/A N/A", "#NA", "-1.#IND", "-1.#QNAN", "-NaN", "-nan", "1.#IND", "1.#QNAN",
+    "<NA>", "N/A", "NA", "NULL", "NaN", "None", "n/a", "nan", "null",
+]
+
+CSV_OPTIONS = {
+    "sep": ",",
+    "quotechar": '"',
+    "encoding": "utf-8",
+    "index_col": 0,
+}
+
+
+def _read_header(csv_path: Path) -> list[str]:
+    with open(csv_path, encoding=CSV_OPTIONS["encoding"], newline="") as fin:
+        return next(csv.reader(fin, delimiter=CSV_OPTIONS["sep"], quotechar=CSV_OPTIONS["quotechar"]))
+
+
+def _columns(usecols: Optional[list[str]]) -> list[str]:
+    columns = list(HH_SCHEMA) if usecols is None else list(usecols)
+    unknown = set(columns) - set(HH_SCHEMA)
+    if unknown:
+        raise ValueError(f"Unknown hh.csv columns: {sorted(unknown)}")
+    return columns
+
+
+def _pandas_options(columns: list[str]) -> dict:
+    wanted = set(columns) | set(INDEX_COLUMNS)
+    return {
+        **CSV_OPTIONS,
+        "engine": "c",
+        "usecols": lambda name: name in wanted,
+        "dtype": {col: HH_SCHEMA[col] for col in columns},
+    }
+
+
+def _read_malformed_rows(header: list[str], rows: list[str], columns: list[str]) -> pd.DataFrame:
+    """
+    Parses rows rejected by the fast reader with the tolerant python engine, one row at a time.
+
+    A row with fewer fields than the header is kept, the missing fields are NaN (as pd.read_csv reads it).
+    A row with more fields is dropped with a warning: its fields cannot be matched with the columns,
+    e.g. after an unescaped quote inside a quoted field. So is a row the python engine cannot parse.
+    """
+    parsed = []
+    for row in rows:
+        try:
+            dataframe = pd.read_csv(
+                io.StringIO(row), engine="python", header=None, index_col=False, dtype=str,
+                sep=CSV_OPTIONS["sep"], quotechar=CSV_OPTIONS["quotechar"],
+            )
+        except pd.errors.ParserError:
+            dataframe = None
+        if dataframe is None or len(dataframe) != 1 or dataframe.shape[1] > len(header):
+            logging.warning(f"ingest: dropping a malformed row with more fields than the header: {row[:80]!r}")
+            continue
+        dataframe.columns = header[:dataframe.shape[1]]
+        parsed.append(dataframe)
+    if not parsed:
+        return pd.DataFrame(columns=columns, dtype=object)
+    dataframe = pd.concat(parsed, ignore_index=True).reindex(columns=header)
+    dataframe = dataframe.set_index(header[0])
+    dataframe.index.name = None
+    # the fields are already strings; astype(str) would turn the missing ones into "nan"
+    return dataframe.reindex(columns=columns)
+
+
+def _with_malformed_rows(
+    dataframe: pd.DataFrame, header: list[str], rows: list[str], columns: list[str], csv_path: Path,
+) -> pd.DataFrame:
+    """
+    Adds the malformed rows parsed with the python engine to the rows of the fast reader.
+    """
+    logging.warning(f"ingest: {len(rows)} malformed rows in {csv_path}, parsing them with the python engine")
+    malformed = _read_malformed_rows(header, rows, columns)
+    # the index of the fast reader is typed, the python engine was given strings
+    malformed.index = malformed.index.astype(dataframe.index.dtype)
+    in_order = dataframe.index.is_monotonic_increasing
+    dataframe = pd.concat([dataframe, malformed])
+    if in_order:
+        dataframe = dataframe.sort_index(kind="stable")
+    return dataframe
+
+
+def _pyarrow_options(header: list[str], columns: list[str], on_invalid_row) -> dict:
+    return {
+        "read_options": pa_csv.ReadOptions(use_threads=True, encoding=CSV_OPTIONS["encoding"]),
+        "parse_options": pa_csv.ParseOptions(
+            delimiter=CSV_OPTIONS["sep"],
+            quote_char=CSV_OPTIONS["quotechar"],
+            newlines_in_values=True,
+            invalid_row_handler=on_invalid_row,
+        ),
+        "convert_options": pa_csv.ConvertOptions(
+            include_columns=[header[0]] + columns,
+            column_types={col: pa.string() for col in columns},
+            null_values=NA_VALUES,
+            strings_can_be_null=True,
+        ),
+    }
+
+
+def _to_dataframe(table: "pa.Table", index_column: str) -> pd.DataFrame:
+    dataframe = table.to_pandas().set_index(index_column)
+    dataframe.index.name = None
+    # a missing string is None in pyarrow and NaN in pd.read_csv
+    for name in dataframe.columns:
+        if table.column(name).null_count:
+            values = dataframe[name].to_numpy(dtype=object, copy=True)
+            values[pd.isna(values)] = np.nan
+            dataframe[name] = values
+    return dataframe
+
+
+def _read_with_pyarrow(csv_path: Path, columns: list[str]) -> pd.DataFrame:
+    malformed: list[str] = []
+
+    def on_invalid_row(row) -> str:
+        malformed.append(row.text)
+        return "skip"
+
+    header = _read_header(csv_path)
+    # keep the order of the file, like pd.read_csv does
+    columns = [col for col in header if col in columns]
+    table = pa_csv.read_csv(csv_path, **_pyarrow_options(header, columns, on_invalid_row))
+    dataframe = _to_dataframe(table, header[0])
+    if malformed:
+        dataframe = _with_malformed_rows(dataframe, header, malformed, columns, csv_path)
+    return dataframe
+
+
+def _iter_with_pyarrow(csv_path: Path, chunk_size: int, columns: list[str]) -> Iterator[pd.DataFrame]:
+    malformed: list[str] = []
+    pending: Optional[pd.DataFrame] = None
+
+    def on_invalid_row(row) -> str:
+        malformed.append(row.text)
+        return "skip"
+
+    def iter_tables() -> Iterator["pa.Table"]:
+        batches, n_rows = [], 0
+        for batch in reader:
+            batches.append(batch)
+            n_rows += batch.num_rows
+            while n_rows >= chunk_size:
+                table = pa.Table.from_batches(batches, schema=reader.schema)
+                yield table.slice(0, chunk_size)
+                batches, n_rows = table.slice(chunk_size).to_batches(), n_rows - chunk_size
+        if n_rows:
+            yield pa.Table.from_batches(batches, schema=reader.schema)
+
+    def to_chunk(table: "pa.Table", next_table: Optional["pa.Table"]) -> pd.DataFrame:
+        nonlocal pending
+        dataframe = _to_dataframe(table, header[0])
+        if malformed:
+            # pyarrow reports the rows while reading a whole block, often ahead of the chunk being cut
+            parsed = _with_malformed_rows(dataframe.iloc[:0], header, malformed, columns, csv_path)
+            pending = parsed if pending is None else pd.concat([pending, parsed])
+            malformed.clear()
+        if pending is None or pending.empty:
+            return dataframe
+        in_order = dataframe.index.is_monotonic_increasing
+        # as with the pandas backend, a malformed row goes into the chunk before it in the file
+        # (the last chunk takes the rest); the index of hh.csv is increasing
+        if next_table is None or not in_order:
+            rows, pending = pending, None
+        else:
+            before = pending.index < next_table.column(header[0])[0].as_py()
+            rows, pending = pending[before], pending[~before]
+        dataframe = pd.concat([dataframe, rows])
+        return dataframe.sort_index(kind="stable") if in_order else dataframe
+
+    header = _read_header(csv_path)
+    columns = [col for col in header if col in columns]
+    reader = pa_csv.open_csv(csv_path, **_pyarrow_options(header, columns, on_invalid_row))
+    # a chunk is held until the next one is cut, which tells where its malformed rows end
+    held = None
+    for table in iter_tables():
+        if held is not None:
+            yield to_chunk(held, table)
+        held = table
+    if held is not None or malformed:
+        yield to_chunk(held if held is not None else reader.schema.empty_table(), None)
+
+
+def _locate_malformed_rows(csv_path: Path, n_fields: int) -> tuple[int, dict[int, str]]:
+    """
+    Finds the rows with another number of fields than the header in one pass of the csv module,
+    which splits the file into rows like the C engine does.
+
+    Returns:
+        tuple: number of rows of the file (with the header) and the text of every malformed row by its number (the header is 0).
+    """
+    lines: list[str] = []
+
+    def read_lines(fin):
+        for line in fin:
+            lines.append(line)
+            yield line
+
+    malformed = {}
+    with open(csv_path, encoding=CSV_OPTIONS["encoding"], newline="") as fin:
+        reader = csv.reader(read_lines(fin), delimiter=CSV_OPTIONS["sep"], quotechar=CSV_OPTIONS["quotechar"])
+        number = -1
+        for number, fields in enumerate(reader):
+            if fields and len(fields) != n_fields:
+                malformed[number] = "".join(lines).rstrip("\r\n")
+            lines.clear()
+    return number + 1, malformed
+
+
+def _read_with_pandas(csv_path: Path, columns: list[str]) -> pd.DataFrame:
+    # with usecols the C engine does not check the number of fields (nor does a chunked read on the
+    # first row of a chunk): the malformed rows are found by the csv module and parsed like pyarrow ones
+    header = _read_header(csv_path)
+    columns = [col for col in header if col in columns]
+    _, malformed = _locate_malformed_rows(csv_path, len(header))
+    dataframe = pd.read_csv(csv_path, skiprows=set(malformed), **_pandas_options(columns))
+    if malformed:
+        dataframe = _with_malformed_rows(dataframe, header, list(malformed.values()), columns, csv_path)
+    return dataframe
+
+
+def _iter_with_pandas(csv_path: Path, chunk_size: int, columns: list[str]) -> Iterator[pd.DataFrame]:
+    header = _read_header(csv_path)
+    columns = [col for col in header if col in columns]
+    n_lines, malformed = _locate_malformed_rows(csv_path, len(header))
+    # the malformed rows are skipped by the C engine, every chunk gets the ones in its range of the file
+    kept = [number for number in range(1, n_lines) if number not in malformed]
+    pending = sorted(malformed)
+    with pd.read_csv(csv_path, chunksize=chunk_size, skiprows=set(malformed), **_pandas_options(columns)) as reader:
+        for idx, chunk in enumerate(reader):
+            end = (idx + 1) * chunk_size
+            boundary = kept[end] if end < len(kept) else n_lines
+            rows = [malformed[number] for number in pending if number < boundary]
+            pending = pending[len(rows):]
+            yield _with_malformed_rows(chunk, header, rows, columns, csv_path) if rows else chunk
+    if pending:
+        yield _read_malformed_rows(header, [malformed[number] for number in pending], columns)
+
+
+def read_hh_csv(csv_path: Path, usecols: Optional[list[str]] = None) -> pd.DataFrame:
+    """
+    Reads hh.csv with the declared schema using the fastest available backend.
+
+    pyarrow parses the file in several threads; rows with another number of fields than the header
+    are skipped by it and parsed separately with the python engine. Without pyarrow the pandas C engine
+    is used, and such rows are found beforehand in one pass of the csv module, skipped by the C engine
+    and parsed the same way. Both backends give the same rows: a short row is kept with NaN in the
+    missing fields, a row with extra fields (or one the python engine cannot parse) is dropped with a warning.
+
+    Args:
+        csv_path: Path to the CSV file.
+        usecols: columns to read (default None - all columns of HH_SCHEMA).
+
+    Returns:
+        pd.DataFrame: dataframe indexed by the first column of the file.
+    """
+    columns = _columns(usecols)
+    if pa is not None:
+        return _read_with_pyarrow(csv_path, columns)
+    return _read_with_pandas(csv_path, columns)
+
+
+def iter_hh_csv(csv_path: Path, chunk_size: int, usecols: Optional[list[str]] = None) -> Iterator[pd.DataFrame]:
+    """
+    Reads hh.csv lazily in chunks of rows with the declared schema and the backends of read_hh_csv.
+
+    Malformed rows are handled like in read_hh_csv and go into the chunk of their part of the file,
+    so a chunk can be a few rows longer than chunk_size.
+
+    Args:
+        csv_path: Path to the CSV file.
+        chunk_size: number of rows in a chunk.
+        usecols: columns to read (default None - all columns of HH_SCHEMA).
+
+    Yields:
+        pd.DataFrame: next chunk of rows.
+    """
+    columns = _columns(usecols)
+    if pa is not None:
+        yield from _iter_with_pyarrow(csv_path, chunk_size, columns)
+    else:
+        yield from _iter_with_pandas(csv_path, chunk_size, columns)
@@ -0,0 +1,97 @@
+from src.memo import map_unique
+
+from functools import reduce
+from operator import or_
+import re
+from typing import Iterable, Mapping
+
+import numpy as np
+import pandas as pd
+
+
+def _trie_pattern(node: dict) -> str:
+    """
+    Regular expression of a trie node: the alternatives are its children, and the continuation
+    is optional where a keyword ends, so the greedy match is the longest keyword.
+    """
+    branches = [re.escape(char) + _trie_pattern(child) for char, child in node.items() if char]
+    if not branches:
+        return ""
+    pattern = branches[0] if len(branches) == 1 else f"(?:{'|'.join(branches)})"
+    return f"(?:{pattern})?" if "" in node else pattern
+
+
+class KeywordMatcher:
+    """
+    Finds which groups of keywords occur in a string, scanning the string once.
+
+    All keywords are compiled into one regular expression: a trie of the keywords inside a lookahead,
+    tried at every position of the string. At a position it matches the longest keyword, and the
+    shorter keywords found at the same position are its prefixes, so their groups are precomputed
+    into the mask of the longest one. The result for a string is a bitmask with the bit of a group set
+    if `any(keyword in value for keyword in group)`.
+
+    Attributes:
+        bits: bit of every group.
+        lowercase: whether the strings are lowercased before matching (the keywords are used as is).
+
+    Methods:
+        mask(*groups): Bits of the given groups.
+        match(value): Bitmask of one string.
+        match_column(values): Bitmasks of a column, every unique value is scanned once.
+        matches(masks, *groups): Rows where a keyword of any of the groups was found.
+        flags(masks, *groups): Same as matches, as 0/1 int64 feature values.
+    """
+    def __init__(self, groups: Mapping[str, Iterable[str]], lowercase: bool = True):
+        if len(groups) > 63:
+            raise ValueError(f"KeywordMatcher supports up to 63 groups, got {len(groups)}")
+        self.bits = {group: 1 << idx for idx, group in enumerate(groups)}
+        self.lowercase = lowercase
+
+        masks: dict[str, int] = {}
+        for group, keywords in groups.items():
+            for keyword in keywords:
+                if not keyword:
+                    raise ValueError(f"Empty keyword in group '{group}'")
+                masks[keyword] = masks.get(keyword, 0) | self.bits[group]
+        self._masks = {
+            keyword: reduce(or_, (mask for prefix, mask in masks.items() if keyword.startswith(prefix)))
+            for keyword in masks
+        }
+
+        trie: dict = {}
+        for keyword in masks:
+            node = trie
+            for char in keyword:
+                node = node.setdefault(char, {})
+            node[""] = {}
+        self._pattern = re.compile(f"(?=({_trie_pattern(trie)}))", re.DOTALL) if trie else None
+
+    def mask(self, *groups: str) -> int:
+        return reduce(or_, (self.bits[group] for group in groups), 0)
+
+    def match(self, value) -> int:
+        if not isinstance(value, str) or self._pattern is None:
+            return 0
+        if self.lowercase:
+            value = value.lower()
+        mask = 0
+        for keyword in self._pattern.findall(value):
+            mask |= self._masks[keyword]
+        return mask
+
+    def match_column(self, values: pd.Series) -> np.ndarray:
+        """
+        Args:
+            values: column of the dataframe.
+
+        Returns:
+            np.ndarray: int64 bitmask of every row.
+        """
+        return map_unique(values, self.match).to_numpy(dtype=np.int64)
+
+    def matches(self, masks: np.ndarray, *groups: str) -> np.ndarray:
+        return (masks & self.mask(*groups)) != 0
+
+    def flags(self, masks: np.ndarray, *groups: str) -> np.ndarray:
+        return self.matches(masks, *groups).astype(np.int64)
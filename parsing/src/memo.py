@@ -0,0 +1,54 @@
+from src.profiling import apply_span
+
+from typing import Callable
+
+import pandas as pd
+
+
+class UniqueValues:
+    """
+    A column split into categorical codes and its unique values.
+
+    Columns like "Город" or "График" have far fewer distinct values than rows, so a parser
+    is run once per unique value and the results are broadcast back to the rows by the codes.
+    Missing values are kept as a unique value of their own and passed to the parser as is,
+    exactly like Series.apply does.
+
+    Methods:
+        map(func): Applies func to every unique value and returns the result for every row.
+    """
+    def __init__(self, values: pd.Series):
+        self.codes, self.uniques = pd.factorize(values, use_na_sentinel=False)
+        self.index = values.index
+        self.name = values.name
+
+    def __len__(self) -> int:
+        return len(self.uniques)
+
+    def map(self, func: Callable) -> pd.Series:
+        """
+        Args:
+            func: parser of one value.
+
+        Returns:
+            pd.Series: func(value) for every row, with the dtype Series.apply would infer.
+        """
+        # the python loop replaces Series.apply: the profiler counts it as apply time
+        with apply_span():
+            values = [func(value) for value in self.uniques]
+        results = pd.Series(values, dtype=None if len(self) else object)
+        return pd.Series(results.to_numpy()[self.codes], index=self.index, name=self.name)
+
+
+def map_unique(values: pd.Series, func: Callable) -> pd.Series:
+    """
+    Memoized `values.apply(func)`: func runs once per unique value of the column.
+
+    Args:
+        values: column of the dataframe.
+        func: parser of one value.
+
+    Returns:
+        pd.Series: func(value) for every row.
+    """
+    return UniqueValues(values).map(func)
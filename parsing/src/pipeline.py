@@ -6,10 +6,19 @@ from src.handlers import (
     ParseResumeHandler, ParseAutoHandler, EncodeCategoricalFeaturesHandler, SplitDataHandler, SaveDataHandler
 )
 
-def build_pipeline() -> Handler:
+from pathlib import Path
+from typing import Optional
+
+def build_pipeline(sparse_features: bool = True, native_categorical: bool = False, store_dir: Optional[Path] = None) -> Handler:
     """
     Builds the full data processing pipeline by chaining together all handlers in the required order.
 
+    Args:
+        sparse_features: save the features as a CSR matrix (features.npz) instead of a dense one (features.npy).
+        native_categorical: skip one-hot encoding, so the categorical columns are saved as they are
+            (categorical.npy) for CatBoost cat_features.
+        store_dir: also write the dataset into the feature store in this directory (default None).
+
     Returns:
         Handler: The first handler in the pipeline (LoadCSVHandler).
     """
@@ -32,7 +41,7 @@ def build_pipeline() -> Handler:
 
     split_data = SplitDataHandler()
 
-    save_data = SaveDataHandler()
+    save_data = SaveDataHandler(sparse=sparse_features, store_dir=store_dir)
 
     load.set_next(gender)\
         .set_next(age)\
@@ -47,9 +56,13 @@ def build_pipeline() -> Handler:
         .set_next(last_job)\
         .set_next(education)\
         .set_next(resume)\
-        .set_next(auto)\
-        .set_next(encode_categorical_features)\
-        .set_next(split_data)\
-        .set_next(save_data)
+        .set_next(auto)
+
+    if native_categorical:
+        auto.set_next(split_data)
+    else:
+        auto.set_next(encode_categorical_features)\
+            .set_next(split_data)
+    split_data.set_next(save_data)
     
     return load
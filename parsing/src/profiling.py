@@ -0,0 +1,264 @@
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass, field
+import functools
+import json
+import logging
+import os
+from pathlib import Path
+import threading
+import time
+import tracemalloc
+from typing import Callable, Iterator, Optional
+
+import pandas as pd
+
+_local = threading.local()
+_patch_lock = threading.Lock()
+_patch_depth = 0
+_original_apply: dict = {}
+
+
+@dataclass
+class StageProfile:
+    """
+    Measurements of one handler run.
+
+    Attributes:
+        name: handler class name.
+        start: start time in seconds since the profiler was created.
+        wall_time: wall time in seconds.
+        cpu_time: CPU time of the process in seconds.
+        peak_memory: peak of memory allocated during the run in bytes (None without memory tracing).
+        rows_in, rows_out: dataframe rows before and after the run.
+        columns_added, columns_dropped: dataframe columns added and dropped by the run.
+        apply_time: time spent inside pandas .apply calls in seconds.
+        apply_calls: number of .apply calls.
+        apply_spans: (start, duration) of every .apply call, in seconds since the profiler was created.
+        pid, tid: process and thread which ran the handler.
+    """
+    name: str
+    start: float
+    wall_time: float = 0.0
+    cpu_time: float = 0.0
+    peak_memory: Optional[int] = None
+    rows_in: Optional[int] = None
+    rows_out: Optional[int] = None
+    columns_added: list[str] = field(default_factory=list)
+    columns_dropped: list[str] = field(default_factory=list)
+    apply_time: float = 0.0
+    apply_calls: int = 0
+    apply_spans: list[tuple[float, float]] = field(default_factory=list)
+    pid: int = 0
+    tid: int = 0
+
+    @property
+    def vectorized_time(self) -> float:
+        return self.wall_time - self.apply_time
+
+
+@contextmanager
+def apply_span() -> Iterator[None]:
+    """
+    Adds the time of the block to the apply time of the stage running in the current thread.
+
+    Used for python loops over values that replace .apply (src.memo), so that they are not
+    counted as vectorized time. Nested spans are counted once.
+    """
+    stage = getattr(_local, "stage", None)
+    if stage is None or getattr(_local, "in_apply", False):
+        yield
+        return
+    _local.in_apply = True
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - start
+        _local.in_apply = False
+        stage.apply_time += elapsed
+        stage.apply_calls += 1
+        stage.apply_spans.append((start - _local.origin, elapsed))
+
+
+def _timed_apply(apply: Callable) -> Callable:
+    """
+    Wraps Series.apply/DataFrame.apply to add their time to the stage running in the current thread.
+    """
+    @functools.wraps(apply)
+    def wrapper(*args, **kwargs):
+        with apply_span():
+            return apply(*args, **kwargs)
+    return wrapper
+
+
+@contextmanager
+def _patched_apply() -> Iterator[None]:
+    """
+    Replaces Series.apply/DataFrame.apply with timed wrappers while the block runs.
+
+    Stages measured at the same time in several threads share one patch: the last of them to finish
+    restores the original methods.
+    """
+    global _patch_depth
+    with _patch_lock:
+        if _patch_depth == 0:
+            for cls in (pd.Series, pd.DataFrame):
+                _original_apply[cls] = cls.apply
+                cls.apply = _timed_apply(cls.apply)
+        _patch_depth += 1
+    try:
+        yield
+    finally:
+        with _patch_lock:
+            _patch_depth -= 1
+            if _patch_depth == 0:
+                for cls, apply in _original_apply.items():
+                    cls.apply = apply
+                _original_apply.clear()
+
+
+def _columns(ctx) -> list[str]:
+    return [] if ctx.dataframe is None else list(ctx.dataframe.columns)
+
+
+class Profiler:
+    """
+    Collects per-handler measurements of a pipeline run.
+
+    Set it to `ctx.profiler` and every Handler.run is measured. Memory tracing uses tracemalloc,
+    which slows pure-python code down, so it can be switched off.
+
+    Methods:
+        measure(name, ctx, process): Runs process() and records a StageProfile for it.
+        summary(): Text table of the recorded stages.
+        save_json(path): Saves the stages as a JSON trace.
+        save_chrome_trace(path): Saves the stages in the Chrome trace event format (chrome://tracing, Perfetto, speedscope).
+    """
+    def __init__(self, trace_memory: bool = True):
+        self.trace_memory = trace_memory
+        self.origin = time.perf_counter()
+        self.stages: list[StageProfile] = []
+        self._lock = threading.Lock()
+        self._pid = os.getpid()
+
+    def __getstate__(self) -> dict:
+        # a copy sent to a worker process records only its own stages
+        state = self.__dict__.copy()
+        state["stages"] = []
+        del state["_lock"]
+        return state
+
+    def __setstate__(self, state: dict) -> None:
+        self.__dict__.update(state)
+        self._lock = threading.Lock()
+
+    @property
+    def is_remote(self) -> bool:
+        """True if this is a copy of the profiler in a worker process."""
+        return self._pid != os.getpid()
+
+    def measure(self, name: str, ctx, process: Callable):
+        """
+        Runs a handler and records its measurements.
+
+        Args:
+            name: handler name.
+            ctx: context passed to the handler.
+            process: callable running the handler and returning the new context.
+
+        Returns:
+            the context returned by process().
+        """
+        if self.trace_memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+
+        columns_in = _columns(ctx)
+        stage = StageProfile(
+            name=name,
+            start=time.perf_counter() - self.origin,
+            rows_in=None if ctx.dataframe is None else len(ctx.dataframe),
+            pid=os.getpid(),
+            tid=threading.get_ident(),
+        )
+        if self.trace_memory:
+            memory_before = tracemalloc.get_traced_memory()[0]
+            tracemalloc.reset_peak()
+        _local.stage, _local.origin = stage, self.origin
+        wall_start, cpu_start = time.perf_counter(), time.process_time()
+        try:
+            with _patched_apply():
+                ctx = process()
+        finally:
+            stage.wall_time = time.perf_counter() - wall_start
+            stage.cpu_time = time.process_time() - cpu_start
+            _local.stage = None
+            if self.trace_memory:
+                stage.peak_memory = tracemalloc.get_traced_memory()[1] - memory_before
+
+        columns_out = _columns(ctx)
+        known_in, known_out = set(columns_in), set(columns_out)
+        stage.rows_out = None if ctx.dataframe is None else len(ctx.dataframe)
+        stage.columns_added = [col for col in columns_out if col not in known_in]
+        stage.columns_dropped = [col for col in columns_in if col not in known_out]
+        with self._lock:
+            self.stages.append(stage)
+        return ctx
+
+    def summary(self) -> str:
+        """
+        Returns:
+            str: table with time, apply share, memory and shape changes of every stage.
+        """
+        lines = [f"{'stage':<36}{'wall s':>9}{'cpu s':>9}{'apply s':>9}{'peak MB':>9}{'rows':>16}{'cols +/-':>10}"]
+        for stage in self.stages:
+            peak = "-" if stage.peak_memory is None else f"{stage.peak_memory / 2**20:.1f}"
+            rows = f"{stage.rows_in}->{stage.rows_out}"
+            columns = f"+{len(stage.columns_added)}/-{len(stage.columns_dropped)}"
+            lines.append(
+                f"{stage.name:<36}{stage.wall_time:>9.3f}{stage.cpu_time:>9.3f}{stage.apply_time:>9.3f}"
+                f"{peak:>9}{rows:>16}{columns:>10}"
+            )
+        return "\n".join(lines)
+
+    def save_json(self, path: Path) -> None:
+        stages = [{**asdict(stage), "vectorized_time": stage.vectorized_time} for stage in self.stages]
+        payload = {
+            "total_wall_time": sum(stage.wall_time for stage in self.stages),
+            "total_apply_time": sum(stage.apply_time for stage in self.stages),
+            "stages": stages,
+        }
+        Path(path).write_text(json.dumps(payload, indent=2, ensure_ascii=False), encoding="utf-8")
+        logging.info(f"Profiler: JSON trace saved to {path}")
+
+    def save_chrome_trace(self, path: Path) -> None:
+        events = []
+        for stage in self.stages:
+            events.append({
+                "name": stage.name,
+                "cat": "handler",
+                "ph": "X",
+                "ts": stage.start * 1e6,
+                "dur": stage.wall_time * 1e6,
+                "pid": stage.pid,
+                "tid": stage.tid,
+                "args": {
+                    "cpu_time": stage.cpu_time,
+                    "peak_memory": stage.peak_memory,
+                    "rows_in": stage.rows_in,
+                    "rows_out": stage.rows_out,
+                    "columns_added": stage.columns_added,
+                    "columns_dropped": stage.columns_dropped,
+                },
+            })
+            for start, duration in stage.apply_spans:
+                events.append({
+                    "name": "apply",
+                    "cat": "apply",
+                    "ph": "X",
+                    "ts": start * 1e6,
+                    "dur": duration * 1e6,
+                    "pid": stage.pid,
+                    "tid": stage.tid,
+                })
+        Path(path).write_text(json.dumps({"traceEvents": events, "displayTimeUnit": "ms"}, ensure_ascii=False), encoding="utf-8")
+        logging.info(f"Profiler: Chrome trace saved to {path}")
@@ -0,0 +1,126 @@
+from src.core import Handler, PipelineContext
+from src.fitted import FittedPipeline
+from src.pipeline import build_pipeline
+
+from pathlib import Path
+from typing import Iterable, Mapping, Optional
+
+import numpy as np
+
+
+class RecordFeaturizer:
+    """
+    Featurizes single resumes (dicts of raw hh.csv fields) for online scoring, without pandas.
+
+    The row-local handlers of the pipeline parse the record one after another (parse_record) with the same
+    parsers and lookup tables as the batch run, and the fitted pipeline gives the job vocabulary and the
+    layout of the one-hot columns. The vector is exactly the row a transform-only run with the same
+    pipeline.json gives for the resume. Fields the pipeline does not use (the index, "ЗП") may be omitted.
+
+    Attributes:
+        fitted: the fitted pipeline.
+        columns: names of the vector values. With one-hot columns these are the fitted columns; with native
+            categorical columns the numeric columns go first and the categorical ones last, in the order
+            regression loads features.npz and categorical.npy.
+        categorical: columns left without one-hot encoding (native categorical mode only).
+        dtype: dtype of the numeric values.
+
+    Methods:
+        parse(record): Parsed fields of one record.
+        transform(record): Feature vector of one record.
+        transform_many(records): Feature matrix of several records.
+    """
+    dtype = np.float32
+
+    def __init__(self, fitted: FittedPipeline, pipeline: Optional[Handler] = None):
+        self.fitted = fitted
+        pipeline = pipeline or build_pipeline(native_categorical=fitted.native_categorical)
+        self.handlers = [handler for handler in pipeline.iter_chain() if handler.row_local]
+        # every row-local handler must parse single records, otherwise the vector misses its columns
+        unsupported = [type(handler).__name__ for handler in self.handlers if not handler.parses_records]
+        if unsupported:
+            raise ValueError(f"RecordFeaturizer: handlers {', '.join(unsupported)} do not parse single records (parses_records)")
+        self.ctx = fitted.apply(PipelineContext(csv_path=Path()))
+        # a set lookup is several times faster than pd.Index.__contains__ for a single value
+        self.ctx.job_vocabulary = frozenset(fitted.job_vocabulary)
+
+        native = fitted.categories if fitted.native_categorical else {}
+        self.categorical = [col for col in fitted.columns if col in native]
+        self.columns = [col for col in fitted.columns if col not in native] + self.categorical
+        position = {col: idx for idx, col in enumerate(self.columns)}
+
+        # one-hot columns: the position of the dummy column of every category,
+        # the first category has none (drop_first), as well as values unseen in fit
+        self._onehot = []
+        dummies = set()
+        if not fitted.native_categorical:
+            for col, values in fitted.categories.items():
+                positions = {value: position[f"{col}_{value}"] for value in values[1:] if f"{col}_{value}" in position}
+                self._onehot.append((col, positions))
+                dummies.update(positions.values())
+        # native categorical columns: values unseen in fit are missing, as in categorical.npy
+        self._categorical = [(col, frozenset(native[col])) for col in self.categorical]
+        numeric = [(idx, col) for idx, col in enumerate(self.columns) if idx not in dummies and col not in native]
+        self._numeric_positions = np.array([idx for idx, _ in numeric], dtype=np.intp)
+        self._numeric_columns = [col for _, col in numeric]
+
+    def parse(self, record: Mapping[str, str]) -> dict:
+        """
+        Args:
+            record: raw fields of one resume by hh.csv column names.
+
+        Returns:
+            dict: the record after every row-local handler.
+
+        Raises:
+            ValueError: if the record misses a field the pipeline needs.
+        """
+        parsed = dict(record)
+        try:
+            for handler in self.handlers:
+                parsed = handler.parse_record(parsed, self.ctx)
+        except KeyError as e:
+            raise ValueError(f"RecordFeaturizer: record has no field {e}") from None
+        return parsed
+
+    def transform(self, record: Mapping[str, str]) -> np.ndarray:
+        """
+        Args:
+            record: raw fields of one resume by hh.csv column names.
+
+        Returns:
+            np.ndarray: values of self.columns; float32, or object with the categorical strings
+                at the end in native categorical mode.
+
+        Raises:
+            ValueError: if the record misses a field the pipeline needs.
+        """
+        parsed = self.parse(record)
+        try:
+            numeric = [parsed[col] for col in self._numeric_columns]
+        except KeyError as e:
+            raise ValueError(f"RecordFeaturizer: the pipeline gives no value for column {e}") from None
+        if self.categorical:
+            # the numeric columns go first, so the vector is the float32 values followed by the strings
+            values = np.array(numeric, dtype=self.dtype).tolist()
+            for col, known in self._categorical:
+                value = parsed[col]
+                values.append(value if value in known else "")
+            return np.array(values, dtype=object)
+        vector = np.zeros(len(self.columns), dtype=self.dtype)
+        vector[self._numeric_positions] = numeric
+        for col, positions in self._onehot:
+            idx = positions.get(parsed[col])
+            if idx is not None:
+                vector[idx] = 1
+        return vector
+
+    def transform_many(self, records: Iterable[Mapping[str, str]]) -> np.ndarray:
+        """
+        Returns:
+            np.ndarray: one row of transform(record) for every record.
+        """
+        vectors = [self.transform(record) for record in records]
+        if not vectors:
+            return np.zeros((0, len(self.columns)), dtype=object if self.categorical else self.dtype)
+        return np.vstack(vectors)
@@ -0,0 +1,142 @@
+from pathlib import Path
+import zipfile
+
+import numpy as np
+import pandas as pd
+import scipy.sparse as sp
+
+
+def to_csr(dataframe: pd.DataFrame, dtype: type = np.float32) -> sp.csr_matrix:
+    """
+    Convert a numeric dataframe with dense and sparse columns into a CSR matrix without densifying it.
+
+    Sparse columns with a zero fill value (one-hot dummies, TF-IDF) contribute only their stored values,
+    dense columns only their nonzero values; NaN is kept as a stored value. The column order is preserved,
+    so `dataframe.columns` are the feature names of the matrix.
+
+    Args:
+        dataframe: numeric (or boolean) columns.
+        dtype: dtype of the matrix values.
+
+    Returns:
+        sp.csr_matrix: Matrix of shape dataframe.shape.
+    """
+    n_rows, n_cols = dataframe.shape
+    indices, values = [], []
+    indptr = np.zeros(n_cols + 1, dtype=np.int64)
+    for position in range(n_cols):
+        column = dataframe.iloc[:, position]
+        if isinstance(column.dtype, pd.SparseDtype) and column.sparse.fill_value == 0:
+            rows = column.array.sp_index.to_int_index().indices
+            data = column.array.sp_values.astype(dtype)
+        else:
+            dense = column.to_numpy(dtype=dtype)
+            rows = np.flatnonzero(dense)
+            data = dense[rows]
+        stored = data != 0
+        indices.append(rows[stored])
+        values.append(data[stored])
+        indptr[position + 1] = indptr[position] + stored.sum()
+
+    matrix = sp.csc_matrix(
+        (
+            np.concatenate(values) if values else np.empty(0, dtype=dtype),
+            np.concatenate(indices) if indices else np.empty(0, dtype=np.int32),
+            indptr,
+        ),
+        shape=(n_rows, n_cols),
+    )
+    return matrix.tocsr()
+
+
+class CSRParts:
+    """
+    A CSR matrix kept on disk as blocks of rows, so only one block is in memory at a time.
+
+    Every appended block is spilled into .npy files of its data, indices and indptr. save_npz() writes
+    the matrix into an .npz archive of scipy.sparse.save_npz (compressed=False) block by block, and a row
+    slice loads only the blocks it overlaps.
+
+    Attributes:
+        directory: directory of the spilled blocks.
+        shape: shape of the matrix.
+        dtype: dtype of the values.
+        nnz: number of stored values.
+        format: "csr", like scipy sparse matrices.
+
+    Methods:
+        append(block): Spills the next block of rows.
+        save_npz(path): Writes the matrix into an uncompressed .npz file.
+    """
+    format = "csr"
+
+    def __init__(self, directory: Path, n_cols: int, dtype: type = np.float32):
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.dtype = np.dtype(dtype)
+        self.n_cols = n_cols
+        self.blocks: list[tuple[int, int]] = []  # (rows, nnz) of every block
+        self.nnz = 0
+
+    @property
+    def shape(self) -> tuple[int, int]:
+        return sum(rows for rows, _ in self.blocks), self.n_cols
+
+    def _path(self, idx: int, name: str) -> Path:
+        return self.directory / f"block_{idx:05d}_{name}.npy"
+
+    def _load(self, idx: int) -> sp.csr_matrix:
+        arrays = [np.load(self._path(idx, name), mmap_mode="r") for name in ("data", "indices", "indptr")]
+        return sp.csr_matrix(tuple(arrays), shape=(self.blocks[idx][0], self.n_cols))
+
+    def append(self, block: sp.csr_matrix) -> None:
+        block = block.tocsr()
+        if block.shape[1] != self.n_cols:
+            raise ValueError(f"A block of {block.shape[1]} columns cannot be appended to a matrix of {self.n_cols} columns")
+        idx = len(self.blocks)
+        np.save(self._path(idx, "data"), block.data.astype(self.dtype, copy=False))
+        np.save(self._path(idx, "indices"), block.indices)
+        np.save(self._path(idx, "indptr"), block.indptr)
+        self.blocks.append((block.shape[0], block.nnz))
+        self.nnz += block.nnz
+
+    def __getitem__(self, rows: slice) -> sp.csr_matrix:
+        start, stop, step = rows.indices(self.shape[0])
+        if step != 1:
+            raise ValueError("Row slices of CSRParts cannot have a step")
+        parts, block_start = [], 0
+        for idx, (n_rows, _) in enumerate(self.blocks):
+            if block_start < stop and block_start + n_rows > start:
+                parts.append(self._load(idx)[max(start - block_start, 0):min(stop - block_start, n_rows)])
+            block_start += n_rows
+        if not parts:
+            return sp.csr_matrix((0, self.n_cols), dtype=self.dtype)
+        return sp.vstack(parts, format="csr")
+
+    def save_npz(self, path: Path) -> None:
+        """
+        Writes the matrix into an uncompressed .npz archive, readable with scipy.sparse.load_npz.
+        """
+        index_dtype = np.dtype(np.int32 if self.nnz < np.iinfo(np.int32).max else np.int64)
+        with zipfile.ZipFile(path, "w", compression=zipfile.ZIP_STORED, allowZip64=True) as archive:
+            for name, dtype, length in (
+                ("data", self.dtype, self.nnz),
+                ("indices", index_dtype, self.nnz),
+                ("indptr", index_dtype, self.shape[0] + 1),
+            ):
+                with archive.open(f"{name}.npy", "w", force_zip64=True) as member:
+                    header = {"descr": np.lib.format.dtype_to_descr(dtype), "fortran_order": False, "shape": (length,)}
+                    np.lib.format.write_array_header_1_0(member, header)
+                    offset = 0
+                    if name == "indptr":
+                        member.write(np.zeros(1, dtype=dtype).tobytes())
+                    for idx in range(len(self.blocks)):
+                        values = np.load(self._path(idx, name), mmap_mode="r")
+                        if name == "indptr":
+                            # row pointers of a block continue the values of the previous blocks
+                            values = values[1:].astype(dtype) + offset
+                            offset = int(values[-1]) if len(values) else offset
+                        member.write(np.ascontiguousarray(values, dtype=dtype).tobytes())
+            for name, value in (("format", np.array(b"csr")), ("shape", np.array(self.shape))):
+                with archive.open(f"{name}.npy", "w") as member:
+                    np.lib.format.write_array(member, value, allow_pickle=False)
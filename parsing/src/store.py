@@ -0,0 +1,147 @@
+from src.sparse import CSRParts
+
+import json
+import logging
+import os
+import shutil
+from pathlib import Path
+from typing import Optional
+
+import numpy as np
+import scipy.sparse as sp
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = None
+
+DEFAULT_STORE_DIR = Path("feature_store")
+MANIFEST_NAME = "manifest.json"
+# Version of the manifest layout; a store of another version is not read.
+STORE_FORMAT_VERSION = 1
+# Rows of one Parquet file and of one row group in it: a read of a row range opens only the files
+# and row groups it overlaps.
+ROWS_PER_PARTITION = 131072
+ROW_GROUP_SIZE = 16384
+# Versions of the store kept on disk: a reader of the previous manifest can finish while a new version is written.
+KEEP_VERSIONS = 2
+
+
+def read_manifest(store_dir: Path) -> Optional[dict]:
+    """
+    Returns:
+        dict: manifest of the store, None if there is no store in the directory.
+    """
+    manifest_path = Path(store_dir) / MANIFEST_NAME
+    if not manifest_path.exists():
+        return None
+    return json.loads(manifest_path.read_text(encoding="utf-8"))
+
+
+def _partition_table(
+    features,
+    target: np.ndarray,
+    codes: Optional[np.ndarray],
+    manifest: dict,
+    start: int,
+    stop: int,
+) -> "pa.Table":
+    block = features[start:stop]
+    block = block.toarray() if sp.issparse(block) else np.asarray(block)
+    # one contiguous array per column
+    block = np.ascontiguousarray(block.T)
+    arrays = [pa.array(values) for values in block]
+    names = [column["name"] for column in manifest["columns"]]
+    for idx, column in enumerate(manifest["categorical"]):
+        column_codes = np.asarray(codes[start:stop, idx])
+        arrays.append(pa.DictionaryArray.from_arrays(
+            pa.array(column_codes, mask=column_codes < 0), pa.array(column["categories"], type=pa.string())
+        ))
+        names.append(column["name"])
+    arrays.append(pa.array(np.asarray(target[start:stop])))
+    names.append(manifest["target"])
+    return pa.Table.from_arrays(arrays, names=names)
+
+
+def write_store(
+    store_dir: Path,
+    features,
+    target: np.ndarray,
+    columns: list[dict],
+    target_name: str,
+    codes: Optional[np.ndarray] = None,
+    categories: Optional[dict[str, list]] = None,
+    pipeline_version: Optional[str] = None,
+    rows_per_partition: int = ROWS_PER_PARTITION,
+    row_group_size: int = ROW_GROUP_SIZE,
+) -> dict:
+    """
+    Writes the dataset into a new version of a partitioned columnar feature store.
+
+    The rows are split into Parquet files of rows_per_partition rows with row groups of row_group_size rows;
+    every feature, categorical column and the target is a column of its own, so a reader takes only the
+    column chunks and row groups it needs. The manifest lists the columns with their original dtypes,
+    the categories, the partitions with their row ranges, the layout of the features in the parsing output
+    (csr or dense) and the version of the fitted pipeline.
+
+    Every write makes a new version: the partitions go into a new directory, then the manifest is replaced
+    atomically, so a reader sees either the old or the new version. Only the last KEEP_VERSIONS
+    versions are kept.
+
+    Args:
+        store_dir: directory of the store.
+        features: numeric features (CSR matrix or dense array), float32.
+        target: target of every row.
+        columns: name and original dtype of every numeric feature, in the order of the features.
+        target_name: name of the target column.
+        codes: int32 codes of the categorical columns (-1 for a missing value, default None).
+        categories: categories of the categorical columns (default None).
+        pipeline_version: version of the fitted pipeline the features were made with (default None).
+        rows_per_partition: rows of one Parquet file.
+        row_group_size: rows of one row group.
+
+    Returns:
+        dict: manifest of the written version.
+    """
+    if pa is None:
+        raise ImportError("The feature store requires pyarrow")
+    store_dir = Path(store_dir)
+    previous = read_manifest(store_dir)
+    version = (previous["version"] if previous is not None else 0) + 1
+    data_dir = store_dir / f"v{version:05d}"
+    # a directory left by an interrupted write is not a part of any manifest
+    shutil.rmtree(data_dir, ignore_errors=True)
+    data_dir.mkdir(parents=True)
+
+    n_rows = features.shape[0]
+    manifest = {
+        "format_version": STORE_FORMAT_VERSION,
+        "version": version,
+        "pipeline_version": pipeline_version,
+        "layout": "csr" if sp.issparse(features) or isinstance(features, CSRParts) else "dense",
+        "dtype": np.dtype(features.dtype).name,
+        "rows": n_rows,
+        "target": target_name,
+        "target_dtype": np.dtype(target.dtype).name,
+        "columns": [{"name": str(column["name"]), "dtype": str(column["dtype"])} for column in columns],
+        "categorical": [
+            {"name": str(name), "categories": [str(value) for value in values]} for name, values in (categories or {}).items()
+        ],
+        "partitions": [],
+    }
+    for part, start in enumerate(range(0, max(n_rows, 1), rows_per_partition)):
+        stop = min(start + rows_per_partition, n_rows)
+        path = data_dir / f"part-{part:05d}.parquet"
+        table = _partition_table(features, target, codes, manifest, start, stop)
+        pq.write_table(table, path, row_group_size=row_group_size, compression="zstd")
+        manifest["partitions"].append({"path": str(path.relative_to(store_dir)), "row_start": start, "rows": stop - start})
+
+    tmp_path = store_dir / (MANIFEST_NAME + ".tmp")
+    tmp_path.write_text(json.dumps(manifest, indent=2, ensure_ascii=False), encoding="utf-8")
+    os.replace(tmp_path, store_dir / MANIFEST_NAME)
+    for old_dir in store_dir.glob("v*"):
+        if old_dir.is_dir() and old_dir.name[1:].isdigit() and int(old_dir.name[1:]) <= version - KEEP_VERSIONS:
+            shutil.rmtree(old_dir, ignore_errors=True)
+    logging.info(f"Store: Saved {n_rows} rows in {len(manifest['partitions'])} partitions to {store_dir} (version {version})")
+    return manifest
@@ -0,0 +1,199 @@
+from src.core import Handler, PipelineContext
+from src.fitted import FittedPipeline
+from src.handlers import LoadCSVHandler, SaveDataHandler
+from src.pipeline import build_pipeline
+from src.profiling import Profiler
+from src.sparse import CSRParts, to_csr
+
+from collections import Counter
+from dataclasses import replace
+import logging
+from pathlib import Path
+from queue import Queue
+from tempfile import TemporaryDirectory
+from threading import Thread
+from typing import Iterable, Iterator, Optional
+
+import numpy as np
+import pandas as pd
+
+JOB_COLUMN = "Ищет работу на должность:"
+
+_END = object()
+
+
+class _ReadError:
+    """
+    Wrapper for an exception raised by the background reader.
+    """
+    def __init__(self, error: BaseException):
+        self.error = error
+
+
+def prefetch(items: Iterable, depth: int = 1) -> Iterator:
+    """
+    Iterates over items while a background thread reads the next ones ahead.
+
+    Args:
+        items: iterable to read in the background.
+        depth: maximum number of items read ahead.
+
+    Yields:
+        items in the original order.
+    """
+    queue = Queue(maxsize=depth)
+
+    def read():
+        try:
+            for item in items:
+                queue.put(item)
+        except BaseException as error:
+            queue.put(_ReadError(error))
+        queue.put(_END)
+
+    Thread(target=read, daemon=True).start()
+    while (item := queue.get()) is not _END:
+        if isinstance(item, _ReadError):
+            raise item.error
+        yield item
+
+
+def fit_job_vocabulary(load: LoadCSVHandler, csv_path: Path, chunk_size: int) -> pd.Index:
+    """
+    Cheap first pass over the job column only: finds the 133 most frequent jobs of the whole file.
+
+    Counts are accumulated in the order of first occurrence, so ties are broken
+    exactly as in `value_counts()` over the full column.
+
+    Args:
+        load: handler used to read the file.
+        csv_path: Path to the CSV file.
+        chunk_size: number of rows read at once.
+
+    Returns:
+        pd.Index: job vocabulary for ParseJobHandler.
+    """
+    counts = Counter()
+    for chunk in load.iter_chunks(csv_path, chunk_size, usecols=[JOB_COLUMN]):
+        counts.update(chunk[JOB_COLUMN].value_counts(sort=False).to_dict())
+    return pd.Series(counts, dtype="int64").sort_values(ascending=False)[:133].index
+
+
+def run_streaming(
+    csv_path: Path,
+    chunk_size: int = 50_000,
+    pipeline: Optional[Handler] = None,
+    profiler: Optional[Profiler] = None,
+    fitted: Optional[FittedPipeline] = None,
+) -> PipelineContext:
+    """
+    Runs the pipeline over the CSV file chunk by chunk, so peak memory depends on chunk_size, not on the file size.
+
+    1. First pass reads only the job column to fix the job vocabulary.
+    2. Every chunk goes through the row-local handlers (while the next chunk is read in the background)
+       and is spilled to a temporary directory; the categories of object columns are collected.
+    3. Merge step: spilled chunks are encoded with the collected categories; the target is written
+       into a target.npy memory map, the features into a features.npy memory map or, for sparse
+       SaveDataHandler, into CSR blocks spilled to the temporary directory (src.sparse.CSRParts)
+       and copied into features.npz block by block at the end. Categorical columns
+       left without one-hot encoding are written as codes into a categorical.npy memory map.
+
+    With a fitted pipeline (transform-only run) the job vocabulary and the categories are taken from it,
+    so the first pass and the collection of categories are skipped.
+
+    Args:
+        csv_path: Path to the CSV file.
+        chunk_size: maximum number of rows in a chunk.
+        pipeline: first handler of the chain (default build_pipeline()).
+        profiler: measures every handler run on every chunk (default None).
+        fitted: fitted pipeline of a transform-only run (default None - fit the vocabulary and categories).
+
+    Returns:
+        PipelineContext: context with the fitted job vocabulary and categories.
+    """
+    handlers = list((pipeline or build_pipeline()).iter_chain())
+    load, stages = handlers[0], handlers[1:]
+    if not isinstance(load, LoadCSVHandler):
+        raise ValueError("Chunked mode requires the pipeline to start with LoadCSVHandler")
+    n_row_local = next((i for i, stage in enumerate(stages) if not stage.row_local), len(stages))
+    row_stages, merge_stages = stages[:n_row_local], stages[n_row_local:]
+    save = merge_stages.pop() if merge_stages and isinstance(merge_stages[-1], SaveDataHandler) else None
+
+    ctx = PipelineContext(csv_path=csv_path, profiler=profiler)
+    if fitted is not None:
+        logging.info(f"Streaming: Using fitted pipeline {fitted.version}")
+        ctx = fitted.apply(ctx)
+    else:
+        logging.info(f"Streaming: Fitting job vocabulary on {csv_path}")
+        ctx.job_vocabulary = fit_job_vocabulary(load, csv_path, chunk_size)
+
+    with TemporaryDirectory(prefix="parsing_chunks_") as spill_dir:
+        spills = []
+        categories: dict[str, set] = {}
+        for idx, chunk in enumerate(prefetch(load.iter_chunks(csv_path, chunk_size))):
+            chunk_ctx = replace(ctx, dataframe=chunk)
+            for stage in row_stages:
+                chunk_ctx = stage.run(chunk_ctx)
+            dataframe = chunk_ctx.dataframe
+            if ctx.categories is None:
+                for col in dataframe.select_dtypes(include="object").columns:
+                    categories.setdefault(col, set()).update(dataframe[col].dropna().unique())
+
+            spill_path = Path(spill_dir) / f"chunk_{idx:05d}.pkl"
+            dataframe.to_pickle(spill_path)
+            spills.append((spill_path, len(dataframe)))
+            logging.info(f"Streaming: Processed chunk {idx} with {len(dataframe)} rows")
+
+        if ctx.categories is None:
+            ctx.categories = {col: sorted(values) for col, values in categories.items()}
+        n_rows = sum(length for _, length in spills)
+
+        features = target = codes = None
+        start = 0
+        for spill_path, length in spills:
+            chunk_ctx = replace(ctx, dataframe=pd.read_pickle(spill_path))
+            for stage in merge_stages:
+                chunk_ctx = stage.run(chunk_ctx)
+            if save is not None:
+                chunk_features = chunk_ctx.features
+                cat_cols = save.categorical_columns(chunk_features)
+                if target is None:
+                    target = np.lib.format.open_memmap(save.target_path, mode="w+", dtype=save.target_dtype, shape=(n_rows,))
+                    columns = chunk_features.drop(columns=cat_cols).iloc[:0]
+                    if cat_cols:
+                        codes = np.lib.format.open_memmap(save.categorical_path, mode="w+", dtype=np.int32, shape=(n_rows, len(cat_cols)))
+                    if save.sparse:
+                        # CSR blocks are spilled too: the whole matrix is never in memory
+                        features = CSRParts(Path(spill_dir) / "features", columns.shape[1], save.features_dtype)
+                    else:
+                        features = np.lib.format.open_memmap(
+                            save.features_path, mode="w+", dtype=save.features_dtype, shape=(n_rows, columns.shape[1])
+                        )
+                if cat_cols:
+                    codes[start:start + length] = save.encode_categorical(chunk_features[cat_cols], ctx.categories)
+                    chunk_features = chunk_features.drop(columns=cat_cols)
+                if save.sparse:
+                    features.append(to_csr(chunk_features, dtype=save.features_dtype))
+                else:
+                    features[start:start + length] = chunk_features.to_numpy(dtype=save.features_dtype)
+                target[start:start + length] = chunk_ctx.target.to_numpy(dtype=save.target_dtype)
+            start += length
+
+        if target is not None:
+            if save.sparse:
+                nnz = save.save_features(features)
+            else:
+                features.flush()
+                nnz = None
+            categories = None
+            if codes is not None:
+                codes.flush()
+                categories = {col: ctx.categories[col] for col in save.categorical_columns(chunk_ctx.features)}
+            target.flush()
+            pipeline_version = save.save_fitted(ctx, chunk_ctx.features)
+            save.save_schema(columns, n_rows, nnz, categories, pipeline_version)
+            # the store reads the spilled CSR blocks partition by partition
+            save.save_store(features, target, codes, save.column_schema(columns), categories, pipeline_version)
+            logging.info(f"Streaming: Data was saved to {save.features_path} and {save.target_path} files")
+    logging.info(f"Streaming: Processed {n_rows} rows in {len(spills)} chunks")
+    return ctx
@@ -0,0 +1,49 @@
+import csv
+
+import pandas as pd
+import pytest
+
+from src import ingest
+from tests.test_profiling import HEADER, ROWS
+
+pytest.importorskip("pyarrow")
+
+# an unescaped quote inside a quoted "Город" field splits it: the row has 15 fields instead of 13
+EXTRA_FIELDS_ROW = (
+    '3,"Мужчина ,  30\xa0лет","50\xa0000\xa0руб.",Программист,"Волгоград центр" , не готов к переезду , '
+    'готов к командировкам",полная занятость,полный день,Опыт работы 1 год,ООО "Альфа",Программист,'
+    'Высшее образование,01.01.2019 10:00,Не указано\n'
+)
+SHORT_ROW = '4,"Женщина ,  25\xa0лет","40\xa0000\xa0руб.",Тестировщик\n'
+
+
+@pytest.fixture
+def csv_path(tmp_path):
+    path = tmp_path / "hh.csv"
+    with open(path, "w", encoding="utf-8", newline="") as fout:
+        writer = csv.writer(fout)
+        writer.writerow(HEADER)
+        writer.writerows(ROWS)
+        fout.write(EXTRA_FIELDS_ROW + SHORT_ROW)
+        writer.writerow([5, *ROWS[0][1:]])
+    return path
+
+
+def read(csv_path, monkeypatch, backend, chunk_size=None):
+    if backend == "pandas":
+        monkeypatch.setattr(ingest, "pa", None)
+    if chunk_size is None:
+        return ingest.read_hh_csv(csv_path)
+    return pd.concat(ingest.iter_hh_csv(csv_path, chunk_size))
+
+
+@pytest.mark.parametrize("chunk_size", [None, 1, 2, 100])
+def test_backends_read_malformed_rows_the_same(csv_path, monkeypatch, chunk_size):
+    with_pyarrow = read(csv_path, monkeypatch, "pyarrow", chunk_size)
+    with_pandas = read(csv_path, monkeypatch, "pandas", chunk_size)
+
+    pd.testing.assert_frame_equal(with_pyarrow, with_pandas)
+    # the row with extra fields is dropped, the short one is kept with NaN as pd.read_csv reads it
+    assert list(with_pyarrow.index) == [0, 1, 2, 4, 5]
+    assert with_pyarrow.loc[4, "Ищет работу на должность:"] == "Тестировщик"
+    assert with_pyarrow.loc[4, ["Город", "Авто"]].isna().all()
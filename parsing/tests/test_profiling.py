@@ -0,0 +1,83 @@
+import csv
+import json
+from pathlib import Path
+import subprocess
+import sys
+from types import SimpleNamespace
+
+import pandas as pd
+import pytest
+
+from src.profiling import Profiler
+
+MAIN = Path(__file__).resolve().parents[1] / "main.py"
+
+HEADER = [
+    "", "Пол, возраст", "ЗП", "Ищет работу на должность:", "Город", "Занятость", "График",
+    "Опыт (двойное нажатие для полной версии)", "Последенее/нынешнее место работы",
+    "Последеняя/нынешняя должность", "Образование и ВУЗ", "Обновление резюме", "Авто",
+]
+ROWS = [
+    [
+        0, "Мужчина ,  49\xa0лет , родился 9\xa0декабря\xa01971", "9\xa0000\xa0USD", "Программист",
+        "Липецк , willing to relocate , not prepared for business trips", "стажировка, полная занятость", "полный день",
+        "Опыт работы 14 лет 4 месяца\n\nСентябрь 2002 — по настоящее время\nЯндекс\nПрограммист",
+        "ПАО Сбербанк", "Программист", "Высшее образование 2008 МГТУ им. Н.Э. Баумана", "13.12.2018 10:12",
+        "Имеется собственный автомобиль",
+    ],
+    [
+        1, "Мужчина ,  65\xa0лет , родился 6\xa0марта\xa01955", "249\xa0000\xa0руб.", "Старший Логист",
+        "Москва , готов к переезду , не готов к командировкам", "стажировка", "сменный график, полный день",
+        "Опыт работы 18 лет 10 месяцев\n\nЯнварь 2018 — по настоящее время\nГазпром нефть\nИнженер",
+        "X5 Retail Group", "Старший Логист", "Среднее образование 1991 КФУ", "11.12.2016 12:24", "Не указано",
+    ],
+    [
+        2, "Male ,  43\xa0years , born on 3\xa0May\xa01977", "4\xa0000\xa0EUR", "Ведущий Маркетолог",
+        "Воронеж , не готов к переезду , готов к командировкам", "part time, full time", "remote working",
+        "Work experience 0 years 3 months\n\nЯнварь 2002 — по настоящее время\nООО \"Альфа\"\nJunior QA engineer",
+        "ООО \"Ромашка\"", "Ведущий Маркетолог", "Secondary special education 2000 МГТУ им. Н.Э. Баумана",
+        "20.12.2019 12:36", "Не указано",
+    ],
+]
+
+
+def test_profile_reports_apply_time_of_parser_stages(tmp_path):
+    with open(tmp_path / "hh.csv", "w", encoding="utf-8", newline="") as fout:
+        writer = csv.writer(fout)
+        writer.writerow(HEADER)
+        writer.writerows(ROWS)
+
+    subprocess.run([sys.executable, str(MAIN), "--profile", "profile"], cwd=tmp_path, check=True)
+
+    trace = json.loads((tmp_path / "profile" / "trace.json").read_text(encoding="utf-8"))
+    stages = {stage["name"]: stage for stage in trace["stages"]}
+    # the parsers run once per unique value (src.memo), the loop is the apply time of the stage
+    for name in ("ParseSalaryHandler", "ParseCityHandler", "ParseAgeHandler"):
+        assert stages[name]["apply_calls"] >= 1
+        assert stages[name]["apply_time"] > 0
+        assert stages[name]["vectorized_time"] < stages[name]["wall_time"]
+    assert trace["total_apply_time"] > 0
+
+
+def test_apply_is_restored_after_profiled_run():
+    series_apply, frame_apply = pd.Series.apply, pd.DataFrame.apply
+    profiler = Profiler(trace_memory=False)
+    ctx = SimpleNamespace(dataframe=pd.DataFrame({"a": [1, 2, 3]}))
+
+    def process():
+        assert pd.Series.apply is not series_apply
+        ctx.dataframe["b"] = ctx.dataframe["a"].apply(str)
+        return ctx
+
+    profiler.measure("Stage", ctx, process)
+    assert profiler.stages[0].apply_calls == 1
+    assert pd.Series.apply is series_apply
+    assert pd.DataFrame.apply is frame_apply
+
+    def failing():
+        raise RuntimeError("stage failed")
+
+    with pytest.raises(RuntimeError):
+        profiler.measure("Failing", ctx, failing)
+    assert pd.Series.apply is series_apply
+    assert pd.DataFrame.apply is frame_apply
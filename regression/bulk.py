@@ -0,0 +1,397 @@
+from config import BULK_BLOCK_SIZE, MODEL_PATH, PARSING_DIR, logger
+from data_loader import add_categorical, load_feature_rows, map_npz, open_features
+from inference import check_pipeline_version, find_input_target, load_input_schema, load_model, select_model_columns
+from interrupts import deferred_interrupt, ignore_interrupt
+from metrics import StreamingMetrics
+
+import argparse
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+import json
+import os
+from pathlib import Path
+import sys
+import time
+from typing import Iterator, Optional
+
+from catboost import CatBoostRegressor
+import numpy as np
+import pandas as pd
+import scipy.sparse as sp
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = None
+
+OUTPUT_FORMATS = (".npy", ".csv", ".parquet")
+
+class FeatureBlocks:
+    """
+    Reads row blocks of a features file without loading the whole file.
+
+    A dense features.npy is memory-mapped; the arrays of an uncompressed sparse features.npz are
+    memory-mapped too, and a block is cut out of them by indptr (data_loader.load_feature_rows). The file is mapped anew for every
+    block and the block is copied out, so only the pages of one block stay in memory whatever the size
+    of the file. A compressed .npz cannot be mapped and is loaded into memory. Categorical columns
+    listed in the sidecar are joined to every block from the memory-mapped categorical.npy.
+
+    Attributes:
+        path: Path to the features file.
+        schema: Sidecar of the file (None - no categorical columns).
+        n_rows: Number of rows.
+        n_cols: Number of numeric columns.
+    """
+
+    def __init__(self, path: Path, schema: Optional[dict] = None):
+        self.path = Path(path)
+        self.schema = schema
+        self.matrix = None
+        arrays = map_npz(self.path) if self.path.suffix == ".npz" else None
+        if arrays is not None:
+            self.n_rows, self.n_cols = (int(size) for size in arrays["shape"])
+        else:
+            features = open_features(self.path)
+            if sp.issparse(features):
+                logger.warning(f"{self.path} is compressed and cannot be memory-mapped, loading it into memory")
+                self.matrix = features
+            self.n_rows, self.n_cols = features.shape
+        if schema is not None and tuple(schema["shape"]) != (self.n_rows, self.n_cols):
+            raise ValueError(f"{self.path} has shape {(self.n_rows, self.n_cols)}, but its sidecar describes {tuple(schema['shape'])}")
+
+    def read(self, start: int, stop: int):
+        """
+        Features of the rows [start, stop).
+
+        Args:
+            start: First row of the block.
+            stop: Row after the last row of the block.
+
+        Returns:
+            CSR matrix, array or DataFrame with categorical columns (as load_features gives for the whole file).
+        """
+        if self.matrix is None:
+            return load_feature_rows(self.path, self.schema, start, stop)
+        block = self.matrix[start:stop]
+        if self.schema is not None and self.schema.get("categorical"):
+            block = add_categorical(block, self.schema, self.path.parent, slice(start, stop))
+        return block
+
+class BlockProgress:
+    """
+    Completed blocks of a bulk scoring job, kept in a JSON file next to the output.
+
+    The file is rewritten atomically after every block, so an interrupted job resumes from it. It also
+    describes the job (input, model, block size); a file of another job is not resumed. With a target
+    the metrics of the completed blocks are kept in the file too, so a resumed job reports the metrics
+    of the whole file.
+
+    Attributes:
+        path: Path to the progress file.
+        job: Description of the job.
+        done: Numbers of the completed blocks.
+        metrics: Metrics of the completed blocks (None without a target).
+    """
+
+    def __init__(self, path: Path, job: dict, metrics: Optional[StreamingMetrics] = None):
+        self.path = path
+        self.job = job
+        self.done = set()
+        self.metrics = metrics
+
+    def resume(self) -> bool:
+        """
+        Load the completed blocks of the same job.
+
+        Returns:
+            True if the file describes this job.
+        """
+        if not self.path.exists():
+            return False
+        state = json.loads(self.path.read_text(encoding="utf-8"))
+        if state.get("job") != self.job:
+            return False
+        self.done = set(state["done"])
+        if state.get("metrics") is not None:
+            self.metrics = StreamingMetrics.from_state(state["metrics"])
+        return True
+
+    def mark(self, block: int, metrics: Optional[dict] = None) -> None:
+        """
+        Record a completed block.
+
+        Args:
+            block: Number of the block.
+            metrics: State of the metrics of the block (StreamingMetrics.to_state).
+        """
+        self.done.add(block)
+        if metrics is not None:
+            self.metrics.merge(StreamingMetrics.from_state(metrics))
+        state = {"job": self.job, "done": sorted(self.done)}
+        if self.metrics is not None:
+            state["metrics"] = self.metrics.to_state()
+        tmp_path = self.path.with_name(self.path.name + ".tmp")
+        tmp_path.write_text(json.dumps(state), encoding="utf-8")
+        os.replace(tmp_path, self.path)
+
+    def remove(self) -> None:
+        self.path.unlink(missing_ok=True)
+
+def file_stamp(path: Path) -> dict:
+    stat = Path(path).stat()
+    return {"path": str(Path(path).resolve()), "size": stat.st_size, "mtime_ns": stat.st_mtime_ns}
+
+def iter_row_ids(csv_path: Path, chunk_size: int) -> Iterator[pd.Index]:
+    """
+    Stream the row IDs of hh.csv (its first column, index_col=0) in chunks, in the order of the file.
+
+    Args:
+        csv_path: Path to hh.csv.
+        chunk_size: Number of IDs in a chunk.
+
+    Yields:
+        pd.Index: IDs of the next rows.
+    """
+    for chunk in pd.read_csv(csv_path, usecols=[0], index_col=0, chunksize=chunk_size):
+        yield chunk.index
+
+def count_row_ids(csv_path: Path, chunk_size: int) -> int:
+    return sum(len(ids) for ids in iter_row_ids(csv_path, chunk_size))
+
+# State of a worker process: the model and the input, opened once by init_worker
+_worker = {}
+
+def init_worker(
+    model: CatBoostRegressor,
+    x_path: Path,
+    schema: Optional[dict],
+    predictions_path: Path,
+    target_path: Optional[Path],
+    thread_count: int,
+) -> None:
+    """
+    Open the input and the output of a bulk scoring job in a worker process.
+
+    The model is passed as an argument of the pool initializer: with the fork start method the workers
+    get the model loaded by the main process without pickling it.
+    """
+    _worker["model"] = model
+    _worker["features"] = FeatureBlocks(x_path, schema)
+    _worker["predictions_path"] = predictions_path
+    _worker["target_path"] = target_path
+    _worker["thread_count"] = thread_count
+
+def init_pool_worker(*init_args) -> None:
+    ignore_interrupt()
+    init_worker(*init_args)
+
+def predict_block(block: int, start: int, stop: int) -> tuple[int, Optional[dict]]:
+    """
+    Predict the rows [start, stop), write them into the output memory map and evaluate them against the target.
+
+    A model trained on a subset of the feature columns gets only its columns of the block (inference.select_model_columns).
+
+    Returns:
+        The number of the block, once its predictions are flushed to disk, and the state of its metrics
+        (None without a target).
+    """
+    blocks = _worker["features"]
+    features = select_model_columns(_worker["model"], blocks.read(start, stop), blocks.schema)
+    values = _worker["model"].predict(features, thread_count=_worker["thread_count"])
+    predictions = np.load(_worker["predictions_path"], mmap_mode="r+")
+    predictions[start:stop] = values
+    predictions.flush()
+    if _worker["target_path"] is None:
+        return block, None
+    target = open_features(_worker["target_path"])[start:stop]
+    return block, StreamingMetrics().update(target, values).to_state()
+
+def iter_prediction_frames(predictions_path: Path, csv_path: Path, block_size: int) -> Iterator[pd.DataFrame]:
+    start = 0
+    for ids in iter_row_ids(csv_path, block_size):
+        predictions = np.array(np.load(predictions_path, mmap_mode="r")[start:start + len(ids)])
+        yield pd.DataFrame({"salary": predictions}, index=ids)
+        start += len(ids)
+
+def export_predictions(predictions_path: Path, output_path: Path, csv_path: Path, block_size: int) -> None:
+    """
+    Stream the predictions with the row IDs of hh.csv into a CSV or Parquet file, one block at a time.
+
+    Args:
+        predictions_path: .npy predictions in the order of the rows of hh.csv.
+        output_path: Path to the .csv or .parquet file.
+        csv_path: hh.csv the features were made from.
+        block_size: Number of rows written at once.
+    """
+    tmp_path = output_path.with_name(output_path.name + ".tmp")
+    frames = iter_prediction_frames(predictions_path, csv_path, block_size)
+    if output_path.suffix == ".csv":
+        for idx, frame in enumerate(frames):
+            frame.to_csv(tmp_path, mode="w" if idx == 0 else "a", header=idx == 0)
+    else:
+        writer = None
+        try:
+            for frame in frames:
+                table = pa.Table.from_pandas(frame, preserve_index=True)
+                if writer is None:
+                    writer = pq.ParquetWriter(tmp_path, table.schema)
+                writer.write_table(table)
+        finally:
+            if writer is not None:
+                writer.close()
+    os.replace(tmp_path, output_path)
+
+def predict_bulk(
+    x_path: Path,
+    output_path: Path,
+    csv_path: Optional[Path] = None,
+    block_size: int = BULK_BLOCK_SIZE,
+    workers: int = 1,
+    model_path: Path = MODEL_PATH,
+    target_path: Optional[Path] = None,
+) -> dict:
+    """
+    Predict a large features file in fixed-size blocks across a process pool, with flat memory.
+
+    The input is memory-mapped and the workers write the predictions of their blocks straight into an
+    .npy memory map. Every finished block is recorded in <output>.progress.json, so an interrupted job
+    started again with the same arguments predicts only the remaining blocks. For a .csv or .parquet
+    output the memory map is a scratch file (<output>.partial.npy): when all blocks are done the
+    predictions are streamed into the output together with the row IDs of hh.csv.
+
+    If the target of the rows is known (target_path, or the target.npy saved by the parsing pipeline next
+    to the input), every block is evaluated by its worker right after it is predicted, and the metrics of
+    the blocks are merged (StreamingMetrics): no second pass over the predictions and no full arrays.
+
+    Args:
+        x_path: Path to the .npz or .npy features file.
+        output_path: Path to the .npy, .csv or .parquet predictions.
+        csv_path: hh.csv with the row IDs for a .csv/.parquet output (defaults to hh.csv of the parsing directory).
+        block_size: Number of rows predicted at once.
+        workers: Number of worker processes (1 - predict in the main process).
+        model_path: Path to the saved model.
+        target_path: .npy target of the rows (default: the target next to the input, if it has as many rows).
+
+    Returns:
+        dict: Rows, blocks, blocks predicted by this run, the time of the run and the metrics (None without a target).
+    """
+    x_path, output_path = Path(x_path), Path(output_path)
+    if output_path.suffix not in OUTPUT_FORMATS:
+        raise ValueError(f"Unknown output format {output_path.suffix}, expected one of {OUTPUT_FORMATS}")
+    if output_path.suffix == ".parquet" and pa is None:
+        raise ImportError("pyarrow is required for a .parquet output")
+    if not x_path.exists():
+        raise FileNotFoundError(f"Input file not found: {x_path}")
+
+    model = load_model(model_path)
+    schema = load_input_schema(x_path)
+    check_pipeline_version(model, schema)
+    blocks = FeatureBlocks(x_path, schema)
+    # the columns of a model trained on a subset of them are checked before any block is predicted
+    select_model_columns(model, blocks.read(0, 0), schema)
+    n_rows = blocks.n_rows
+    if target_path is None:
+        target_path = find_input_target(x_path, n_rows)
+    elif len(open_features(target_path)) != n_rows:
+        raise ValueError(f"{target_path} has {len(open_features(target_path))} values, but {x_path} has {n_rows} rows")
+
+    if output_path.suffix != ".npy":
+        csv_path = Path(csv_path) if csv_path is not None else PARSING_DIR / "hh.csv"
+        if not csv_path.exists():
+            raise FileNotFoundError(f"hh.csv with the row IDs not found: {csv_path}")
+        n_ids = count_row_ids(csv_path, block_size)
+        if n_ids != n_rows:
+            raise ValueError(f"{csv_path} has {n_ids} rows, but {x_path} has {n_rows}: the features were made from another file")
+        predictions_path = output_path.with_name(output_path.name + ".partial.npy")
+    else:
+        predictions_path = output_path
+
+    job = {
+        "input": file_stamp(x_path),
+        "model": file_stamp(model_path),
+        "rows": n_rows,
+        "block_size": block_size,
+        "output": str(output_path.resolve()),
+        "target": file_stamp(target_path) if target_path is not None else None,
+    }
+    progress = BlockProgress(output_path.with_name(output_path.name + ".progress.json"), job)
+    if progress.resume() and predictions_path.exists():
+        logger.info(f"Resuming {output_path}: {len(progress.done)} blocks are already predicted")
+    else:
+        progress.done = set()
+        progress.metrics = StreamingMetrics() if target_path is not None else None
+        np.lib.format.open_memmap(predictions_path, mode="w+", dtype=np.float64, shape=(n_rows,)).flush()
+
+    bounds = [(block, start, min(start + block_size, n_rows)) for block, start in enumerate(range(0, n_rows, block_size))]
+    pending = iter([bound for bound in bounds if bound[0] not in progress.done])
+    n_pending = len(bounds) - len(progress.done)
+    thread_count = max(1, (os.cpu_count() or 1) // workers)
+    init_args = (model, x_path, schema, predictions_path, target_path, thread_count)
+    logger.info(f"Predicting {n_rows} rows in {n_pending} blocks of {block_size} rows ({workers} workers)")
+
+    start_time = time.perf_counter()
+    if workers == 1:
+        init_worker(*init_args)
+        for bound in pending:
+            progress.mark(*predict_block(*bound))
+        _worker.clear()
+    else:
+        with deferred_interrupt() as interrupted, ProcessPoolExecutor(
+            max_workers=workers, initializer=init_pool_worker, initargs=init_args
+        ) as pool:
+            # a few blocks ahead per worker: an interrupted job leaves little queued work
+            running = set()
+            while True:
+                # after Ctrl+C nothing new is submitted; the running blocks finish and are marked done
+                for bound in (() if interrupted.is_set() else pending):
+                    running.add(pool.submit(predict_block, *bound))
+                    if len(running) >= 2 * workers:
+                        break
+                if interrupted.is_set():
+                    running = {future for future in running if not future.cancel()}
+                if not running:
+                    break
+                done, running = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    progress.mark(*future.result())
+    seconds = time.perf_counter() - start_time
+
+    if output_path.suffix != ".npy":
+        export_predictions(predictions_path, output_path, csv_path, block_size)
+        predictions_path.unlink()
+    progress.remove()
+    logger.info(f"Predictions saved to {output_path} ({n_pending} blocks in {seconds:.1f} s)")
+    metrics = progress.metrics.log() if progress.metrics is not None else None
+    return {"rows": n_rows, "blocks": len(bounds), "predicted_blocks": n_pending, "seconds": seconds, "metrics": metrics}
+
+def parse_arguments():
+    """
+    Parse CLI arguments of bulk scoring.
+
+    Returns:
+        argparse.Namespace: Parsed arguments.
+    """
+    parser = argparse.ArgumentParser(description="Sharded memory-mapped bulk scoring with the salary model")
+    parser.add_argument("input_file", type=Path, help="Path to input .npz (sparse) or .npy (dense) features file")
+    parser.add_argument("--output", type=Path, required=True, help="Predictions: .npy (memory map), .csv or .parquet (with hh.csv row IDs)")
+    parser.add_argument("--csv", type=Path, default=None, help="hh.csv the features were made from (row IDs of a .csv/.parquet output)")
+    parser.add_argument("--block-size", type=int, default=BULK_BLOCK_SIZE, help="Rows predicted at once")
+    parser.add_argument("--workers", type=int, default=1, help="Number of worker processes")
+    parser.add_argument("--target", type=Path, default=None,
+                        help="Target .npy to evaluate the predictions on the fly (default: the target next to the input)")
+    return parser.parse_args()
+
+def main():
+    """Main entry point of bulk scoring."""
+    args = parse_arguments()
+    try:
+        predict_bulk(args.input_file, args.output, args.csv, args.block_size, args.workers, target_path=args.target)
+    except KeyboardInterrupt:
+        logger.info("Interrupted: run the same command again to resume from the last completed block")
+        sys.exit(130)
+    except Exception as e:
+        logger.error(f"An error occurred: {e}")
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -7,10 +7,27 @@ BASE_DIR = Path(__file__).parent.resolve()
 PARSING_DIR = BASE_DIR.parent / "parsing"
 RESOURCES_DIR = BASE_DIR.parent / "resources"
 MODEL_PATH = RESOURCES_DIR / "salary_model.cbm"
+# CV-метрики модели, выбранной подбором гиперпараметров (main.py --tune)
+METRICS_PATH = RESOURCES_DIR / "salary_model.metrics.json"
+# Журнал испытаний подбора гиперпараметров (продолжается после прерывания)
+TRIALS_PATH = RESOURCES_DIR / "tuning" / "trials.jsonl"
+RANDOM_STATE = 28
+# Границы квантования обучающих данных (quantization.py): выбираются один раз, пока не изменились файлы парсинга
+BORDERS_DIR = RESOURCES_DIR / "borders"
 
 # Данные для обучения
 X_PATH = PARSING_DIR / "features.npy"
 Y_PATH = PARSING_DIR / "target.npy"
+SCHEMA_PATH = PARSING_DIR / "features.json"
+# Колоночное хранилище признаков (parsing/main.py --feature-store): чтение только нужных столбцов и строк
+STORE_DIR = PARSING_DIR / "feature_store"
+
+# Пакетный инференс (bulk.py): строк в одном блоке
+BULK_BLOCK_SIZE = 65536
+
+# Сервис предсказаний (service.py)
+SERVICE_HOST = "127.0.0.1"
+SERVICE_PORT = 8080
 
 def setup_logging():
     """
@@ -0,0 +1,140 @@
+from config import MODEL_PATH, PARSING_DIR, RANDOM_STATE, SCHEMA_PATH, X_PATH, Y_PATH, logger
+from data_loader import load_feature_rows, load_schema, open_features
+from metrics import StreamingMetrics
+from model import train_model
+from quantization import cat_feature_names, quantize_pool
+
+import hashlib
+from pathlib import Path
+from typing import Optional
+
+from catboost import CatBoostRegressor, Pool
+import numpy as np
+from sklearn.model_selection import train_test_split
+
+# New trees added by one update
+UPDATE_ITERATIONS = 200
+# An update whose validation RMSE exceeds the RMSE of the last full training by this ratio is replaced by a full retraining
+DRIFT_TOLERANCE = 1.25
+# Fewer new rows do not make an update (their validation part would be too small to guard the drift)
+MIN_UPDATE_ROWS = 500
+# Parameters of the model kept by the new trees
+INHERITED_PARAMS = ("depth", "learning_rate", "l2_leaf_reg", "border_count")
+
+def target_digest(target, n_rows: int) -> str:
+    """
+    Short hash of the first n_rows values of the target, to check that a new export only appends rows.
+    """
+    return hashlib.sha256(np.ascontiguousarray(np.asarray(target[:n_rows], dtype=np.float64)).tobytes()).hexdigest()[:16]
+
+def record_training(model: CatBoostRegressor, parsing_dir: Path = PARSING_DIR) -> None:
+    """
+    Write into the model metadata which rows of the parsing output it has been trained on.
+
+    Args:
+        model: Model trained on all rows of the parsing output.
+        parsing_dir: Directory with the output of the parsing pipeline.
+    """
+    target = open_features(parsing_dir / Y_PATH.name)
+    model.get_metadata()["train_rows"] = str(len(target))
+    model.get_metadata()["target_digest"] = target_digest(target, len(target))
+
+def metadata_value(model: CatBoostRegressor, key: str) -> Optional[str]:
+    metadata = model.get_metadata()
+    return metadata[key] if key in metadata.keys() else None
+
+def full_retrain(parsing_dir: Path, reason: str) -> CatBoostRegressor:
+    logger.warning(f"Full retraining: {reason}")
+    model = train_model(quantize_pool(parsing_dir=parsing_dir))
+    record_training(model, parsing_dir)
+    return model
+
+def update_model(
+    parsing_dir: Path = PARSING_DIR,
+    model_path: Path = MODEL_PATH,
+    iterations: int = UPDATE_ITERATIONS,
+    tolerance: float = DRIFT_TOLERANCE,
+) -> Optional[CatBoostRegressor]:
+    """
+    Continue boosting the saved model on the rows the parsing output has gained since it was trained.
+
+    A new export of hh.csv is parsed as usual (with --transform, so the feature columns stay the same).
+    The model metadata tells how many rows of the parsing output it has seen and the hash of their target;
+    if the new output starts with the same rows, only the rows after them are read (a row slice of the
+    memory-mapped features, see data_loader.load_feature_rows) into a Pool, 80% of
+    them are used to train `iterations` new trees on top of the model (CatBoost init_model, the borders of
+    the model are kept) and 20% to validate. The time of an update depends on the number of new rows,
+    not on the whole history.
+
+    Drift guard: the updated model must have an RMSE on the validation part of the new rows no worse
+    than `tolerance` times the RMSE of the last full training on its test part (test_rmse, or cv_rmse of
+    a tuned model). Otherwise - and when the rows seen by the model have changed, the fitted parsing
+    pipeline is another or the model has no training record - the model is trained from scratch on all
+    rows (as --train).
+
+    Args:
+        parsing_dir: Directory with the output of the parsing pipeline.
+        model_path: Path to the model to update.
+        iterations: Number of new trees.
+        tolerance: Allowed ratio of the validation RMSE to the RMSE of the last full training.
+
+    Returns:
+        The updated or retrained model (with its training record in the metadata), None if there are
+        fewer than MIN_UPDATE_ROWS new rows.
+    """
+    model = CatBoostRegressor()
+    model.load_model(str(model_path))
+    schema = load_schema(parsing_dir / SCHEMA_PATH.name)
+    x_path = parsing_dir / (schema["features_path"] if schema is not None else X_PATH.name)
+    # only the target is opened whole (memory-mapped): the features of the seen rows are never read
+    target = open_features(parsing_dir / Y_PATH.name)
+
+    trained_rows = metadata_value(model, "train_rows")
+    reference = metadata_value(model, "test_rmse") or metadata_value(model, "cv_rmse")
+    pipeline_version = schema.get("pipeline_version") if schema is not None else None
+    if trained_rows is None or reference is None:
+        return full_retrain(parsing_dir, f"{model_path} has no record of its training rows")
+    trained_rows, reference = int(trained_rows), float(reference)
+    if pipeline_version != metadata_value(model, "pipeline_version"):
+        return full_retrain(parsing_dir, f"the features were made by another fitted pipeline ({pipeline_version})")
+    if len(target) < trained_rows or target_digest(target, trained_rows) != metadata_value(model, "target_digest"):
+        return full_retrain(parsing_dir, f"the first {trained_rows} rows are not the rows the model was trained on")
+
+    n_new = len(target) - trained_rows
+    if n_new < MIN_UPDATE_ROWS:
+        logger.info(f"{n_new} new rows (fewer than {MIN_UPDATE_ROWS}): the model is not updated")
+        return None
+
+    new_features = load_feature_rows(x_path, schema, trained_rows, len(target))
+    if new_features.shape[0] != n_new:
+        raise ValueError(f"{x_path} has {trained_rows + new_features.shape[0]} rows, but the target has {len(target)}")
+    pool = Pool(new_features, np.asarray(target[trained_rows:]), cat_features=cat_feature_names(new_features))
+    train_idx, valid_idx = train_test_split(np.arange(n_new), test_size=0.2, random_state=RANDOM_STATE)
+    train_pool, valid_pool = pool.slice(train_idx), pool.slice(valid_idx)
+    valid_target = valid_pool.get_label()
+
+    previous_rmse = StreamingMetrics().update(valid_target, model.predict(valid_pool)).result()["rmse"]
+    params = model.get_all_params()
+    updated = CatBoostRegressor(
+        **{name: params[name] for name in INHERITED_PARAMS if name in params},
+        iterations=iterations,
+        random_state=RANDOM_STATE,
+        verbose=0,
+    )
+    logger.info(f"Updating the model ({model.tree_count_} trees, {trained_rows} rows) on {n_new} new rows...")
+    updated.fit(train_pool, eval_set=valid_pool, use_best_model=False, init_model=model)
+    updated_rmse = StreamingMetrics().update(valid_target, updated.get_test_eval()).result()["rmse"]
+    logger.info(
+        f"Validation RMSE on the new rows: {previous_rmse:.2f} before the update, {updated_rmse:.2f} after "
+        f"(full training: {reference:.2f})"
+    )
+    if updated_rmse > tolerance * reference:
+        return full_retrain(parsing_dir, f"validation RMSE {updated_rmse:.2f} is more than {tolerance} x {reference:.2f}")
+
+    # init_model does not carry the metadata over
+    for key in ("test_rmse", "cv_rmse", "cv_mae", "cv_r2"):
+        if metadata_value(model, key) is not None:
+            updated.get_metadata()[key] = metadata_value(model, key)
+    updated.get_metadata()["updates"] = str(int(metadata_value(model, "updates") or 0) + 1)
+    record_training(updated, parsing_dir)
+    return updated
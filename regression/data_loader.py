@@ -1,19 +1,201 @@
-from config import X_PATH, Y_PATH, logger
+from config import PARSING_DIR, SCHEMA_PATH, STORE_DIR, X_PATH, Y_PATH, logger
+from store import read_manifest, read_store
+
+import json
+from pathlib import Path
+import struct
+import zipfile
+from typing import Optional, Sequence, Union
 
 import numpy as np
+import pandas as pd
+import scipy.sparse as sp
+
+def open_features(path: Path) -> Union[np.ndarray, sp.csr_matrix]:
+    """
+    Open a features matrix: a sparse .npz matrix as CSR, a typed .npy matrix as a read-only memory map (no copy, no pickle).
+
+    Args:
+        path: Path to the .npz or .npy file.
+
+    Returns:
+        CSR matrix or memory-mapped array.
+    """
+    if Path(path).suffix == ".npz":
+        return sp.load_npz(path).tocsr()
+    try:
+        return np.load(path, mmap_mode="r")
+    except ValueError as e:
+        raise ValueError(
+            f"{path} is not a numeric matrix ({e}). Please re-run the parsing pipeline to save typed features."
+        ) from e
+
+def map_npz(path: Path) -> Optional[dict[str, np.memmap]]:
+    """
+    Memory-map the arrays of an uncompressed .npz file (the parsing pipeline saves features.npz with compressed=False).
 
-def load_data():
+    Every member of such an archive is a plain .npy file stored in the zip as is, so its data can be
+    mapped at the offset of the member without reading the archive.
+
+    Args:
+        path: Path to the .npz file.
+
+    Returns:
+        Read-only memory maps by array name, or None if the archive is compressed.
+    """
+    arrays = {}
+    with zipfile.ZipFile(path) as archive, open(path, "rb") as fin:
+        for info in archive.infolist():
+            if info.compress_type != zipfile.ZIP_STORED:
+                return None
+            # local file header: 30 bytes, then the file name and the extra field
+            fin.seek(info.header_offset)
+            header = fin.read(30)
+            name_length, extra_length = struct.unpack("<HH", header[26:30])
+            fin.seek(info.header_offset + 30 + name_length + extra_length)
+            version = np.lib.format.read_magic(fin)
+            read_header = np.lib.format.read_array_header_1_0 if version == (1, 0) else np.lib.format.read_array_header_2_0
+            shape, fortran_order, dtype = read_header(fin)
+            if dtype.hasobject:
+                return None
+            if not np.prod(shape):
+                # an empty array cannot be mapped
+                arrays[Path(info.filename).stem] = np.zeros(shape, dtype=dtype)
+                continue
+            arrays[Path(info.filename).stem] = np.memmap(
+                path, dtype=dtype, mode="r", offset=fin.tell(), shape=shape, order="F" if fortran_order else "C"
+            )
+    return arrays
+
+def load_schema(schema_path: Path = SCHEMA_PATH) -> Optional[dict]:
+    """
+    Load the sidecar with feature names and dtypes written by the parsing pipeline.
+
+    Args:
+        schema_path: Path to the sidecar (features.json of the parsing directory by default).
+
+    Returns:
+        Schema dictionary or None if the sidecar is missing.
+    """
+    if not schema_path.exists():
+        return None
+    return json.loads(schema_path.read_text(encoding="utf-8"))
+
+def add_categorical(features, schema: dict, directory: Path, rows: slice = slice(None)) -> pd.DataFrame:
+    """
+    Join the numeric features with the categorical columns saved without one-hot encoding.
+
+    Categories are restored as strings (an empty string for a missing value), so CatBoost
+    gets the same values whatever the codes of the categories in a particular file are.
+
+    Args:
+        features: Numeric feature matrix.
+        schema: Sidecar of the features file.
+        directory: Directory with the files of the sidecar.
+        rows: Rows of the file the features are (all rows by default).
+
+    Returns:
+        DataFrame with the numeric columns followed by the categorical (object) columns.
+    """
+    numeric = features.toarray() if sp.issparse(features) else np.asarray(features)
+    frame = pd.DataFrame(numeric, columns=[column["name"] for column in schema["columns"]])
+    codes = np.load(directory / schema["categorical_path"], mmap_mode="r")[rows]
+    for idx, column in enumerate(schema["categorical"]):
+        values = pd.Categorical.from_codes(codes[:, idx], categories=column["categories"])
+        frame[column["name"]] = pd.Series(values, dtype=object).fillna("").to_numpy()
+    return frame
+
+def load_features(path: Path, schema: Optional[dict] = None):
+    """
+    Load a features file and join the categorical columns listed in its sidecar.
+
+    Args:
+        path: Path to the .npz or .npy file.
+        schema: Sidecar of the file (None - the file is used as is).
+
+    Returns:
+        CSR matrix, memory-mapped array or DataFrame with categorical columns (for CatBoost cat_features).
+    """
+    features = open_features(path)
+    if schema is None:
+        return features
+    if tuple(schema["shape"]) != features.shape:
+        raise ValueError(f"{path} has shape {features.shape}, but its sidecar describes {tuple(schema['shape'])}")
+    if schema.get("categorical"):
+        features = add_categorical(features, schema, Path(path).parent)
+    return features
+
+def load_feature_rows(path: Path, schema: Optional[dict], start: int, stop: int):
+    """
+    Load the rows [start, stop) of a features file without loading the other rows.
+
+    A dense .npy is memory-mapped; the arrays of an uncompressed sparse .npz are memory-mapped too (map_npz),
+    and the rows are cut out of them by indptr. A compressed .npz cannot be mapped and is loaded whole.
+    Categorical columns listed in the sidecar are joined from the same rows of the memory-mapped categorical.npy.
+
+    Args:
+        path: Path to the .npz or .npy file.
+        schema: Sidecar of the file (None - no categorical columns).
+        start: First row.
+        stop: Row after the last row.
+
+    Returns:
+        CSR matrix, array or DataFrame with categorical columns (as load_features gives for the whole file).
+    """
+    arrays = map_npz(path) if Path(path).suffix == ".npz" else None
+    if arrays is not None:
+        n_cols = int(arrays["shape"][1])
+        indptr = np.array(arrays["indptr"][start:stop + 1])
+        low, high = indptr[0], indptr[-1]
+        features = sp.csr_matrix(
+            (np.array(arrays["data"][low:high]), np.array(arrays["indices"][low:high]), indptr - low),
+            shape=(len(indptr) - 1, n_cols),
+        )
+    else:
+        features = open_features(path)[start:stop]
+        features = features if sp.issparse(features) else np.array(features)
+    if schema is not None and schema.get("categorical"):
+        features = add_categorical(features, schema, Path(path).parent, slice(start, stop))
+    return features
+
+def load_data(parsing_dir: Path = PARSING_DIR, columns: Optional[Sequence[str]] = None, rows: Optional[slice] = None):
     """
     Load preprocessed dataset (features and target) from the parsing directory.
-    
+
+    The features file is taken from the sidecar: a sparse CSR matrix (features.npz) is loaded as is,
+    a dense one (features.npy) is memory-mapped, so loading does not copy the data into memory.
+    Categorical columns saved without one-hot encoding are joined into a DataFrame.
+
+    A subset of columns or rows is read from the feature store of the same parsing run
+    (parsing with --feature-store, see store.read_store): only the selected columns and rows are read.
+
+    Args:
+        parsing_dir: Directory with the output of the parsing pipeline.
+        columns: Names or glob patterns of the feature columns (None - all of them).
+        rows: Row range (None - all rows).
+
     Returns:
         tuple containing the feature matrix (features) and target vector (target).
     """
-    if not X_PATH.exists() or not Y_PATH.exists():
-        raise FileNotFoundError(f"Files not found: {X_PATH} or {Y_PATH}. Please run parsing pipeline first.")
-        
+    schema = load_schema(parsing_dir / SCHEMA_PATH.name)
+    if columns is not None or rows is not None:
+        store_dir = parsing_dir / STORE_DIR.name
+        manifest = read_manifest(store_dir)
+        if manifest is not None and schema is not None and (
+            manifest["pipeline_version"] != schema.get("pipeline_version") or manifest["rows"] != schema["shape"][0]
+        ):
+            raise ValueError(
+                f"The feature store in {store_dir} does not match {SCHEMA_PATH.name}: "
+                f"re-run the parsing pipeline with --feature-store."
+            )
+        return read_store(store_dir, columns, rows or slice(None))
+    x_path = parsing_dir / (schema["features_path"] if schema is not None else X_PATH.name)
+    y_path = parsing_dir / Y_PATH.name
+    if not x_path.exists() or not y_path.exists():
+        raise FileNotFoundError(f"Files not found: {x_path} or {y_path}. Please run parsing pipeline first.")
+
     logger.info("Loading data...")
-    features = np.load(X_PATH, allow_pickle=True)
-    target = np.load(Y_PATH, allow_pickle=True)
-    logger.info(f"Data loaded. features shape: {features.shape}, target shape: {target.shape}")
+    features = load_features(x_path, schema)
+    target = open_features(y_path)
+    logger.info(f"Data loaded. features shape: {features.shape} ({type(features).__name__}), target shape: {target.shape}")
     return features, target
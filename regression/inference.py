@@ -1,36 +1,137 @@
 from config import MODEL_PATH, logger
+from data_loader import load_features, load_schema, open_features
+from registry import MODELS
 
+import json
 from pathlib import Path
+from typing import Optional
 
 from catboost import CatBoostRegressor
 import numpy as np
+import pandas as pd
+
+def check_pipeline_version(model: CatBoostRegressor, schema) -> None:
+    """
+    Check that the features were made by the same fitted parsing pipeline as the training features.
+
+    Args:
+        model: Loaded model.
+        schema: Sidecar of the input file (None - nothing to check).
+
+    Raises:
+        ValueError: If the versions of the fitted pipelines differ.
+    """
+    metadata = model.get_metadata()
+    model_version = metadata["pipeline_version"] if "pipeline_version" in metadata.keys() else None
+    features_version = schema.get("pipeline_version") if schema is not None else None
+    if model_version is not None and features_version is not None and model_version != features_version:
+        raise ValueError(
+            f"Features were made by the fitted pipeline {features_version}, but the model was trained on {model_version}. "
+            f"Re-run parsing with --transform <pipeline.json of the training run>."
+        )
+
+def select_model_columns(model: CatBoostRegressor, features, schema: Optional[dict]):
+    """
+    Select the columns of a model trained on a subset of the feature columns (main.py --train --columns).
+
+    Args:
+        model: Loaded model.
+        features: Features of the input file (CSR matrix, array or DataFrame with categorical columns).
+        schema: Sidecar of the input file with the names of its columns.
+
+    Returns:
+        The features of the model columns; the features as they are for a model trained on all columns.
+
+    Raises:
+        ValueError: If the columns of a matrix cannot be found without the sidecar.
+    """
+    metadata = model.get_metadata()
+    if "feature_columns" not in metadata.keys():
+        return features
+    names = json.loads(metadata["feature_columns"])
+    if isinstance(features, pd.DataFrame):
+        return features[names]
+    if schema is None:
+        raise ValueError("The model was trained on a subset of the feature columns: the input file needs its features.json")
+    positions = {column["name"]: idx for idx, column in enumerate(schema["columns"])}
+    return features[:, [positions[name] for name in names]]
+
+def load_input_schema(x_path: Path) -> Optional[dict]:
+    """
+    Load the sidecar of an input features file.
+
+    Args:
+        x_path: Path to the features file.
+
+    Returns:
+        The features.json next to the file if it describes this file, else None.
+    """
+    schema = load_schema(x_path.parent / "features.json")
+    if schema is not None and schema["features_path"] != x_path.name:
+        return None
+    return schema
+
+def find_input_target(x_path: Path, n_rows: int) -> Optional[Path]:
+    """
+    Find the target saved by the parsing pipeline next to an input features file, to evaluate its predictions.
+
+    Args:
+        x_path: Path to the features file.
+        n_rows: Number of rows of the features file.
+
+    Returns:
+        Path to the target, or None if there is none or it has another number of rows.
+    """
+    schema = load_input_schema(x_path)
+    target_path = x_path.parent / (schema["target_path"] if schema is not None else "target.npy")
+    if not target_path.exists():
+        return None
+    n_values = len(open_features(target_path))
+    if n_values != n_rows:
+        logger.info(f"{target_path} has {n_values} values, not {n_rows}: it is not the target of {x_path.name}")
+        return None
+    return target_path
+
+def load_model(model_path: Path = MODEL_PATH) -> CatBoostRegressor:
+    """
+    Get the trained model from the model registry of the process.
+
+    The model is loaded once and cached; it is loaded again only when the file is replaced.
+
+    Args:
+        model_path: Path to the saved model (defaults to resources/salary_model.cbm).
+
+    Returns:
+        Loaded model.
+    """
+    if not model_path.exists():
+        error_msg = f"Model file not found at {model_path}. Please train the model first with `python3 main.py --train`"
+        logger.error(error_msg)
+        raise FileNotFoundError(error_msg)
+    return MODELS.get(model_path)
 
 def predict_and_save(x_path_str: str, output_path_str: str = "target.npy") -> np.ndarray:
     """
     Load model and perform inference on input data.
 
     Args:
-        x_path_str: Path to input .npy file with features.
+        x_path_str: Path to input .npz or .npy file with features.
         output_path_str: Path to save predictions (defaults to "target.npy").
 
     Returns:
         Array of predicted values.
     """
-    if not MODEL_PATH.exists():
-        error_msg = f"Model file not found at {MODEL_PATH}. Please train the model first with `python3 main.py --train`"
-        logger.error(error_msg)
-        raise FileNotFoundError(error_msg)
-        
-    logger.info(f"Loading model from {MODEL_PATH}")
-    model = CatBoostRegressor()
-    model.load_model(str(MODEL_PATH))
+    model = load_model()
     
     x_path = Path(x_path_str)
     if not x_path.exists():
         raise FileNotFoundError(f"Input file not found: {x_path}")
         
-    x_new = np.load(x_path, allow_pickle=True)
-    
+    # the sidecar next to the input file lists its categorical columns
+    schema = load_input_schema(x_path)
+    check_pipeline_version(model, schema)
+    x_new = select_model_columns(model, load_features(x_path, schema), schema)
+
     logger.info(f"Predicting for {x_new.shape[0]} samples...")
     predictions = model.predict(x_new)
     
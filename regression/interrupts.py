@@ -0,0 +1,30 @@
+from contextlib import contextmanager
+import signal
+import threading
+from typing import Iterator
+
+@contextmanager
+def deferred_interrupt() -> Iterator[threading.Event]:
+    """
+    Turn Ctrl+C into a flag while a process pool is driven, and raise KeyboardInterrupt afterwards.
+
+    A KeyboardInterrupt raised inside ProcessPoolExecutor.submit can leave its internal lock taken, and
+    the shutdown of the pool then hangs. Instead the loop checks the flag, stops submitting, lets the
+    running tasks finish (their results are recorded, so a resumed job does not repeat them) and leaves
+    the pool; KeyboardInterrupt is raised when the block exits.
+
+    Yields:
+        threading.Event: Set on Ctrl+C.
+    """
+    interrupted = threading.Event()
+    previous = signal.signal(signal.SIGINT, lambda signum, frame: interrupted.set())
+    try:
+        yield interrupted
+    finally:
+        signal.signal(signal.SIGINT, previous)
+    if interrupted.is_set():
+        raise KeyboardInterrupt
+
+def ignore_interrupt() -> None:
+    """Ignore Ctrl+C in a worker process: the main process decides when to stop."""
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
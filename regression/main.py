@@ -1,7 +1,12 @@
-from config import logger
-from data_loader import load_data
-from inference import predict_and_save
-from model import evaluate_model, save_model, train_model
+from config import BULK_BLOCK_SIZE, logger
+from continual import record_training, update_model
+from data_loader import load_schema, open_features
+from inference import find_input_target, predict_and_save
+from metrics import StreamingMetrics
+from model import save_model, train_model
+from quantization import quantize_pool
+from store import parse_rows, record_selection
+from tuning import tune_model
 
 import argparse
 from pathlib import Path
@@ -24,14 +29,52 @@ def parse_arguments():
         help="Train the model using data from parsing directory"
     )
     
+    group.add_argument(
+        "--tune",
+        action="store_true",
+        help="Search the hyperparameters with k-fold cross-validation and save the best model"
+    )
+
+    group.add_argument(
+        "--update",
+        action="store_true",
+        help="Continue training the saved model on the rows added to the parsing output since it was trained"
+    )
+
     group.add_argument(
         "input_file", 
         nargs="?", 
-        help="Path to input .npy file for prediction"
+        help="Path to input .npz (sparse) or .npy (dense) features file for prediction"
     )
 
+    parser.add_argument(
+        "--columns",
+        nargs="+",
+        default=None,
+        help="Train on these feature columns only, names or glob patterns like 'job_*' (--train, --tune; read from the feature store)"
+    )
+    parser.add_argument(
+        "--rows",
+        type=parse_rows,
+        default=None,
+        help="Train on the row range START:STOP only (--train, --tune; read from the feature store)"
+    )
+    parser.add_argument("--trials", type=int, default=20, help="Number of hyperparameter trials (--tune)")
+    parser.add_argument("--folds", type=int, default=5, help="Number of cross-validation folds (--tune)")
+    parser.add_argument("--cpus", type=int, default=None, help="CPU budget of the search (--tune, default: all CPUs)")
+    parser.add_argument("--threads-per-fit", type=int, default=1, help="CatBoost threads of one fold fit (--tune)")
+
     return parser.parse_args()
 
+def record(model, args) -> None:
+    """
+    Record the training data in the model metadata: all rows of the parsing output or a subset of the feature store.
+    """
+    if args.columns is None and args.rows is None:
+        record_training(model)
+    else:
+        record_selection(model, args.columns, args.rows)
+
 def main():
     """Main entry point handling argument parsing and pipeline execution."""
     args = parse_arguments()
@@ -39,12 +82,31 @@ def main():
     try:
         if args.train:
             logger.info("Starting training process...")
-            features, target = load_data()
+            pool = quantize_pool(columns=args.columns, rows=args.rows)
             
-            model = train_model(features, target)
-            save_model(model)
+            model = train_model(pool)
+            record(model, args)
+            schema = load_schema()
+            save_model(model, schema.get("pipeline_version") if schema is not None else None)
 
             logger.info("Training completed successfully.")            
+        elif args.tune:
+            logger.info("Starting hyperparameter search...")
+            model, cv_metrics = tune_model(
+                args.trials, args.folds, args.cpus, args.threads_per_fit, columns=args.columns, rows=args.rows
+            )
+            record(model, args)
+            schema = load_schema()
+            save_model(model, schema.get("pipeline_version") if schema is not None else None, cv_metrics)
+
+            logger.info("Tuning completed successfully.")
+        elif args.update:
+            logger.info("Starting continual training...")
+            model = update_model()
+            if model is not None:
+                schema = load_schema()
+                save_model(model, schema.get("pipeline_version") if schema is not None else None)
+                logger.info("Update completed successfully.")
         elif args.input_file:
             input_path = Path(args.input_file)
             logger.info(f"Starting inference for file: {input_path}")
@@ -52,12 +114,20 @@ def main():
             output_path = input_path.parent / "y_pred.npy"
             
             y_pred = predict_and_save(str(input_path), str(output_path))
-            try:
-                _, y_true = load_data()
-                evaluate_model(y_true, y_pred)
-            except Exception as e: 
-                logger.info(f'Metrics evaluation is not possible, unknown dataset: {e}')
+            # the target saved next to the input is read block by block, not loaded whole
+            target_path = find_input_target(input_path, len(y_pred))
+            if target_path is None:
+                logger.info("Metrics evaluation is not possible, unknown dataset: no target next to the input file")
+            else:
+                y_true = open_features(target_path)
+                metrics = StreamingMetrics()
+                for start in range(0, len(y_pred), BULK_BLOCK_SIZE):
+                    metrics.update(y_true[start:start + BULK_BLOCK_SIZE], y_pred[start:start + BULK_BLOCK_SIZE])
+                metrics.log()
             
+    except KeyboardInterrupt:
+        logger.info("Interrupted: run the same command again to resume")
+        sys.exit(130)
     except Exception as e:
         logger.error(f"An error occurred: {e}")
         sys.exit(1)
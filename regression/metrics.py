@@ -0,0 +1,199 @@
+from config import logger
+
+import math
+from typing import Optional
+
+import numpy as np
+
+class StreamingMetrics:
+    """
+    Regression metrics accumulated block by block, without keeping y_true and y_pred in memory.
+
+    MAE, RMSE and the bias are kept as sums; R2 needs the variance of the target, which is merged
+    from per-block means and sums of squared deviations (Chan et al.), so it is as stable as a
+    two-pass computation. Quantiles of the absolute error come from a log-bucket sketch (DDSketch):
+    an error x falls into the bucket ceil(log(x) / log(gamma)), gamma = (1 + a) / (1 - a), so any
+    quantile is returned with a relative error of at most a (relative_accuracy), in O(log(max/min))
+    memory. Accumulators of different blocks or processes are combined with merge().
+
+    Attributes:
+        relative_accuracy: Relative accuracy of the error quantiles.
+        quantiles: Quantiles of the absolute error reported by result().
+        n: Number of accumulated rows.
+    """
+    quantiles = (0.5, 0.9, 0.99)
+
+    def __init__(self, relative_accuracy: float = 0.01):
+        self.relative_accuracy = relative_accuracy
+        self.gamma = (1 + relative_accuracy) / (1 - relative_accuracy)
+        self.log_gamma = math.log(self.gamma)
+        self.n = 0
+        self.sum_abs = 0.0
+        self.sum_sq = 0.0
+        self.sum_err = 0.0
+        self.max_abs = 0.0
+        self.target_mean = 0.0
+        self.target_m2 = 0.0
+        # bucket -> count of the absolute errors in it; exact zeros are counted apart
+        self.buckets: dict[int, int] = {}
+        self.zeros = 0
+
+    def _merge_target(self, n: int, mean: float, m2: float) -> None:
+        total = self.n + n
+        delta = mean - self.target_mean
+        self.target_mean += delta * n / total
+        self.target_m2 += m2 + delta * delta * self.n * n / total
+
+    def update(self, y_true, y_pred) -> "StreamingMetrics":
+        """
+        Add a block of rows.
+
+        Args:
+            y_true: Actual target values of the block.
+            y_pred: Predicted values of the block.
+
+        Returns:
+            The accumulator itself.
+        """
+        y_true = np.asarray(y_true, dtype=np.float64).ravel()
+        y_pred = np.asarray(y_pred, dtype=np.float64).ravel()
+        if y_true.shape != y_pred.shape:
+            raise ValueError(f"y_true has {len(y_true)} values, y_pred has {len(y_pred)}")
+        if not len(y_true):
+            return self
+        errors = y_pred - y_true
+        abs_errors = np.abs(errors)
+        mean = float(y_true.mean())
+        self._merge_target(len(y_true), mean, float(np.square(y_true - mean).sum()))
+        self.n += len(y_true)
+        self.sum_abs += float(abs_errors.sum())
+        self.sum_sq += float(np.square(errors).sum())
+        self.sum_err += float(errors.sum())
+        self.max_abs = max(self.max_abs, float(abs_errors.max()))
+
+        positive = abs_errors[abs_errors > 0]
+        self.zeros += len(abs_errors) - len(positive)
+        keys, counts = np.unique(np.ceil(np.log(positive) / self.log_gamma).astype(np.int64), return_counts=True)
+        for key, count in zip(keys.tolist(), counts.tolist()):
+            self.buckets[key] = self.buckets.get(key, 0) + count
+        return self
+
+    def merge(self, other: "StreamingMetrics") -> "StreamingMetrics":
+        """
+        Add the rows of another accumulator (of the same relative accuracy).
+
+        Args:
+            other: Accumulator of other rows.
+
+        Returns:
+            The accumulator itself.
+        """
+        if other.relative_accuracy != self.relative_accuracy:
+            raise ValueError("Cannot merge metrics of different relative accuracy")
+        if not other.n:
+            return self
+        self._merge_target(other.n, other.target_mean, other.target_m2)
+        self.n += other.n
+        self.sum_abs += other.sum_abs
+        self.sum_sq += other.sum_sq
+        self.sum_err += other.sum_err
+        self.max_abs = max(self.max_abs, other.max_abs)
+        self.zeros += other.zeros
+        for key, count in other.buckets.items():
+            self.buckets[key] = self.buckets.get(key, 0) + count
+        return self
+
+    def quantile(self, q: float) -> Optional[float]:
+        """
+        Quantile of the absolute error, within relative_accuracy.
+
+        Args:
+            q: Quantile in [0, 1].
+
+        Returns:
+            The quantile, None if no rows were accumulated.
+        """
+        if not self.n:
+            return None
+        rank = q * (self.n - 1)
+        seen = self.zeros
+        if seen > rank:
+            return 0.0
+        for key in sorted(self.buckets):
+            seen += self.buckets[key]
+            if seen > rank:
+                # the middle of the bucket (gamma^(k-1), gamma^k] in relative terms
+                return min(2 * self.gamma ** key / (self.gamma + 1), self.max_abs)
+        return self.max_abs
+
+    def result(self) -> dict:
+        """
+        Metrics of the accumulated rows.
+
+        Returns:
+            Dictionary with n, MAE, RMSE, R2, mean error (bias), maximum absolute error and the quantiles
+            of the absolute error (abs_error_p50, ...).
+        """
+        if not self.n:
+            return {"n": 0}
+        ss_res = self.sum_sq
+        # like sklearn.metrics.r2_score for a constant target
+        r2 = 1 - ss_res / self.target_m2 if self.target_m2 else (1.0 if ss_res == 0 else 0.0)
+        metrics = {
+            "n": self.n,
+            "mae": self.sum_abs / self.n,
+            "rmse": math.sqrt(self.sum_sq / self.n),
+            "r2": r2,
+            "bias": self.sum_err / self.n,
+            "max_error": self.max_abs,
+        }
+        for q in self.quantiles:
+            metrics[f"abs_error_p{round(q * 100)}"] = self.quantile(q)
+        return metrics
+
+    def log(self) -> dict:
+        """
+        Log the metrics of the accumulated rows.
+
+        Returns:
+            Dictionary of result().
+        """
+        metrics = self.result()
+        logger.info(f"Model Evaluation ({metrics['n']} rows):")
+        if not metrics["n"]:
+            return metrics
+        logger.info(f"MAE: {metrics['mae']:.2f}")
+        logger.info(f"RMSE: {metrics['rmse']:.2f}")
+        logger.info(f"R2 Score: {metrics['r2']:.4f}")
+        logger.info(f"Bias: {metrics['bias']:.2f}, max error: {metrics['max_error']:.2f}")
+        quantiles = ", ".join(
+            f"p{round(q * 100)} {metrics[f'abs_error_p{round(q * 100)}']:.2f}" for q in self.quantiles
+        )
+        logger.info(f"Absolute error quantiles (±{self.relative_accuracy:.0%}): {quantiles}")
+        return metrics
+
+    def to_state(self) -> dict:
+        """
+        JSON-serializable state of the accumulator (see from_state).
+        """
+        state = {key: value for key, value in vars(self).items() if key not in ("gamma", "log_gamma", "buckets")}
+        state["buckets"] = [[key, count] for key, count in sorted(self.buckets.items())]
+        return state
+
+    @classmethod
+    def from_state(cls, state: dict) -> "StreamingMetrics":
+        """
+        Restore an accumulator saved with to_state.
+
+        Args:
+            state: Saved state.
+
+        Returns:
+            The accumulator.
+        """
+        metrics = cls(state["relative_accuracy"])
+        for key, value in state.items():
+            if key not in ("relative_accuracy", "buckets"):
+                setattr(metrics, key, value)
+        metrics.buckets = {int(key): int(count) for key, count in state["buckets"]}
+        return metrics
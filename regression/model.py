@@ -1,13 +1,16 @@
-from config import RESOURCES_DIR, MODEL_PATH, logger
+from config import METRICS_PATH, RANDOM_STATE, RESOURCES_DIR, MODEL_PATH, logger
+from metrics import StreamingMetrics
+
+import json
+import os
 
 from catboost import CatBoostRegressor
 import numpy as np
-from sklearn.metrics import mean_absolute_error, mean_squared_error, r2_score
 from sklearn.model_selection import train_test_split
 
 def evaluate_model(y_true, y_pred):
     """
-    Calculate and log regression performance metrics (MAE, RMSE, R2).
+    Calculate and log regression performance metrics (MAE, RMSE, R2 and quantiles of the absolute error).
 
     Args:
         y_true: Actual target values.
@@ -16,48 +19,58 @@ def evaluate_model(y_true, y_pred):
     Returns:
         Dictionary containing calculated metrics.
     """
-    mae = mean_absolute_error(y_true, y_pred)
-    mse = mean_squared_error(y_true, y_pred)
-    r2 = r2_score(y_true, y_pred)
-    
-    logger.info("Model Evaluation:")
-    logger.info(f"MAE: {mae:.2f}")
-    logger.info(f"RMSE: {np.sqrt(mse):.2f}")
-    logger.info(f"R2 Score: {r2:.4f}")
-    
-    return {"mae": mae, "rmse": np.sqrt(mse), "r2": r2}
+    return StreamingMetrics().update(y_true, y_pred).log()
 
-def train_model(features, target):
+def train_model(pool):
     """
-    Train a CatBoostRegressor model on the provided data.
+    Train a CatBoostRegressor model on a quantized pool of the training data (quantization.quantize_pool).
     
-    Splits data 80/20, trains the model, and evaluates on test set.
+    Splits data 80/20 by row indices (Pool.slice takes the quantized rows, the features are not copied
+    or quantized again), trains the model, and evaluates on test set. The test part is passed as eval_set
+    only to get its predictions (use_best_model=False: the model does not depend on it).
 
     Args:
-        features: Feature matrix.
-        target: Target vector.
+        pool: Quantized Pool with the target as its label; categorical columns are its cat_features.
 
     Returns:
         Trained CatBoostRegressor model.
     """
-    X_train, X_test, y_train, y_test = train_test_split(features, target, test_size=0.2, random_state=28)
-    
-    model = CatBoostRegressor(verbose=0, random_state=28)
-    
-    logger.info("Training CatBoost model...")
-    model.fit(X_train, y_train)
+    train_idx, test_idx = train_test_split(np.arange(pool.num_row()), test_size=0.2, random_state=RANDOM_STATE)
+    train_pool, test_pool = pool.slice(train_idx), pool.slice(test_idx)
+
+    model = CatBoostRegressor(verbose=0, random_state=RANDOM_STATE)
+
+    logger.info(f"Training CatBoost model (cat_features: {pool.get_cat_feature_indices() or None})...")
+    model.fit(train_pool, eval_set=test_pool, use_best_model=False)
 
-    y_pred = model.predict(X_test)
-    evaluate_model(y_test, y_pred)
+    # predictions of the final model on the eval set: CatBoost cannot predict a slice with categorical features
+    y_pred = model.get_test_eval()
+    metrics = evaluate_model(test_pool.get_label(), y_pred)
+    # the reference of the drift guard of continual training (continual.update_model)
+    model.get_metadata()["test_rmse"] = str(metrics["rmse"])
     return model
 
-def save_model(model):
+def save_model(model, pipeline_version=None, cv_metrics=None):
     """
     Save the trained model to the resources directory in .cbm format.
 
     Args:
         model: Trained CatBoostRegressor model.
+        pipeline_version: Version of the fitted parsing pipeline the training features were made with,
+            saved into the model metadata.
+        cv_metrics: Cross-validation summary of a tuned model (tuning.tune_model): the mean metrics are saved
+            into the model metadata, the whole summary into resources/salary_model.metrics.json.
     """
     RESOURCES_DIR.mkdir(parents=True, exist_ok=True)
-    model.save_model(str(MODEL_PATH))
+    if pipeline_version is not None:
+        model.get_metadata()["pipeline_version"] = pipeline_version
+    if cv_metrics is not None:
+        for name in ("cv_rmse", "cv_mae", "cv_r2"):
+            model.get_metadata()[name] = str(cv_metrics[name])
+        METRICS_PATH.write_text(json.dumps(cv_metrics, indent=2), encoding="utf-8")
+        logger.info(f"CV metrics saved to {METRICS_PATH}")
+    # the model is replaced atomically: a process reloading it never reads a half-written file
+    tmp_path = MODEL_PATH.with_name(MODEL_PATH.name + ".tmp")
+    model.save_model(str(tmp_path))
+    os.replace(tmp_path, MODEL_PATH)
     logger.info(f"Model saved to {MODEL_PATH}")
@@ -0,0 +1,131 @@
+from config import PARSING_DIR, BORDERS_DIR, SCHEMA_PATH, STORE_DIR, X_PATH, Y_PATH, logger
+from data_loader import load_data, load_schema
+from store import MANIFEST_NAME
+
+import hashlib
+import json
+import os
+from pathlib import Path
+import time
+from typing import Optional, Sequence
+
+import catboost
+from catboost import Pool
+import pandas as pd
+
+# Number of borders of a numeric feature, as CatBoost quantizes by default on CPU
+DEFAULT_BORDER_COUNT = 254
+
+def cat_feature_names(features) -> Optional[list]:
+    """
+    Object columns of a DataFrame (parsing with --native-categorical), passed to CatBoost as cat_features.
+    """
+    if isinstance(features, pd.DataFrame):
+        return features.select_dtypes(include="object").columns.tolist() or None
+    return None
+
+def source_files(parsing_dir: Path = PARSING_DIR) -> list[Path]:
+    """
+    Files of the parsing output the training data is loaded from (see data_loader.load_data).
+
+    The manifest of the feature store is replaced by every write of the store, so it stands for its partitions.
+    """
+    schema = load_schema(parsing_dir / SCHEMA_PATH.name)
+    if schema is None:
+        return [parsing_dir / X_PATH.name, parsing_dir / Y_PATH.name]
+    names = [SCHEMA_PATH.name, schema["features_path"], Y_PATH.name, schema.get("categorical_path")]
+    manifest_path = parsing_dir / STORE_DIR.name / MANIFEST_NAME
+    return [parsing_dir / name for name in names if name] + ([manifest_path] if manifest_path.exists() else [])
+
+def source_version(parsing_dir: Path = PARSING_DIR) -> str:
+    """
+    Short hash of the path, mtime and size of the parsing output: it changes whenever parsing is run again.
+    """
+    stamps = []
+    for path in source_files(parsing_dir):
+        stat = path.stat()
+        stamps.append([str(path.resolve()), stat.st_mtime_ns, stat.st_size])
+    return hashlib.sha256(json.dumps(stamps).encode()).hexdigest()[:16]
+
+def selection_key(columns: Optional[Sequence[str]] = None, rows: Optional[slice] = None) -> Optional[str]:
+    """
+    Short hash of a subset of columns and rows of the training data, None for all data.
+    """
+    if columns is None and rows is None:
+        return None
+    selection = {"columns": list(columns) if columns is not None else None, "rows": [rows.start, rows.stop] if rows is not None else None}
+    return hashlib.sha256(json.dumps(selection).encode()).hexdigest()[:8]
+
+def border_paths(border_count: int, borders_dir: Path = BORDERS_DIR, selection: Optional[str] = None) -> tuple[Path, Path]:
+    """
+    Paths to the saved borders of the training data (or of its subset) and to their description for a number of borders.
+    """
+    name = f"train-b{border_count}" + (f"-{selection}" if selection else "")
+    return borders_dir / f"{name}.borders.tsv", borders_dir / f"{name}.json"
+
+def quantize_pool(
+    border_count: int = DEFAULT_BORDER_COUNT,
+    parsing_dir: Path = PARSING_DIR,
+    borders_dir: Path = BORDERS_DIR,
+    rebuild: bool = False,
+    columns: Optional[Sequence[str]] = None,
+    rows: Optional[slice] = None,
+) -> Pool:
+    """
+    Quantize the training data into a CatBoost Pool, once per process; only the borders are kept between runs.
+
+    Quantization is split in two: choosing the borders of every numeric feature (the expensive part) and
+    binning the values by them. The first call chooses the borders and saves them (Pool.save_quantization_borders)
+    with a description: the version of the parsing output, the number of borders and the CatBoost version.
+    While these are the same, later calls only bin the features by the saved borders (input_borders); the
+    model is the same as with borders chosen again. The pool is then split by row indices (Pool.slice):
+    the train/test split and the folds of the hyperparameter search neither copy nor quantize the features,
+    and the processes of the search get the pool of the main process.
+
+    The quantized pool itself is not saved: a pool loaded from a file (Pool.save, quantized://) lacks the
+    bundles of mutually exclusive features CatBoost builds while quantizing, and an iteration on the
+    one-hot features takes about twice as long (benchmarks/training_startup.py).
+
+    A subset of columns or rows is read from the feature store (data_loader.load_data), and its borders
+    are saved separately.
+
+    Args:
+        border_count: Number of borders of a numeric feature.
+        parsing_dir: Directory with the output of the parsing pipeline.
+        borders_dir: Directory of the saved borders.
+        rebuild: Choose the borders again even if the saved ones are up to date.
+        columns: Names or glob patterns of the feature columns (None - all of them).
+        rows: Row range (None - all rows).
+
+    Returns:
+        Quantized Pool with the target as its label.
+    """
+    selection = selection_key(columns, rows)
+    borders_path, meta_path = border_paths(border_count, borders_dir, selection)
+    meta = {"source": source_version(parsing_dir), "border_count": border_count, "catboost": catboost.__version__}
+    if selection is not None:
+        meta["selection"] = selection
+    saved = (
+        not rebuild and borders_path.exists() and meta_path.exists()
+        and json.loads(meta_path.read_text(encoding="utf-8")) == meta
+    )
+
+    features, target = load_data(parsing_dir, columns, rows)
+    start = time.perf_counter()
+    pool = Pool(features, target, cat_features=cat_feature_names(features))
+    if saved:
+        pool.quantize(input_borders=str(borders_path))
+        logger.info(f"Features quantized by the borders of {borders_path} ({time.perf_counter() - start:.2f} s)")
+        return pool
+
+    pool.quantize(border_count=border_count)
+    logger.info(f"Features quantized into {border_count} borders ({time.perf_counter() - start:.2f} s)")
+    borders_dir.mkdir(parents=True, exist_ok=True)
+    # the description is written last: borders interrupted while saving are not taken for up-to-date ones
+    meta_path.unlink(missing_ok=True)
+    tmp_path = borders_path.with_name(borders_path.name + ".tmp")
+    pool.save_quantization_borders(str(tmp_path))
+    os.replace(tmp_path, borders_path)
+    meta_path.write_text(json.dumps(meta, indent=2), encoding="utf-8")
+    logger.info(f"Borders saved to {borders_path}")
+    return pool
@@ -0,0 +1,154 @@
+from config import logger
+
+from collections import OrderedDict
+from dataclasses import dataclass
+import hashlib
+import os
+from pathlib import Path
+import threading
+import time
+from typing import Union
+
+from catboost import CatBoostClassifier, CatBoostRegressor
+
+CatBoostModel = Union[CatBoostRegressor, CatBoostClassifier]
+
+@dataclass(frozen=True)
+class ModelEntry:
+    """
+    A model loaded by the registry.
+
+    Attributes:
+        model: The loaded model.
+        path: Path the model was loaded from.
+        version: First 12 hex digits of the sha256 of the model file.
+        loaded_at: Time of loading (time.time()).
+    """
+    model: CatBoostModel
+    path: Path
+    version: str
+    loaded_at: float
+
+class ModelRegistry:
+    """
+    In-process cache of loaded CatBoost models (regression and classification) with LRU eviction.
+
+    Every get() checks the file with os.stat: while its mtime, size and inode are the same, the cached
+    model is returned without touching the file. When the file is replaced (e.g. a new
+    resources/salary_model.cbm), the new model is loaded from the bytes read once, then swapped in under
+    a lock: callers holding the previous model keep using it, and no caller gets a half-loaded one. If the
+    new file cannot be loaded (it is still being written), the previous version keeps serving and the
+    file is checked again on the next call.
+
+    Models are keyed by path, mtime and size, or by the content hash (by_hash=True: a file touched or
+    copied without changes is not loaded again). Several files - e.g. two model versions for A/B
+    scoring - stay loaded at once, up to `capacity` models; the least recently used one is evicted first.
+
+    Attributes:
+        capacity: Maximum number of loaded models.
+        by_hash: Key the models by the content hash instead of path, mtime and size.
+        loads: Number of models loaded from disk.
+        hits: Number of get() calls served from the cache.
+    """
+
+    def __init__(self, capacity: int = 4, by_hash: bool = False):
+        self.capacity = capacity
+        self.by_hash = by_hash
+        self.loads = 0
+        self.hits = 0
+        self._entries: OrderedDict = OrderedDict()
+        # (path, model class) -> (stat stamp, key of the entry loaded from it)
+        self._stamps: dict = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _stamp(path: str) -> tuple:
+        stat = os.stat(path)
+        return stat.st_mtime_ns, stat.st_size, stat.st_ino
+
+    def _load(self, path: Path, blob: bytes, model_class: type, version: str) -> ModelEntry:
+        model = model_class()
+        model.load_model(blob=blob)
+        self.loads += 1
+        logger.info(f"Loaded model {version} from {path}")
+        return ModelEntry(model, path, version, time.time())
+
+    def get_entry(self, model_path: Path, model_class: type = CatBoostRegressor) -> ModelEntry:
+        """
+        Get the current version of a model file, loading it if it is not cached or was replaced.
+
+        Args:
+            model_path: Path to the .cbm model.
+            model_class: CatBoostRegressor or CatBoostClassifier.
+
+        Returns:
+            ModelEntry of the model.
+
+        Raises:
+            FileNotFoundError: If there is no model file.
+        """
+        # a str key: hashing a Path is several times slower than the stat call
+        path = os.path.abspath(model_path)
+        stamp = self._stamp(path)
+        with self._lock:
+            cached = self._stamps.get((path, model_class))
+            if cached is not None and cached[0] == stamp and cached[1] in self._entries:
+                self._entries.move_to_end(cached[1])
+                self.hits += 1
+                return self._entries[cached[1]]
+
+            with open(path, "rb") as fin:
+                blob = fin.read()
+            version = hashlib.sha256(blob).hexdigest()[:12]
+            key = (model_class, version) if self.by_hash else (model_class, path, stamp)
+            entry = self._entries.get(key)
+            if entry is None:
+                try:
+                    entry = self._load(Path(path), blob, model_class, version)
+                except Exception as e:
+                    previous = self._entries.get(cached[1]) if cached is not None else None
+                    if previous is None:
+                        raise
+                    logger.warning(f"Cannot load the new {path} ({e}), keeping the model {previous.version}")
+                    return previous
+                self._entries[key] = entry
+            self._entries.move_to_end(key)
+            self._stamps[(path, model_class)] = (stamp, key)
+            while len(self._entries) > self.capacity:
+                _, evicted = self._entries.popitem(last=False)
+                logger.info(f"Evicted model {evicted.version} ({evicted.path}) from the registry")
+            return entry
+
+    def get(self, model_path: Path, model_class: type = CatBoostRegressor) -> CatBoostModel:
+        """
+        Get the current version of a model file (see get_entry).
+
+        Args:
+            model_path: Path to the .cbm model.
+            model_class: CatBoostRegressor or CatBoostClassifier.
+
+        Returns:
+            The loaded model.
+        """
+        return self.get_entry(model_path, model_class).model
+
+    def entries(self) -> list[dict]:
+        """
+        Loaded models from the least to the most recently used.
+
+        Returns:
+            List of dictionaries with the path, version, class and loading time of every model.
+        """
+        with self._lock:
+            return [
+                {"path": str(entry.path), "version": entry.version, "class": type(entry.model).__name__, "loaded_at": entry.loaded_at}
+                for entry in self._entries.values()
+            ]
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._stamps.clear()
+
+# Registry of the process: inference.load_model, bulk scoring and the service take models from it
+MODELS = ModelRegistry()
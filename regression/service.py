@@ -0,0 +1,659 @@
+from config import MODEL_PATH, PARSING_DIR, SERVICE_HOST, SERVICE_PORT, logger
+from data_loader import load_features
+from inference import check_pipeline_version, load_input_schema, load_model
+from registry import MODELS, ModelEntry, ModelRegistry
+
+import argparse
+import asyncio
+import collections
+from concurrent.futures import ThreadPoolExecutor
+import functools
+import itertools
+import json
+from pathlib import Path
+import subprocess
+import sys
+import time
+from typing import Callable, Optional
+
+import numpy as np
+import pandas as pd
+import scipy.sparse as sp
+
+async def read_message(reader: asyncio.StreamReader) -> Optional[tuple[str, dict, bytes]]:
+    """
+    Read one HTTP/1.1 message (a request or a response) with a Content-Length body.
+
+    Args:
+        reader: Stream of the connection.
+
+    Returns:
+        Start line, lowercased headers and body, or None if the connection was closed.
+    """
+    start_line = await reader.readline()
+    if not start_line:
+        return None
+    headers = {}
+    while True:
+        line = await reader.readline()
+        if line in (b"\r\n", b"\n", b""):
+            break
+        name, _, value = line.decode("latin-1").partition(":")
+        headers[name.strip().lower()] = value.strip()
+    body = await reader.readexactly(int(headers.get("content-length", 0)))
+    return start_line.decode("latin-1").strip(), headers, body
+
+def encode_message(start_line: str, body: bytes = b"") -> bytes:
+    """
+    Encode an HTTP/1.1 message with a JSON body.
+
+    Args:
+        start_line: Request or status line.
+        body: JSON body.
+
+    Returns:
+        Bytes of the message.
+    """
+    head = f"{start_line}\r\nContent-Type: application/json\r\nContent-Length: {len(body)}\r\n\r\n"
+    return head.encode("latin-1") + body
+
+def percentiles(values, quantiles=(50, 99)) -> dict:
+    """
+    Percentiles of latencies in seconds, in milliseconds.
+
+    Args:
+        values: Latencies in seconds.
+        quantiles: Percentiles to compute.
+
+    Returns:
+        Dictionary p<q>_ms -> latency (None for no values).
+    """
+    values = np.asarray(values, dtype=np.float64)
+    return {f"p{q}_ms": float(np.percentile(values, q) * 1000) if len(values) else None for q in quantiles}
+
+class MicroBatcher:
+    """
+    Combine concurrent requests into micro-batches scored with one vectorized call.
+
+    The first request of a batch opens a latency window of max_delay seconds: requests arriving
+    within the window join the batch, until it has max_batch_size rows. The batch is scored by
+    predict on a thread pool, so the event loop keeps accepting requests (and collecting the next
+    batch) while the model works. At most `workers` batches are scored at once; while all workers
+    are busy the next batch keeps growing up to max_batch_size.
+    """
+
+    def __init__(
+        self,
+        predict: Callable[[list], np.ndarray],
+        max_batch_size: int = 256,
+        max_delay: float = 0.005,
+        workers: int = 1,
+    ):
+        self.predict = predict
+        self.max_batch_size = max_batch_size
+        self.max_delay = max_delay
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="predict")
+        self.batch_sizes = collections.Counter()
+        self._workers = asyncio.Semaphore(workers)
+        self._queue: asyncio.Queue = asyncio.Queue()
+        self._tasks: set = set()
+
+    async def submit(self, row) -> float:
+        """
+        Score one row within the next micro-batch.
+
+        Args:
+            row: Row of the batch for predict (the service passes the model entry with the feature vector).
+
+        Returns:
+            Prediction for the row.
+        """
+        future = asyncio.get_running_loop().create_future()
+        self._queue.put_nowait((row, future))
+        return await future
+
+    def _drain(self, batch: list) -> None:
+        while len(batch) < self.max_batch_size and not self._queue.empty():
+            batch.append(self._queue.get_nowait())
+
+    async def run(self) -> None:
+        """Collect micro-batches and score them until cancelled."""
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self._queue.get()]
+            deadline = loop.time() + self.max_delay
+            while len(batch) < self.max_batch_size:
+                self._drain(batch)
+                timeout = deadline - loop.time()
+                if len(batch) >= self.max_batch_size or timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+            await self._workers.acquire()
+            self._drain(batch)
+            task = loop.create_task(self._score(batch))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    async def _score(self, batch: list) -> None:
+        self.batch_sizes[len(batch)] += 1
+        try:
+            predictions = await asyncio.get_running_loop().run_in_executor(
+                self.executor, self.predict, [row for row, _ in batch]
+            )
+        except Exception as e:
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+        else:
+            for (_, future), value in zip(batch, predictions):
+                if not future.done():
+                    future.set_result(float(value))
+        finally:
+            self._workers.release()
+
+class ScoringService:
+    """
+    Asyncio HTTP service around the salary model.
+
+    POST /predict takes {"features": [...]} - a feature vector in the order of the training features
+    (numeric values followed by the categorical strings for a model trained with --native-categorical) -
+    or {"record": {...}} - raw hh.csv fields of one resume, featurized with the fitted parsing pipeline.
+    Concurrent requests are scored in micro-batches (see MicroBatcher). GET /stats reports the number of
+    requests, throughput, p50/p99 latency and batch sizes, GET /models the loaded model versions,
+    GET /health checks that the service is up.
+
+    Models are taken from the model registry for every request, so a replaced model file is picked
+    up without a restart; a row is scored by the model version it was made for. A model trained on a
+    subset of the feature columns (feature_columns metadata) gets only its columns of a featurized record.
+    A new version the fitted pipeline cannot featurize records for (another pipeline version, columns
+    the pipeline does not give) is rejected, and the previous version keeps serving. Several named
+    models can be served at once for A/B scoring: a request picks one with "model": <name> (the first
+    one by default), and every model has its own micro-batches.
+    """
+
+    def __init__(
+        self,
+        models: dict[str, Path],
+        pipeline_path: Optional[Path] = None,
+        max_batch_size: int = 256,
+        max_delay: float = 0.005,
+        workers: int = 1,
+        registry: ModelRegistry = MODELS,
+    ):
+        self.models = dict(models)
+        self.default = next(iter(self.models))
+        self.registry = registry
+        self._layouts = {}
+        self._rejected = set()
+        for path in self.models.values():
+            load_model(path)
+        self.featurizer = self.load_featurizer(pipeline_path) if pipeline_path is not None else None
+        # the served versions: a reloaded model replaces its entry only if its features can be made
+        self._served = {}
+        for name, path in self.models.items():
+            entry = self.registry.get_entry(path)
+            self.feature_layout(entry)
+            self._served[name] = entry
+        self.batchers = {
+            name: MicroBatcher(functools.partial(self.predict_rows, name), max_batch_size, max_delay, workers)
+            for name in self.models
+        }
+        self.latencies = collections.deque(maxlen=100_000)
+        self.requests = 0
+        self.errors = 0
+        self.started = None
+
+    def load_featurizer(self, pipeline_path: Path):
+        """
+        Load the single-record featurizer of the parsing project for raw resume fields.
+
+        Args:
+            pipeline_path: pipeline.json of the parsing run the model was trained on.
+
+        Returns:
+            RecordFeaturizer of the fitted pipeline.
+        """
+        if str(PARSING_DIR) not in sys.path:
+            sys.path.insert(0, str(PARSING_DIR))
+        from src.fitted import FittedPipeline
+        from src.record import RecordFeaturizer
+
+        fitted = FittedPipeline.load(pipeline_path)
+        featurizer = RecordFeaturizer(fitted)
+        logger.info(f"Raw resume fields are featurized with the fitted pipeline {fitted.version}")
+        return featurizer
+
+    def feature_layout(self, entry: ModelEntry) -> tuple[int, frozenset, Optional[np.ndarray]]:
+        """
+        Features of a model version.
+
+        Args:
+            entry: Registry entry of the model.
+
+        Returns:
+            Number of features, indices of the categorical features and positions of the model columns
+            in the vector of the record featurizer (None - the whole vector or no featurizer).
+
+        Raises:
+            ValueError: If the featurizer cannot make the features of the model.
+        """
+        layout = self._layouts.get(entry.version)
+        if layout is not None:
+            return layout
+        model = entry.model
+        n_features = len(model.feature_names_)
+        positions = None
+        if self.featurizer is not None:
+            check_pipeline_version(model, {"pipeline_version": self.featurizer.fitted.version})
+            metadata = model.get_metadata()
+            columns = self.featurizer.columns
+            if "feature_columns" in metadata.keys():
+                position = {col: idx for idx, col in enumerate(columns)}
+                names = json.loads(metadata["feature_columns"])
+                missing = [name for name in names if name not in position]
+                if missing:
+                    raise ValueError(f"The model {entry.version} takes columns the fitted pipeline does not give: {missing}")
+                positions = np.array([position[name] for name in names], dtype=np.intp)
+            elif len(columns) != n_features:
+                raise ValueError(f"The fitted pipeline gives {len(columns)} features, the model {entry.version} takes {n_features}")
+        layout = n_features, frozenset(model.get_cat_feature_indices()), positions
+        self._layouts[entry.version] = layout
+        return layout
+
+    def model_entry(self, name: str) -> ModelEntry:
+        """
+        Served version of a model: the current one of the registry, unless its features cannot be made.
+
+        Args:
+            name: Name of the model.
+
+        Returns:
+            ModelEntry the requests are scored with.
+        """
+        entry = self.registry.get_entry(self.models[name])
+        served = self._served[name]
+        if entry.version == served.version or entry.version in self._rejected:
+            return served
+        try:
+            self.feature_layout(entry)
+        except ValueError as e:
+            self._rejected.add(entry.version)
+            logger.error(f"Rejected the model {entry.version} of {entry.path} ({e}), keeping the model {served.version}")
+            return served
+        self._served[name] = entry
+        return entry
+
+    def features_row(self, payload: dict, entry: ModelEntry) -> np.ndarray:
+        """
+        Feature vector of one request.
+
+        Args:
+            payload: Parsed JSON body of the request.
+            entry: Registry entry of the model the request is scored with.
+
+        Returns:
+            Feature vector of the model.
+
+        Raises:
+            ValueError: If the request is malformed.
+        """
+        if "record" in payload:
+            if self.featurizer is None:
+                raise ValueError("Raw resume fields need the service to be started with --pipeline")
+            row = self.featurizer.transform(payload["record"])
+            positions = self.feature_layout(entry)[2]
+            return row if positions is None else row[positions]
+        if "features" not in payload:
+            raise ValueError('Expected {"features": [...]} or {"record": {...}}')
+        values = payload["features"]
+        n_features, cat_features, _ = self.feature_layout(entry)
+        if len(values) != n_features:
+            raise ValueError(f"Expected {n_features} features, got {len(values)}")
+        if not cat_features:
+            return np.asarray(values, dtype=np.float32)
+        return np.array(
+            [str(value) if idx in cat_features else float(value) for idx, value in enumerate(values)], dtype=object
+        )
+
+    def predict_rows(self, name: str, rows: list) -> np.ndarray:
+        """
+        Score one micro-batch with a single model call per model version (runs on the thread pool).
+
+        Args:
+            name: Name of the model.
+            rows: Registry entries and feature vectors of the batch.
+
+        Returns:
+            Predictions for the rows.
+        """
+        entry = rows[0][0]
+        if all(row_entry is entry for row_entry, _ in rows):
+            return entry.model.predict(np.vstack([row for _, row in rows]))
+        # the model was replaced while the batch was collected: every row is scored by its version
+        predictions = np.empty(len(rows))
+        versions = {}
+        for idx, (row_entry, _) in enumerate(rows):
+            versions.setdefault(row_entry.version, (row_entry, []))[1].append(idx)
+        for row_entry, indices in versions.values():
+            predictions[indices] = row_entry.model.predict(np.vstack([rows[idx][1] for idx in indices]))
+        return predictions
+
+    async def predict(self, body: bytes) -> dict:
+        try:
+            payload = json.loads(body)
+            name = payload.get("model", self.default)
+            if name not in self.models:
+                raise ValueError(f"Unknown model {name!r}, the service has {sorted(self.models)}")
+            entry = self.model_entry(name)
+            row = self.features_row(payload, entry)
+        except (ValueError, TypeError, AttributeError) as e:
+            raise ValueError(str(e)) from None
+        return {"salary": await self.batchers[name].submit((entry, row)), "model": name}
+
+    def model_versions(self) -> dict:
+        """
+        Current versions of the served models.
+
+        Returns:
+            Dictionary model name -> path and version (sha256 prefix of the file) of the model.
+        """
+        versions = {}
+        for name in self.models:
+            entry = self.model_entry(name)
+            versions[name] = {"path": str(entry.path), "version": entry.version, "loaded_at": entry.loaded_at}
+        return versions
+
+    def stats(self) -> dict:
+        """
+        Service statistics since the first request.
+
+        Returns:
+            Dictionary with the number of requests and errors, throughput, latency percentiles and batch sizes.
+        """
+        elapsed = time.perf_counter() - self.started if self.started is not None else 0.0
+        batch_sizes = sum((batcher.batch_sizes for batcher in self.batchers.values()), collections.Counter())
+        batches = sum(batch_sizes.values())
+        rows = sum(size * count for size, count in batch_sizes.items())
+        return {
+            "requests": self.requests,
+            "errors": self.errors,
+            "throughput_rps": self.requests / elapsed if elapsed else 0.0,
+            **percentiles(self.latencies),
+            "batches": batches,
+            "mean_batch_size": rows / batches if batches else 0.0,
+            "max_batch_size": max(batch_sizes, default=0),
+            "model_batches": {name: sum(batcher.batch_sizes.values()) for name, batcher in self.batchers.items()},
+        }
+
+    async def route(self, method: str, path: str, body: bytes) -> tuple[str, dict]:
+        if method == "POST" and path == "/predict":
+            start = time.perf_counter()
+            if self.started is None:
+                self.started = start
+            self.requests += 1
+            try:
+                result = await self.predict(body)
+            except ValueError as e:
+                self.errors += 1
+                return "400 Bad Request", {"error": str(e)}
+            except Exception as e:
+                self.errors += 1
+                logger.error(f"Prediction failed: {e}")
+                return "500 Internal Server Error", {"error": str(e)}
+            self.latencies.append(time.perf_counter() - start)
+            return "200 OK", result
+        if method == "GET" and path == "/stats":
+            return "200 OK", self.stats()
+        if method == "GET" and path == "/models":
+            return "200 OK", self.model_versions()
+        if method == "GET" and path == "/health":
+            return "200 OK", {"status": "ok", "models": list(self.models), "raw_records": self.featurizer is not None}
+        return "404 Not Found", {"error": f"{method} {path} is not supported"}
+
+    async def handle_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        """Serve the requests of one keep-alive connection."""
+        try:
+            while True:
+                message = await read_message(reader)
+                if message is None:
+                    break
+                start_line, headers, body = message
+                method, path, _ = start_line.split(" ", 2)
+                status, payload = await self.route(method, path, body)
+                writer.write(encode_message(f"HTTP/1.1 {status}", json.dumps(payload).encode("utf-8")))
+                await writer.drain()
+                if headers.get("connection", "").lower() == "close":
+                    break
+        except (asyncio.IncompleteReadError, ConnectionError, ValueError):
+            pass
+        finally:
+            writer.close()
+
+    async def serve(self, host: str = SERVICE_HOST, port: int = SERVICE_PORT) -> None:
+        """
+        Serve until cancelled.
+
+        Args:
+            host: Interface to listen on (localhost by default).
+            port: Port to listen on.
+        """
+        tasks = [asyncio.create_task(batcher.run()) for batcher in self.batchers.values()]
+        server = await asyncio.start_server(self.handle_connection, host, port)
+        batcher = self.batchers[self.default]
+        logger.info(
+            f"Scoring service on http://{host}:{port} with models {list(self.models)} "
+            f"(micro-batches up to {batcher.max_batch_size} rows, window {batcher.max_delay * 1000:.1f} ms)"
+        )
+        try:
+            async with server:
+                await server.serve_forever()
+        finally:
+            for task in tasks:
+                task.cancel()
+            for batcher in self.batchers.values():
+                batcher.executor.shutdown(wait=False)
+
+async def request(host: str, port: int, method: str, path: str, payload: Optional[dict] = None) -> tuple[str, dict]:
+    """
+    Send one request on a new connection.
+
+    Returns:
+        Status line and parsed JSON body of the response.
+    """
+    reader, writer = await asyncio.open_connection(host, port)
+    try:
+        body = json.dumps(payload).encode("utf-8") if payload is not None else b""
+        writer.write(encode_message(f"{method} {path} HTTP/1.1\r\nHost: {host}\r\nConnection: close", body))
+        await writer.drain()
+        status, _, response = await read_message(reader)
+        return status, json.loads(response)
+    finally:
+        writer.close()
+
+async def run_load(host: str, port: int, payloads: list, requests: int, concurrency: int) -> dict:
+    """
+    Built-in load generator: `concurrency` keep-alive clients send `requests` prediction requests in total.
+
+    Args:
+        host: Host of the service.
+        port: Port of the service.
+        payloads: Request bodies, sent round-robin.
+        requests: Total number of requests.
+        concurrency: Number of concurrent clients.
+
+    Returns:
+        Client-side throughput and latency percentiles, and the statistics of the service.
+    """
+    bodies = [
+        encode_message(f"POST /predict HTTP/1.1\r\nHost: {host}", json.dumps(payload).encode("utf-8")) for payload in payloads
+    ]
+    counter = itertools.count()
+    latencies = []
+    errors = 0
+
+    async def client():
+        nonlocal errors
+        reader, writer = await asyncio.open_connection(host, port)
+        try:
+            while (idx := next(counter)) < requests:
+                start = time.perf_counter()
+                writer.write(bodies[idx % len(bodies)])
+                await writer.drain()
+                status, _, _ = await read_message(reader)
+                latencies.append(time.perf_counter() - start)
+                if not status.endswith("200 OK"):
+                    errors += 1
+        finally:
+            writer.close()
+
+    start = time.perf_counter()
+    await asyncio.gather(*(client() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - start
+    _, server_stats = await request(host, port, "GET", "/stats")
+    return {
+        "requests": requests,
+        "concurrency": concurrency,
+        "errors": errors,
+        "seconds": elapsed,
+        "throughput_rps": requests / elapsed,
+        **percentiles(latencies),
+        "server": server_stats,
+    }
+
+def load_payloads(features_path: Optional[Path], csv_path: Optional[Path], limit: int = 10_000) -> list:
+    """
+    Request bodies for the load generator: rows of a features file or raw resumes of hh.csv.
+
+    Args:
+        features_path: .npz/.npy features file of the parsing project (its features.json is used if present).
+        csv_path: hh.csv with raw resumes (the service needs --pipeline).
+        limit: Maximum number of distinct payloads.
+
+    Returns:
+        List of JSON payloads.
+    """
+    if csv_path is not None:
+        frame = pd.read_csv(csv_path, index_col=0, nrows=limit, dtype=str, keep_default_na=False)
+        return [{"record": record} for record in frame.to_dict("records")]
+    features = load_features(features_path, load_input_schema(features_path))
+    if isinstance(features, pd.DataFrame):
+        rows = features.iloc[:limit].to_numpy(dtype=object).tolist()
+    elif sp.issparse(features):
+        rows = features[:limit].toarray().tolist()
+    else:
+        rows = np.asarray(features[:limit]).tolist()
+    return [{"features": row} for row in rows]
+
+async def wait_until_up(host: str, port: int, timeout: float = 60.0) -> None:
+    deadline = time.monotonic() + timeout
+    while True:
+        try:
+            await request(host, port, "GET", "/health")
+            return
+        except OSError:
+            if time.monotonic() > deadline:
+                raise TimeoutError(f"The service on {host}:{port} did not start in {timeout:.0f} s")
+            await asyncio.sleep(0.2)
+
+def parse_models(specs: Optional[list[str]]) -> dict[str, Path]:
+    """
+    Models of the --model NAME=PATH arguments.
+
+    Args:
+        specs: Values of --model (None - the trained salary model).
+
+    Returns:
+        Dictionary model name -> path, in the order of the arguments.
+    """
+    if not specs:
+        return {"default": MODEL_PATH}
+    models = {}
+    for spec in specs:
+        name, sep, path = spec.partition("=")
+        if not sep or not name or not path:
+            raise ValueError(f"Expected --model NAME=PATH, got {spec!r}")
+        models[name] = Path(path)
+    return models
+
+def parse_arguments():
+    """
+    Parse CLI arguments of the service and of the load generator.
+
+    Returns:
+        argparse.Namespace: Parsed arguments.
+    """
+    parser = argparse.ArgumentParser(description="Micro-batching scoring service for the salary model")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    serve = commands.add_parser("serve", help="Run the scoring service")
+    load = commands.add_parser("load", help="Run the load generator against the service")
+    for command in (serve, load):
+        command.add_argument("--host", default=SERVICE_HOST, help="Host of the service")
+        command.add_argument("--port", type=int, default=SERVICE_PORT, help="Port of the service")
+
+    serve.add_argument("--model", action="append", default=None, metavar="NAME=PATH",
+                       help=f"Serve this model under NAME (repeat for A/B scoring; default: default={MODEL_PATH})")
+    serve.add_argument("--pipeline", type=Path, default=None,
+                       help="pipeline.json of the parsing run the model was trained on, to score raw resume fields")
+    serve.add_argument("--max-batch-size", type=int, default=256, help="Maximum rows of a micro-batch")
+    serve.add_argument("--max-delay-ms", type=float, default=5.0, help="Latency window of a micro-batch, ms")
+    serve.add_argument("--workers", type=int, default=1, help="Micro-batches scored at once (threads)")
+
+    source = load.add_mutually_exclusive_group(required=True)
+    source.add_argument("--features", type=Path, help="Send rows of this features file (.npz/.npy)")
+    source.add_argument("--csv", type=Path, help="Send raw resumes of this hh.csv (the service needs --pipeline)")
+    load.add_argument("--requests", type=int, default=5000, help="Total number of requests")
+    load.add_argument("--concurrency", type=int, default=64, help="Number of concurrent clients")
+    load.add_argument("--spawn", nargs=argparse.REMAINDER, default=None,
+                      help="Start the service in a subprocess with these serve arguments (e.g. --spawn --max-delay-ms 2)")
+    load.add_argument("--json", type=Path, default=None, help="Save the report to this JSON file")
+    return parser.parse_args()
+
+async def load_main(args) -> dict:
+    payloads = load_payloads(args.features, args.csv)
+    server = None
+    if args.spawn is not None:
+        server = subprocess.Popen([
+            sys.executable, str(Path(__file__).resolve()), "serve", "--host", args.host, "--port", str(args.port), *args.spawn
+        ])
+    try:
+        await wait_until_up(args.host, args.port)
+        return await run_load(args.host, args.port, payloads, args.requests, args.concurrency)
+    finally:
+        if server is not None:
+            server.terminate()
+            server.wait()
+
+def main():
+    """Main entry point: run the service or the load generator."""
+    args = parse_arguments()
+    try:
+        if args.command == "serve":
+            service = ScoringService(
+                parse_models(args.model), args.pipeline, args.max_batch_size, args.max_delay_ms / 1000, args.workers
+            )
+            asyncio.run(service.serve(args.host, args.port))
+        else:
+            report = asyncio.run(load_main(args))
+            server = report["server"]
+            logger.info(
+                f"{report['requests']} requests, {report['concurrency']} clients, {report['errors']} errors: "
+                f"{report['throughput_rps']:.0f} req/s, p50 {report['p50_ms']:.2f} ms, p99 {report['p99_ms']:.2f} ms"
+            )
+            logger.info(
+                f"Service: {server['throughput_rps']:.0f} req/s, p50 {server['p50_ms']:.2f} ms, p99 {server['p99_ms']:.2f} ms, "
+                f"{server['batches']} micro-batches of {server['mean_batch_size']:.1f} rows on average (max {server['max_batch_size']})"
+            )
+            if args.json:
+                args.json.write_text(json.dumps(report, indent=2))
+    except KeyboardInterrupt:
+        pass
+    except Exception as e:
+        logger.error(f"An error occurred: {e}")
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,174 @@
+from config import STORE_DIR, logger
+
+import fnmatch
+import json
+from pathlib import Path
+import time
+from typing import Optional, Sequence
+
+import numpy as np
+import pandas as pd
+import scipy.sparse as sp
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = None
+
+# Version of the manifest layout written by the parsing pipeline (parsing/src/store.py)
+STORE_FORMAT_VERSION = 1
+MANIFEST_NAME = "manifest.json"
+
+def read_manifest(store_dir: Path = STORE_DIR) -> Optional[dict]:
+    """
+    Load the manifest of the feature store written by the parsing pipeline (--feature-store).
+
+    Args:
+        store_dir: Directory of the store.
+
+    Returns:
+        Manifest dictionary or None if there is no store.
+
+    Raises:
+        ValueError: If the store has another layout version.
+    """
+    manifest_path = Path(store_dir) / MANIFEST_NAME
+    if not manifest_path.exists():
+        return None
+    manifest = json.loads(manifest_path.read_text(encoding="utf-8"))
+    if manifest.get("format_version") != STORE_FORMAT_VERSION:
+        raise ValueError(f"{manifest_path} has format version {manifest.get('format_version')}, expected {STORE_FORMAT_VERSION}")
+    return manifest
+
+def parse_rows(text: str) -> slice:
+    """
+    Parse a row range START:STOP (either bound may be omitted) for argparse.
+    """
+    start, sep, stop = text.partition(":")
+    if not sep:
+        raise ValueError(f"Row range must look like START:STOP, got {text!r}")
+    return slice(int(start) if start else None, int(stop) if stop else None)
+
+def select_columns(manifest: dict, patterns: Optional[Sequence[str]] = None) -> list[str]:
+    """
+    Names of the feature columns matching any of the patterns (exact names or globs like "job_*"), in the store order.
+
+    Args:
+        manifest: Manifest of the store.
+        patterns: Names or glob patterns (None - all feature columns).
+
+    Returns:
+        Numeric columns followed by the categorical ones.
+
+    Raises:
+        ValueError: If a pattern matches no column.
+    """
+    names = [column["name"] for column in manifest["columns"] + manifest["categorical"]]
+    if patterns is None:
+        return names
+    unmatched = [pattern for pattern in patterns if not fnmatch.filter(names, pattern)]
+    if unmatched:
+        raise ValueError(f"No feature columns match {unmatched}")
+    return [name for name in names if any(fnmatch.fnmatchcase(name, pattern) for pattern in patterns)]
+
+def read_table(store_dir: Path, manifest: dict, columns: list[str], rows: slice = slice(None)) -> "pa.Table":
+    """
+    Read the columns of a row range of the store: only the partitions and row groups overlapping the range are opened,
+    and only the column chunks of the requested columns are read.
+    """
+    start, stop, step = rows.indices(manifest["rows"])
+    if step != 1:
+        raise ValueError("Row ranges of the feature store cannot have a step")
+    tables = []
+    for partition in manifest["partitions"]:
+        part_start = partition["row_start"]
+        if part_start + partition["rows"] <= start or part_start >= stop:
+            continue
+        parquet = pq.ParquetFile(Path(store_dir) / partition["path"])
+        groups, group_start, first_row = [], part_start, None
+        for group in range(parquet.metadata.num_row_groups):
+            group_rows = parquet.metadata.row_group(group).num_rows
+            if group_start < stop and group_start + group_rows > start:
+                groups.append(group)
+                first_row = group_start if first_row is None else first_row
+            group_start += group_rows
+        table = parquet.read_row_groups(groups, columns=columns)
+        offset = max(start - first_row, 0)
+        tables.append(table.slice(offset, min(stop, part_start + partition["rows"]) - first_row - offset))
+    if not tables:
+        return pa.table({name: pa.array([], type=pa.float32()) for name in columns})
+    return pa.concat_tables(tables)
+
+def read_store(store_dir: Path = STORE_DIR, columns: Optional[Sequence[str]] = None, rows: slice = slice(None)):
+    """
+    Load a subset of the training data from the feature store, reading only the selected columns and rows.
+
+    The features have the same form as data_loader.load_data gives for the whole parsing output: a CSR matrix
+    (the store of a sparse run) or a dense array of the numeric columns, or a DataFrame when categorical
+    columns are selected (restored as strings, an empty string for a missing value).
+
+    Args:
+        store_dir: Directory of the store.
+        columns: Names or glob patterns of the feature columns (None - all of them).
+        rows: Row range (default all rows).
+
+    Returns:
+        tuple containing the feature matrix (features) and target vector (target).
+    """
+    if pa is None:
+        raise ImportError("Reading the feature store requires pyarrow")
+    manifest = read_manifest(store_dir)
+    if manifest is None:
+        raise FileNotFoundError(f"No feature store in {store_dir}. Please run the parsing pipeline with --feature-store.")
+    names = select_columns(manifest, columns)
+    categorical = {column["name"] for column in manifest["categorical"]}
+    numeric = [name for name in names if name not in categorical]
+
+    start = time.perf_counter()
+    table = read_table(store_dir, manifest, names + [manifest["target"]], rows)
+    target = table.column(manifest["target"]).to_numpy().astype(manifest["target_dtype"])
+    dtype = np.dtype(manifest["dtype"])
+    if manifest["layout"] == "csr" and len(numeric) == len(names):
+        # the matrix is assembled column by column from the non-zero values, never densely
+        row_parts, col_parts, value_parts = [], [], []
+        for idx, name in enumerate(numeric):
+            values = table.column(name).to_numpy()
+            nonzero = np.flatnonzero(values)
+            row_parts.append(nonzero)
+            col_parts.append(np.full(len(nonzero), idx))
+            value_parts.append(values[nonzero])
+        features = sp.csr_matrix(
+            (np.concatenate(value_parts or [np.empty(0, dtype)]).astype(dtype),
+             (np.concatenate(row_parts or [np.empty(0, int)]), np.concatenate(col_parts or [np.empty(0, int)]))),
+            shape=(table.num_rows, len(numeric)),
+        )
+    elif len(numeric) == len(names):
+        features = np.empty((table.num_rows, len(numeric)), dtype)
+        for idx, name in enumerate(numeric):
+            features[:, idx] = table.column(name).to_numpy()
+    else:
+        features = pd.DataFrame({name: table.column(name).to_numpy().astype(dtype, copy=False) for name in numeric})
+        for name in names:
+            if name in categorical:
+                values = table.column(name).to_pandas()
+                features[name] = pd.Series(values, dtype=object).fillna("").to_numpy()
+    logger.info(
+        f"Read {len(names)} of {len(manifest['columns']) + len(manifest['categorical'])} columns and "
+        f"{table.num_rows} of {manifest['rows']} rows from {store_dir} ({time.perf_counter() - start:.2f} s)"
+    )
+    return features, target
+
+def record_selection(model, columns: Optional[Sequence[str]], rows: Optional[slice], store_dir: Path = STORE_DIR) -> None:
+    """
+    Write into the model metadata the feature columns and the row range of the feature store it has been trained on.
+
+    The inference selects the same columns from a full features file (inference.select_model_columns).
+    Such a model has no record of its training rows (continual.record_training), so --update retrains it on all data.
+    """
+    manifest = read_manifest(store_dir)
+    if columns is not None:
+        model.get_metadata()["feature_columns"] = json.dumps(select_columns(manifest, columns), ensure_ascii=False)
+    if rows is not None:
+        start, stop, _ = rows.indices(manifest["rows"])
+        model.get_metadata()["row_range"] = f"{start}:{stop}"
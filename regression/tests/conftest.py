@@ -0,0 +1,5 @@
+import sys
+from pathlib import Path
+
+# the modules of regression are flat and imported by name, as main.py does
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
@@ -0,0 +1,50 @@
+import functools
+import json
+
+from catboost import CatBoostRegressor
+import numpy as np
+import pytest
+import scipy.sparse as sp
+
+import bulk
+import inference
+
+COLUMNS = ["age", "experience_months", "job_developer", "job_manager", "city_Moscow", "city_Other"]
+
+
+@pytest.fixture
+def subset_model(tmp_path):
+    """A sparse features.npz with its sidecar and a model trained on two of its columns."""
+    rng = np.random.default_rng(28)
+    dense = rng.integers(0, 3, size=(500, len(COLUMNS))).astype(np.float32)
+    dense[:, 0] = rng.integers(18, 65, size=500)
+    target = 1000 * dense[:, 0] + 50000 * dense[:, 3] + rng.normal(0, 100, size=500)
+    sp.save_npz(tmp_path / "features.npz", sp.csr_matrix(dense), compressed=False)
+    schema = {
+        "features_path": "features.npz",
+        "target_path": "target.npy",
+        "format": "csr",
+        "shape": list(dense.shape),
+        "dtype": "float32",
+        "columns": [{"name": name, "dtype": "float32"} for name in COLUMNS],
+    }
+    (tmp_path / "features.json").write_text(json.dumps(schema), encoding="utf-8")
+
+    subset = ["age", "job_manager"]
+    model = CatBoostRegressor(iterations=30, verbose=0, random_state=28)
+    model.fit(dense[:, [COLUMNS.index(name) for name in subset]], target)
+    model.get_metadata()["feature_columns"] = json.dumps(subset)
+    model_path = tmp_path / "salary_model.cbm"
+    model.save_model(str(model_path))
+    return tmp_path / "features.npz", model_path
+
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_bulk_predicts_the_model_columns_as_inference(subset_model, tmp_path, monkeypatch, workers):
+    x_path, model_path = subset_model
+    monkeypatch.setattr(inference, "load_model", functools.partial(inference.load_model, model_path))
+    expected = inference.predict_and_save(str(x_path), str(tmp_path / "expected.npy"))
+
+    bulk.predict_bulk(x_path, tmp_path / "bulk.npy", block_size=64, workers=workers, model_path=model_path)
+
+    np.testing.assert_array_equal(np.load(tmp_path / "bulk.npy"), expected)
@@ -0,0 +1,316 @@
+from config import PARSING_DIR, RANDOM_STATE, TRIALS_PATH, logger
+from interrupts import deferred_interrupt, ignore_interrupt
+from quantization import quantize_pool, selection_key, source_version
+
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+import itertools
+import json
+import os
+from pathlib import Path
+import random
+import time
+from typing import Optional, Sequence
+
+from catboost import CatBoostRegressor, Pool
+import numpy as np
+from sklearn.model_selection import KFold
+
+# Values of the hyperparameters the trials are sampled from
+SEARCH_SPACE = {
+    "depth": [4, 6, 8],
+    "learning_rate": [0.03, 0.06, 0.1],
+    "l2_leaf_reg": [1, 3, 10],
+    "border_count": [64, 254],
+}
+# Upper bound of the boosting iterations; the eval set of the fold stops a trial earlier
+MAX_ITERATIONS = 2000
+EARLY_STOPPING_ROUNDS = 50
+# A fold worse than the same fold of the best finished trial by this ratio (RMSE) prunes the rest of its trial
+PRUNE_RATIO = 1.1
+
+def sample_trials(n_trials: int, seed: int = RANDOM_STATE) -> list[dict]:
+    """
+    Sample distinct points of the search space (the whole grid if it is smaller than n_trials).
+
+    The sample depends only on the seed and the search space, so a resumed search gets the same trials.
+
+    Args:
+        n_trials: Number of trials.
+        seed: Seed of the sample.
+
+    Returns:
+        List of hyperparameter dictionaries.
+    """
+    grid = [dict(zip(SEARCH_SPACE, values)) for values in itertools.product(*SEARCH_SPACE.values())]
+    return random.Random(seed).sample(grid, min(n_trials, len(grid)))
+
+# Data of a worker process, set by init_worker
+_worker = {}
+
+def init_worker(pools: dict[int, Pool]) -> None:
+    """
+    Keep the quantized pools of the training data in a worker process.
+
+    The pools are passed as an argument of the pool initializer: with the fork start method the workers
+    get the pools loaded by the main process without pickling them.
+    """
+    ignore_interrupt()
+    _worker["pools"] = pools
+
+def run_fold(trial: int, params: dict, fold: int, train_idx: np.ndarray, valid_idx: np.ndarray, thread_count: int) -> dict:
+    """
+    Train one trial on one fold, stopping by the RMSE on the validation part of the fold.
+
+    The rows of the fold are sliced from the pool quantized with the border_count of the trial. The metrics
+    of the validation part are computed by CatBoost at every iteration (custom_metric), so the model does
+    not predict it again.
+
+    Returns:
+        dict: Record of the trial log with the metrics of the fold at the best iteration.
+    """
+    pool = _worker["pools"][params["border_count"]]
+    start = time.perf_counter()
+    model = CatBoostRegressor(
+        **{name: value for name, value in params.items() if name != "border_count"},
+        iterations=MAX_ITERATIONS,
+        custom_metric=["MAE", "R2"],
+        random_state=RANDOM_STATE,
+        thread_count=thread_count,
+        allow_writing_files=False,
+        verbose=0,
+    )
+    model.fit(pool.slice(train_idx), eval_set=pool.slice(valid_idx), early_stopping_rounds=EARLY_STOPPING_ROUNDS)
+    best_iteration = int(model.get_best_iteration())
+    metrics = model.get_evals_result()["validation"]
+    return {
+        "trial": trial,
+        "fold": fold,
+        "params": params,
+        "best_iteration": best_iteration,
+        "rmse": metrics["RMSE"][best_iteration],
+        "mae": metrics["MAE"][best_iteration],
+        "r2": metrics["R2"][best_iteration],
+        "seconds": time.perf_counter() - start,
+    }
+
+class TrialLog:
+    """
+    Append-only JSON Lines log of a hyperparameter search, resumable after interruption.
+
+    The first line describes the search (data, folds, search space, seed); every other line is a finished
+    fold or a pruned trial, appended and flushed as soon as it is known. A search started again with the
+    same description skips the logged folds and trials; a log of another search is started anew.
+
+    Attributes:
+        path: Path to the log.
+        search: Description of the search.
+        folds: Logged fold records by (trial, fold).
+        pruned: Numbers of the pruned trials.
+    """
+
+    def __init__(self, path: Path, search: dict):
+        self.path = path
+        self.search = search
+        self.folds: dict[tuple[int, int], dict] = {}
+        self.pruned: set[int] = set()
+
+    def resume(self) -> bool:
+        """
+        Load the records of the same search.
+
+        Returns:
+            True if the log describes this search.
+        """
+        if not self.path.exists():
+            return False
+        with open(self.path, encoding="utf-8") as fin:
+            lines = fin.read().splitlines()
+        if not lines or json.loads(lines[0]).get("search") != self.search:
+            return False
+        for line in lines[1:]:
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                # the last line of an interrupted search may be cut off
+                continue
+            if record.get("pruned"):
+                self.pruned.add(record["trial"])
+            else:
+                self.folds[(record["trial"], record["fold"])] = record
+        return True
+
+    def start(self) -> None:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.path.write_text(json.dumps({"search": self.search}) + "\n", encoding="utf-8")
+
+    def append(self, record: dict) -> None:
+        with open(self.path, "a", encoding="utf-8") as fout:
+            fout.write(json.dumps(record) + "\n")
+            fout.flush()
+            os.fsync(fout.fileno())
+        if record.get("pruned"):
+            self.pruned.add(record["trial"])
+        else:
+            self.folds[(record["trial"], record["fold"])] = record
+
+    def summary(self, trial: int, n_folds: int) -> Optional[dict]:
+        """
+        Cross-validation metrics of a trial with all folds logged.
+
+        Returns:
+            Mean and standard deviation of the fold metrics, mean best iteration; None for an unfinished trial.
+        """
+        records = [self.folds.get((trial, fold)) for fold in range(n_folds)]
+        if trial in self.pruned or any(record is None for record in records):
+            return None
+        summary = {"trial": trial, "params": records[0]["params"]}
+        for name in ("rmse", "mae", "r2"):
+            values = np.array([record[name] for record in records])
+            summary[f"cv_{name}"] = float(values.mean())
+            summary[f"cv_{name}_std"] = float(values.std())
+        summary["best_iteration"] = float(np.mean([record["best_iteration"] for record in records]))
+        summary["folds"] = [{key: record[key] for key in ("rmse", "mae", "r2", "best_iteration")} for record in records]
+        return summary
+
+def tune_model(
+    n_trials: int = 20,
+    n_folds: int = 5,
+    cpus: Optional[int] = None,
+    threads_per_fit: int = 1,
+    log_path: Path = TRIALS_PATH,
+    parsing_dir: Path = PARSING_DIR,
+    columns: Optional[Sequence[str]] = None,
+    rows: Optional[slice] = None,
+) -> tuple[CatBoostRegressor, dict]:
+    """
+    Search the hyperparameters with k-fold cross-validation, then train the best trial on all data.
+
+    The training data is taken as quantized pools (quantization.quantize_pool), one per border_count of the trials.
+    Only their borders are cached: every search quantizes the features again with the saved borders
+    (input_borders) instead of choosing them, and a fold only slices the rows of the pool. A subset of
+    columns or rows is read from the feature store.
+
+    Every (trial, fold) pair is a task of a process pool. The CPU budget is global: the pool has
+    cpus // threads_per_fit processes and every CatBoost fit uses threads_per_fit threads, so at most
+    `cpus` threads train at once. Trials are scheduled in order, a few folds ahead per process.
+
+    A fit stops when the RMSE on the validation part of its fold has not improved for
+    EARLY_STOPPING_ROUNDS iterations (CatBoost eval_set), and the metrics are taken at the best iteration.
+    A trial is pruned when one of its folds is worse than the same fold of the best finished trial by
+    PRUNE_RATIO (RMSE): its folds that have not started are cancelled. Every finished fold and pruned trial is
+    appended to the trial log, so an interrupted search started again runs only the missing folds. On Ctrl+C
+    the running folds are finished and logged before KeyboardInterrupt is raised.
+
+    The best trial (lowest mean RMSE) is retrained on all data with the mean best iteration of its folds.
+
+    Args:
+        n_trials: Number of sampled points of SEARCH_SPACE.
+        n_folds: Number of cross-validation folds.
+        cpus: CPU budget of the search (default os.cpu_count()).
+        threads_per_fit: CatBoost threads of one fit.
+        log_path: Path to the trial log (JSON Lines).
+        parsing_dir: Directory with the output of the parsing pipeline.
+        columns: Names or glob patterns of the feature columns (None - all of them).
+        rows: Row range (None - all rows).
+
+    Returns:
+        tuple: The final model and the CV summary of the best trial.
+    """
+    cpus = cpus or os.cpu_count() or 1
+    threads_per_fit = min(threads_per_fit, cpus)
+    workers = max(1, cpus // threads_per_fit)
+    trials = sample_trials(n_trials)
+    pools = {
+        border_count: quantize_pool(border_count, parsing_dir, columns=columns, rows=rows)
+        for border_count in sorted({params["border_count"] for params in trials})
+    }
+    n_rows = next(iter(pools.values())).num_row()
+    splits = list(KFold(n_splits=n_folds, shuffle=True, random_state=RANDOM_STATE).split(np.arange(n_rows)))
+
+    search = {
+        "data": source_version(parsing_dir),
+        "folds": n_folds,
+        "seed": RANDOM_STATE,
+        "search_space": SEARCH_SPACE,
+        "max_iterations": MAX_ITERATIONS,
+        "early_stopping_rounds": EARLY_STOPPING_ROUNDS,
+    }
+    if columns is not None or rows is not None:
+        search["selection"] = selection_key(columns, rows)
+    log = TrialLog(log_path, search)
+    if log.resume():
+        logger.info(f"Resuming the search from {log_path}: {len(log.folds)} folds done, {len(log.pruned)} trials pruned")
+    else:
+        log.start()
+
+    def best_summary() -> Optional[dict]:
+        summaries = [log.summary(trial, n_folds) for trial in range(len(trials))]
+        summaries = [summary for summary in summaries if summary is not None]
+        return min(summaries, key=lambda summary: summary["cv_rmse"], default=None)
+
+    pending = [
+        (trial, fold) for trial in range(len(trials)) for fold in range(n_folds)
+        if trial not in log.pruned and (trial, fold) not in log.folds
+    ]
+    logger.info(
+        f"Tuning: {len(trials)} trials x {n_folds} folds ({len(pending)} fits left), "
+        f"{workers} processes x {threads_per_fit} threads (CPU budget {cpus})"
+    )
+    with deferred_interrupt() as interrupted, ProcessPoolExecutor(
+        max_workers=workers, initializer=init_worker, initargs=(pools,)
+    ) as pool:
+        queue = iter(pending)
+        running = {}
+        while True:
+            # after Ctrl+C nothing new is submitted; the running folds finish and are logged
+            for trial, fold in (() if interrupted.is_set() else queue):
+                if trial in log.pruned:
+                    continue
+                train_idx, valid_idx = splits[fold]
+                future = pool.submit(run_fold, trial, trials[trial], fold, train_idx, valid_idx, threads_per_fit)
+                running[future] = (trial, fold)
+                if len(running) >= 2 * workers:
+                    break
+            if interrupted.is_set():
+                for future in list(running):
+                    if future.cancel():
+                        del running[future]
+            if not running:
+                break
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                trial, fold = running.pop(future)
+                if trial in log.pruned:
+                    continue
+                record = future.result()
+                log.append(record)
+                best = best_summary()
+                if best is not None and best["trial"] != trial and record["rmse"] > best["folds"][fold]["rmse"] * PRUNE_RATIO:
+                    log.append({"trial": trial, "pruned": True, "fold": fold, "rmse": record["rmse"]})
+                    logger.info(
+                        f"Trial {trial} pruned: fold {fold} RMSE {record['rmse']:.0f}, "
+                        f"{best['folds'][fold]['rmse']:.0f} for the best trial {best['trial']}"
+                    )
+                    for other, (other_trial, _) in list(running.items()):
+                        if other_trial == trial and other.cancel():
+                            del running[other]
+                elif (summary := log.summary(trial, n_folds)) is not None:
+                    logger.info(
+                        f"Trial {trial} {trials[trial]}: CV RMSE {summary['cv_rmse']:.0f} ± {summary['cv_rmse_std']:.0f}, "
+                        f"R2 {summary['cv_r2']:.4f}, {summary['best_iteration']:.0f} iterations"
+                    )
+
+    best = best_summary()
+    if best is None:
+        raise RuntimeError("No trial finished all folds")
+    logger.info(f"Best trial {best['trial']} {best['params']}: CV RMSE {best['cv_rmse']:.2f}, MAE {best['cv_mae']:.2f}, R2 {best['cv_r2']:.4f}")
+    model = CatBoostRegressor(
+        **{name: value for name, value in best["params"].items() if name != "border_count"},
+        iterations=max(1, round(best["best_iteration"]) + 1),
+        random_state=RANDOM_STATE,
+        thread_count=cpus,
+        allow_writing_files=False,
+        verbose=0,
+    )
+    model.fit(pools[best["params"]["border_count"]])
+    return model, best